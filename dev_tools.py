@@ -5,6 +5,7 @@ import io
 import os
 import shutil
 import subprocess
+import timeit
 import zipfile
 
 import click
@@ -132,5 +133,174 @@ def autoformat(files):
     subprocess.call(('isort', '--virtual-env', venv_path, '-rc') + files)
 
 
+@cli.group()
+def benchmark():
+    """Micro benchmarks of performance sensitive code paths"""
+
+
+def _report(name, seconds, baseline=None):
+    line = '%-40s %10.2f ms' % (name, seconds * 1000)
+    if baseline:
+        line += '  (%.1fx)' % (baseline / seconds)
+    click.echo(line)
+
+
+@benchmark.command()
+@click.option('--entries', 'amount', default=20000, help='Amount of entries in the synthetic task')
+@click.option('--plugins', default=20, help='Amount of filter plugins counting the entries')
+def entries(amount, plugins):
+    """Counting and iterating entries of a task by state"""
+    from flexget.entry import Entry
+    from flexget.task import EntryContainer
+
+    def make_container():
+        container = EntryContainer(
+            Entry(title='Entry %s' % i, url='http://localhost/%s' % i) for i in range(amount)
+        )
+        for i, entry in enumerate(container):
+            if i % 3 == 0:
+                entry.accept()
+            elif i % 3 == 1:
+                entry.reject()
+        return container
+
+    container = make_container()
+
+    def scan():
+        # How the views were counted before the container tracked entry states
+        for _ in range(plugins):
+            for states in (('accepted',), ('rejected',), ('undecided', 'accepted')):
+                sum(1 for e in container if e._state in states)
+
+    def indexed():
+        for _ in range(plugins):
+            for view in (container.accepted, container.rejected, container.entries):
+                len(view)
+
+    def iterate():
+        for _ in range(plugins):
+            for _ in container.accepted:
+                pass
+
+    click.echo('%s entries, %s plugins' % (amount, plugins))
+    baseline = min(timeit.repeat(scan, number=1, repeat=3))
+    _report('count by scanning', baseline)
+    _report('count from state index', min(timeit.repeat(indexed, number=1, repeat=3)), baseline)
+    _report('iterate accepted', min(timeit.repeat(iterate, number=1, repeat=3)))
+    _report('build and decide task', min(timeit.repeat(make_container, number=1, repeat=3)))
+
+
+@benchmark.command()
+@click.option('--tasks', default=150, help='Amount of tasks in the synthetic config')
+@click.option('--runs', default=3, help='How many times every task is executed')
+def phases(tasks, runs):
+    """Dispatching plugins and plugin events of task phases"""
+    import random
+
+    from flexget import logger, plugin
+    from flexget.event import event, fire_event, get_events
+
+    logger.initialize(True)
+    plugin.load_plugins()
+    random.seed(0)
+    names = sorted(p.name for p in plugin.get_plugins(interface='task') if not p.builtin)
+    configs = [dict.fromkeys(random.sample(names, 8)) for _ in range(tasks)]
+
+    # Handlers doing nothing, as many as the real plugin events have
+    for name in ('before_plugin', 'after_plugin'):
+        for handler in get_events('task.execute.%s' % name):
+            event('benchmark.%s' % name, priority=handler.priority)(lambda *args: None)
+
+    def dispatch(get_phase_plugins, fire):
+        for _ in range(runs):
+            for config in configs:
+                for phase in plugin.task_phases:
+                    for p in get_phase_plugins(phase):
+                        if p.name in config or p.builtin:
+                            fire('benchmark.before_plugin', None, p.name)
+                            fire('benchmark.after_plugin', None, p.name)
+
+    def fire_sorted(name, *args):
+        # How events were fired before the handler order was cached
+        for handler in get_events(name):
+            handler(*args)
+
+    def sorted_plugins(phase):
+        # How phase plugins were looked up before the order was cached
+        return sorted(
+            plugin.get_plugins(phase=phase), key=lambda p: p.phase_handlers[phase], reverse=True
+        )
+
+    click.echo('%s tasks, %s runs' % (tasks, runs))
+    baseline = min(
+        timeit.repeat(lambda: dispatch(sorted_plugins, fire_sorted), number=1, repeat=3)
+    )
+    _report('sort plugins and events on every call', baseline)
+    planned = min(
+        timeit.repeat(
+            lambda: dispatch(plugin.get_plugins_by_phase, fire_event), number=1, repeat=3
+        )
+    )
+    _report('precomputed phase and event order', planned, baseline)
+
+
+@benchmark.command()
+@click.argument('files', nargs=-1)
+@click.option(
+    '--strainer', default='table', help='Tag name to limit parsing to, for the parse_only runs'
+)
+def soup(files, strainer):
+    """Parsing html pages with each available parser
+
+    Pages are read from FILES, or from the responses saved in the test cassettes if no files are given.
+    """
+    import glob
+
+    import yaml
+    from bs4 import FeatureNotFound, SoupStrainer
+
+    from flexget.utils.soup import PARSERS, get_soup
+
+    pages = []
+    if files:
+        for name in files:
+            with io.open(name, 'rb') as f:
+                pages.append(f.read())
+    else:
+        for name in glob.glob('flexget/tests/cassettes/*'):
+            try:
+                with io.open(name, encoding='utf-8') as f:
+                    cassette = yaml.load(f, Loader=yaml.Loader)
+            except (yaml.YAMLError, UnicodeDecodeError):
+                continue
+            for interaction in cassette.get('interactions', []):
+                body = interaction['response']['body'].get('string')
+                if isinstance(body, str) and '<html' in body[:1000].lower():
+                    pages.append(body)
+    if not pages:
+        raise click.ClickException('No html pages found')
+
+    click.echo('%s pages, %s kB' % (len(pages), sum(len(p) for p in pages) // 1024))
+    baseline = None
+    for parser in PARSERS:
+        for parse_only in (None, SoupStrainer(strainer)):
+            if parse_only is not None and parser == 'html5lib':
+                continue
+            name = '%s%s' % (parser, ' (parse only <%s>)' % strainer if parse_only else '')
+            try:
+                took = min(
+                    timeit.repeat(
+                        lambda: [get_soup(p, parser, parse_only=parse_only) for p in pages],
+                        number=1,
+                        repeat=3,
+                    )
+                )
+            except FeatureNotFound:
+                click.echo('%-40s not installed' % name)
+                continue
+            _report(name, took, baseline)
+            baseline = baseline or took
+
+
 if __name__ == '__main__':
     cli()
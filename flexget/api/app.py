@@ -1,23 +1,31 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import base64
+import binascii
 import json
 import logging
 import os
 import re
+import zlib
 from collections import deque
+from datetime import datetime
 from functools import wraps, partial
 
-from flask import Flask, request, jsonify, make_response
+from flask import Flask, Response, request, jsonify, make_response, stream_with_context
+from flask import json as flask_json
 from flask_compress import Compress
 from flask_cors import CORS
-from flask_restplus import Api as RestPlusAPI, Resource
+from flask_restplus import Api as RestPlusAPI, Resource, inputs
 from jsonschema import RefResolutionError
+from sqlalchemy import and_, or_
 from werkzeug.http import generate_etag
+from werkzeug.urls import url_encode
 
 from flexget import manager
 from flexget.config_schema import process_config, format_checker
 from flexget.utils.database import with_session
+from flexget.utils.tools import TimedDict
 from flexget.webserver import User
 from . import __path__
 
@@ -145,7 +153,9 @@ class API(RestPlusAPI):
             pass
         return self.doc(responses={code_or_apierror: (description, model)}, **kwargs)
 
-    def pagination_parser(self, parser=None, sort_choices=None, default=None, add_sort=None):
+    def pagination_parser(
+        self, parser=None, sort_choices=None, default=None, add_sort=None, keyset=False
+    ):
         """
         Return a standardized pagination parser, to be used for any endpoint that has pagination.
 
@@ -153,6 +163,8 @@ class API(RestPlusAPI):
         :param tuple sort_choices: A tuple of strings, to be used as server side attribute searches
         :param str default: The default sort string, used `sort_choices[0]` if not given
         :param bool add_sort: Add sort order choices without adding specific sort choices
+        :param bool keyset: Add the `cursor` and `estimate_count` arguments, for endpoints supporting
+            keyset pagination. See :func:`keyset_page`.
 
         :return: An api.parser() instance with pagination and sorting arguments.
         """
@@ -170,6 +182,20 @@ class API(RestPlusAPI):
                 default=default or sort_choices[0],
                 help='Sort by attribute',
             )
+        if keyset:
+            pagination.add_argument(
+                'cursor',
+                help='Continue after the position given by the `next` link of the previous '
+                'page, page number is ignored. Send an empty cursor to get the first page. '
+                'Responses are streamed and do not contain the total count unless '
+                '`estimate_count` is set',
+            )
+            pagination.add_argument(
+                'estimate_count',
+                type=inputs.boolean,
+                default=False,
+                help='Allow the total count to be served from a short lived cache',
+            )
 
         return pagination
 
@@ -180,7 +206,7 @@ api_app.config['DEBUG'] = True
 api_app.config['ERROR_404_HELP'] = False
 api_app.url_map.strict_slashes = False
 
-CORS(api_app, expose_headers='Link, Total-Count, Count, ETag')
+CORS(api_app, expose_headers='Link, Total-Count, Count, ETag, Next-Cursor')
 Compress(api_app)
 
 api = API(
@@ -367,6 +393,9 @@ def etag(method=None, cache_age=0):
         assert request.method in ['HEAD', 'GET'], '@etag is only supported for GET requests'
         rv = method(*args, **kwargs)
         rv = make_response(rv)
+        # Streamed responses cannot be hashed without consuming them
+        if rv.is_streamed:
+            return rv
 
         # Some headers can change without data change for specific page
         content_headers = (
@@ -431,3 +460,181 @@ def pagination_headers(total_pages, total_items, page_count, request):
     link_string += LINKTEMPLATE.format(total_pages, 'last')
 
     return {'Link': link_string, 'Total-Count': total_items, 'Count': page_count}
+
+
+# Counts of queries, keyed by their statement and parameters
+_count_cache = TimedDict(cache_time='1 minute')
+
+
+def count_query(query, estimate=False):
+    """
+    Returns the number of rows `query` would return.
+
+    :param query: SQLAlchemy query
+    :param bool estimate: If True, a count up to a minute old may be returned for the same query
+    """
+    if not estimate:
+        return query.count()
+    statement = query.statement.compile()
+    key = (str(statement), repr(sorted(statement.params.items())))
+    count = _count_cache.get(key)
+    if count is None:
+        count = _count_cache[key] = query.count()
+    return count
+
+
+def encode_cursor(value, item_id):
+    """Encodes the sort value and id of the last item of a page into an opaque cursor string."""
+    data = {'id': item_id, 'value': value}
+    if isinstance(value, datetime):
+        data['value'] = value.strftime('%Y-%m-%dT%H:%M:%S.%f')
+        data['type'] = 'datetime'
+    return base64.urlsafe_b64encode(json.dumps(data).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Decodes a cursor created by :func:`encode_cursor`.
+
+    :return: Tuple of sort value and id
+    :raises BadRequest: If cursor is not valid
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        value = data['value']
+        if data.get('type') == 'datetime':
+            value = datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%f')
+        return value, data['id']
+    except (ValueError, TypeError, KeyError, binascii.Error, UnicodeError):
+        raise BadRequest('invalid cursor `%s`' % cursor)
+
+
+def keyset_query(query, sort_column, id_column, descending, cursor=None):
+    """
+    Returns `query` ordered by `sort_column`, using the unique `id_column` to break ties, and starting after the item
+    given by `cursor`. Sort column must not contain nulls.
+
+    :param query: SQLAlchemy query of a single mapped class
+    :param sort_column: Mapped attribute to sort by
+    :param id_column: Mapped primary key attribute
+    :param bool descending: Sort order
+    :param str cursor: Cursor of the previous page, see :func:`keyset_page`
+    """
+    if cursor:
+        value, last_id = decode_cursor(cursor)
+        if descending:
+            query = query.filter(
+                or_(sort_column < value, and_(sort_column == value, id_column < last_id))
+            )
+        else:
+            query = query.filter(
+                or_(sort_column > value, and_(sort_column == value, id_column > last_id))
+            )
+    if descending:
+        return query.order_by(sort_column.desc(), id_column.desc())
+    return query.order_by(sort_column, id_column)
+
+
+def keyset_page(query, sort_column, id_column, descending, per_page, cursor=None):
+    """
+    Returns one page of `query` ordered by `sort_column`, using the unique `id_column` to break ties.
+
+    Unlike offset slicing, the position in the results is given by the values of the last item of previous page, so
+    deep pages are as fast as the first one when the sort column is indexed. Sort column must not contain nulls.
+
+    :param query: SQLAlchemy query of a single mapped class
+    :param sort_column: Mapped attribute to sort by
+    :param id_column: Mapped primary key attribute
+    :param bool descending: Sort order
+    :param int per_page: Maximum number of items to return
+    :param str cursor: Cursor of the previous page, as returned from this function
+    :return: Tuple of the list of items and the cursor of next page, or None if this is the last page
+    """
+    query = keyset_query(query, sort_column, id_column, descending, cursor)
+    items = query.limit(per_page + 1).all()
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return items, next_cursor
+
+
+def cursor_headers(next_cursor, page_count, request, total_items=None):
+    """
+    Creates the `Link`, `Next-Cursor`, `Count` and optionally `Total-Count` headers for keyset pagination.
+
+    :param next_cursor: Cursor of the next page or None if there are no more pages
+    :param page_count: Item count for page
+    :param request: The flask request used
+    :param total_items: Total number of items, if known
+    """
+    headers = {'Count': page_count}
+    if next_cursor:
+        url = request.url_root + request.path.lstrip('/')
+        args = request.args.copy()
+        args['cursor'] = next_cursor
+        args.pop('page', None)
+        headers['Link'] = '<{}?{}>; rel="next"'.format(url, url_encode(args))
+        headers['Next-Cursor'] = next_cursor
+    if total_items is not None:
+        headers['Total-Count'] = total_items
+    return headers
+
+
+def stream_json_list(items):
+    """
+    Creates a streamed response of a JSON array, encoding one item at a time instead of building the whole document
+    in memory. Items must be fully loaded, since the database session is closed by the time the response is sent.
+
+    :param items: Iterable of JSON serializable objects
+    """
+    gzip = 'gzip' in request.headers.get('Accept-Encoding', '').lower()
+
+    def generate():
+        compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16) if gzip else None
+        chunks = ['[']
+        for index, item in enumerate(items):
+            if index:
+                chunks.append(',')
+            chunks.append(flask_json.dumps(item))
+            if len(chunks) >= 50:
+                data = ''.join(chunks).encode('utf-8')
+                chunks = []
+                yield compressor.compress(data) if compressor else data
+        chunks.append(']')
+        data = ''.join(chunks).encode('utf-8')
+        if compressor:
+            yield compressor.compress(data) + compressor.flush()
+        else:
+            yield data
+
+    rsp = Response(stream_with_context(generate()), mimetype='application/json')
+    if gzip:
+        # Compressed while streaming, so the compress extension leaves it alone
+        rsp.headers['Content-Encoding'] = 'gzip'
+        rsp.headers['Vary'] = 'Accept-Encoding'
+    return rsp
+
+
+def keyset_response(query, sort_column, id_column, args, per_page, serializer=None):
+    """
+    Creates a streamed response of one page of `query`, for endpoints using :meth:`API.pagination_parser` with
+    `keyset` enabled. The page is loaded and serialized in the session of the request, so the items always match the
+    cursor of the next page.
+
+    :param query: SQLAlchemy query of a single mapped class
+    :param sort_column: Mapped attribute to sort by
+    :param id_column: Mapped primary key attribute
+    :param args: Parsed pagination arguments
+    :param int per_page: Maximum number of items to return
+    :param serializer: Function to convert an item to a JSON serializable object, uses `to_dict` by default
+    """
+    total_items = count_query(query, estimate=True) if args['estimate_count'] else None
+    items, next_cursor = keyset_page(
+        query, sort_column, id_column, args['order'] == 'desc', per_page, args['cursor']
+    )
+    serializer = serializer or (lambda item: item.to_dict())
+    rsp = stream_json_list([serializer(item) for item in items])
+    rsp.headers.extend(cursor_headers(next_cursor, len(items), request, total_items))
+    return rsp
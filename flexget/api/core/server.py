@@ -3,12 +3,14 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 import copy
 
 import base64
+import calendar
 
 import os
 import json
 import sys
 import logging
 import threading
+import time
 import traceback
 from time import sleep
 from path import Path
@@ -16,6 +18,7 @@ import binascii
 import cherrypy
 import yaml
 from flask import Response, jsonify, request
+from flask_restplus import inputs
 from flexget.utils.tools import get_latest_flexget_version_number
 from pyparsing import (
     Word,
@@ -33,6 +36,7 @@ from pyparsing import (
 from pyparsing import nums, alphanums, printables
 from yaml.error import YAMLError
 
+from flexget import logger
 from flexget._version import __version__
 from flexget.api import api, APIResource
 from flexget.api.app import (
@@ -296,6 +300,19 @@ server_log_parser.add_argument(
     'lines', type=int, default=200, help='How many lines to find before streaming'
 )
 server_log_parser.add_argument('search', help='Search filter support google like syntax')
+server_log_parser.add_argument(
+    'level',
+    choices=('trace', 'debug', 'verbose', 'info', 'warning', 'error', 'critical'),
+    help='Only return messages of this level or higher',
+)
+server_log_parser.add_argument('task', help='Only return messages logged by this task')
+server_log_parser.add_argument('plugin', help='Only return messages logged by this plugin')
+server_log_parser.add_argument(
+    'since', type=inputs.datetime_from_iso8601, help='Only return messages logged since this time'
+)
+server_log_parser.add_argument(
+    'until', type=inputs.datetime_from_iso8601, help='Only return messages logged before this time'
+)
 
 
 def reverse_readline(fh, start_byte=0, buf_size=8192):
@@ -343,6 +360,27 @@ def file_inode(filename):
             os.close(fd)
 
 
+def log_filters(args):
+    """Converts the filter arguments of the log endpoint to :func:`flexget.logger.search_structured_log` filters"""
+    filters = {}
+    if args.get('level'):
+        filters['min_level'] = logger.get_level_no(args['level'])
+    for key in ('task', 'plugin'):
+        if args.get(key):
+            filters[key] = args[key]
+    for key in ('since', 'until'):
+        if args.get(key):
+            filters[key] = timestamp(args[key])
+    return filters
+
+
+def timestamp(dt):
+    """Converts `dt` to a unix timestamp. Naive datetimes are in local time."""
+    if dt.tzinfo is None:
+        return time.mktime(dt.timetuple())
+    return calendar.timegm(dt.utctimetuple())
+
+
 @server_api.route('/log/')
 class ServerLogAPI(APIResource):
     @api.doc(parser=server_log_parser)
@@ -351,19 +389,93 @@ class ServerLogAPI(APIResource):
         """ Stream Flexget log Streams as line delimited JSON """
         args = server_log_parser.parse_args()
 
+        if os.path.isabs(self.manager.options.logfile):
+            base_log_file = self.manager.options.logfile
+        else:
+            base_log_file = os.path.join(self.manager.config_base, self.manager.options.logfile)
+        structured_log_file = base_log_file + logger.STRUCTURED_SUFFIX
+
+        def follow_structured(lines, search, filters):
+            log_parser = LogParser(search)
+
+            def matcher(record):
+                return log_parser.matches(
+                    ' '.join(
+                        record.get(key) or ''
+                        for key in ('timestamp', 'log_level', 'plugin', 'task', 'message')
+                    )
+                )
+
+            def serialize(record):
+                return json.dumps(
+                    {
+                        key: record.get(key, '')
+                        for key in ('timestamp', 'log_level', 'plugin', 'task', 'message')
+                    }
+                )
+
+            yield '{"stream": ['  # Start of the json stream
+
+            # Blocks which cannot match the filters are skipped using the index of the log
+            records, stream_from_byte = logger.search_structured_log(
+                structured_log_file, lines, matcher=matcher, **filters
+            )
+            for record in records:
+                yield serialize(record) + ',\n'
+
+            # Nothing logged after `until` can match, no point in following the log
+            keep_following = 'until' not in filters
+            current_inode = file_inode(structured_log_file)
+
+            while keep_following:
+                # If the server is shutting down then end the stream nicely
+                if cherrypy.engine.state != cherrypy.engine.states.STARTED:
+                    break
+
+                new_inode = file_inode(structured_log_file)
+                if current_inode != new_inode:
+                    # File rotated. Read from beginning
+                    stream_from_byte = 0
+                    current_inode = new_inode
+
+                try:
+                    with open(structured_log_file, 'rb') as fh:
+                        fh.seek(stream_from_byte)
+                        data = fh.read()
+                except IOError:
+                    yield '{}'
+                    continue
+
+                # Only consume complete lines, the rest is read again on next round
+                data = data[: data.rfind(b'\n') + 1]
+                stream_from_byte += len(data)
+                matched = [
+                    record
+                    for record in logger.parse_structured_lines(data)
+                    if logger.record_matches(record, **filters) and matcher(record)
+                ]
+                if not matched:
+                    # If no match then delay to prevent many read hits on the file
+                    sleep(2)
+                    yield '{},\n'
+                for record in matched:
+                    yield serialize(record) + ',\n'
+
+            yield '{}]}'  # End of stream
+
+        # A structured log left from when it was enabled is no longer up to date
+        if logger.structured_log_enabled() and os.path.isfile(structured_log_file):
+            return Response(
+                follow_structured(args['lines'], args['search'], log_filters(args)),
+                mimetype='text/event-stream',
+            )
+
         def follow(lines, search):
             log_parser = LogParser(search)
             stream_from_byte = 0
 
             lines_found = []
 
-            if os.path.isabs(self.manager.options.logfile):
-                base_log_file = self.manager.options.logfile
-            else:
-                base_log_file = os.path.join(
-                    self.manager.config_base, self.manager.options.logfile
-                )
-
             yield '{"stream": ['  # Start of the json stream
 
             # Read back in the logs until we find enough lines
@@ -4,9 +4,12 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 import argparse
 import cgi
 import copy
+import threading
+from collections import deque
 from datetime import datetime, timedelta
 from json import JSONEncoder
 
+import cherrypy
 from flask import jsonify, Response, request
 from flask_restplus import inputs
 from queue import Queue, Empty
@@ -382,6 +385,91 @@ class TaskQueueAPI(APIResource):
         return jsonify(tasks)
 
 
+class EventBroadcast(object):
+    """
+    Keeps the latest published events in a ring buffer for any number of listeners.
+
+    Publishing only appends to the buffer and wakes up waiting listeners, so the cost for the publisher does not
+    depend on the amount of listeners. Events are serialized once, when published.
+    """
+
+    def __init__(self, maxlen=200):
+        self._events = deque(maxlen=maxlen)
+        self._last_id = 0
+        self._condition = threading.Condition()
+
+    def publish(self, event_type, data):
+        with self._condition:
+            self._last_id += 1
+            self._events.append((self._last_id, event_type, json.dumps(data)))
+            self._condition.notify_all()
+
+    @property
+    def last_id(self):
+        return self._last_id
+
+    def events_after(self, event_id, timeout=None):
+        """
+        Returns events published after `event_id`, waiting up to `timeout` seconds for one if there are none.
+
+        :return: List of (id, type, serialized data) tuples
+        """
+        with self._condition:
+            if self._last_id <= event_id and timeout:
+                self._condition.wait(timeout)
+            return [e for e in self._events if e[0] > event_id]
+
+
+telemetry_events = EventBroadcast()
+
+
+@event('task.execute.telemetry')
+def publish_telemetry(task, data):
+    telemetry_events.publish('telemetry', data)
+
+
+telemetry_parser = api.parser()
+telemetry_parser.add_argument(
+    'history',
+    type=inputs.boolean,
+    default=False,
+    help='Start with recently published events, instead of only new ones',
+)
+
+
+@tasks_api.route('/telemetry/')
+@api.doc(
+    description='Server-sent events with statistics of running tasks, sent at start, after each '
+    'phase and at the end of an execution. Supports resuming with the `Last-Event-ID` header.'
+)
+class TaskTelemetryAPI(APIResource):
+    @api.doc(parser=telemetry_parser)
+    @api.response(200, description='Streams as server-sent events')
+    def get(self, session=None):
+        """ Stream task execution statistics """
+        args = telemetry_parser.parse_args()
+        last_id = request.headers.get('Last-Event-ID', type=int)
+        if last_id is None:
+            last_id = 0 if args['history'] else telemetry_events.last_id
+
+        def stream(last_id):
+            yield 'retry: 5000\n\n'
+            while True:
+                events = telemetry_events.events_after(last_id, timeout=15)
+                for event_id, event_type, data in events:
+                    last_id = event_id
+                    yield 'id: %s\nevent: %s\ndata: %s\n\n' % (event_id, event_type, data)
+                # If the server is shutting down then end the stream
+                if cherrypy.engine.state != cherrypy.engine.states.STARTED:
+                    break
+                if not events:
+                    yield ': keepalive\n\n'
+
+        rsp = Response(stream(last_id), mimetype='text/event-stream')
+        rsp.headers['Cache-Control'] = 'no-cache'
+        return rsp
+
+
 class ExecuteLog(Queue):
     """ Supports task log streaming by acting like a file object """
 
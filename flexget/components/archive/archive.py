@@ -3,11 +3,17 @@ from __future__ import unicode_literals, division, absolute_import
 import logging
 import re
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+from collections import OrderedDict
+from datetime import datetime
+
+from sqlalchemy.orm import selectinload
 
 from flexget import plugin
 from flexget.entry import Entry
 from flexget.event import event
 from flexget.manager import Session
+from flexget.utils.database import bulk_insert, prefetch
+from flexget.utils.tools import chunked
 from . import db
 
 log = logging.getLogger('archive')
@@ -31,54 +37,72 @@ class Archive(object):
         else:
             tag_names = config
 
+        # Entries are archived once per title and url, even if they are in several of those lists
+        entries = OrderedDict()
+        for entry in task.entries + task.rejected + task.failed:
+            entries.setdefault((entry['title'], entry['url']), entry)
+
+        if not entries:
+            return
+
         tags = []
         for tag_name in set(tag_names):
             tags.append(db.get_tag(tag_name, task.session))
-
-        count = 0
-        processed = []
-        for entry in task.entries + task.rejected + task.failed:
-            # I think entry can be in multiple of those lists .. not sure though!
-            if entry in processed:
-                continue
-            else:
-                processed.append(entry)
-
-            ae = (
-                task.session.query(db.ArchiveEntry)
-                .filter(db.ArchiveEntry.title == entry['title'])
-                .filter(db.ArchiveEntry.url == entry['url'])
-                .first()
-            )
+        source = db.get_source(task.name, task.session)
+        # New archive entries are linked to the source and tags by id
+        task.session.add(source)
+        task.session.add_all(tags)
+        task.session.flush()
+
+        # Look up all the already archived entries at once
+        query = task.session.query(db.ArchiveEntry).options(
+            selectinload(db.ArchiveEntry.sources), selectinload(db.ArchiveEntry.tags)
+        )
+        archived = {}
+        for ae in prefetch(query, db.ArchiveEntry.title, [title for title, _ in entries]):
+            archived.setdefault((ae.title, ae.url), ae)
+
+        now = datetime.now()
+        new_entries = []
+        for (title, url), entry in entries.items():
+            ae = archived.get((title, url))
             if ae:
                 # add (missing) sources
-                source = db.get_source(task.name, task.session)
                 if source not in ae.sources:
                     log.debug('Adding `%s` into `%s` sources' % (task.name, ae))
                     ae.sources.append(source)
                 # add (missing) tags
-                for tag_name in tag_names:
-                    atag = db.get_tag(tag_name, task.session)
+                for atag in tags:
                     if atag not in ae.tags:
-                        log.debug('Adding tag %s into %s' % (tag_name, ae))
+                        log.debug('Adding tag %s into %s' % (atag.name, ae))
                         ae.tags.append(atag)
             else:
                 # create new archive entry
-                ae = db.ArchiveEntry()
-                ae.title = entry['title']
-                ae.url = entry['url']
-                if 'description' in entry:
-                    ae.description = entry['description']
-                ae.task = task.name
-                ae.sources.append(db.get_source(task.name, task.session))
-                if tags:
-                    # note, we're extending empty list
-                    ae.tags.extend(tags)
-                log.debug('Adding `%s` with %i tags to archive' % (ae, len(tags)))
-                task.session.add(ae)
-                count += 1
-        if count:
-            log.verbose('Added %i new entries to archive' % count)
+                log.debug('Adding `%s` with %i tags to archive' % (title, len(tags)))
+                new_entries.append(
+                    {
+                        'title': title,
+                        'url': url,
+                        'description': entry.get('description'),
+                        'task': task.name,
+                        'added': now,
+                    }
+                )
+        if not new_entries:
+            return
+        # The generated ids of the new archive entries are needed to link their sources and tags
+        bulk_insert(task.session, db.ArchiveEntry, new_entries, return_defaults=True)
+        source_links = [{'entry_id': ae['id'], 'source_id': source.id} for ae in new_entries]
+        tag_links = [
+            {'entry_id': ae['id'], 'tag_id': atag.id} for ae in new_entries for atag in tags
+        ]
+        for table, links in (
+            (db.archive_sources_table, source_links),
+            (db.archive_tags_table, tag_links),
+        ):
+            for chunk in chunked(links):
+                task.session.execute(table.insert(), chunk)
+        log.verbose('Added %i new entries to archive' % len(new_entries))
 
     def on_task_abort(self, task, config):
         """
@@ -1,6 +1,7 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+from collections import OrderedDict
 from datetime import datetime
 
 from sqlalchemy import Index
@@ -9,7 +10,7 @@ from flexget import plugin
 from flexget.components.backlog.db import log, BacklogEntry, get_entries, clear_entries
 from flexget.event import event
 from flexget.manager import Session
-from flexget.utils.database import with_session
+from flexget.utils.database import with_session, bulk_insert, dump_entry, prefetch
 from flexget.utils.tools import parse_timedelta
 
 
@@ -63,40 +64,55 @@ class InputBacklog(object):
         """Add single entry to task backlog
 
         If :amount: is not specified, entry will only be injected on next execution."""
-        snapshot = entry.snapshots.get('after_input')
-        if not snapshot:
-            if task.current_phase != 'input':
-                # Not having a snapshot is normal during input phase, don't display a warning
-                log.warning(
-                    'No input snapshot available for `%s`, using current state' % entry['title']
-                )
-            snapshot = entry
+        self.add_backlog_entries(task, [entry], amount, session=session)
+
+    @with_session
+    def add_backlog_entries(self, task, entries, amount='', session=None):
+        """Add entries to task backlog, with one lookup and insert for all of them rather than for each entry
+
+        If :amount: is not specified, entries will only be injected on next execution."""
         expire_time = datetime.now() + parse_timedelta(amount)
-        backlog_entry = (
-            session.query(BacklogEntry)
-            .filter(BacklogEntry.title == entry['title'])
-            .filter(BacklogEntry.task == task.name)
-            .first()
-        )
-        if backlog_entry:
-            # If there is already a backlog entry for this, update the expiry time if necessary.
-            if backlog_entry.expire < expire_time:
-                log.debug('Updating expiry time for %s' % entry['title'])
-                backlog_entry.expire = expire_time
-        else:
-            log.debug('Saving %s' % entry['title'])
-            backlog_entry = BacklogEntry()
-            backlog_entry.title = entry['title']
-            backlog_entry.entry = snapshot
-            backlog_entry.task = task.name
-            backlog_entry.expire = expire_time
-            session.add(backlog_entry)
+        # Backlog entries are unique by title within a task
+        entries_by_title = OrderedDict()
+        for entry in entries:
+            entries_by_title.setdefault(entry['title'], entry)
+        query = session.query(BacklogEntry).filter(BacklogEntry.task == task.name)
+        backlog_entries = {}
+        for backlog_entry in prefetch(query, BacklogEntry.title, list(entries_by_title)):
+            backlog_entries.setdefault(backlog_entry.title, backlog_entry)
+
+        new_entries = []
+        for title, entry in entries_by_title.items():
+            backlog_entry = backlog_entries.get(title)
+            if backlog_entry:
+                # If there is already a backlog entry for this, update the expiry time if necessary.
+                if backlog_entry.expire < expire_time:
+                    log.debug('Updating expiry time for %s' % title)
+                    backlog_entry.expire = expire_time
+                continue
+            snapshot = entry.snapshots.get('after_input')
+            if not snapshot:
+                if task.current_phase != 'input':
+                    # Not having a snapshot is normal during input phase, don't display a warning
+                    log.warning(
+                        'No input snapshot available for `%s`, using current state' % title
+                    )
+                snapshot = entry
+            log.debug('Saving %s' % title)
+            new_entries.append(
+                {
+                    'task': task.name,
+                    'title': title,
+                    'expire': expire_time,
+                    '_json': dump_entry(snapshot),
+                }
+            )
+        bulk_insert(session, BacklogEntry, new_entries)
 
     def learn_backlog(self, task, amount=''):
         """Learn current entries into backlog. All task inputs must have been executed."""
         with Session() as session:
-            for entry in task.entries:
-                self.add_backlog(task, entry, amount, session=session)
+            self.add_backlog_entries(task, task.entries, amount, session=session)
 
     @with_session
     def get_injections(self, task, session=None):
@@ -3,12 +3,13 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 from future.moves.urllib.parse import urlparse, urlsplit, urlunsplit, quote
 from future.moves.urllib.error import URLError
 
-import itertools
 import logging
 import threading
+import time
 import socket
 import struct
 import binascii
+from collections import OrderedDict
 from random import randrange
 from http.client import BadStatusLine
 from requests import RequestException
@@ -17,45 +18,37 @@ from flexget import plugin
 from flexget.event import event
 from flexget.utils import requests
 from flexget.utils.bittorrent import bdecode
+from flexget.utils.tools import TimedDict, chunked, parallel_map
 
 log = logging.getLogger('torrent_alive')
 
 
-class TorrentAliveThread(threading.Thread):
-    _counter = itertools.count()
+# Number of trackers scraped at the same time
+MAX_WORKERS = 10
+# Maximum info hashes in a single scrape request. UDP packets fit 74, HTTP is limited by the url length
+UDP_SCRAPE_MAX = 74
+HTTP_SCRAPE_MAX = 50
+# Seconds a UDP connection id may be used for, clients are allowed one minute
+UDP_CONNECTION_TTL = 60
+UDP_PROTOCOL_ID = 0x41727101980
+UDP_ACTION_CONNECT = 0
+UDP_ACTION_SCRAPE = 2
+UDP_ACTION_ERROR = 3
 
-    def __init__(self, tracker, info_hash):
-        threading.Thread.__init__(self, name='torrent_alive-%d' % next(self._counter))
-        self.tracker = tracker
-        self.info_hash = info_hash
-        self.tracker_seeds = 0
-
-    def run(self):
-        self.tracker_seeds = get_tracker_seeds(self.tracker, self.info_hash)
-        log.debug(
-            '%s seeds found from %s',
-            self.tracker_seeds,
-            get_scrape_url(self.tracker, self.info_hash),
-        )
+# Seeds found for (tracker, info hash), so reruns and tasks sharing torrents do not scrape again right away
+scrape_cache = TimedDict('5 minutes')
+_scrape_cache_lock = threading.Lock()
+# UDP connection ids and the time they were obtained, by tracker (host, port)
+_udp_connections = {}
+_udp_connections_lock = threading.Lock()
 
 
-def max_seeds_from_threads(threads):
+def get_scrape_url(tracker_url, info_hash):
     """
-    Joins the threads and returns the maximum seeds found from any of them.
+    Returns the scrape url of a tracker.
 
-    :param threads: A list of started `TorrentAliveThread`
-    :return: Maximum seeds found from any of the threads
+    :param info_hash: Info hash, or a list of them to scrape in one request
     """
-    seeds = 0
-    for background in threads:
-        log.debug('Coming up next: %s', background.tracker)
-        background.join()
-        seeds = max(seeds, background.tracker_seeds)
-        log.debug('Current highest number of seeds found: %s', seeds)
-    return seeds
-
-
-def get_scrape_url(tracker_url, info_hash):
     if 'announce' in tracker_url:
         v = urlsplit(tracker_url)
         result = urlunsplit(
@@ -65,109 +58,217 @@ def get_scrape_url(tracker_url, info_hash):
         log.debug('`announce` not contained in tracker url, guessing scrape address.')
         result = tracker_url + '/scrape'
 
+    # Check for a list rather than a string, which may be a native or a future str on python 2
+    info_hashes = info_hash if isinstance(info_hash, (list, tuple)) else [info_hash]
     result += '&' if '?' in result else '?'
-    result += 'info_hash=%s' % quote(binascii.unhexlify(info_hash))
+    result += '&'.join('info_hash=%s' % quote(binascii.unhexlify(h)) for h in info_hashes)
     return result
 
 
-def get_udp_seeds(url, info_hash):
+def get_udp_connection_id(clisocket, address, refresh=False):
+    """Returns a connection id for the tracker at `address`, doing the connect handshake if none is cached."""
+    with _udp_connections_lock:
+        cached = _udp_connections.get(address)
+    if cached and not refresh and time.time() - cached[1] < UDP_CONNECTION_TTL:
+        return cached[0]
+
+    transaction_id = randrange(1, 65535)  # Random Transaction ID creation
+    # build packet with protocol id, using 0 value for action, giving our transaction ID for this packet
+    clisocket.send(struct.pack(b">QLL", UDP_PROTOCOL_ID, UDP_ACTION_CONNECT, transaction_id))
+    # set 16 bytes ["QLL" = 16 bytes] for the fmq for unpack
+    res = clisocket.recv(16)
+    action, res_transaction_id, connection_id = struct.unpack(b">LLQ", res[:16])
+    if action != UDP_ACTION_CONNECT or res_transaction_id != transaction_id:
+        raise IOError('Invalid connect response from tracker')
+    with _udp_connections_lock:
+        _udp_connections[address] = (connection_id, time.time())
+    return connection_id
+
+
+def scrape_udp(url, info_hashes):
+    """
+    Scrapes a UDP tracker for up to :data:`UDP_SCRAPE_MAX` info hashes with a single request.
+
+    :return: Dict of seeds by info hash
+    """
     parsed_url = urlparse(url)
     try:
         port = parsed_url.port
     except ValueError:
         log.error('UDP Port Error, url was %s', url)
-        return 0
+        return {}
 
-    log.debug('Checking for seeds from %s', url)
-
-    connection_id = 0x41727101980  # connection id is always this
-    transaction_id = randrange(1, 65535)  # Random Transaction ID creation
+    log.debug('Checking for seeds of %s torrents from %s', len(info_hashes), url)
 
     if port is None:
         log.error('UDP Port Error, port was None')
-        return 0
+        return {}
 
     if port < 0 or port > 65535:
         log.error('UDP Port Error, port was %s', port)
-        return 0
+        return {}
 
-    # Create the socket
+    address = (parsed_url.hostname, port)
+    # build packet hash out of decoded info_hashes
+    packet_hashes = b''.join(binascii.unhexlify(info_hash) for info_hash in info_hashes)
+    clisocket = None
     try:
         clisocket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         clisocket.settimeout(5.0)
-        clisocket.connect((parsed_url.hostname, port))
-
-        # build packet with connection_ID, using 0 value for action, giving our transaction ID for this packet
-        packet = struct.pack(b">QLL", connection_id, 0, transaction_id)
-        clisocket.send(packet)
-
-        # set 16 bytes ["QLL" = 16 bytes] for the fmq for unpack
-        res = clisocket.recv(16)
-        # check recieved packet for response
-        action, transaction_id, connection_id = struct.unpack(b">LLQ", res)
-
-        # build packet hash out of decoded info_hash
-        packet_hash = binascii.unhexlify(info_hash)
-
-        # construct packet for scrape with decoded info_hash setting action byte to 2 for scape
-        packet = struct.pack(b">QLL", connection_id, 2, transaction_id) + packet_hash
+        clisocket.connect(address)
+
+        for attempt in range(2):
+            # A cached connection id may have been expired by the tracker, get a fresh one on the retry
+            connection_id = get_udp_connection_id(clisocket, address, refresh=attempt > 0)
+            transaction_id = randrange(1, 65535)
+            # construct packet for scrape with decoded info_hashes setting action byte to 2 for scrape
+            packet = struct.pack(b">QLL", connection_id, UDP_ACTION_SCRAPE, transaction_id)
+            clisocket.send(packet + packet_hashes)
+            # set recieve size of 8 + 12 bytes per torrent
+            res = clisocket.recv(8 + 12 * len(info_hashes))
+            action, res_transaction_id = struct.unpack(b">LL", res[:8])
+            # The response may be a late one to an earlier request, whose seeds are for other torrents
+            if res_transaction_id != transaction_id:
+                raise IOError('Scrape response from tracker has the wrong transaction id')
+            if action not in (UDP_ACTION_SCRAPE, UDP_ACTION_ERROR):
+                raise IOError('Invalid scrape response from tracker')
+            # Check for UDP error packet
+            if action != UDP_ACTION_ERROR:
+                break
+        else:
+            log.error('There was a UDP Packet Error 3')
+            return {}
+    except (IOError, struct.error) as e:
+        log.warning('Socket Error: %s', e)
+        return {}
+    finally:
+        if clisocket is not None:
+            clisocket.close()
+
+    # first 8 bytes are followed by seeders, completed and leechers for each requested torrent
+    seeds = {}
+    for index, info_hash in enumerate(info_hashes):
+        offset = 8 + 12 * index
+        if len(res) < offset + 12:
+            break
+        seeders, _, _ = struct.unpack(b">LLL", res[offset : offset + 12])
+        seeds[info_hash] = seeders
+    log.debug('scrape_udp is returning: %s', seeds)
+    return seeds
 
-        clisocket.send(packet)
-        # set recieve size of 8 + 12 bytes
-        res = clisocket.recv(20)
 
-    except IOError as e:
-        log.warning('Socket Error: %s', e)
-        return 0
-    # Check for UDP error packet
-    (action,) = struct.unpack(b">L", res[:4])
-    if action == 3:
-        log.error('There was a UDP Packet Error 3')
-        return 0
+def get_udp_seeds(url, info_hash):
+    return scrape_udp(url, [info_hash]).get(info_hash, 0)
 
-    # first 8 bytes are followed by seeders, completed and leechers for requested torrent
-    seeders, _, _ = struct.unpack(b">LLL", res[8:20])
-    log.debug('get_udp_seeds is returning: %s', seeders)
-    clisocket.close()
-    return seeders
 
+def scrape_http(url, info_hashes):
+    """
+    Scrapes a HTTP tracker for a list of info hashes with a single request.
 
-def get_http_seeds(url, info_hash):
-    url = get_scrape_url(url, info_hash)
+    :return: Dict of seeds by info hash
+    """
+    url = get_scrape_url(url, info_hashes)
     if not url:
         log.debug('if not url is true returning 0')
-        return 0
+        return {}
     log.debug('Checking for seeds from %s', url)
 
     try:
         data = bdecode(requests.get(url).content).get('files')
     except RequestException as e:
         log.debug('Error scraping: %s', e)
-        return 0
+        return {}
     except SyntaxError as e:
         log.warning('Error decoding tracker response: %s', e)
-        return 0
+        return {}
     except BadStatusLine as e:
         log.warning('Error BadStatusLine: %s', e)
-        return 0
+        return {}
     except IOError as e:
         log.warning('Server error: %s', e)
-        return 0
+        return {}
     if not data:
         log.debug('No data received from tracker scrape.')
-        return 0
-    log.debug('get_http_seeds is returning: %s', list(data.values())[0]['complete'])
-    return list(data.values())[0]['complete']
+        return {}
+    requested = dict((info_hash.upper(), info_hash) for info_hash in info_hashes)
+    seeds = {}
+    for key, value in data.items():
+        # Keys are the raw info hashes, decoded to text by bdecode when they happen to be valid utf-8
+        if not isinstance(key, bytes):
+            key = key.encode('utf-8')
+        info_hash = binascii.hexlify(key).decode('ascii').upper()
+        if info_hash in requested:
+            seeds[requested[info_hash]] = value.get('complete', 0)
+    if len(info_hashes) == 1 and len(data) == 1 and not seeds:
+        # Some trackers do not key the response with the requested hash
+        seeds = {info_hashes[0]: list(data.values())[0].get('complete', 0)}
+    log.debug('scrape_http is returning: %s', seeds)
+    return seeds
 
 
-def get_tracker_seeds(url, info_hash):
+def get_http_seeds(url, info_hash):
+    return scrape_http(url, [info_hash]).get(info_hash, 0)
+
+
+def scrape_tracker(url, info_hashes):
+    """
+    Scrapes a tracker for a list of info hashes, with as few requests as the tracker protocol allows.
+
+    :return: Dict of seeds by info hash
+    """
     if url.startswith('udp'):
-        return get_udp_seeds(url, info_hash)
+        scrape, chunk_size = scrape_udp, UDP_SCRAPE_MAX
     elif url.startswith('http'):
-        return get_http_seeds(url, info_hash)
+        scrape, chunk_size = scrape_http, HTTP_SCRAPE_MAX
     else:
         log.warning('There is a problem with the get_tracker_seeds')
-        return 0
+        return {}
+    seeds = {}
+    for chunk in chunked(info_hashes, chunk_size):
+        try:
+            seeds.update(scrape(url, chunk))
+        except URLError as e:
+            log.debug('Error scraping %s: %s', url, e)
+    return seeds
+
+
+def get_tracker_seeds(url, info_hash):
+    return scrape_tracker(url, [info_hash]).get(info_hash, 0)
+
+
+def scrape_trackers(hashes_by_tracker, max_workers=MAX_WORKERS):
+    """
+    Scrapes trackers from a pool of worker threads, each tracker once for all its info hashes. Results found in
+    :data:`scrape_cache` are not requested again.
+
+    :param dict hashes_by_tracker: Lists of info hashes, by tracker url
+    :return: Dict of seeds by (tracker, info hash). Torrents which could not be scraped are missing.
+    """
+    seeds = {}
+    jobs = []
+    with _scrape_cache_lock:
+        for tracker, info_hashes in hashes_by_tracker.items():
+            missing = []
+            for info_hash in info_hashes:
+                key = (tracker, info_hash)
+                if key in scrape_cache:
+                    seeds[key] = scrape_cache[key]
+                else:
+                    missing.append(info_hash)
+            if missing:
+                jobs.append((tracker, missing))
+    log.debug('Scraping %s trackers, %s results were cached', len(jobs), len(seeds))
+
+    def scrape(job):
+        tracker, info_hashes = job
+        return scrape_tracker(tracker, info_hashes)
+
+    results = parallel_map(scrape, jobs, max_workers=max_workers, name='torrent_alive')
+    with _scrape_cache_lock:
+        for (tracker, _), result in zip(jobs, results):
+            for info_hash, tracker_seeds in result.items():
+                scrape_cache[(tracker, info_hash)] = seeds[(tracker, info_hash)] = tracker_seeds
+    return seeds
 
 
 class TorrentAlive(object):
@@ -215,6 +316,9 @@ class TorrentAlive(object):
         config = self.prepare_config(config)
         min_seeds = config['min_seeds']
 
+        # Find the trackers of all torrents first, so each tracker is scraped once for all of them
+        checks = []
+        hashes_by_tracker = OrderedDict()
         for entry in task.accepted:
             # If torrent_seeds is filled, we will have already filtered in filter phase
             if entry.get('torrent_seeds'):
@@ -222,56 +326,48 @@ class TorrentAlive(object):
                 continue
             log.debug('Checking for seeds for %s:', entry['title'])
             torrent = entry.get('torrent')
-            if torrent:
-                log.debug('started examining torrent: %s', torrent)
-                seeds = 0
-                info_hash = torrent.info_hash
-                announce_list = torrent.content.get('announce-list')
-                if announce_list:
-                    # Multitracker torrent
-                    threadlist = []
-                    for tier in announce_list:
-                        for tracker in tier:
-                            background = TorrentAliveThread(tracker, info_hash)
-                            try:
-                                background.start()
-                                threadlist.append(background)
-                            except threading.ThreadError:
-                                # If we can't start a new thread, wait for current ones to complete and continue
-                                log.debug('Reached max threads, finishing current threads.')
-                                seeds = max(seeds, max_seeds_from_threads(threadlist))
-                                background.start()
-                                threadlist = [background]
-                            log.debug(
-                                'Started thread to scrape %s with info hash %s', tracker, info_hash
-                            )
-
-                    seeds = max(seeds, max_seeds_from_threads(threadlist))
-                    log.debug('Highest number of seeds found: %s', seeds)
-                elif torrent.content.get('announce'):
-                    # Single tracker
-                    tracker = torrent.content['announce']
-                    try:
-                        seeds = get_tracker_seeds(tracker, info_hash)
-                    except URLError as e:
-                        log.debug('Error scraping %s: %s', tracker, e)
-                else:
-                    log.warning(
-                        'Torrent %s does not seem to have a tracker specified, cannot check for seeders',
-                        entry['title'],
-                    )
-                    return
-
-                # Reject if needed
-                if seeds < min_seeds:
-                    entry.reject(
-                        reason='Tracker(s) had < %s required seeds. (%s)' % (min_seeds, seeds),
-                        remember_time=config['reject_for'],
-                    )
-                    # Maybe there is better match that has enough seeds
-                    task.rerun(plugin='torrent_alive', reason='Not enough seeds')
-                else:
-                    log.debug('Found %i seeds from trackers', seeds)
+            if not torrent:
+                continue
+            log.debug('started examining torrent: %s', torrent)
+            info_hash = torrent.info_hash.upper()
+            announce_list = torrent.content.get('announce-list')
+            if announce_list:
+                # Multitracker torrent
+                trackers = [tracker for tier in announce_list for tracker in tier]
+            elif torrent.content.get('announce'):
+                # Single tracker
+                trackers = [torrent.content['announce']]
+            else:
+                log.warning(
+                    'Torrent %s does not seem to have a tracker specified, cannot check for '
+                    'seeders',
+                    entry['title'],
+                )
+                continue
+            for tracker in trackers:
+                info_hashes = hashes_by_tracker.setdefault(tracker, [])
+                if info_hash not in info_hashes:
+                    info_hashes.append(info_hash)
+            checks.append((entry, info_hash, trackers))
+
+        if not checks:
+            return
+        tracker_seeds = scrape_trackers(hashes_by_tracker)
+
+        for entry, info_hash, trackers in checks:
+            seeds = max(tracker_seeds.get((tracker, info_hash), 0) for tracker in trackers)
+            log.debug('Highest number of seeds found for %s: %s', entry['title'], seeds)
+
+            # Reject if needed
+            if seeds < min_seeds:
+                entry.reject(
+                    reason='Tracker(s) had < %s required seeds. (%s)' % (min_seeds, seeds),
+                    remember_time=config['reject_for'],
+                )
+                # Maybe there is better match that has enough seeds
+                task.rerun(plugin='torrent_alive', reason='Not enough seeds')
+            else:
+                log.debug('Found %i seeds from trackers', seeds)
 
 
 @event('plugin.register')
@@ -8,7 +8,14 @@ from flask import jsonify, request
 from sqlalchemy import desc, asc
 
 from flexget.api import api, APIResource
-from flexget.api.app import BadRequest, etag, pagination_headers, NotFoundError
+from flexget.api.app import (
+    BadRequest,
+    etag,
+    pagination_headers,
+    NotFoundError,
+    count_query,
+    keyset_response,
+)
 from . import db
 
 log = logging.getLogger('history')
@@ -38,9 +45,11 @@ class ObjectsContainer(object):
 history_list_schema = api.schema_model('history.list', ObjectsContainer.history_list_object)
 
 sort_choices = ('id', 'task', 'filename', 'url', 'title', 'time', 'details')
+# Indexed columns which can be used with cursor pagination
+keyset_sort_choices = ('id', 'time')
 
 # Create pagination parser
-history_parser = api.pagination_parser(sort_choices=sort_choices, default='time')
+history_parser = api.pagination_parser(sort_choices=sort_choices, default='time', keyset=True)
 history_parser.add_argument('task', help='Filter by task name')
 
 
@@ -72,7 +81,16 @@ class HistoryAPI(APIResource):
         if task:
             query = query.filter(db.History.task == task)
 
-        total_items = query.count()
+        if args['cursor'] is not None:
+            if sort_by not in keyset_sort_choices:
+                raise BadRequest(
+                    'cursor pagination can only sort by %s' % ', '.join(keyset_sort_choices)
+                )
+            return keyset_response(
+                query, getattr(db.History, sort_by), db.History.id, args, per_page
+            )
+
+        total_items = count_query(query, estimate=args['estimate_count'])
 
         if not total_items:
             pagination = pagination_headers(0, 0, 0, request)
@@ -1,8 +1,23 @@
+import logging
 from datetime import datetime
 
 from sqlalchemy import Column, Integer, String, Unicode, DateTime
 
-from flexget.manager import Base
+from flexget import db_schema
+from flexget.utils.sqlalchemy_utils import table_exists, create_index
+
+log = logging.getLogger('history.db')
+Base = db_schema.versioned_base('history', 1)
+
+
+@db_schema.upgrade('history')
+def upgrade(ver, session):
+    if ver is None:
+        if table_exists('history', session):
+            log.info('Adding index to history table.')
+            create_index('history', session, 'time')
+        ver = 1
+    return ver
 
 
 class History(Base):
@@ -13,7 +28,7 @@ class History(Base):
     filename = Column(String)
     url = Column(String)
     title = Column(Unicode)
-    time = Column(DateTime)
+    time = Column(DateTime, index=True)
     details = Column(String)
 
     def __init__(self):
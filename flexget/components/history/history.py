@@ -2,9 +2,11 @@ from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
 import logging
+from datetime import datetime
 
 from flexget import plugin
 from flexget.event import event
+from flexget.utils.database import bulk_insert
 from . import db
 
 log = logging.getLogger('history')
@@ -20,17 +22,24 @@ class PluginHistory(object):
         if config is False:
             return  # Explicitly disabled with configuration
 
+        now = datetime.now()
+        items = []
         for entry in task.accepted:
-            item = db.History()
-            item.task = task.name
-            item.filename = entry.get('output', None)
-            item.title = entry['title']
-            item.url = entry['url']
             reason = ''
             if 'reason' in entry:
                 reason = ' (reason: %s)' % entry['reason']
-            item.details = 'Accepted by %s%s' % (entry.get('accepted_by', '<unknown>'), reason)
-            task.session.add(item)
+            details = 'Accepted by %s%s' % (entry.get('accepted_by', '<unknown>'), reason)
+            items.append(
+                {
+                    'task': task.name,
+                    'filename': entry.get('output', None),
+                    'title': entry['title'],
+                    'url': entry['url'],
+                    'time': now,
+                    'details': details,
+                }
+            )
+        bulk_insert(task.session, db.History, items)
 
 
 @event('plugin.register')
@@ -10,11 +10,14 @@ from sqlalchemy.orm.exc import NoResultFound
 
 from flexget.api import api, APIResource
 from flexget.api.app import (
+    BadRequest,
     NotFoundError,
     base_message_schema,
     success_response,
     etag,
     pagination_headers,
+    count_query,
+    keyset_response,
     Conflict,
 )
 
@@ -147,7 +150,9 @@ entry_lists_entries_return_schema = api.schema_model(
 )
 
 sort_choices = ('id', 'added', 'title', 'original_url', 'list_id')
-entries_parser = api.pagination_parser(sort_choices=sort_choices, default='title')
+# Indexed columns which can be used with cursor pagination
+keyset_sort_choices = ('added', 'id')
+entries_parser = api.pagination_parser(sort_choices=sort_choices, default='title', keyset=True)
 
 
 @entry_list_api.route('/<int:list_id>/entries/')
@@ -188,7 +193,20 @@ class EntryListEntriesAPI(APIResource):
             'session': session,
         }
 
-        total_items = list.entries.count()
+        if args['cursor'] is not None:
+            if sort_by not in keyset_sort_choices:
+                raise BadRequest(
+                    'cursor pagination can only sort by %s' % ', '.join(keyset_sort_choices)
+                )
+            return keyset_response(
+                list.entries,
+                getattr(db.EntryListEntry, sort_by),
+                db.EntryListEntry.id,
+                args,
+                per_page,
+            )
+
+        total_items = count_query(list.entries, estimate=args['estimate_count'])
 
         if not total_items:
             return jsonify([])
@@ -3,7 +3,7 @@ import pickle
 from collections import MutableSet
 from datetime import datetime
 
-from sqlalchemy import Unicode, select, Column, Integer, DateTime, ForeignKey, or_, func
+from sqlalchemy import Unicode, select, Column, Integer, DateTime, ForeignKey, Index, or_, func
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.elements import and_
 
@@ -13,10 +13,10 @@ from flexget.entry import Entry
 from flexget.manager import Session
 from flexget.utils import json
 from flexget.utils.database import entry_synonym, with_session
-from flexget.utils.sqlalchemy_utils import table_schema, table_add_column
+from flexget.utils.sqlalchemy_utils import table_schema, table_add_column, create_index
 
 log = logging.getLogger('entry_list.db')
-Base = versioned_base('entry_list', 1)
+Base = versioned_base('entry_list', 2)
 
 
 @db_schema.upgrade('entry_list')
@@ -40,6 +40,10 @@ def upgrade(ver, session):
                 log.error('Unable error upgrading entry_list pickle object due to %s' % str(e))
 
         ver = 1
+    if ver == 1:
+        log.info('Adding index to entry_list_entries table.')
+        create_index('entry_list_entries', session, 'list_id', 'added')
+        ver = 2
     return ver
 
 
@@ -86,6 +90,9 @@ class EntryListEntry(Base):
         }
 
 
+Index('ix_entry_list_entries_list_id_added', EntryListEntry.list_id, EntryListEntry.added)
+
+
 class DBEntrySet(MutableSet):
     def _db_list(self, session):
         return session.query(EntryListList).filter(EntryListList.name == self.config).first()
@@ -18,6 +18,8 @@ from flexget.api.app import (
     BadRequest,
     etag,
     pagination_headers,
+    count_query,
+    keyset_response,
 )
 from .movie_list import MovieListBase
 from . import db
@@ -178,7 +180,9 @@ movie_identifiers_doc = (
 )
 
 sort_choices = ('id', 'added', 'title', 'year')
-movies_parser = api.pagination_parser(sort_choices=sort_choices, default='title')
+# Indexed columns which can be used with cursor pagination
+keyset_sort_choices = ('added', 'id')
+movies_parser = api.pagination_parser(sort_choices=sort_choices, default='title', keyset=True)
 
 
 @movie_list_api.route('/<int:list_id>/movies/')
@@ -214,7 +218,20 @@ class MovieListMoviesAPI(APIResource):
         except NoResultFound:
             raise NotFoundError('list_id %d does not exist' % list_id)
 
-        total_items = list.movies.count()
+        if args['cursor'] is not None:
+            if sort_by not in keyset_sort_choices:
+                raise BadRequest(
+                    'cursor pagination can only sort by %s' % ', '.join(keyset_sort_choices)
+                )
+            return keyset_response(
+                list.movies,
+                getattr(db.MovieListMovie, sort_by),
+                db.MovieListMovie.id,
+                args,
+                per_page,
+            )
+
+        total_items = count_query(list.movies, estimate=args['estimate_count'])
 
         if not total_items:
             return jsonify([])
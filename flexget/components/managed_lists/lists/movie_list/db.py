@@ -4,13 +4,14 @@ import logging
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 from datetime import datetime
 
-from sqlalchemy import Column, Unicode, Integer, ForeignKey, func, DateTime
+from sqlalchemy import Column, Unicode, Integer, ForeignKey, Index, func, DateTime
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.elements import and_
 
-from flexget import plugin
+from flexget import db_schema, plugin
 from flexget.db_schema import versioned_base, with_session
 from flexget.entry import Entry
+from flexget.utils.sqlalchemy_utils import create_index
 
 try:
     # NOTE: Importing other plugins is discouraged!
@@ -19,7 +20,18 @@ except ImportError:
     raise plugin.DependencyError(issued_by=__name__, missing='parser_common')
 
 log = logging.getLogger('movie_list')
-Base = versioned_base('movie_list', 0)
+Base = versioned_base('movie_list', 1)
+
+
+@db_schema.upgrade('movie_list')
+def upgrade(ver, session):
+    if ver is None:
+        ver = 0
+    if ver == 0:
+        log.info('Adding index to movie_list_movies table.')
+        create_index('movie_list_movies', session, 'list_id', 'added')
+        ver = 1
+    return ver
 
 
 class MovieListBase(object):
@@ -97,6 +109,9 @@ class MovieListMovie(Base):
         return {identifier.id_name: identifier.id_value for identifier in self.ids}
 
 
+Index('ix_movie_list_movies_list_id_added', MovieListMovie.list_id, MovieListMovie.added)
+
+
 class MovieListID(Base):
     __tablename__ = 'movie_list_ids'
     id = Column(Integer, primary_key=True)
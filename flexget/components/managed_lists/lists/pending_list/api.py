@@ -15,6 +15,8 @@ from flexget.api.app import (
     success_response,
     etag,
     pagination_headers,
+    count_query,
+    keyset_response,
     Conflict,
     BadRequest,
 )
@@ -168,7 +170,9 @@ pending_lists_entries_return_schema = api.schema_model(
 )
 
 sort_choices = ('id', 'added', 'title', 'original_url', 'list_id', 'approved')
-entries_parser = api.pagination_parser(sort_choices=sort_choices, default='title')
+# Indexed columns which can be used with cursor pagination
+keyset_sort_choices = ('added', 'id')
+entries_parser = api.pagination_parser(sort_choices=sort_choices, default='title', keyset=True)
 entries_parser.add_argument('filter', help='Filter by title name')
 
 
@@ -213,7 +217,20 @@ class PendingListEntriesAPI(APIResource):
             'session': session,
         }
 
-        total_items = list.entries.count()
+        if args['cursor'] is not None:
+            if sort_by not in keyset_sort_choices:
+                raise BadRequest(
+                    'cursor pagination can only sort by %s' % ', '.join(keyset_sort_choices)
+                )
+            return keyset_response(
+                db.entries_query(list_id, filter=filter_, session=session),
+                getattr(db.PendingListEntry, sort_by),
+                db.PendingListEntry.id,
+                args,
+                per_page,
+            )
+
+        total_items = count_query(list.entries, estimate=args['estimate_count'])
 
         if not total_items:
             return jsonify([])
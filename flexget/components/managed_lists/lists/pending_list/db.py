@@ -4,7 +4,7 @@ import logging
 from builtins import *  # pylint: disable=unused-import, redefined-builtin
 from datetime import datetime
 
-from sqlalchemy import Column, Unicode, Integer, DateTime, func, Boolean
+from sqlalchemy import Column, Unicode, Integer, DateTime, Index, func, Boolean
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.elements import and_
 from sqlalchemy.sql.schema import ForeignKey
@@ -12,15 +12,21 @@ from sqlalchemy.sql.schema import ForeignKey
 from flexget import db_schema
 from flexget.db_schema import versioned_base
 from flexget.utils.database import entry_synonym, with_session
+from flexget.utils.sqlalchemy_utils import create_index
 
 plugin_name = 'pending_list'
 log = logging.getLogger(plugin_name)
-Base = versioned_base(plugin_name, 0)
+Base = versioned_base(plugin_name, 1)
 
 
 @db_schema.upgrade(plugin_name)
 def upgrade(ver, session):
-    ver = 0
+    if ver is None:
+        ver = 0
+    if ver == 0:
+        log.info('Adding index to wait_list_entries table.')
+        create_index('wait_list_entries', session, 'list_id', 'added')
+        ver = 1
     return ver
 
 
@@ -74,6 +80,9 @@ class PendingListEntry(Base):
         }
 
 
+Index('ix_wait_list_entries_list_id_added', PendingListEntry.list_id, PendingListEntry.added)
+
+
 @with_session
 def get_pending_lists(name=None, session=None):
     log.debug('retrieving pending lists')
@@ -108,6 +117,17 @@ def delete_list_by_id(list_id, session=None):
         session.delete(entry_list)
 
 
+@with_session
+def entries_query(list_id, approved=False, filter=None, session=None):
+    """Returns an unordered query of entries of a pending list."""
+    query = session.query(PendingListEntry).filter(PendingListEntry.list_id == list_id)
+    if filter:
+        query = query.filter(func.lower(PendingListEntry.title).contains(filter.lower()))
+    if approved:
+        query = query.filter(PendingListEntry.approved is approved)
+    return query
+
+
 @with_session
 def get_entries_by_list_id(
     list_id,
@@ -120,11 +140,7 @@ def get_entries_by_list_id(
     session=None,
 ):
     log.debug('querying entries from pending list with id %d', list_id)
-    query = session.query(PendingListEntry).filter(PendingListEntry.list_id == list_id)
-    if filter:
-        query = query.filter(func.lower(PendingListEntry.title).contains(filter.lower()))
-    if approved:
-        query = query.filter(PendingListEntry.approved is approved)
+    query = entries_query(list_id, approved=approved, filter=filter, session=session)
     if descending:
         query = query.order_by(getattr(PendingListEntry, order_by).desc())
     else:
@@ -1,10 +1,12 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import copy
 import logging
 
 from flexget import plugin
 from flexget.event import event
+from flexget.utils.tools import LRUCache, hashable
 
 log = logging.getLogger('parsing')
 PARSER_TYPES = ['movie', 'series']
@@ -14,6 +16,9 @@ parsers = {}
 # Mapping from parser type to the name of the default/selected parser for that type
 default_parsers = {}
 selected_parsers = {}
+# Recent parse results, by (parser type, parser name, data, kwargs). The same titles are parsed over and over by
+# metainfo, filter and learn plugins within an execution, and by consecutive runs of a task.
+parse_cache = LRUCache(max_size=5000)
 
 
 # We need to wait until manager startup to access other plugin instances, to make sure they have all been loaded
@@ -73,8 +78,9 @@ class PluginParsing(object):
 
         :returns: An object containing the parsed information. The `valid` attribute will be set depending on success.
         """
-        parser = parsers['series'][selected_parsers.get('series', default_parsers.get('series'))]
-        return parser.parse_series(data, name=name, **kwargs)
+        parser_name = selected_parsers.get('series', default_parsers.get('series'))
+        kwargs['name'] = name
+        return cached_parse('series', parser_name, data, kwargs)
 
     def parse_movie(self, data, **kwargs):
         """
@@ -84,8 +90,46 @@ class PluginParsing(object):
 
         :returns: An object containing the parsed information. The `valid` attribute will be set depending on success.
         """
-        parser = parsers['movie'][selected_parsers.get('movie') or default_parsers['movie']]
-        return parser.parse_movie(data, **kwargs)
+        parser_name = selected_parsers.get('movie') or default_parsers['movie']
+        return cached_parse('movie', parser_name, data, kwargs)
+
+
+def cached_parse(parser_type, parser_name, data, kwargs):
+    """
+    Parses `data` with the given parser, reusing the result of an earlier identical call if one is cached.
+
+    Callers are free to modify the returned result and the objects in it, like its quality, a deep copy of the
+    cached one is returned each time.
+    """
+    parse = getattr(parsers[parser_type][parser_name], 'parse_' + parser_type)
+    try:
+        key = (parser_type, parser_name, data, hashable(kwargs))
+        hash(key)
+    except TypeError:
+        # Some argument can't be used as a key, don't cache
+        return parse(data, **kwargs)
+    try:
+        result = parse_cache[key]
+    except KeyError:
+        result = parse(data, **kwargs)
+        parse_cache[key] = result
+    return copy.deepcopy(result)
+
+
+@event('manager.execute.completed')
+def log_cache_stats(manager, options):
+    if not getattr(options, 'debug_perf', False):
+        return
+    stats = parse_cache.stats()
+    lookups = stats['hits'] + stats['misses']
+    log.info(
+        'Parse result cache: %s hits, %s misses (%.0f%% hit rate), %s/%s results cached',
+        stats['hits'],
+        stats['misses'],
+        100.0 * stats['hits'] / lookups if lookups else 0,
+        stats['size'],
+        stats['max_size'],
+    )
 
 
 @event('plugin.register')
@@ -9,6 +9,7 @@ from flexget.components.scheduler.scheduler import (
     schedule_schema,
     scheduler,
     scheduler_job_map,
+    get_job_metrics,
     DEFAULT_SCHEDULES,
 )
 from flexget.api import api, APIResource
@@ -28,14 +29,31 @@ class ObjectsContainer(object):
     # SwaggerUI does not yet support anyOf or oneOf
     schedule_object = copy.deepcopy(schedule_schema)
     schedule_object['properties']['id'] = {'type': 'integer'}
-    schedule_object['maxProperties'] += 1
 
     schedules_list = {'type': 'array', 'items': schedule_object}
 
+    schedule_metrics = {
+        'type': 'object',
+        'properties': {
+            'runs': {'type': 'integer'},
+            'skipped': {'type': 'integer'},
+            'last_run': {'type': ['string', 'null']},
+            'last_queue_wait': {'type': ['number', 'null']},
+            'last_run_time': {'type': ['number', 'null']},
+            'total_queue_wait': {'type': 'number'},
+            'total_run_time': {'type': 'number'},
+            'avg_queue_wait': {'type': ['number', 'null']},
+            'avg_run_time': {'type': ['number', 'null']},
+        },
+    }
+
 
 base_schedule_schema = api.schema_model('schedules.base', schedule_schema)
 api_schedule_schema = api.schema_model('schedules.schedule', ObjectsContainer.schedule_object)
 api_schedules_list_schema = api.schema_model('schedules.list', ObjectsContainer.schedules_list)
+api_schedule_metrics_schema = api.schema_model(
+    'schedules.metrics', ObjectsContainer.schedule_metrics
+)
 
 
 def _schedule_by_id(schedule_id, schedules):
@@ -200,3 +218,32 @@ class ScheduleAPI(APIResource):
                 return success_response('schedule %d successfully deleted' % schedule_id)
 
         raise NotFoundError('schedule %d not found' % schedule_id)
+
+
+@schedule_api.route('/<int:schedule_id>/metrics/')
+@api.doc(params={'schedule_id': 'ID of Schedule'})
+@api.response(NotFoundError)
+@api.response(Conflict)
+class ScheduleMetricsAPI(APIResource):
+    @api.response(200, model=api_schedule_metrics_schema)
+    def get(self, schedule_id, session=None):
+        """ Get queue wait and run time metrics of a schedule, times are in seconds """
+        schedules = self.manager.config.get('schedules', [])
+
+        # Checks for boolean config
+        if schedules is True:
+            schedules = DEFAULT_SCHEDULES
+        elif schedules is False:
+            raise Conflict('Schedules are disables in config')
+
+        schedule, _ = _schedule_by_id(schedule_id, schedules)
+        if schedule is None:
+            raise NotFoundError('schedule %d not found' % schedule_id)
+
+        metrics = None
+        job_id = scheduler_job_map.get(schedule_id)
+        if job_id:
+            metrics = get_job_metrics(job_id)
+        if metrics is None:
+            raise NotFoundError('schedule %d has not run yet' % schedule_id)
+        return jsonify(metrics)
@@ -1,9 +1,13 @@
 from __future__ import unicode_literals, division, absolute_import
 
 import hashlib
+import itertools
 import logging
 import os
 import struct
+import threading
+import time
+from datetime import datetime, timedelta
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
 import pytz
@@ -73,12 +77,36 @@ schedule_schema = {
         'tasks': {'type': ['array', 'string'], 'items': {'type': 'string'}},
         'interval': interval_schema,
         'schedule': cron_schema,
+        'jitter': {
+            'type': 'integer',
+            'minimum': 0,
+            'description': 'Delay each run by a random amount of up to this many seconds.',
+        },
+        'spread': {
+            'type': 'boolean',
+            'description': 'Offset the first run of an interval schedule by a fixed amount within '
+            'the interval, so schedules sharing the same interval do not all fire at once.',
+        },
+        'coalesce': {
+            'type': 'boolean',
+            'description': 'Run only once if several runs were missed, e.g. while the daemon was '
+            'stopped.',
+        },
+        'max_instances': {
+            'type': 'integer',
+            'minimum': 1,
+            'description': 'How many runs of this schedule may be waiting or running at the same '
+            'time.',
+        },
+        'skip_queued': {
+            'type': 'boolean',
+            'description': 'Do not queue tasks which are already waiting in the task queue or '
+            'running.',
+        },
     },
     'required': ['tasks'],
-    'minProperties': 2,
-    'maxProperties': 2,
-    'error_minProperties': 'Either `cron` or `interval` must be defined.',
-    'error_maxProperties': 'Either `cron` or `interval` must be defined.',
+    'oneOf': [{'required': ['interval']}, {'required': ['schedule']}],
+    'error_oneOf': 'Either `cron` or `interval` must be defined.',
     'additionalProperties': False,
 }
 
@@ -91,6 +119,12 @@ main_schema = {
 
 scheduler = None
 scheduler_job_map = {}
+# Queue wait and run time statistics for each job, keyed by job id
+job_metrics = {}
+# Start times of tasks queued by the scheduler, keyed by the run of the job and then by task id
+_task_start_times = {}
+_run_ids = itertools.count()
+_metrics_lock = threading.Lock()
 
 
 def job_id(conf):
@@ -98,16 +132,103 @@ def job_id(conf):
     return hashlib.sha1(json.dumps(conf, sort_keys=True).encode('utf-8')).hexdigest()
 
 
-def run_job(tasks):
+def spread_offset(jid, interval):
+    """Returns a stable offset within `interval` for the job with id `jid`."""
+    seconds = int(timedelta(**interval).total_seconds())
+    if seconds <= 0:
+        return timedelta()
+    return timedelta(seconds=int(jid, 16) % seconds)
+
+
+def _update_metrics(jid, **values):
+    with _metrics_lock:
+        metrics = job_metrics.setdefault(
+            jid,
+            {
+                'runs': 0,
+                'skipped': 0,
+                'last_run': None,
+                'last_queue_wait': None,
+                'last_run_time': None,
+                'total_queue_wait': 0.0,
+                'total_run_time': 0.0,
+            },
+        )
+        if 'skipped' in values:
+            metrics['skipped'] += values.pop('skipped')
+        if 'last_queue_wait' in values:
+            metrics['runs'] += 1
+            metrics['total_queue_wait'] += values['last_queue_wait']
+            metrics['total_run_time'] += values['last_run_time']
+        metrics.update(values)
+
+
+def get_job_metrics(jid):
+    """Returns queue wait and run time statistics for the job with id `jid`, or None if it has not run yet."""
+    with _metrics_lock:
+        metrics = job_metrics.get(jid)
+        if metrics is None:
+            return None
+        metrics = dict(metrics)
+    runs = metrics['runs']
+    metrics['avg_queue_wait'] = metrics['total_queue_wait'] / runs if runs else None
+    metrics['avg_run_time'] = metrics['total_run_time'] / runs if runs else None
+    return metrics
+
+
+@event('task.execute.started')
+def record_task_start(task):
+    start_times = _task_start_times.get(getattr(task.options, 'scheduler_run', None))
+    if start_times is not None:
+        start_times[task.id] = time.time()
+
+
+def run_job(tasks, job_id=None, skip_queued=False):
     """Add the execution to the queue and waits until it is finished"""
+    if skip_queued:
+        queued = manager.task_queue.queued_task_names()
+        skipped = [task for task in tasks if task in queued]
+        if skipped:
+            log.info(
+                'Not queuing tasks which are already queued or running: %s', ', '.join(skipped)
+            )
+            tasks = [task for task in tasks if task not in queued]
+            if job_id:
+                _update_metrics(job_id, skipped=1)
+            if not tasks:
+                return
     log.debug('executing tasks: %s', tasks)
-    finished_events = manager.execute(
-        options={'tasks': tasks, 'cron': True, 'allow_manual': False}, priority=5
-    )
-    for _, task_name, event_ in finished_events:
-        log.debug('task finished executing: %s', task_name)
-        event_.wait()
+    # Start times are recorded for this run from before the tasks are queued, they may start right away
+    run_id = next(_run_ids)
+    start_times = _task_start_times[run_id] = {}
+    queued_time = time.time()
+    try:
+        finished_events = manager.execute(
+            options={
+                'tasks': tasks,
+                'cron': True,
+                'allow_manual': False,
+                'scheduler_run': run_id,
+            },
+            priority=5,
+        )
+        queue_wait = run_time = 0.0
+        for task_id, task_name, event_ in finished_events:
+            event_.wait()
+            log.debug('task finished executing: %s', task_name)
+            started = start_times.get(task_id) or queued_time
+            finished = time.time()
+            # Time spent waiting on tasks that are not part of this schedule counts as queue wait
+            queue_wait += max(started - queued_time, 0)
+            run_time += finished - started
+            queued_time = finished
+    finally:
+        _task_start_times.pop(run_id, None)
     log.debug('all tasks in schedule finished executing')
+    if job_id:
+        _update_metrics(
+            job_id, last_run=datetime.now(), last_queue_wait=queue_wait, last_run_time=run_time
+        )
 
 
 @event('manager.daemon.started')
@@ -156,8 +277,7 @@ def setup_jobs(manager):
     if not manager.is_daemon:
         return
 
-    global scheduler_job_map
-    scheduler_job_map = {}
+    scheduler_job_map.clear()
 
     if 'schedules' not in manager.config:
         log.info(
@@ -180,23 +300,41 @@ def setup_jobs(manager):
         jid = job_id(job_config)
         configured_job_ids.append(jid)
         scheduler_job_map[id(job_config)] = jid
+        tasks = job_config['tasks']
+        if not isinstance(tasks, list):
+            tasks = [tasks]
+        job_kwargs = {'job_id': jid, 'skip_queued': job_config.get('skip_queued', False)}
         if jid in existing_job_ids:
+            # Keep the stored next run time, but make sure jobs stored by older versions get current arguments
+            scheduler.modify_job(jid, args=(tasks,), kwargs=job_kwargs)
             continue
         if 'interval' in job_config:
-            trigger, trigger_args = 'interval', job_config['interval']
+            trigger, trigger_args = 'interval', dict(job_config['interval'])
+            if job_config.get('spread'):
+                trigger_args['start_date'] = datetime.now() + spread_offset(
+                    jid, job_config['interval']
+                )
         else:
-            trigger, trigger_args = 'cron', job_config['schedule']
-        tasks = job_config['tasks']
-        if not isinstance(tasks, list):
-            tasks = [tasks]
+            trigger, trigger_args = 'cron', dict(job_config['schedule'])
+        if job_config.get('jitter'):
+            trigger_args['jitter'] = job_config['jitter']
         name = ','.join(tasks)
         scheduler.add_job(
-            run_job, args=(tasks,), id=jid, name=name, trigger=trigger, **trigger_args
+            run_job,
+            args=(tasks,),
+            kwargs=job_kwargs,
+            id=jid,
+            name=name,
+            trigger=trigger,
+            coalesce=job_config.get('coalesce', True),
+            max_instances=job_config.get('max_instances', 1),
+            **trigger_args
         )
     # Remove jobs no longer in config
     for jid in existing_job_ids:
         if jid not in configured_job_ids:
             scheduler.remove_job(jid)
+            job_metrics.pop(jid, None)
     scheduler.resume()
 
 
@@ -10,11 +10,14 @@ from sqlalchemy.orm.exc import NoResultFound
 
 from flexget.api import api, APIResource
 from flexget.api.app import (
+    BadRequest,
     NotFoundError,
     base_message_schema,
     success_response,
     etag,
     pagination_headers,
+    count_query,
+    keyset_response,
 )
 from . import db
 
@@ -61,7 +64,9 @@ seen_base_parser.add_argument(
 )
 
 sort_choices = ('title', 'task', 'added', 'local', 'reason', 'id')
-seen_search_parser = api.pagination_parser(seen_base_parser, sort_choices)
+# Indexed columns which can be used with cursor pagination
+keyset_sort_choices = ('added', 'id')
+seen_search_parser = api.pagination_parser(seen_base_parser, sort_choices, keyset=True)
 
 
 @seen_api.route('/')
@@ -95,6 +100,16 @@ class SeenSearchAPI(APIResource):
             value = unquote(value)
             value = '%{0}%'.format(value)
 
+        if args['cursor'] is not None:
+            if sort_by not in keyset_sort_choices:
+                raise BadRequest(
+                    'cursor pagination can only sort by %s' % ', '.join(keyset_sort_choices)
+                )
+            query = db.search_query(value=value, status=local, session=session)
+            return keyset_response(
+                query, getattr(db.SeenEntry, sort_by), db.SeenEntry.id, args, per_page
+            )
+
         start = per_page * (page - 1)
         stop = start + per_page
 
@@ -108,7 +123,12 @@ class SeenSearchAPI(APIResource):
             'session': session,
         }
 
-        total_items = db.search(count=True, **kwargs)
+        if args['estimate_count']:
+            total_items = count_query(
+                db.search_query(value=value, status=local, session=session), estimate=True
+            )
+        else:
+            total_items = db.search(count=True, **kwargs)
 
         if not total_items:
             return jsonify([])
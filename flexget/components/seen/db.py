@@ -29,7 +29,7 @@ from flexget import plugin
 from flexget.event import event
 from flexget.manager import Session
 from flexget.utils.database import with_session
-from flexget.utils.sqlalchemy_utils import table_schema, table_add_column
+from flexget.utils.sqlalchemy_utils import table_schema, table_add_column, create_index
 
 try:
     # NOTE: Importing other plugins is discouraged!
@@ -39,7 +39,7 @@ except ImportError:
 
 
 log = logging.getLogger('seen.db')
-Base = db_schema.versioned_base('seen', 4)
+Base = db_schema.versioned_base('seen', 5)
 
 
 @db_schema.upgrade('seen')
@@ -68,6 +68,10 @@ def upgrade(ver, session):
         entry_table = table_schema('seen_entry', session)
         session.execute(update(entry_table, entry_table.c.local == None, {'local': False}))
         ver = 4
+    if ver == 4:
+        log.info('Adding index to seen_entry table.')
+        create_index('seen_entry', session, 'added')
+        ver = 5
 
     return ver
 
@@ -79,7 +83,7 @@ class SeenEntry(Base):
     title = Column(Unicode)
     reason = Column(Unicode)
     task = Column('feed', Unicode)
-    added = Column(DateTime)
+    added = Column(DateTime, index=True)
     local = Column(Boolean)
 
     fields = relation('SeenField', backref='seen_entry', cascade='all, delete, delete-orphan')
@@ -251,6 +255,17 @@ def search(
     return query.group_by(SeenEntry).slice(start, stop).from_self()
 
 
+@with_session
+def search_query(value=None, status=None, session=None):
+    """Returns a query of seen entries, without grouping so it can be used for keyset pagination."""
+    query = session.query(SeenEntry)
+    if value:
+        query = query.filter(SeenEntry.fields.any(SeenField.value.like(value)))
+    if status is not None:
+        query = query.filter(SeenEntry.local == status)
+    return query
+
+
 @with_session
 def get_entry_by_id(entry_id, session=None):
     return session.query(SeenEntry).filter(SeenEntry.id == entry_id).one()
@@ -2,9 +2,11 @@ from __future__ import unicode_literals, division, absolute_import
 
 import logging
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+from datetime import datetime
 
 from flexget import plugin
 from flexget.event import event
+from flexget.utils.database import bulk_insert
 from . import db
 
 log = logging.getLogger(__name__)
@@ -113,32 +115,56 @@ class FilterSeen(object):
         if isinstance(config, list):
             fields.extend(config)
 
-        for entry in task.accepted:
-            self.learn(task, entry, fields=fields, local=local)
-            # verbose if in learning mode
-            if task.options.learn:
+        self.learn_entries(task, task.accepted, fields=fields, local=local)
+        # verbose if in learning mode
+        if task.options.learn:
+            for entry in task.accepted:
                 log.info("Learned '%s' (will skip this in the future)" % (entry['title']))
 
     def learn(self, task, entry, fields=None, reason=None, local=False):
         """Marks entry as seen"""
+        self.learn_entries(task, [entry], fields=fields, reason=reason, local=local)
+
+    def learn_entries(self, task, entries, fields=None, reason=None, local=False):
+        """Marks all entries as seen, with a few bulk inserts rather than an insert per entry and field"""
         # no explicit fields given, use default
         if not fields:
             fields = self.fields
-        se = db.SeenEntry(entry['title'], str(task.name), reason, local)
-        remembered = []
-        for field in fields:
-            if field not in entry:
-                continue
-            # removes duplicate values (eg. url, original_url are usually same)
-            if entry[field] in remembered:
-                continue
-            remembered.append(entry[field])
-            sf = db.SeenField(str(field), str(entry[field]))
-            se.fields.append(sf)
-            log.debug("Learned '%s' (field: %s, local: %d)" % (entry[field], field, local))
-        # Only add the entry to the session if it has one of the required fields
-        if se.fields:
-            task.session.add(se)
+        now = datetime.now()
+        seen_entries = []
+        seen_fields = []
+        for entry in entries:
+            remembered = []
+            values = []
+            for field in fields:
+                if field not in entry:
+                    continue
+                # removes duplicate values (eg. url, original_url are usually same)
+                if entry[field] in remembered:
+                    continue
+                remembered.append(entry[field])
+                values.append({'field': str(field), 'value': str(entry[field]), 'added': now})
+                log.debug("Learned '%s' (field: %s, local: %d)" % (entry[field], field, local))
+            # Only remember the entry if it has one of the required fields
+            if values:
+                seen_entries.append(
+                    {
+                        'title': entry['title'],
+                        'task': str(task.name),
+                        'reason': reason,
+                        'added': now,
+                        'local': bool(local),
+                    }
+                )
+                seen_fields.append(values)
+        # The generated ids of the seen entries are needed to link their fields
+        bulk_insert(task.session, db.SeenEntry, seen_entries, return_defaults=True)
+        for seen_entry, values in zip(seen_entries, seen_fields):
+            for value in values:
+                value['seen_entry_id'] = seen_entry['id']
+        bulk_insert(
+            task.session, db.SeenField, [value for values in seen_fields for value in values]
+        )
 
     def forget(self, task, title):
         """Forget SeenEntry with :title:. Return True if forgotten."""
@@ -19,6 +19,8 @@ from flexget.api.app import (
     success_response,
     etag,
     pagination_headers,
+    count_query,
+    keyset_response,
 )
 from flexget.event import fire_event
 from flexget.plugin import PluginError
@@ -52,7 +54,10 @@ def series_details(show, begin=False, latest=False):
     if begin:
         series_dict['begin_episode'] = show.begin.to_dict() if show.begin else None
     if latest:
-        latest_entity = db.get_latest_release(show)
+        if show.summary:
+            latest_entity = show.summary.latest_entity
+        else:
+            latest_entity = db.get_latest_release(show)
         series_dict['latest_entity'] = latest_entity.to_dict() if latest_entity else None
         if latest_entity:
             series_dict['latest_entity']['latest_release'] = latest_entity.latest_release.to_dict()
@@ -217,6 +222,12 @@ series_list_parser.add_argument(
     help="Get lookup result for every show by sending another request to lookup API",
 )
 series_list_parser.add_argument('query', help="Search by name based on the query")
+series_list_parser.add_argument(
+    'after',
+    type=int,
+    help="ID of the last show of the previous page. Continues the listing after that show "
+    "instead of using page offsets, which is faster for large lists",
+)
 
 ep_identifier_doc = (
     "'episode_identifier' should be one of SxxExx, integer or date formatted such as 2012-12-12"
@@ -267,9 +278,13 @@ class SeriesAPI(APIResource):
             'descending': descending,
             'session': session,
             'name': name,
+            'after': args.get('after'),
         }
 
-        total_items = db.get_series_summary(count=True, **kwargs)
+        try:
+            total_items = db.get_series_summary(count=True, **kwargs)
+        except LookupError as e:
+            raise NotFoundError(e.args[0])
 
         if not total_items:
             return jsonify([])
@@ -717,7 +732,9 @@ release_base_parser.add_argument(
 )
 
 sort_choices = ('first_seen', 'downloaded', 'proper_count', 'title')
-release_list_parser = api.pagination_parser(release_base_parser, sort_choices)
+# Columns which can be used with cursor pagination
+release_keyset_sort_choices = ('first_seen',)
+release_list_parser = api.pagination_parser(release_base_parser, sort_choices, keyset=True)
 
 release_delete_parser = release_base_parser.copy()
 release_delete_parser.add_argument(
@@ -776,6 +793,19 @@ class SeriesSeasonsReleasesAPI(APIResource):
         if per_page > 100:
             per_page = 100
 
+        if args['cursor'] is not None:
+            if sort_by not in release_keyset_sort_choices:
+                raise BadRequest(
+                    'cursor pagination can only sort by %s'
+                    % ', '.join(release_keyset_sort_choices)
+                )
+            query = db.season_releases_query(season, downloaded=downloaded, session=session)
+            rsp = keyset_response(
+                query, getattr(db.SeasonRelease, sort_by), db.SeasonRelease.id, args, per_page
+            )
+            rsp.headers.extend({'Series-ID': show_id, 'Season-ID': season_id})
+            return rsp
+
         start = per_page * (page - 1)
         stop = start + per_page
 
@@ -790,7 +820,13 @@ class SeriesSeasonsReleasesAPI(APIResource):
         }
 
         # Total number of releases
-        total_items = db.get_season_releases(count=True, **kwargs)
+        if args['estimate_count']:
+            total_items = count_query(
+                db.season_releases_query(season, downloaded=downloaded, session=session),
+                estimate=True,
+            )
+        else:
+            total_items = db.get_season_releases(count=True, **kwargs)
 
         # Release items
         release_items = [release.to_dict() for release in db.get_season_releases(**kwargs)]
@@ -1034,6 +1070,19 @@ class SeriesEpisodeReleasesAPI(APIResource):
         if per_page > 100:
             per_page = 100
 
+        if args['cursor'] is not None:
+            if sort_by not in release_keyset_sort_choices:
+                raise BadRequest(
+                    'cursor pagination can only sort by %s'
+                    % ', '.join(release_keyset_sort_choices)
+                )
+            query = db.episode_releases_query(episode, downloaded=downloaded, session=session)
+            rsp = keyset_response(
+                query, getattr(db.EpisodeRelease, sort_by), db.EpisodeRelease.id, args, per_page
+            )
+            rsp.headers.extend({'Series-ID': show_id, 'Episode-ID': ep_id})
+            return rsp
+
         start = per_page * (page - 1)
         stop = start + per_page
 
@@ -1048,7 +1097,13 @@ class SeriesEpisodeReleasesAPI(APIResource):
         }
 
         # Total number of releases
-        total_items = db.get_episode_releases(count=True, **kwargs)
+        if args['estimate_count']:
+            total_items = count_query(
+                db.episode_releases_query(episode, downloaded=downloaded, session=session),
+                estimate=True,
+            )
+        else:
+            total_items = db.get_episode_releases(count=True, **kwargs)
 
         # Release items
         release_items = [release.to_dict() for release in db.get_episode_releases(**kwargs)]
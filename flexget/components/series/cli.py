@@ -94,12 +94,12 @@ def display_summary(options):
             latest_release = '-'
             age_col = '-'
             episode_id = '-'
-            latest = db.get_latest_release(series)
+            latest = series.summary.latest_entity
             identifier_type = series.identified_by
             if identifier_type == 'auto':
                 identifier_type = colorize('yellow', 'auto')
             if latest:
-                behind = db.new_entities_after(latest)
+                behind = (series.summary.behind, series.summary.behind_unit)
                 latest_release = get_latest_status(latest)
                 # colorize age
                 age_col = latest.age
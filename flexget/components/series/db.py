@@ -6,6 +6,7 @@ import re
 from datetime import datetime, timedelta
 from functools import total_ordering
 
+import sqlalchemy
 from sqlalchemy import (
     Column,
     Integer,
@@ -21,16 +22,19 @@ from sqlalchemy import (
     and_,
     delete,
     desc,
+    case,
+    exists,
+    or_,
 )
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.hybrid import hybrid_property, Comparator
-from sqlalchemy.orm import relation, backref
+from sqlalchemy.orm import relation, backref, contains_eager, joinedload, selectinload
 
 from flexget import db_schema, plugin
 from flexget.components.series.utils import normalize_series_name
 from flexget.event import event, fire_event
 from flexget.manager import Session
-from flexget.utils.database import quality_property, with_session
+from flexget.utils.database import quality_property, with_session, delete_in_batches
 from flexget.utils.sqlalchemy_utils import (
     table_exists,
     drop_tables,
@@ -39,9 +43,9 @@ from flexget.utils.sqlalchemy_utils import (
     table_schema,
     create_index,
 )
-from flexget.utils.tools import parse_episode_identifier
+from flexget.utils.tools import parse_episode_identifier, chunked
 
-SCHEMA_VER = 14
+SCHEMA_VER = 15
 log = logging.getLogger('series.db')
 Base = db_schema.versioned_base('series', SCHEMA_VER)
 
@@ -94,6 +98,13 @@ class Series(Base):
 
     seasons = relation('Season', backref='series', cascade='all, delete, delete-orphan')
 
+    summary = relation(
+        'SeriesSummary',
+        uselist=False,
+        backref=backref('series', uselist=False),
+        cascade='all, delete, delete-orphan',
+    )
+
     # Make a special property that does indexed case insensitive lookups on name, but stores/returns specified case
     @hybrid_property
     def name(self):
@@ -562,6 +573,65 @@ class SeriesTask(Base):
         self.name = name
 
 
+class SeriesSummary(Base):
+    """
+    Denormalized per series data, used for listing series without aggregating all the episodes and releases.
+
+    Rows are refreshed when series entities or releases change, see :func:`refresh_series_summaries`.
+    """
+
+    __tablename__ = 'series_summary'
+
+    series_id = Column(Integer, ForeignKey('series.id'), primary_key=True)
+    configured = Column(Boolean, default=False, index=True)
+    premiere = Column(Boolean, default=False)
+    episode_count = Column(Integer, default=0)
+    season_count = Column(Integer, default=0)
+    release_count = Column(Integer, default=0)
+    downloaded_count = Column(Integer, default=0)
+    last_download_date = Column(DateTime, index=True)
+    # Latest downloaded entity is either an episode or a season pack
+    latest_episode_id = Column(Integer)
+    latest_season_id = Column(Integer)
+    latest_release_id = Column(Integer)
+    # Number of entities seen after the latest downloaded one
+    behind = Column(Integer, default=0)
+
+    latest_episode = relation(
+        'Episode',
+        primaryjoin='SeriesSummary.latest_episode_id == Episode.id',
+        foreign_keys=[latest_episode_id],
+        viewonly=True,
+    )
+    latest_season = relation(
+        'Season',
+        primaryjoin='SeriesSummary.latest_season_id == Season.id',
+        foreign_keys=[latest_season_id],
+        viewonly=True,
+    )
+
+    @property
+    def latest_entity(self):
+        """
+        :return: Latest downloaded Episode or Season, or None
+        """
+        return self.latest_season if self.latest_season_id else self.latest_episode
+
+    @property
+    def behind_unit(self):
+        return 'seasons' if self.latest_season_id else 'eps'
+
+    def __str__(self):
+        return '<SeriesSummary(series_id=%s,latest_episode_id=%s,latest_season_id=%s)>' % (
+            self.series_id,
+            self.latest_episode_id,
+            self.latest_season_id,
+        )
+
+    def __repr__(self):
+        return str(self).encode('ascii', 'replace')
+
+
 Index('episode_series_identifier', Episode.series_id, Episode.identifier)
 
 
@@ -722,38 +792,78 @@ def upgrade(ver, session):
         # New season_releases table, added by "create_all"
         log.info('Adding season_releases table')
         ver = 14
+    if ver == 14:
+        log.info('Adding series_summary table, this may take a while.')
+        SeriesSummary.__table__.create(bind=session.connection(), checkfirst=True)
+        refresh_series_summaries(session)
+        ver = 15
     return ver
 
 
 @event('manager.db_cleanup')
 def db_cleanup(manager, session):
-    # Clean up old undownloaded releases
-    result = (
-        session.query(EpisodeRelease)
-        .filter(EpisodeRelease.downloaded == False)
-        .filter(EpisodeRelease.first_seen < datetime.now() - timedelta(days=120))
-        .delete(False)
-    )
-    if result:
-        log.verbose('Removed %d undownloaded episode releases.', result)
-    # Clean up episodes without releases
-    result = (
-        session.query(Episode)
-        .filter(~Episode.releases.any())
-        .filter(~Episode.begins_series.any())
-        .delete(False)
-    )
-    if result:
-        log.verbose('Removed %d episodes without releases.', result)
-    # Clean up series without episodes that aren't in any tasks
-    result = (
-        session.query(Series)
-        .filter(~Series.episodes.any())
-        .filter(~Series.in_tasks.any())
-        .delete(False)
-    )
-    if result:
-        log.verbose('Removed %d series without episodes.', result)
+    """
+    Deletes in batches, and returns False when the database cleanup runs out of time. The next cleanup continues
+    where this one stopped.
+    """
+    # Series whose summaries need to be recalculated
+    series_ids = set()
+
+    def releases_deleted(ids):
+        series_ids.update(
+            row[0]
+            for row in session.query(Episode.series_id)
+            .join(EpisodeRelease, EpisodeRelease.episode_id == Episode.id)
+            .filter(EpisodeRelease.id.in_(ids))
+            .distinct()
+        )
+
+    def episodes_deleted(ids):
+        series_ids.update(
+            row[0]
+            for row in session.query(Episode.series_id).filter(Episode.id.in_(ids)).distinct()
+        )
+
+    steps = [
+        # Clean up old undownloaded releases
+        (
+            'undownloaded episode releases',
+            session.query(EpisodeRelease)
+            .filter(EpisodeRelease.downloaded == False)
+            .filter(EpisodeRelease.first_seen < datetime.now() - timedelta(days=120)),
+            EpisodeRelease.id,
+            releases_deleted,
+        ),
+        # Clean up episodes without releases
+        (
+            'episodes without releases',
+            session.query(Episode)
+            .filter(~Episode.releases.any())
+            .filter(~Episode.begins_series.any()),
+            Episode.id,
+            episodes_deleted,
+        ),
+        # Clean up series without episodes that aren't in any tasks
+        (
+            'series without episodes',
+            session.query(Series).filter(~Series.episodes.any()).filter(~Series.in_tasks.any()),
+            Series.id,
+            None,
+        ),
+    ]
+    finished = True
+    for description, query, id_column, on_batch in steps:
+        result, finished = delete_in_batches(query, id_column, manager, on_batch)
+        if result:
+            log.verbose('Removed %d %s.', result, description)
+        if not finished:
+            break
+    # Bulk deletes above bypass the ORM, update the summaries
+    orphaned = ~SeriesSummary.series_id.in_(select([Series.id]))
+    session.query(SeriesSummary).filter(orphaned).delete(False)
+    for chunk in chunked(list(series_ids)):
+        refresh_series_summaries(session, chunk)
+    return finished
 
 
 def set_alt_names(alt_names, db_series, session):
@@ -802,6 +912,14 @@ def get_all_entities(series, session, sort_by='age', reverse=False):
     return sorted(episodes + seasons, key=key, reverse=reverse)
 
 
+def episode_releases_query(episode, downloaded=None, session=None):
+    """ Return an unordered query of releases for a given episode """
+    releases = session.query(EpisodeRelease).filter(EpisodeRelease.episode_id == episode.id)
+    if downloaded is not None:
+        releases = releases.filter(EpisodeRelease.downloaded == downloaded)
+    return releases
+
+
 def get_episode_releases(
     episode,
     downloaded=None,
@@ -813,9 +931,7 @@ def get_episode_releases(
     session=None,
 ):
     """ Return all releases for a given episode """
-    releases = session.query(EpisodeRelease).filter(EpisodeRelease.episode_id == episode.id)
-    if downloaded is not None:
-        releases = releases.filter(EpisodeRelease.downloaded == downloaded)
+    releases = episode_releases_query(episode, downloaded=downloaded, session=session)
     if count:
         return releases.count()
     releases = releases.slice(start, stop).from_self()
@@ -826,6 +942,14 @@ def get_episode_releases(
     return releases.all()
 
 
+def season_releases_query(season, downloaded=None, session=None):
+    """ Return an unordered query of releases for a given season """
+    releases = session.query(SeasonRelease).filter(SeasonRelease.season_id == season.id)
+    if downloaded is not None:
+        releases = releases.filter(SeasonRelease.downloaded == downloaded)
+    return releases
+
+
 def get_season_releases(
     season,
     downloaded=None,
@@ -837,9 +961,7 @@ def get_season_releases(
     session=None,
 ):
     """ Return all releases for a given season """
-    releases = session.query(SeasonRelease).filter(SeasonRelease.season_id == season.id)
-    if downloaded is not None:
-        releases = releases.filter(SeasonRelease.downloaded == downloaded)
+    releases = season_releases_query(season, downloaded=downloaded, session=session)
     if count:
         return releases.count()
     releases = releases.slice(start, stop).from_self()
@@ -907,6 +1029,170 @@ def _add_alt_name(alt, db_series, series_name, session):
         log.debug('-> added %s', db_series_alt)
 
 
+def update_series_summary(series):
+    """
+    Recalculate the summary row of a single series.
+
+    :param Series series: Series instance, must be attached to a session
+    """
+    session = Session.object_session(series)
+    with session.no_autoflush:
+        summary = series.summary
+        if summary is None:
+            summary = series.summary = SeriesSummary()
+        summary.configured = session.query(
+            exists().where(SeriesTask.series_id == series.id)
+        ).scalar()
+        summary.episode_count = (
+            session.query(func.count(Episode.id)).filter(Episode.series_id == series.id).scalar()
+        )
+        summary.season_count = (
+            session.query(func.count(Season.id)).filter(Season.series_id == series.id).scalar()
+        )
+
+        episode_releases = (
+            session.query(
+                func.count(EpisodeRelease.id),
+                func.sum(case([(EpisodeRelease.downloaded == True, 1)], else_=0)),
+                func.max(case([(EpisodeRelease.downloaded == True, EpisodeRelease.first_seen)])),
+            )
+            .join(EpisodeRelease.episode)
+            .filter(Episode.series_id == series.id)
+            .one()
+        )
+        season_releases = (
+            session.query(
+                func.count(SeasonRelease.id),
+                func.sum(case([(SeasonRelease.downloaded == True, 1)], else_=0)),
+                func.max(case([(SeasonRelease.downloaded == True, SeasonRelease.first_seen)])),
+            )
+            .join(SeasonRelease.season)
+            .filter(Season.series_id == series.id)
+            .one()
+        )
+        summary.release_count = episode_releases[0] + season_releases[0]
+        summary.downloaded_count = (episode_releases[1] or 0) + (season_releases[1] or 0)
+        download_dates = [d for d in (episode_releases[2], season_releases[2]) if d]
+        summary.last_download_date = max(download_dates) if download_dates else None
+
+        # Premieres are shows that have only downloaded episodes up to S01E02
+        max_season, max_number = (
+            session.query(func.max(Episode.season), func.max(Episode.number))
+            .join(Episode.releases)
+            .filter(Episode.series_id == series.id)
+            .filter(EpisodeRelease.downloaded == True)
+            .one()
+        )
+        summary.premiere = (
+            max_season is not None
+            and max_number is not None
+            and max_season <= 1
+            and max_number <= 2
+        )
+
+        latest = get_latest_release(series)
+        summary.latest_episode_id = None
+        summary.latest_season_id = None
+        summary.latest_release_id = None
+        summary.behind = 0
+        if latest:
+            if latest.is_season:
+                summary.latest_season_id = latest.id
+            else:
+                summary.latest_episode_id = latest.id
+            latest_release = latest.latest_release
+            summary.latest_release_id = latest_release.id if latest_release else None
+            summary.behind = new_entities_after(latest)[0]
+    return summary
+
+
+def refresh_series_summaries(session, series_ids=None):
+    """
+    Recalculate summary rows for given series, or all series if `series_ids` is not given.
+
+    :param session: Database session to use
+    :param series_ids: Iterable of series ids
+    """
+    query = session.query(Series)
+    if series_ids is not None:
+        series_ids = list(series_ids)
+        if not series_ids:
+            return
+        query = query.filter(Series.id.in_(series_ids))
+    session.flush()
+    session.info['series_summary_updating'] = True
+    try:
+        for series in query:
+            update_series_summary(series)
+        session.flush()
+    finally:
+        session.info.pop('series_summary_updating', None)
+
+
+def refresh_configured_flags(session):
+    """Recalculate the `configured` flag of all series summaries from the series_tasks table."""
+    configured = exists().where(SeriesTask.series_id == SeriesSummary.series_id)
+    session.query(SeriesSummary).update({'configured': configured}, synchronize_session=False)
+
+
+def _summary_series(obj):
+    """Returns the series instance whose summary is affected by change of `obj`, if any."""
+    if isinstance(obj, Series):
+        return obj
+    if isinstance(obj, EpisodeRelease):
+        obj = obj.episode
+    elif isinstance(obj, SeasonRelease):
+        obj = obj.season
+    if isinstance(obj, (Episode, Season, SeriesTask)):
+        return obj.series
+
+
+def _collect_summary_change(mapper, connection, target):
+    """Remembers the series whose summary needs an update when a row of the series tables is written."""
+    session = Session.object_session(target)
+    if session is None or session.info.get('series_summary_updating'):
+        return
+    series = _summary_series(target)
+    if series is None:
+        return
+    session.info.setdefault('series_summary_dirty', set()).add(series)
+
+
+def _update_changed_summaries(session):
+    """
+    Recalculates the summaries of the series changed in this transaction once, when it is committed, rather than on
+    every (auto)flush. Until then queries of the session see the previous summaries.
+    """
+    # Changes not flushed yet may concern more series, the flush returns right away if there are none
+    session.flush()
+    dirty = session.info.get('series_summary_dirty')
+    if not dirty:
+        return
+    session.info['series_summary_dirty'] = set()
+    session.info['series_summary_updating'] = True
+    try:
+        for series in dirty:
+            state = sqlalchemy.inspect(series)
+            if state.persistent and not state.deleted:
+                # Written by the flush of the commit
+                update_series_summary(series)
+    finally:
+        session.info.pop('series_summary_updating', None)
+
+
+def _discard_summary_changes(session, previous_transaction):
+    if session.info.get('series_summary_dirty'):
+        session.info['series_summary_dirty'] = set()
+
+
+# Keep summaries in sync with changes done through the ORM, bulk operations must call `refresh_series_summaries`
+for _model in (Series, Episode, Season, EpisodeRelease, SeasonRelease, SeriesTask):
+    for _event in ('before_insert', 'before_update', 'before_delete'):
+        sqlalchemy.event.listen(_model, _event, _collect_summary_change)
+sqlalchemy.event.listen(Session, 'before_commit', _update_changed_summaries)
+sqlalchemy.event.listen(Session, 'after_soft_rollback', _discard_summary_changes)
+
+
 @with_session
 def get_series_summary(
     configured=None,
@@ -918,6 +1204,7 @@ def get_series_summary(
     descending=None,
     session=None,
     name=None,
+    after=None,
 ):
     """
     Return a query with results for all series.
@@ -927,6 +1214,9 @@ def get_series_summary(
     :param premieres: Return only shows with 1 season and less than 3 episodes
     :param count: Decides whether to return count of all shows or data itself
     :param session: Passed session
+    :param after: Id of the last series of previous page. When given, results continue after that series
+        (keyset pagination) and `start` is ignored.
+    :raises LookupError: If there is no series with id `after`
     :return:
     """
     if not configured:
@@ -935,32 +1225,61 @@ def get_series_summary(
         raise LookupError(
             '"configured" parameter must be either "configured", "unconfigured", or "all"'
         )
-    query = session.query(Series)
-    query = (
-        query.outerjoin(Series.episodes)
-        .outerjoin(Episode.releases)
-        .outerjoin(Series.in_tasks)
-        .group_by(Series.id)
-    )
+    if after is not None and not session.query(Series.id).filter(Series.id == after).first():
+        raise LookupError('series with id %s not found' % after)
+    # Series without a summary row yet (e.g. added with bulk inserts) are still listed
+    query = session.query(Series).outerjoin(Series.summary)
+    no_summary = SeriesSummary.series_id == None
     if configured == 'configured':
-        query = query.having(func.count(SeriesTask.id) >= 1)
+        query = query.filter(
+            or_(SeriesSummary.configured == True, and_(no_summary, Series.in_tasks.any()))
+        )
     elif configured == 'unconfigured':
-        query = query.having(func.count(SeriesTask.id) < 1)
+        query = query.filter(
+            or_(SeriesSummary.configured == False, and_(no_summary, ~Series.in_tasks.any()))
+        )
     if name:
         query = query.filter(Series._name_normalized.contains(name))
     if premieres:
-        query = (
-            query.having(func.max(Episode.season) <= 1).having(func.max(Episode.number) <= 2)
-        ).filter(EpisodeRelease.downloaded == True)
+        query = query.filter(SeriesSummary.premiere == True)
     if count:
-        return query.group_by(Series).count()
+        return query.count()
     if sort_by == 'show_name':
         order_by = Series.name
     else:
-        order_by = func.max(EpisodeRelease.first_seen)
-    query = query.order_by(desc(order_by)) if descending else query.order_by(order_by)
+        order_by = func.coalesce(SeriesSummary.last_download_date, datetime.min)
+    if after is not None:
+        last = (
+            session.query(order_by)
+            .select_from(Series)
+            .outerjoin(Series.summary)
+            .filter(Series.id == after)
+            .scalar()
+        )
+        if descending:
+            query = query.filter(or_(order_by < last, and_(order_by == last, Series.id < after)))
+        else:
+            query = query.filter(or_(order_by > last, and_(order_by == last, Series.id > after)))
+        if stop is not None:
+            stop -= start or 0
+        start = None
+    if descending:
+        query = query.order_by(desc(order_by), desc(Series.id))
+    else:
+        query = query.order_by(order_by, Series.id)
+    query = query.options(
+        contains_eager(Series.summary)
+        .joinedload(SeriesSummary.latest_episode)
+        .selectinload(Episode.releases),
+        contains_eager(Series.summary)
+        .joinedload(SeriesSummary.latest_season)
+        .selectinload(Season.releases),
+        joinedload(Series.begin).selectinload(Episode.releases),
+        selectinload(Series.alternate_names),
+        selectinload(Series.in_tasks),
+    )
 
-    return query.slice(start, stop).from_self()
+    return query.slice(start, stop)
 
 
 def auto_identified_by(series):
@@ -75,6 +75,7 @@ class GenSeries(object):
             log.info('There are still %d left to be processed!' % len(self.entries))
             # rerun ad infinitum, also commits session between them
             task._rerun = True
+            task._fresh_input = True
             task._rerun_count = 0
 
 
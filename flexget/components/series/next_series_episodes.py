@@ -273,7 +273,9 @@ class NextSeriesEpisodes(object):
                 # we keep searching as long as matches are found!
                 # TODO: this should ideally be in discover so it would be more generic
                 task.max_reruns += 1
-                task.rerun(plugin='next_series_episodes', reason='Look for next episode')
+                task.rerun(
+                    plugin='next_series_episodes', reason='Look for next episode', fresh_input=True
+                )
             elif db_release:
                 # There are know releases of this episode, but none were accepted
                 return
@@ -297,7 +299,11 @@ class NextSeriesEpisodes(object):
                         '%s %s not found, rerunning to look for next season'
                         % (entry['series_name'], entry['series_id'])
                     )
-                    task.rerun(plugin='next_series_episodes', reason='Look for next season')
+                    task.rerun(
+                        plugin='next_series_episodes',
+                        reason='Look for next season',
+                        fresh_input=True,
+                    )
 
 
 @event('plugin.register')
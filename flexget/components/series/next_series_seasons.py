@@ -245,7 +245,7 @@ class NextSeriesSeasons(object):
                     # we keep searching as long as matches are found!
                     # TODO: this should ideally be in discover so it would be more generic
                     task.max_reruns += 1
-                    task.rerun(plugin=plugin_name, reason='Look for next season')
+                    task.rerun(plugin=plugin_name, reason='Look for next season', fresh_input=True)
             elif latest and not latest.completed:
                 # There are known releases of this season, but none were accepted
                 return
@@ -71,6 +71,7 @@ def clean_series(manager):
             removed_tasks = removed_tasks.filter(not_(db.SeriesTask.name.in_(manager.tasks)))
         deleted = removed_tasks.delete(synchronize_session=False)
         if deleted:
+            db.refresh_configured_flags(session)
             session.commit()
 
 
@@ -1053,9 +1054,10 @@ class FilterSeries(FilterSeriesBase):
     def on_task_learn(self, task, config):
         """Learn succeeded episodes"""
         log.debug('on_task_learn')
-        for entry in task.accepted:
-            if 'series_releases' in entry:
-                with Session() as session:
+        learned_series = set()
+        with Session() as session:
+            for entry in task.accepted:
+                if 'series_releases' in entry:
                     season_num = ep_num = 0
                     if entry['season_pack']:
                         season_num = (
@@ -1063,21 +1065,36 @@ class FilterSeries(FilterSeriesBase):
                             .filter(db.SeasonRelease.id.in_(entry['series_releases']))
                             .update({'downloaded': True}, synchronize_session=False)
                         )
+                        learned_series.update(
+                            series_id
+                            for (series_id,) in session.query(db.Season.series_id)
+                            .join(db.Season.releases)
+                            .filter(db.SeasonRelease.id.in_(entry['series_releases']))
+                        )
                     else:
                         ep_num = (
                             session.query(db.EpisodeRelease)
                             .filter(db.EpisodeRelease.id.in_(entry['series_releases']))
                             .update({'downloaded': True}, synchronize_session=False)
                         )
+                        learned_series.update(
+                            series_id
+                            for (series_id,) in session.query(db.Episode.series_id)
+                            .join(db.Episode.releases)
+                            .filter(db.EpisodeRelease.id.in_(entry['series_releases']))
+                        )
 
-                log.debug(
-                    'marking %s episode releases and %s season releases as downloaded for `%s`',
-                    ep_num,
-                    season_num,
-                    entry,
-                )
-            else:
-                log.debug('`%s` is not a series', entry['title'])
+                    log.debug(
+                        'marking %s episode releases and %s season releases as downloaded '
+                        'for `%s`',
+                        ep_num,
+                        season_num,
+                        entry,
+                    )
+                else:
+                    log.debug('`%s` is not a series', entry['title'])
+            # Releases were updated in bulk, summaries need to be refreshed manually
+            db.refresh_series_summaries(session, learned_series)
 
 
 class SeriesDBManager(FilterSeriesBase):
@@ -1095,6 +1112,7 @@ class SeriesDBManager(FilterSeriesBase):
 
             session.query(db.SeriesTask).filter(db.SeriesTask.name == task.name).delete()
             if not task.config.get('series'):
+                db.refresh_configured_flags(session)
                 return
             config = self.prepare_config(task.config['series'])
 
@@ -1159,6 +1177,7 @@ class SeriesDBManager(FilterSeriesBase):
 
             if add_series_tasks:
                 session.bulk_save_objects(add_series_tasks.values())
+            db.refresh_configured_flags(session)
 
 
 @event('plugin.register')
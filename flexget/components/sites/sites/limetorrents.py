@@ -10,7 +10,7 @@ from flexget import plugin
 from flexget.entry import Entry
 from flexget.event import event
 from flexget.utils.requests import RequestException
-from flexget.utils.soup import get_soup
+from flexget.utils.soup import get_soup, SoupStrainer
 from flexget.components.sites.utils import torrent_availability
 from flexget.utils.tools import parse_filesize
 
@@ -104,7 +104,8 @@ class Limetorrents(object):
                 log.error('Limetorrents request failed: %s', e)
                 continue
 
-            soup = get_soup(page.content)
+            # Only the result tables are needed
+            soup = get_soup(page.content, parse_only=SoupStrainer('table'))
             if soup.find('a', attrs={'class': 'csprite_dl14'}) is not None:
                 for link in soup.findAll('a', attrs={'class': 'csprite_dl14'}):
 
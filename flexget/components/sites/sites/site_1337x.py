@@ -9,7 +9,7 @@ from flexget import plugin
 from flexget.entry import Entry
 from flexget.event import event
 from flexget.utils.requests import RequestException
-from flexget.utils.soup import get_soup
+from flexget.utils.soup import get_soup, SoupStrainer
 from flexget.components.sites.utils import torrent_availability
 from flexget.utils.tools import parse_filesize
 from flexget.components.sites.urlrewriting import UrlRewritingError
@@ -109,7 +109,9 @@ class Site1337x(object):
                 log.error('1337x request failed: %s', e)
                 continue
 
-            soup = get_soup(page.content)
+            soup = get_soup(
+                page.content, parse_only=SoupStrainer('div', attrs={'class': 'table-list-wrap'})
+            )
             if soup.find('div', attrs={'class': 'table-list-wrap'}) is not None:
                 for link in soup.find('div', attrs={'class': 'table-list-wrap'}).findAll(
                     'a', href=re.compile('^/torrent/')
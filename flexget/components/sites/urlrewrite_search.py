@@ -25,6 +25,8 @@ class PluginSearch(object):
 
     .. note:: Some url rewriters will use search plugins automatically if entry url
               points into a search page.
+
+    Several entries are searched at the same time when `max_workers` is set in the `urlrewriting` options.
     """
 
     schema = {
@@ -48,46 +50,49 @@ class PluginSearch(object):
         for p in plugin.get_plugins(interface='search'):
             plugins[p.name] = p.instance
 
-        # search accepted
-        for entry in task.accepted:
-            # loop through configured searches
-            for name in config:
-                search_config = None
-                if isinstance(name, dict):
-                    # the name is the first/only key in the dict.
-                    name, search_config = list(name.items())[0]
-                log.verbose('Searching `%s` from %s' % (entry['title'], name))
-                try:
-                    try:
-                        results = plugins[name].search(
-                            task=task, entry=entry, config=search_config
-                        )
-                    except TypeError:
-                        # Old search api did not take task argument
-                        log.warning('Search plugin %s does not support latest search api.' % name)
-                        results = plugins[name].search(entry, search_config)
-                    matcher = SequenceMatcher(a=entry['title'])
-                    for result in results:
-                        matcher.set_seq2(result['title'])
-                        if matcher.ratio() > 0.9:
-                            log.debug('Found url: %s', result['url'])
-                            entry['url'] = result['url']
-                            break
-                        else:
-                            log.debug('Match %s is not close enough', result['title'])
-                    else:
-                        continue
-                    break
-                except (plugin.PluginError, plugin.PluginWarning) as pw:
-                    log.verbose('Failed: %s' % pw.value)
-                    continue
-
-            # Search failed
+        # search accepted, several entries at a time if url rewriting is configured to do so
+        entries = list(task.accepted)
+        found = plugin.get('urlrewriting', self).map_entries(
+            task, lambda entry: self.search_entry(task, entry, config, plugins), entries
+        )
+        # Entries are only rejected from the task thread
+        for entry, url in zip(entries, found):
+            if url:
+                entry['url'] = url
             else:
+                # Search failed
                 # If I don't have a URL, doesn't matter if I'm immortal...
                 entry['immortal'] = False
                 entry.reject('search failed')
 
+    def search_entry(self, task, entry, config, plugins):
+        """Returns url of the first close enough search result for `entry`, trying searches in configured order."""
+        # loop through configured searches
+        for name in config:
+            search_config = None
+            if isinstance(name, dict):
+                # the name is the first/only key in the dict.
+                name, search_config = list(name.items())[0]
+            log.verbose('Searching `%s` from %s' % (entry['title'], name))
+            try:
+                try:
+                    results = plugins[name].search(task=task, entry=entry, config=search_config)
+                except TypeError:
+                    # Old search api did not take task argument
+                    log.warning('Search plugin %s does not support latest search api.' % name)
+                    results = plugins[name].search(entry, search_config)
+                matcher = SequenceMatcher(a=entry['title'])
+                for result in results:
+                    matcher.set_seq2(result['title'])
+                    if matcher.ratio() > 0.9:
+                        log.debug('Found url: %s', result['url'])
+                        return result['url']
+                    else:
+                        log.debug('Match %s is not close enough', result['title'])
+            except (plugin.PluginError, plugin.PluginWarning) as pw:
+                log.verbose('Failed: %s' % pw.value)
+        return None
+
 
 @event('plugin.register')
 def register_plugin():
@@ -1,13 +1,20 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import copy
 import logging
 
 from flexget import plugin
 from flexget.event import event
+from flexget.utils.tools import parallel_map
 
 log = logging.getLogger('urlrewriter')
 
+# Number of entries rewritten at the same time, rewrites are resolved one entry at a time by default
+MAX_WORKERS = 1
+# Number of concurrent requests to a single host while rewriting
+MAX_DOMAIN_WORKERS = 2
+
 
 class UrlRewritingError(Exception):
     def __init__(self, value):
@@ -20,64 +27,128 @@ class UrlRewritingError(Exception):
 class PluginUrlRewriting(object):
     """
     Provides URL rewriting framework
+
+    Rewrites can be resolved for several entries at the same time. Rewrites are remembered for the remainder of the
+    task execution, so reruns of the task do not fetch the same pages again. Rewriters which are also search plugins
+    are not remembered, as they may search with other fields of the entry than its url.
+
+    Example::
+
+      urlrewriting:
+        max_workers: 4
     """
 
+    schema = {
+        'type': 'object',
+        'properties': {
+            'max_workers': {'type': 'integer', 'minimum': 1, 'default': MAX_WORKERS},
+            'domain_workers': {'type': 'integer', 'minimum': 1, 'default': MAX_DOMAIN_WORKERS},
+        },
+        'additionalProperties': False,
+    }
+
     def __init__(self):
         self.disabled_rewriters = []
+        # Fields set by each rewrite, by task name and (rewriter name, url)
+        self.rewrite_cache = {}
+
+    def prepare_config(self, config):
+        config = dict(config or {})
+        config.setdefault('max_workers', MAX_WORKERS)
+        config.setdefault('domain_workers', MAX_DOMAIN_WORKERS)
+        return config
+
+    def on_task_start(self, task, config):
+        # Start phase is skipped on reruns, the cache is kept until the task exits
+        self.rewrite_cache[task.name] = {}
 
     def on_task_urlrewrite(self, task, config):
-        log.debug('Checking %s entries', len(task.accepted))
-        # try to urlrewrite all accepted
-        for entry in task.accepted:
+        entries = list(task.accepted)
+        log.debug('Checking %s entries', len(entries))
+
+        def rewrite(entry):
             try:
                 self.url_rewrite(task, entry)
             except UrlRewritingError as e:
                 log.warning(e.value)
+                return True
+
+        # try to urlrewrite all accepted
+        errors = self.map_entries(task, rewrite, entries)
+        # Entries are only failed from the task thread
+        for entry, error in zip(entries, errors):
+            if error:
                 entry.fail()
 
+    def on_task_exit(self, task, config):
+        self.rewrite_cache.pop(task.name, None)
+
+    on_task_abort = on_task_exit
+
     # API method
-    def url_rewritable(self, task, entry):
-        """Return True if entry is urlrewritable by registered rewriter."""
+    def map_entries(self, task, func, entries):
+        """
+        Calls `func` with each of `entries`, from several threads if the task configures `max_workers` for url
+        rewriting. Requests made with `task.requests` meanwhile are limited to `domain_workers` per host.
+
+        :return: List of the results of `func`, in the order of `entries`
+        """
+        config = self.prepare_config(task.config.get('urlrewriting'))
+        previous_host_requests = task.requests.max_host_requests
+        task.requests.max_host_requests = config['domain_workers']
+        try:
+            return parallel_map(
+                func, entries, max_workers=config['max_workers'], name='urlrewrite'
+            )
+        finally:
+            task.requests.max_host_requests = previous_host_requests
+
+    # API method
+    def find_rewriter(self, task, entry):
+        """Returns the first enabled rewriter which can rewrite url of `entry`, or None."""
         for urlrewriter in plugin.get_plugins(interface='urlrewriter'):
             if urlrewriter.name in self.disabled_rewriters:
                 log.trace('Skipping rewriter %s since it\'s disabled', urlrewriter.name)
                 continue
             log.trace('checking urlrewriter %s', urlrewriter.name)
             if urlrewriter.instance.url_rewritable(task, entry):
-                return True
-        return False
+                return urlrewriter
+        return None
+
+    # API method
+    def url_rewritable(self, task, entry):
+        """Return True if entry is urlrewritable by registered rewriter."""
+        return self.find_rewriter(task, entry) is not None
 
     # API method - why priority though?
     @plugin.priority(plugin.PRIORITY_FIRST)
     def url_rewrite(self, task, entry):
         """Rewrites given entry url. Raises UrlRewritingError if failed."""
+        cache = self.rewrite_cache.get(task.name)
         tries = 0
-        while self.url_rewritable(task, entry) and entry.accepted:
+        while entry.accepted:
+            # Each rewritten url is handed to the first rewriter that accepts it, until none does
+            urlrewriter = self.find_rewriter(task, entry)
+            if urlrewriter is None:
+                return
             tries += 1
             if tries > 20:
                 raise UrlRewritingError(
                     'URL rewriting was left in infinite loop while rewriting url for %s, '
                     'some rewriter is returning always True' % entry
                 )
-            for urlrewriter in plugin.get_plugins(interface='urlrewriter'):
-                name = urlrewriter.name
-                if name in self.disabled_rewriters:
-                    log.trace('Skipping rewriter %s since it\'s disabled', name)
-                    continue
+            name = urlrewriter.name
+            old_url = entry['url']
+            key = (name, old_url)
+            cacheable = cache is not None and 'search' not in urlrewriter.interfaces
+            if cacheable and key in cache:
+                log.debug('Using earlier rewrite of %s by %s', old_url, name)
+                entry.update(copy.deepcopy(cache[key]))
+            else:
+                before = dict(entry.store)
                 try:
-                    if urlrewriter.instance.url_rewritable(task, entry):
-                        old_url = entry['url']
-                        log.debug('Url rewriting %s' % entry['url'])
-                        urlrewriter.instance.url_rewrite(task, entry)
-                        if entry['url'] != old_url:
-                            if entry.get('urls') and old_url in entry.get('urls'):
-                                entry['urls'][entry['urls'].index(old_url)] = entry['url']
-                            log.info(
-                                'Entry \'%s\' URL rewritten to %s (with %s)',
-                                entry['title'],
-                                entry['url'],
-                                name,
-                            )
+                    log.debug('Url rewriting %s' % entry['url'])
+                    urlrewriter.instance.url_rewrite(task, entry)
                 except UrlRewritingError as r:
                     # increase failcount
                     # count = self.shared_cache.storedefault(entry['url'], 1)
@@ -90,6 +161,23 @@ class PluginUrlRewriting(object):
                     raise UrlRewritingError(
                         '%s: Internal error with url %s' % (name, entry['url'])
                     )
+                if cacheable and entry.accepted:
+                    cache[key] = copy.deepcopy(
+                        dict(
+                            (field, value)
+                            for field, value in entry.store.items()
+                            if before.get(field) is not value and not entry.is_lazy(field)
+                        )
+                    )
+            if entry['url'] != old_url:
+                if entry.get('urls') and old_url in entry.get('urls'):
+                    entry['urls'][entry['urls'].index(old_url)] = entry['url']
+                log.info(
+                    'Entry \'%s\' URL rewritten to %s (with %s)',
+                    entry['title'],
+                    entry['url'],
+                    name,
+                )
 
 
 class DisableUrlRewriter(object):
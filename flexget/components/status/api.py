@@ -32,6 +32,16 @@ class ObjectsContainer(object):
             'start': {'type': 'string', 'format': 'date-time'},
             'succeeded': {'type': 'boolean'},
             'task_id': {'type': 'integer'},
+            'queue_wait': {'type': ['number', 'null']},
+            'http_requests': {'type': ['integer', 'null']},
+            'db_queries': {'type': ['integer', 'null']},
+            'phase_durations': {
+                'type': 'object',
+                'additionalProperties': {'type': 'number'},
+                'description': 'Seconds spent in each phase',
+            },
+            'reruns': {'type': ['integer', 'null']},
+            'rerun_time': {'type': ['number', 'null']},
         },
         'additionalProperties': False,
     }
@@ -3,9 +3,20 @@ import logging
 import datetime
 from datetime import timedelta
 
-from flexget.utils.database import with_session
-from flexget.utils.sqlalchemy_utils import create_index
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, select, func, Index
+from flexget.utils.database import with_session, json_synonym
+from flexget.utils.sqlalchemy_utils import create_index, table_add_column
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Unicode,
+    Float,
+    DateTime,
+    Boolean,
+    select,
+    func,
+    Index,
+)
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.schema import ForeignKey
 from sqlalchemy.orm import relation
@@ -14,7 +25,10 @@ from flexget import db_schema
 from flexget.event import event
 
 log = logging.getLogger('status.db')
-Base = db_schema.versioned_base('status', 2)
+Base = db_schema.versioned_base('status', 4)
+
+# Maximum amount of executions kept per task
+MAX_EXECUTIONS = 1000
 
 
 @db_schema.upgrade('status')
@@ -23,6 +37,18 @@ def upgrade(ver, session):
         # Creates the executions table index
         create_index('status_execution', session, 'task_id', 'start', 'end', 'succeeded')
         ver = 2
+    if ver == 2:
+        log.info('Adding execution statistics columns to status_execution table.')
+        table_add_column('status_execution', 'queue_wait', Float, session)
+        table_add_column('status_execution', 'http_requests', Integer, session)
+        table_add_column('status_execution', 'db_queries', Integer, session)
+        table_add_column('status_execution', 'phase_durations', Unicode, session)
+        ver = 3
+    if ver == 3:
+        log.info('Adding rerun statistics columns to status_execution table.')
+        table_add_column('status_execution', 'reruns', Integer, session)
+        table_add_column('status_execution', 'rerun_time', Float, session)
+        ver = 4
     return ver
 
 
@@ -70,6 +96,14 @@ class TaskExecution(Base):
     rejected = Column(Integer)
     failed = Column(Integer)
     abort_reason = Column(String, nullable=True)
+    # Execution statistics, durations are in seconds
+    queue_wait = Column(Float, nullable=True)
+    http_requests = Column(Integer, nullable=True)
+    db_queries = Column(Integer, nullable=True)
+    _phase_durations = Column('phase_durations', Unicode, nullable=True)
+    phase_durations = json_synonym('_phase_durations')
+    reruns = Column(Integer, nullable=True)
+    rerun_time = Column(Float, nullable=True)
 
     def __repr__(self):
         return (
@@ -99,6 +133,12 @@ class TaskExecution(Base):
             'rejected': self.rejected,
             'failed': self.failed,
             'abort_reason': self.abort_reason,
+            'queue_wait': self.queue_wait,
+            'http_requests': self.http_requests,
+            'db_queries': self.db_queries,
+            'phase_durations': self.phase_durations if self._phase_durations else {},
+            'reruns': self.reruns,
+            'rerun_time': self.rerun_time,
         }
 
 
@@ -129,6 +169,22 @@ def db_cleanup(manager, session):
         log.verbose('Removed %s task executions from history older than 1 year', result)
 
 
+def trim_executions(task_id, session, keep=MAX_EXECUTIONS):
+    """Removes the oldest executions of a task, keeping `keep` latest ones."""
+    latest = (
+        session.query(TaskExecution.id)
+        .filter(TaskExecution.task_id == task_id)
+        .order_by(TaskExecution.start.desc())
+        .limit(keep)
+    )
+    return (
+        session.query(TaskExecution)
+        .filter(TaskExecution.task_id == task_id)
+        .filter(~TaskExecution.id.in_(latest.subquery()))
+        .delete(synchronize_session=False)
+    )
+
+
 @with_session
 def get_status_tasks(
     start=None, stop=None, order_by='last_execution_time', descending=True, session=None
@@ -2,15 +2,149 @@ from __future__ import unicode_literals, division, absolute_import
 
 import datetime
 import logging
+import threading
+import time
+from collections import OrderedDict
 from datetime import timedelta
 
+import sqlalchemy
+from sqlalchemy.engine import Engine
+
 from flexget import plugin
-from flexget.event import event
+from flexget.event import event, fire_event
 from flexget.manager import Session
+from flexget.utils.requests import get_request_count
 from . import db
 
 log = logging.getLogger('status')
 
+# Number of database statements executed, used for execution statistics
+_query_count = 0
+_query_count_lock = threading.Lock()
+
+
+def _count_query(*args):
+    global _query_count
+    with _query_count_lock:
+        _query_count += 1
+
+
+sqlalchemy.event.listen(Engine, 'before_cursor_execute', _count_query)
+
+
+class ExecutionTelemetry(object):
+    """
+    Collects statistics of a single task execution: time spent in each phase, entry counts, amount of HTTP requests
+    and database statements, how long the task waited in the task queue, and the amount and duration of reruns.
+
+    HTTP requests and database statements are counted process wide while the task runs, since tasks are executed one
+    at a time.
+    """
+
+    def __init__(self, task):
+        self.task_name = task.name
+        self.task_id = task.id
+        self.start = time.time()
+        self.queue_wait = max(self.start - task.queued_time, 0) if task.queued_time else None
+        self.phases = OrderedDict()
+        self.phase = None
+        self._plugin_start = None
+        self._http_start = get_request_count()
+        self._db_start = _query_count
+        self.reruns = 0
+        # Reruns which reused the entries of the previous input phase
+        self.reused_inputs = 0
+        self._rerun_start = None
+
+    @property
+    def http_requests(self):
+        return get_request_count() - self._http_start
+
+    @property
+    def db_queries(self):
+        return _query_count - self._db_start
+
+    @property
+    def rerun_time(self):
+        """Seconds spent in reruns of the task."""
+        if self._rerun_start is None:
+            return 0
+        return time.time() - self._rerun_start
+
+    def rerun_started(self, reused_input):
+        self.reruns += 1
+        if reused_input:
+            self.reused_inputs += 1
+        if self._rerun_start is None:
+            self._rerun_start = time.time()
+
+    def plugin_started(self):
+        self._plugin_start = time.time()
+
+    def plugin_finished(self, phase):
+        if self._plugin_start is None:
+            return
+        self.phases[phase] = self.phases.get(phase, 0) + time.time() - self._plugin_start
+        self._plugin_start = None
+
+    def to_dict(self, task, status):
+        return {
+            'task': self.task_name,
+            'task_id': self.task_id,
+            'status': status,
+            'phase': self.phase,
+            'elapsed': round(time.time() - self.start, 3),
+            'queue_wait': round(self.queue_wait, 3) if self.queue_wait is not None else None,
+            'phase_durations': dict((p, round(d, 3)) for p, d in self.phases.items()),
+            'produced': len(task.all_entries),
+            'accepted': len(task.accepted),
+            'rejected': len(task.rejected),
+            'failed': len(task.failed),
+            'http_requests': self.http_requests,
+            'db_queries': self.db_queries,
+            'reruns': self.reruns,
+            'reused_inputs': self.reused_inputs,
+            'rerun_time': round(self.rerun_time, 3),
+        }
+
+
+def publish(task, status):
+    """Fires the `task.execute.telemetry` event with the current statistics of `task`."""
+    fire_event('task.execute.telemetry', task, task.telemetry.to_dict(task, status))
+
+
+@event('task.execute.started')
+def start_telemetry(task):
+    task.telemetry = ExecutionTelemetry(task)
+    publish(task, 'started')
+
+
+@event('task.execute.rerun')
+def rerun_started(task, reused_input):
+    telemetry = getattr(task, 'telemetry', None)
+    if telemetry is not None:
+        telemetry.rerun_started(reused_input)
+
+
+@event('task.execute.before_plugin')
+def before_plugin(task, plugin_name):
+    telemetry = getattr(task, 'telemetry', None)
+    if telemetry is None:
+        return
+    if telemetry.phase != task.current_phase:
+        if telemetry.phase is not None:
+            # Previous phase has completed
+            publish(task, 'running')
+        telemetry.phase = task.current_phase
+    telemetry.plugin_started()
+
+
+@event('task.execute.after_plugin')
+def after_plugin(task, plugin_name):
+    telemetry = getattr(task, 'telemetry', None)
+    if telemetry is not None:
+        telemetry.plugin_finished(task.current_phase)
+
 
 class Status(object):
     """Track health status of tasks"""
@@ -43,6 +177,7 @@ class Status(object):
         self.execution.rejected = len(task.rejected)
         self.execution.failed = len(task.failed)
 
+    @plugin.priority(plugin.PRIORITY_LAST)
     def on_task_exit(self, task, config):
         with Session() as session:
             if self.execution is None:
@@ -51,7 +186,18 @@ class Status(object):
                 self.execution.succeeded = False
                 self.execution.abort_reason = task.abort_reason
             self.execution.end = datetime.datetime.now()
-            session.merge(self.execution)
+            telemetry = getattr(task, 'telemetry', None)
+            if telemetry is not None:
+                self.execution.queue_wait = telemetry.queue_wait
+                self.execution.http_requests = telemetry.http_requests
+                self.execution.db_queries = telemetry.db_queries
+                self.execution.phase_durations = telemetry.phases
+                self.execution.reruns = telemetry.reruns
+                self.execution.rerun_time = telemetry.rerun_time
+                publish(task, 'aborted' if task.aborted else 'complete')
+            execution = session.merge(self.execution)
+            session.flush()
+            db.trim_executions(execution.task_id, session)
 
     on_task_abort = on_task_exit
 
@@ -286,6 +286,19 @@ def is_valid_template(instance):
     return get_template(instance) is not None
 
 
+@format_checker.checks('expression', raises=ValueError)
+def is_expression(instance):
+    if not isinstance(instance, str_types) or template.environment is None:
+        return True
+    if '{?' in instance:
+        # Contains variables which have not been substituted yet, it can only be checked once they are
+        return True
+    try:
+        return template.compile_expression(instance)
+    except template.RenderError as e:
+        raise ValueError(e.args[0])
+
+
 def set_error_message(error):
     """
     Create user facing error message from a :class:`jsonschema.ValidationError` `error`
@@ -400,11 +413,25 @@ def validate_oneOf(validator, oneOf, instance, schema):
         yield e
 
 
+def validate_propertyNames(validator, property_names, instance, schema):
+    """Backport of the draft 6 `propertyNames` keyword, validates each key of an object against a schema."""
+    if not validator.is_type(instance, 'object'):
+        return
+    for key in instance:
+        for error in validator.descend(instance=key, schema=property_names, path=key):
+            yield error
+
+
 def validate_deprecated(validator, message, instance, schema):
     """Not really a validator, just warns if deprecated section of config is being used."""
     log.warning(message)
 
 
-validators = {'anyOf': validate_anyOf, 'oneOf': validate_oneOf, 'deprecated': validate_deprecated}
+validators = {
+    'anyOf': validate_anyOf,
+    'oneOf': validate_oneOf,
+    'propertyNames': validate_propertyNames,
+    'deprecated': validate_deprecated,
+}
 
 SchemaValidator = jsonschema.validators.extend(jsonschema.Draft4Validator, validators)
@@ -3,6 +3,7 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 from future.utils import PY2, native_str, text_type
 
 import copy
+import datetime
 import functools
 import logging
 
@@ -12,6 +13,20 @@ from flexget.utils.template import render_from_entry, FlexGetTemplate
 
 log = logging.getLogger('entry')
 
+# Field values of these types are never modified in place, so copies of an entry can share them
+IMMUTABLE_TYPES = (
+    text_type,
+    native_str,
+    bytes,
+    int,
+    float,
+    bool,
+    type(None),
+    datetime.date,
+    datetime.time,
+    datetime.timedelta,
+)
+
 
 class EntryUnicodeError(Exception):
     """This exception is thrown when trying to set non-unicode compatible field value to entry."""
@@ -42,6 +57,8 @@ class Entry(LazyDict):
         super(Entry, self).__init__()
         self.traces = []
         self.snapshots = {}
+        # Weak references to the EntryContainers holding this entry, which are told about state changes
+        self._containers = []
         self._state = 'undecided'
         self._hooks = {'accept': [], 'reject': [], 'fail': [], 'complete': []}
         self.task = None
@@ -164,6 +181,21 @@ class Entry(LazyDict):
         # Run entry on_complete hooks
         self.run_hooks('complete', **kwargs)
 
+    @property
+    def _state(self):
+        return self._state_value
+
+    @_state.setter
+    def _state(self, state):
+        old_state = self.__dict__.get('_state_value')
+        self._state_value = state
+        if old_state is None or old_state == state:
+            return
+        for ref in self._containers:
+            container = ref()
+            if container is not None:
+                container._state_changed(self, old_state, state)
+
     @property
     def state(self):
         return self._state
@@ -184,6 +216,20 @@ class Entry(LazyDict):
     def undecided(self):
         return self._state == 'undecided'
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Copies of the entry do not belong to the containers of the original
+        state.pop('_containers', None)
+        return state
+
+    def __setstate__(self, state):
+        state = dict(state)
+        if '_state' in state:
+            # Pickled by an older version
+            state['_state_value'] = state.pop('_state')
+        self.__dict__.update(state)
+        self._containers = []
+
     def __setitem__(self, key, value):
         # Enforce unicode compatibility.
         if PY2 and isinstance(value, native_str):
@@ -260,6 +306,34 @@ class Entry(LazyDict):
                 log.warning('Snapshot `%s` is being overwritten for `%s`' % (name, self['title']))
             self.snapshots[name] = snapshot
 
+    def clone(self):
+        """
+        Returns a copy of this entry, with its state, traces, snapshots and hooks. Hooks and their arguments are
+        shared with the copy, use :func:`clone_entries` to copy a group of entries with hooks referring to each other.
+
+        Cheaper than a deepcopy, field values of :data:`IMMUTABLE_TYPES` are shared with the copy and only other
+        values are copied. Lazy fields stay lazy in the copy.
+        """
+        new = type(self)()
+        lazy_lookup = None
+        for field, value in self.store.items():
+            if isinstance(value, IMMUTABLE_TYPES):
+                new.store[field] = value
+            elif isinstance(value, LazyLookup):
+                if lazy_lookup is None:
+                    lazy_lookup = LazyLookup(new)
+                    lazy_lookup.func_list = list(value.func_list)
+                    lazy_lookup.key_list = list(value.key_list)
+                new.store[field] = lazy_lookup
+            else:
+                new.store[field] = copy.deepcopy(value)
+        new.traces = list(self.traces)
+        new.snapshots = dict(self.snapshots)
+        new._hooks = dict((action, list(funcs)) for action, funcs in self._hooks.items())
+        new._state = self._state
+        new.task = self.task
+        return new
+
     def update_using_map(self, field_map, source_item, ignore_none=False):
         """
         Populates entry fields from a source object using a dictionary that maps from entry field names to
@@ -312,3 +386,54 @@ class Entry(LazyDict):
 
     def __repr__(self):
         return '<Entry(title=%s,state=%s)>' % (self['title'], self._state)
+
+
+def clone_entries(entries):
+    """
+    Returns clones of `entries`, see :meth:`Entry.clone`.
+
+    Keyword arguments of hooks referring to any of `entries`, directly or in lists, tuples, sets and dicts, are rebound
+    to the clones. Those containers are copied once, and shared by the clones like they were by the originals, so hooks
+    keeping state about a group of entries (e.g. the remaining search results of a discover query) work on the clones
+    independently from the originals. Other hook arguments are shared with the originals.
+    """
+    entries = list(entries)
+    clones = [entry.clone() for entry in entries]
+    memo = dict((id(entry), clone) for entry, clone in zip(entries, clones))
+    for clone in clones:
+        clone._hooks = dict(
+            (action, [_rebind_hook(func, memo) for func in funcs])
+            for action, funcs in clone._hooks.items()
+        )
+    return clones
+
+
+def _rebind_hook(func, memo):
+    if not isinstance(func, functools.partial) or not func.keywords:
+        return func
+    keywords = dict((key, _rebind(value, memo)) for key, value in func.keywords.items())
+    if all(keywords[key] is value for key, value in func.keywords.items()):
+        return func
+    return functools.partial(func.func, *func.args, **keywords)
+
+
+def _rebind(value, memo):
+    """Returns `value` with the entries in `memo` replaced, copying the containers holding any of them."""
+    if id(value) in memo:
+        return memo[id(value)]
+    if isinstance(value, Entry):
+        return value
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_rebind(item, memo) for item in value]
+        if all(new is old for new, old in zip(items, value)):
+            return value
+        rebound = type(value)(items)
+    elif isinstance(value, dict):
+        items = [(key, _rebind(item, memo)) for key, item in value.items()]
+        if all(new is old for (_, new), old in zip(items, value.values())):
+            return value
+        rebound = type(value)(items)
+    else:
+        return value
+    memo[id(value)] = rebound
+    return rebound
@@ -9,6 +9,21 @@ import logging
 log = logging.getLogger('event')
 
 _events = {}
+# Handlers of each event in the order they are called, rebuilt after handlers are added, removed or reprioritized
+_sorted_events = {}
+# Incremented whenever handlers are added, removed or reprioritized
+_version = 0
+
+
+def _handlers_changed():
+    global _version
+    _version += 1
+    _sorted_events.clear()
+
+
+def get_version():
+    """Returns a number which changes whenever event handlers are added, removed or change priority."""
+    return _version
 
 
 class Event(object):
@@ -19,6 +34,15 @@ class Event(object):
         self.func = func
         self.priority = priority
 
+    @property
+    def priority(self):
+        return self._priority
+
+    @priority.setter
+    def priority(self, value):
+        self._priority = value
+        _handlers_changed()
+
     def __call__(self, *args, **kwargs):
         return self.func(*args, **kwargs)
 
@@ -84,12 +108,14 @@ def add_event_handler(name, func, priority=128):
     log.trace('registered function %s to event %s' % (func.__name__, name))
     event = Event(name, func, priority)
     events.append(event)
+    _handlers_changed()
     return event
 
 
 def remove_event_handlers(name):
     """Removes all handlers for given event `name`."""
     _events.pop(name, None)
+    _handlers_changed()
 
 
 def remove_event_handler(name, func):
@@ -97,6 +123,7 @@ def remove_event_handler(name, func):
     for e in list(_events.get(name, [])):
         if e.func is func:
             _events[name].remove(e)
+            _handlers_changed()
 
 
 def fire_event(name, *args, **kwargs):
@@ -109,7 +136,10 @@ def fire_event(name, *args, **kwargs):
     :param kwargs: Key Value arguments passed to handler function
     """
     if name in _events:
-        for event in get_events(name):
+        events = _sorted_events.get(name)
+        if events is None:
+            events = _sorted_events[name] = tuple(get_events(name))
+        for event in events:
             result = event(*args, **kwargs)
             if result is not None:
                 args = (result,) + args[1:]
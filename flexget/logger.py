@@ -4,6 +4,8 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 import codecs
 import collections
 import contextlib
+import io
+import json
 import logging
 import logging.handlers
 import sys
@@ -22,6 +24,15 @@ VERBOSE = 15
 # environment variables to modify rotating log parameters from defaults of 1 MB and 9 files
 ENV_MAXBYTES = 'FLEXGET_LOG_MAXBYTES'
 ENV_MAXCOUNT = 'FLEXGET_LOG_MAXCOUNT'
+# environment variable to enable the structured (JSON lines) log written next to the regular log file, when set to 1
+ENV_STRUCTURED = 'FLEXGET_LOG_STRUCTURED'
+# Suffix of the structured log file and of its sidecar index
+STRUCTURED_SUFFIX = '.json'
+INDEX_SUFFIX = '.idx'
+# Amount of log bytes summarized by one index entry
+INDEX_BLOCK_SIZE = 64 * 1024
+# Blocks with more distinct tasks or plugins than this are not indexed by those fields
+INDEX_MAX_NAMES = 32
 
 # Stores `task`, logging `session_id`, and redirected `output` stream in a thread local context
 local_context = threading.local()
@@ -150,6 +161,257 @@ class FlexGetFormatter(logging.Formatter):
         return logging.Formatter.format(self, record)
 
 
+class JSONFormatter(logging.Formatter):
+    """Formats log records as single line JSON objects, used by the structured log"""
+
+    def __init__(self):
+        logging.Formatter.__init__(self, datefmt='%Y-%m-%d %H:%M')
+
+    def format(self, record):
+        message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            message += '\n' + record.exc_text
+        return json.dumps(
+            {
+                'timestamp': self.formatTime(record, self.datefmt),
+                'created': record.created,
+                'log_level': record.levelname,
+                'levelno': record.levelno,
+                'plugin': record.name,
+                'task': getattr(record, 'task', '') or '',
+                'message': message,
+            }
+        )
+
+
+class StructuredFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Writes log records as JSON lines and maintains a sidecar index next to the log file.
+
+    Every `INDEX_BLOCK_SIZE` bytes of log an entry is appended to the index, recording the byte range of the block,
+    its time span, level range and the tasks and plugins logging in it. This allows :func:`search_structured_log` to
+    skip blocks that cannot match a query instead of parsing every line.
+    """
+
+    def __init__(self, filename, maxBytes=0, backupCount=0):
+        self._block = None
+        self._offset = 0
+        logging.handlers.RotatingFileHandler.__init__(
+            self, filename, maxBytes=maxBytes, backupCount=backupCount
+        )
+        self.setFormatter(JSONFormatter())
+
+    def _open(self):
+        stream = io.open(self.baseFilename, 'ab')
+        self._offset = stream.seek(0, os.SEEK_END)
+        return stream
+
+    def emit(self, record):
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            data = (self.format(record) + '\n').encode('utf-8')
+            self.stream.write(data)
+            self.stream.flush()
+            self._index_record(record, len(data))
+        except Exception:
+            self.handleError(record)
+
+    def _index_record(self, record, size):
+        block = self._block
+        if block is None:
+            block = self._block = {
+                'start': self._offset,
+                'first': record.created,
+                'min_level': record.levelno,
+                'max_level': record.levelno,
+                'tasks': set(),
+                'plugins': set(),
+            }
+        block['last'] = record.created
+        block['min_level'] = min(block['min_level'], record.levelno)
+        block['max_level'] = max(block['max_level'], record.levelno)
+        for key, value in (('tasks', getattr(record, 'task', '') or ''), ('plugins', record.name)):
+            names = block[key]
+            if names is not None:
+                names.add(value)
+                if len(names) > INDEX_MAX_NAMES:
+                    block[key] = None
+        self._offset += size
+        if self._offset - block['start'] >= INDEX_BLOCK_SIZE:
+            self._close_block()
+
+    def _close_block(self):
+        """Appends the summary of the current block to the index."""
+        block, self._block = self._block, None
+        if block is None:
+            return
+        entry = {
+            'start': block['start'],
+            'end': self._offset,
+            'first': block['first'],
+            'last': block['last'],
+            'min_level': block['min_level'],
+            'max_level': block['max_level'],
+            'tasks': sorted(block['tasks']) if block['tasks'] is not None else None,
+            'plugins': sorted(block['plugins']) if block['plugins'] is not None else None,
+        }
+        with io.open(self.baseFilename + INDEX_SUFFIX, 'ab') as index:
+            index.write((json.dumps(entry) + '\n').encode('utf-8'))
+
+    def doRollover(self):
+        self._close_block()
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        if self.backupCount > 0:
+            # Rotate the index files along with the log files
+            names = [self.baseFilename] + [
+                '%s.%d' % (self.baseFilename, i) for i in range(1, self.backupCount + 1)
+            ]
+            for source, dest in reversed(list(zip(names, names[1:]))):
+                for suffix in ('', INDEX_SUFFIX):
+                    if os.path.exists(source + suffix):
+                        if os.path.exists(dest + suffix):
+                            os.remove(dest + suffix)
+                        os.rename(source + suffix, dest + suffix)
+        self.stream = self._open()
+
+    def close(self):
+        self.acquire()
+        try:
+            self._close_block()
+        finally:
+            self.release()
+        logging.handlers.RotatingFileHandler.close(self)
+
+
+def _read_index(filename, size):
+    """
+    Returns the index blocks of a structured log file as a list of dicts covering the whole file. Parts of the file
+    which are not indexed (the block currently being written, or after a crash) are returned as blocks without
+    any metadata, so they are always scanned.
+    """
+    blocks = []
+    try:
+        with io.open(filename + INDEX_SUFFIX, 'rb') as index:
+            for line in index:
+                try:
+                    block = json.loads(line.decode('utf-8'))
+                except ValueError:
+                    continue
+                if block['end'] <= size:
+                    blocks.append(block)
+    except IOError:
+        pass
+    blocks.sort(key=lambda b: b['start'])
+    covered = []
+    position = 0
+    for block in blocks:
+        if block['start'] < position:
+            # Overlapping entry, index is not consistent with this file anymore
+            continue
+        if block['start'] > position:
+            covered.append({'start': position, 'end': block['start']})
+        covered.append(block)
+        position = block['end']
+    if position < size:
+        covered.append({'start': position, 'end': size})
+    return covered
+
+
+def _block_may_match(block, min_level=None, task=None, plugin=None, since=None, until=None):
+    if 'first' not in block:
+        return True
+    if min_level is not None and block['max_level'] < min_level:
+        return False
+    if since is not None and block['last'] < since:
+        return False
+    if until is not None and block['first'] > until:
+        return False
+    if task is not None and block['tasks'] is not None and task not in block['tasks']:
+        return False
+    if plugin is not None and block['plugins'] is not None and plugin not in block['plugins']:
+        return False
+    return True
+
+
+def record_matches(record, min_level=None, task=None, plugin=None, since=None, until=None):
+    """Checks whether a structured log record passes the given filters."""
+    if min_level is not None and record.get('levelno', 0) < min_level:
+        return False
+    if since is not None and record.get('created', 0) < since:
+        return False
+    if until is not None and record.get('created', 0) > until:
+        return False
+    if task is not None and record.get('task') != task:
+        return False
+    if plugin is not None and record.get('plugin') != plugin:
+        return False
+    return True
+
+
+def parse_structured_lines(data):
+    """Decodes a chunk of structured log lines, skipping incomplete or corrupt ones."""
+    records = []
+    for line in data.decode('utf-8', 'replace').split('\n'):
+        if not line:
+            continue
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+    return records
+
+
+def search_structured_log(filename, lines=200, matcher=None, **filters):
+    """
+    Finds the latest records of a structured log and its rotated files, using the sidecar indexes to skip blocks.
+
+    :param filename: Path of the structured log file
+    :param int lines: Maximum amount of records to return
+    :param matcher: Optional function called with each record which passed `filters`, returns whether it matches
+    :param filters: `min_level`, `task`, `plugin`, `since` and `until` (timestamps) filters
+    :return: Tuple of matching records, oldest first, and the size of `filename` when it was searched
+    """
+    found = []
+    end = 0
+    since = filters.get('since')
+    log_file = filename
+    rotation = 0
+    while os.path.isfile(log_file):
+        size = os.path.getsize(log_file)
+        if not rotation:
+            end = size
+        blocks = _read_index(log_file, size)
+        with io.open(log_file, 'rb') as fh:
+            for block in reversed(blocks):
+                if not _block_may_match(block, **filters):
+                    continue
+                fh.seek(block['start'])
+                records = parse_structured_lines(fh.read(block['end'] - block['start']))
+                for record in reversed(records):
+                    if not record_matches(record, **filters):
+                        continue
+                    if matcher and not matcher(record):
+                        continue
+                    found.append(record)
+                    if len(found) >= lines:
+                        found.reverse()
+                        return found, end
+        if since is not None and any('first' in b and b['first'] < since for b in blocks):
+            # Rotated files are older than this one
+            break
+        rotation += 1
+        log_file = '%s.%d' % (filename, rotation)
+    found.reverse()
+    return found, end
+
+
 _logging_configured = False
 _buff_handler = None
 _logging_started = False
@@ -190,8 +452,16 @@ def initialize(unit_test=False):
     logger.addHandler(crash_handler)
 
 
-def start(filename=None, level=logging.INFO, to_console=True, to_file=True):
+def structured_log_enabled():
+    """Returns True when the structured log has been enabled with the `FLEXGET_LOG_STRUCTURED` environment variable."""
+    return os.environ.get(ENV_STRUCTURED) == '1'
+
+
+def start(filename=None, level=logging.INFO, to_console=True, to_file=True, structured=None):
     """After initialization, start file logging.
+
+    :param bool structured: Also write a structured log with a search index next to the log file. As it doubles the
+      log writes, it is only written when enabled with the `FLEXGET_LOG_STRUCTURED` environment variable by default.
     """
     global _logging_started
 
@@ -215,6 +485,17 @@ def start(filename=None, level=logging.INFO, to_console=True, to_file=True):
         file_handler.setLevel(level)
         logger.addHandler(file_handler)
 
+        if structured is None:
+            structured = structured_log_enabled()
+        if structured:
+            structured_handler = StructuredFileHandler(
+                filename + STRUCTURED_SUFFIX,
+                maxBytes=int(os.environ.get(ENV_MAXBYTES, 1000 * 1024)),
+                backupCount=int(os.environ.get(ENV_MAXCOUNT, 9)),
+            )
+            structured_handler.setLevel(level)
+            logger.addHandler(structured_handler)
+
     # without --cron we log to console
     if to_console:
         # Make sure we don't send any characters that the current terminal doesn't support printing
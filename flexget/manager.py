@@ -16,6 +16,7 @@ import shutil  # noqa
 import signal  # noqa
 import sys  # noqa
 import threading  # noqa
+import time  # noqa
 import traceback  # noqa
 import hashlib  # noqa
 from contextlib import contextmanager  # noqa
@@ -27,6 +28,7 @@ import yaml  # noqa
 from sqlalchemy.exc import OperationalError  # noqa
 from sqlalchemy.ext.declarative import declarative_base  # noqa
 from sqlalchemy.orm import sessionmaker  # noqa
+from sqlalchemy.pool import QueuePool, StaticPool  # noqa
 
 # These need to be declared before we start importing from other flexget modules, since they might import them
 from flexget.utils.sqlalchemy_utils import ContextSession  # noqa
@@ -35,7 +37,7 @@ Base = declarative_base()
 Session = sessionmaker(class_=ContextSession)
 
 from flexget import config_schema, db_schema, logger, plugin  # noqa
-from flexget.event import fire_event  # noqa
+from flexget.event import event, fire_event, get_events  # noqa
 from flexget.ipc import IPCClient, IPCServer  # noqa
 from flexget.options import (
     CoreArgumentParser,
@@ -53,6 +55,43 @@ log = logging.getLogger('manager')
 
 manager = None
 DB_CLEANUP_INTERVAL = timedelta(days=7)
+# How long a scheduled database cleanup may run before pausing until the next opportunity
+DB_CLEANUP_BUDGET = timedelta(minutes=2)
+
+# SQLite PRAGMA settings applied to each new database connection, selectable with the `database` config key
+DB_PROFILES = {
+    # Leave SQLite defaults alone
+    'default': {},
+    # Lets readers (API, CLI) work concurrently with the task runner, at the cost of some durability on power loss
+    'performance': {
+        'journal_mode': 'wal',
+        'synchronous': 'normal',
+        'cache_size': 16 * 1024 * 1024,
+        'mmap_size': 64 * 1024 * 1024,
+        'busy_timeout': 10000,
+    },
+}
+
+database_schema = {
+    'type': 'object',
+    'properties': {
+        'profile': {'type': 'string', 'enum': list(DB_PROFILES), 'default': 'default'},
+        'journal_mode': {
+            'type': 'string',
+            'enum': ['delete', 'truncate', 'persist', 'memory', 'wal', 'off'],
+        },
+        'synchronous': {'type': 'string', 'enum': ['off', 'normal', 'full', 'extra']},
+        'cache_size': {'type': ['string', 'integer'], 'format': 'size'},
+        'mmap_size': {'type': ['string', 'integer'], 'format': 'size'},
+        'busy_timeout': {'type': 'integer', 'minimum': 0, 'description': 'In milliseconds.'},
+    },
+    'additionalProperties': False,
+}
+
+
+@event('config.register')
+def register_config():
+    config_schema.register_config_key('database', database_schema)
 
 
 class Manager(object):
@@ -133,6 +172,7 @@ class Manager(object):
         self.config_path = None
         self.db_filename = None
         self.engine = None
+        self.db_pragmas = {}
         self.lockfile = None
         self.database_uri = None
         self.db_upgraded = False
@@ -142,6 +182,8 @@ class Manager(object):
         self.task_queue = None
         self.persist = None
         self.initialized = False
+        # Time at which the running database cleanup should pause, see `db_cleanup_expired`
+        self._db_cleanup_deadline = None
 
         self.config = {}
 
@@ -458,8 +500,8 @@ class Manager(object):
             )
             if not options.cron:
                 # Wait until execution of all tasks has finished
-                for _, _, event in finished_events:
-                    event.wait()
+                for _, _, finished in finished_events:
+                    finished.wait()
         else:
             self.task_queue.start()
             self.ipc_server.start()
@@ -737,6 +779,7 @@ class Manager(object):
             raise
         log.debug('New config data loaded.')
         self.user_config = copy.deepcopy(new_user_config)
+        self.configure_database()
         fire_event('manager.config_updated', self)
 
     def backup_config(self):
@@ -816,11 +859,22 @@ class Manager(object):
 
         # fire up the engine
         log.debug('Connecting to: %s' % self.database_uri)
+        engine_args = {}
+        url = sqlalchemy.engine.url.make_url(self.database_uri)
+        if url.drivername.startswith('sqlite') and url.database not in (None, '', ':memory:'):
+            # Keep file database connections open for reuse instead of reconnecting for every session
+            engine_args['poolclass'] = QueuePool
+        elif url.drivername.startswith('sqlite'):
+            # Each connection to an in-memory database is a separate database, share a single connection between
+            # all threads so that plugins running in worker threads see the same data. As they share its transaction
+            # too, locking between threads only shows with a database file.
+            engine_args['poolclass'] = StaticPool
         try:
             self.engine = sqlalchemy.create_engine(
                 self.database_uri,
                 echo=self.options.debug_sql,
                 connect_args={'check_same_thread': False, 'timeout': 10},
+                **engine_args
             )
         except ImportError as e:
             print(
@@ -833,6 +887,8 @@ class Manager(object):
                 file=sys.stderr,
             )
             sys.exit(1)
+        if self.engine.dialect.name == 'sqlite':
+            sqlalchemy.event.listen(self.engine, 'connect', self._set_sqlite_pragmas)
         Session.configure(bind=self.engine)
         # create all tables, doesn't do anything to existing tables
         try:
@@ -852,6 +908,46 @@ class Manager(object):
                 )
             raise
 
+    def _set_sqlite_pragmas(self, dbapi_connection, connection_record):
+        """Applies the configured database profile to a new SQLite connection."""
+        if not self.db_pragmas:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma, value in self.db_pragmas.items():
+                cursor.execute('PRAGMA %s = %s' % (pragma, value))
+        finally:
+            cursor.close()
+
+    def configure_database(self):
+        """Updates the database connection settings from the `database` section of the config."""
+        if not self.engine or self.engine.dialect.name != 'sqlite':
+            return
+        config = self.config.get('database', {})
+        settings = dict(DB_PROFILES[config.get('profile', 'default')])
+        settings.update((key, value) for key, value in config.items() if key != 'profile')
+        pragmas = {}
+        for key, value in settings.items():
+            if key in ('cache_size', 'mmap_size'):
+                value = config_schema.parse_size(value)
+                if key == 'cache_size':
+                    # A negative cache_size is interpreted as KiB instead of pages
+                    value = -(value // 1024)
+            elif key in ('journal_mode', 'synchronous'):
+                value = value.upper()
+            pragmas[key] = value
+        if pragmas == self.db_pragmas:
+            return
+        log.debug('Database settings: %s', pragmas)
+        self.db_pragmas = pragmas
+        if self.engine.url.database in (None, '', ':memory:'):
+            # An in-memory database only lives as long as its connection, apply to it directly
+            with self.engine.connect() as conn:
+                self._set_sqlite_pragmas(conn.connection, None)
+        else:
+            # Pooled connections were opened with the old settings, new ones will pick up the current ones
+            self.engine.dispose()
+
     def _read_lock(self):
         """
         Read the values from the lock file. Returns None if there is no current lock file.
@@ -1008,29 +1104,94 @@ class Manager(object):
         """
         Perform database cleanup if cleanup interval has been met.
 
+        Each cleanup handler runs in its own transaction. Unless forced, the cleanup pauses when
+        :data:`DB_CLEANUP_BUDGET` is used up, and resumes with the remaining handlers on the next call. Scheduled
+        cleanups run from the task queue, so they never run alongside tasks.
+
         Fires events:
 
         * manager.db_cleanup
 
-          If interval was met. Gives session to do the cleanup as a parameter.
+          If interval was met. Gives session to do the cleanup as a parameter. Handlers with a lot of work should do
+          it in batches, stop once :meth:`db_cleanup_expired` and return False to be resumed on the next cleanup.
+
+        * manager.db_vacuum
 
-        :param bool force: Run the cleanup no matter whether the interval has been met.
+          After all cleanup handlers have finished.
+
+        :param bool force: Run the complete cleanup no matter whether the interval has been met.
+        :returns: A dict with the time in seconds each cleanup handler took, or None if the cleanup did not run here.
         """
         expired = (
             self.persist.get('last_cleanup', datetime(1900, 1, 1))
             < datetime.now() - DB_CLEANUP_INTERVAL
         )
-        if force or expired:
-            log.info('Running database cleanup.')
-            with Session() as session:
-                fire_event('manager.db_cleanup', self, session)
-            # Try to VACUUM after cleanup
-            fire_event('manager.db_vacuum', self)
-            # Just in case some plugin was overzealous in its cleaning, mark the config changed
-            self.config_changed()
-            self.persist['last_cleanup'] = datetime.now()
-        else:
+        resuming = bool(self.persist.get('db_cleanup_done'))
+        if not (force or expired or resuming):
             log.debug('Not running db cleanup, last run %s' % self.persist.get('last_cleanup'))
+            return
+        return self._run_db_cleanup(budget=None if force else DB_CLEANUP_BUDGET)
+
+    def db_cleanup_expired(self):
+        """Returns True when the running database cleanup has used up its time budget and should pause."""
+        return self._db_cleanup_deadline is not None and time.time() > self._db_cleanup_deadline
+
+    def _run_db_cleanup(self, budget=None):
+        """
+        Runs the `manager.db_cleanup` handlers which have not yet completed in the current cleanup round.
+
+        :param timedelta budget: Pause after this much time, see :meth:`db_cleanup_expired`. Unlimited if None.
+        :returns: A dict with the time in seconds each handler took during this call.
+        """
+        done = set(self.persist.get('db_cleanup_done') or [])
+        log.info('%s database cleanup.', 'Resuming' if done else 'Running')
+        try:
+            handlers = list(get_events('manager.db_cleanup'))
+        except KeyError:
+            handlers = []
+        started = time.time()
+        if budget:
+            self._db_cleanup_deadline = started + budget.total_seconds()
+        timings = {}
+        paused = False
+        try:
+            for handler in handlers:
+                name = '%s.%s' % (handler.func.__module__, handler.func.__name__)
+                if name in done:
+                    continue
+                if self.db_cleanup_expired():
+                    paused = True
+                    break
+                handler_started = time.time()
+                finished = True
+                try:
+                    with Session() as session:
+                        finished = handler(self, session) is not False
+                except Exception as e:
+                    # Don't retry the broken handler until the next cleanup round
+                    log.error('Database cleanup by %s failed: %s', name, e)
+                    log.debug('Database cleanup error', exc_info=True)
+                timings[name] = time.time() - handler_started
+                log.verbose('Database cleanup by %s took %.2f seconds', name, timings[name])
+                if not finished:
+                    # The handler ran out of time, it continues where it stopped on the next run
+                    paused = True
+                    break
+                done.add(name)
+        finally:
+            self._db_cleanup_deadline = None
+        if paused:
+            log.info('Database cleanup paused, it will be continued on the next run.')
+            self.persist['db_cleanup_done'] = list(done)
+            return timings
+        # Try to VACUUM after cleanup
+        fire_event('manager.db_vacuum', self)
+        # Just in case some plugin was overzealous in its cleaning, mark the config changed
+        self.config_changed()
+        self.persist['db_cleanup_done'] = []
+        self.persist['last_cleanup'] = datetime.now()
+        log.info('Database cleanup finished in %.2f seconds.', time.time() - started)
+        return timings
 
     def shutdown(self, finish_queue=True):
         """
@@ -1050,6 +1211,13 @@ class Manager(object):
         fire_event('manager.shutdown', self)
         if not self.unit_test:  # don't scroll "nosetests" summary results when logging is enabled
             log.debug('Shutting down')
+        if self.engine.dialect.name == 'sqlite':
+            # Let SQLite update the query planner statistics it found useful during this run
+            try:
+                with self.engine.connect() as conn:
+                    conn.execute('PRAGMA optimize')
+            except OperationalError as e:
+                log.debug('Could not optimize database: %s', e)
         self.engine.dispose()
         # remove temporary database used in test mode
         if self.options.test:
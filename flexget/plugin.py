@@ -20,6 +20,7 @@ from flexget import components as components_pkg
 from flexget import config_schema
 from flexget.event import add_event_handler as add_phase_handler
 from flexget.event import fire_event, remove_event_handlers
+from flexget.event import get_version as get_event_version
 
 log = logging.getLogger('plugin')
 
@@ -191,6 +192,11 @@ plugins = {}
 plugins_loaded = False
 
 _loaded_plugins = {}
+# Incremented whenever plugins are registered or their attributes (eg. builtin) change
+_registry_version = 0
+# Plugins handling each phase in execution order, valid for `_phase_plugins_version`
+_phase_plugins = {}
+_phase_plugins_version = None
 _plugin_options = []
 _new_phase_queue = {}
 
@@ -364,7 +370,9 @@ class PluginInfo(dict):
         return dict.__getattribute__(self, attr)
 
     def __setattr__(self, attr, value):
+        global _registry_version
         self[attr] = value
+        _registry_version += 1
 
     def __str__(self):
         return '<PluginInfo(name=%s)>' % self.name
@@ -620,6 +628,28 @@ def plugin_schemas(**kwargs):
 config_schema.register_schema('/schema/plugins', plugin_schemas)
 
 
+def get_plugins_by_phase(phase):
+    """
+    Return plugins which handle `phase`, in the order their handlers are run.
+
+    The order is computed once and reused until plugins are registered or changed, or handler priorities change.
+
+    :param string phase: Name of the phase
+    :return: Tuple of PluginInfo instances.
+    """
+    global _phase_plugins_version
+    version = (_registry_version, get_event_version())
+    if version != _phase_plugins_version:
+        _phase_plugins.clear()
+        _phase_plugins_version = version
+    phase_plugins = _phase_plugins.get(phase)
+    if phase_plugins is None:
+        phase_plugins = _phase_plugins[phase] = tuple(
+            sorted(get_plugins(phase=phase), key=lambda p: p.phase_handlers[phase], reverse=True)
+        )
+    return phase_plugins
+
+
 def get_phases_by_plugin(name):
     """Return all phases plugin :name: hooks"""
     return list(get_plugin_by_name(name).phase_handlers)
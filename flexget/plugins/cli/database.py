@@ -23,7 +23,9 @@ def do_cli(manager, options):
 
 
 def cleanup(manager):
-    manager.db_cleanup(force=True)
+    timings = manager.db_cleanup(force=True)
+    for name, seconds in sorted(timings.items(), key=lambda item: item[1], reverse=True):
+        console('%-60s %8.2fs' % (name, seconds))
     console('Database cleanup complete.')
 
 
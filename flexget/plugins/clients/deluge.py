@@ -9,6 +9,7 @@ import logging
 import os
 
 import time
+from collections import OrderedDict
 
 from flexget import plugin
 from flexget.entry import Entry
@@ -18,6 +19,44 @@ from flexget.utils.template import RenderError
 
 log = logging.getLogger('deluge')
 
+# Connected clients, shared by all tasks using the same daemon. Keyed by host, port, username and password.
+_clients = {}
+
+# Torrent status fields needed to apply options after a torrent has been added
+STATUS_KEYS = [
+    'files',
+    'total_size',
+    'save_path',
+    'move_on_completed_path',
+    'move_on_completed',
+    'progress',
+]
+
+
+@event('manager.shutdown')
+def disconnect_clients(manager):
+    for client in list(_clients.values()):
+        DelugePlugin.discard_client(client)
+
+
+class CallBatch(object):
+    """
+    Collects daemon calls which take a list of torrent ids as their first argument, so that calls with the same
+    method and arguments for many torrents are sent as a single call.
+    """
+
+    def __init__(self):
+        self.calls = OrderedDict()
+
+    def add(self, method, torrent_id, *args):
+        self.calls.setdefault((method,) + args, []).append(torrent_id)
+
+    def send(self, client):
+        for key, torrent_ids in self.calls.items():
+            log.debug('Calling %s for %s torrents', key[0], len(torrent_ids))
+            client.call(key[0], torrent_ids, *key[1:])
+        self.calls.clear()
+
 
 class DelugePlugin(object):
     """Base class for deluge plugins, contains settings and methods for connecting to a deluge daemon."""
@@ -58,6 +97,32 @@ class DelugePlugin(object):
             decode_utf8=True,
         )
 
+    def connect_client(self, config):
+        """
+        Returns a connected client. The connection is kept open and reused by later tasks (and executions when
+        running as a daemon) using the same deluge daemon.
+        """
+        client = self.setup_client(config)
+        key = (client.host, client.port, client.username, client.password)
+        pooled = _clients.get(key)
+        if pooled is not None and pooled.connected:
+            log.debug('Reusing connection to deluge daemon at %s:%s', client.host, client.port)
+            return pooled
+        client.connect()
+        _clients[key] = client
+        return client
+
+    @staticmethod
+    def discard_client(client):
+        """Closes a connection and removes it from the shared clients, so that the next task reconnects."""
+        for key, pooled in list(_clients.items()):
+            if pooled is client:
+                del _clients[key]
+        try:
+            client.disconnect()
+        except Exception as e:
+            log.debug('Error disconnecting from deluge daemon: %s', e)
+
     def prepare_config(self, config):
         config.setdefault('host', 'localhost')
         config.setdefault('port', 58846)
@@ -112,6 +177,7 @@ class InputDeluge(DelugePlugin):
                     'username': {'type': 'string'},
                     'password': {'type': 'string'},
                     'config_path': {'type': 'string', 'format': 'path'},
+                    'keys': {'type': 'array', 'items': {'type': 'string'}},
                     'filter': {
                         'type': 'object',
                         'properties': {
@@ -148,18 +214,19 @@ class InputDeluge(DelugePlugin):
     def on_task_input(self, task, config):
         """Generates and returns a list of entries from the deluge daemon."""
         config = self.prepare_config(config)
-        # Reset the entries list
-        client = self.setup_client(config)
-        client.connect()
-
-        entries = self.generate_entries(client, config)
-        client.disconnect()
-        return entries
+        client = self.connect_client(config)
+        try:
+            return self.generate_entries(client, config)
+        except Exception:
+            self.discard_client(client)
+            raise
 
     def generate_entries(self, client, config):
         entries = []
         filter = config.get('filter', {})
-        torrents = client.call('core.get_torrents_status', filter or {}, [])
+        # Only ask for the configured fields (and those mapped to entry fields), all of them if none are configured
+        keys = sorted(set(config['keys']) | set(self.settings_map)) if config.get('keys') else []
+        torrents = client.call('core.get_torrents_status', filter or {}, keys)
         for hash, torrent_dict in torrents.items():
             # Make sure it has a url so no plugins crash
             entry = Entry(deluge_id=hash, url='')
@@ -291,20 +358,31 @@ class OutputDeluge(DelugePlugin):
     def on_task_output(self, task, config):
         """Add torrents to deluge at exit."""
         config = self.prepare_config(config)
-        client = self.setup_client(config)
         # don't add when learning
         if task.options.learn:
             return
         if not config['enabled'] or not (task.accepted or task.options.test):
             return
 
-        client.connect()
+        client = self.connect_client(config)
 
         if task.options.test:
             log.debug('Test connection to deluge daemon successful.')
-            client.disconnect()
             return
 
+        batch = CallBatch()
+        try:
+            self._output(task, config, client, batch)
+            batch.send(client)
+        except Exception:
+            self.discard_client(client)
+            raise
+
+    def _torrent_id(self, entry):
+        torrent_id = entry.get('deluge_id') or entry.get('torrent_info_hash')
+        return torrent_id and torrent_id.lower()
+
+    def _output(self, task, config, client, batch):
         # loop through entries to get a list of labels to add
         labels = set()
         for entry in task.accepted:
@@ -339,6 +417,12 @@ class OutputDeluge(DelugePlugin):
 
         # add the torrents
         torrent_ids = client.call('core.get_session_state')
+        # Get the status of all torrents which are already loaded at once
+        loaded_ids = OrderedDict.fromkeys(self._torrent_id(entry) for entry in task.accepted)
+        loaded_ids = [torrent_id for torrent_id in loaded_ids if torrent_id in torrent_ids]
+        statuses = {}
+        if loaded_ids:
+            statuses = client.call('core.get_torrents_status', {'id': loaded_ids}, STATUS_KEYS)
         for entry in task.accepted:
             # Generate deluge options dict for torrent add
             add_opts = {}
@@ -386,16 +470,24 @@ class OutputDeluge(DelugePlugin):
                 modify_opts['content_filename'] = pathscrub(entry.render(content_filename))
             except RenderError as e:
                 log.error('Error setting content_filename for %s: %s', entry['title'], e)
+            if modify_opts.get('move_completed_path'):
+                # Set along with the other options instead of with separate calls
+                add_opts['move_completed'] = True
+                add_opts['move_completed_path'] = modify_opts['move_completed_path']
 
-            torrent_id = entry.get('deluge_id') or entry.get('torrent_info_hash')
-            torrent_id = torrent_id and torrent_id.lower()
+            torrent_id = self._torrent_id(entry)
             if torrent_id in torrent_ids:
                 log.info('%s is already loaded in deluge, setting options', entry['title'])
                 # Entry has a deluge id, verify the torrent is still in the deluge session and apply options
                 # Since this is already loaded in deluge, we may also need to change the path
                 modify_opts['path'] = add_opts.pop('download_location', None)
-                client.call('core.set_torrent_options', [torrent_id], add_opts)
-                self._set_torrent_options(client, torrent_id, entry, modify_opts)
+                if add_opts:
+                    client.call('core.set_torrent_options', [torrent_id], add_opts)
+                status = statuses.get(torrent_id)
+                if status is not None and modify_opts.get('move_completed_path'):
+                    status['move_on_completed'] = True
+                    status['move_on_completed_path'] = modify_opts['move_completed_path']
+                self._set_torrent_options(client, torrent_id, entry, modify_opts, batch, status)
             elif config['action'] != 'add':
                 log.warning(
                     'Cannot %s %s, because it is not loaded in deluge.',
@@ -454,19 +546,17 @@ class OutputDeluge(DelugePlugin):
                     log.error('There was an error adding %s to deluge.' % entry['title'])
                 else:
                     log.info('%s successfully added to deluge.', entry['title'])
-                    self._set_torrent_options(client, added_torrent, entry, modify_opts)
+                    self._set_torrent_options(client, added_torrent, entry, modify_opts, batch)
             if config['action'] in ('remove', 'purge'):
                 client.call('core.remove_torrent', torrent_id, config['action'] == 'purge')
                 log.info('%s removed from deluge.', entry['title'])
             elif config['action'] == 'pause':
-                client.call('core.pause_torrent', [torrent_id])
+                batch.add('core.pause_torrent', torrent_id)
                 log.info('%s has been paused in deluge.', entry['title'])
             elif config['action'] == 'resume':
-                client.call('core.resume_torrent', [torrent_id])
+                batch.add('core.resume_torrent', torrent_id)
                 log.info('%s has been resumed in deluge.', entry['title'])
 
-        client.disconnect()
-
     def on_task_learn(self, task, config):
         """ Make sure all temp files are cleaned up when entries are learned """
         # If download plugin is enabled, it will handle cleanup.
@@ -485,35 +575,38 @@ class OutputDeluge(DelugePlugin):
             return 'No Label'
         return re.sub(r'[^\w-]+', '_', label.lower())
 
-    def _set_torrent_options(self, client, torrent_id, entry, opts):
-        """Gets called when a torrent was added to the daemon."""
+    def _set_torrent_options(self, client, torrent_id, entry, opts, batch, status=None):
+        """
+        Gets called when a torrent was added to the daemon. Calls which can be made for many torrents at once are
+        added to `batch`, and the torrent status is only fetched if it was not given and is needed.
+        """
         entry['deluge_id'] = torrent_id
 
         if opts.get('move_completed_path'):
-            client.call('core.set_torrent_move_completed', torrent_id, True)
-            client.call(
-                'core.set_torrent_move_completed_path', torrent_id, opts['move_completed_path']
-            )
+            # This has been set with the add options
             log.debug('%s move on complete set to %s', entry['title'], opts['move_completed_path'])
         if opts.get('label'):
             client.call('label.set_torrent', torrent_id, opts['label'])
         if opts.get('queue_to_top') is not None:
             if opts['queue_to_top']:
-                client.call('core.queue_top', [torrent_id])
+                batch.add('core.queue_top', torrent_id)
                 log.debug('%s moved to top of queue', entry['title'])
             else:
-                client.call('core.queue_bottom', [torrent_id])
+                batch.add('core.queue_bottom', torrent_id)
                 log.debug('%s moved to bottom of queue', entry['title'])
 
-        status_keys = [
-            'files',
-            'total_size',
-            'save_path',
-            'move_on_completed_path',
-            'move_on_completed',
-            'progress',
-        ]
-        status = client.call('core.get_torrent_status', torrent_id, status_keys)
+        container_directory = pathscrub(
+            entry.render(entry.get('container_directory') or opts.get('container_directory', ''))
+        )
+        needs_status = (
+            opts.get('move_completed_path')
+            or opts.get('path')
+            or opts.get('content_filename')
+            or opts.get('main_file_only')
+            or container_directory
+        )
+        if status is None and needs_status:
+            status = client.call('core.get_torrent_status', torrent_id, STATUS_KEYS)
         # Determine where the file should be
         move_now_path = None
         if opts.get('move_completed_path'):
@@ -533,9 +626,11 @@ class OutputDeluge(DelugePlugin):
             status['save_path']
         ):
             log.debug('Moving storage for %s to %s', entry['title'], move_now_path)
-            client.call('core.move_storage', [torrent_id], move_now_path)
+            batch.add('core.move_storage', torrent_id, move_now_path)
 
         big_file_name = ''
+        # All renames of the torrent are sent with a single call
+        rename_pairs = []
         if opts.get('content_filename') or opts.get('main_file_only'):
             # find a file that makes up more than main_file_ratio (default: 90%) of the total size
             main_file = None
@@ -577,7 +672,7 @@ class OutputDeluge(DelugePlugin):
 
             def rename(file, new_name):
                 # Renames a file in torrent
-                client.call('core.rename_files', torrent_id, [(file['index'], new_name)])
+                rename_pairs.append((file['index'], new_name))
                 log.debug('File %s in %s renamed to %s', file['path'], entry['title'], new_name)
 
             if main_file is not None:
@@ -641,24 +736,22 @@ class OutputDeluge(DelugePlugin):
                             for f in status['files']
                             if f != main_file and (f != sub_file or not keep_subs)
                         ]
-                        rename_pairs = [
+                        rename_pairs.extend(
                             (
                                 f['index'],
                                 top_files_dir + ".sparse_files/" + os.path.basename(f['path']),
                             )
                             for f in sparse_files
-                        ]
-                        client.call('core.rename_files', torrent_id, rename_pairs)
+                        )
             else:
                 log.warning(
                     'No files in "%s" are > %d%% of content size, no files renamed.',
                     entry['title'],
                     opts.get('main_file_ratio') * 100,
                 )
+        if rename_pairs:
+            client.call('core.rename_files', torrent_id, rename_pairs)
 
-        container_directory = pathscrub(
-            entry.render(entry.get('container_directory') or opts.get('container_directory', ''))
-        )
         if container_directory:
             if big_file_name:
                 folder_structure = big_file_name.split(os.sep)
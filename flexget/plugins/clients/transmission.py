@@ -7,6 +7,7 @@ import os
 import logging
 import base64
 import re
+from collections import OrderedDict
 from datetime import datetime
 from datetime import timedelta
 from netrc import netrc, NetrcParseError
@@ -32,6 +33,68 @@ except ImportError:
 
 log = logging.getLogger('transmission')
 
+# Fields requested from transmission by the plugins, otherwise all fields of all torrents are sent.
+# Torrent properties are backed by these fields: ratio -> uploadRatio,
+# progress -> sizeWhenDone and leftUntilDone, priority -> bandwidthPriority, date_* -> *Date,
+# files() -> files, priorities and wanted
+OUTPUT_FIELDS = ['id', 'name', 'hashString', 'totalSize']
+SEED_LIMIT_FIELDS = [
+    'uploadRatio',
+    'seedRatioMode',
+    'seedRatioLimit',
+    'seedIdleMode',
+    'seedIdleLimit',
+    'activityDate',
+]
+INPUT_FIELDS = (
+    OUTPUT_FIELDS
+    + SEED_LIMIT_FIELDS
+    + [
+        'torrentFile',
+        'comment',
+        'downloadDir',
+        'isFinished',
+        'isPrivate',
+        'status',
+        'addedDate',
+        'doneDate',
+        'startDate',
+        'bandwidthPriority',
+        'sizeWhenDone',
+        'leftUntilDone',
+        'secondsDownloading',
+        'secondsSeeding',
+        'trackers',
+        'error',
+    ]
+)
+CLEAN_FIELDS = (
+    OUTPUT_FIELDS
+    + SEED_LIMIT_FIELDS
+    + [
+        'status',
+        'addedDate',
+        'doneDate',
+        'downloadDir',
+        'trackers',
+        'files',
+        'priorities',
+        'wanted',
+    ]
+)
+
+# RPC clients are shared by all tasks and phases using the same daemon
+_clients = {}
+# Sessions and torrent lists are fetched once per task run, by client and set of requested fields
+_sessions = {}
+_torrent_lists = {}
+
+
+@event('task.execute.started')
+def clear_run_cache(task):
+    _sessions.clear()
+    _torrent_lists.clear()
+
 
 class TransmissionBase(object):
     def __init__(self):
@@ -57,7 +120,15 @@ class TransmissionBase(object):
                 log.error('netrc: %s, file: %s, line: %s' % (e.msg, e.filename, e.lineno))
         return config
 
+    @staticmethod
+    def client_key(config):
+        return config['host'], config['port'], config.get('username'), config.get('password')
+
     def create_rpc_client(self, config):
+        """Returns the RPC client for the daemon in `config`, connecting if there is not one already."""
+        key = self.client_key(config)
+        if key in _clients:
+            return _clients[key]
         user, password = config.get('username'), config.get('password')
 
         try:
@@ -80,8 +151,34 @@ class TransmissionBase(object):
                     )
             else:
                 raise plugin.PluginError("Error connecting to transmission: %s" % e.message)
+        _clients[key] = cli
         return cli
 
+    def get_session(self, config):
+        """Returns the session of the daemon, fetched once per task run."""
+        key = self.client_key(config)
+        if key not in _sessions:
+            _sessions[key] = self.client.get_session()
+        return _sessions[key]
+
+    def get_torrents(self, config, fields):
+        """
+        Returns all torrents of the daemon with (at least) `fields` loaded. The list is fetched once per task run,
+        a list fetched earlier with more fields is reused.
+        """
+        lists = _torrent_lists.setdefault(self.client_key(config), {})
+        fields = frozenset(fields)
+        for cached_fields, torrents in lists.items():
+            if fields <= cached_fields:
+                return torrents
+        torrents = self.client.get_torrents(arguments=sorted(fields))
+        lists[fields] = torrents
+        return torrents
+
+    def invalidate_torrents(self, config):
+        """Drops the cached torrent lists of the daemon, after torrents have been changed."""
+        _torrent_lists.pop(self.client_key(config), None)
+
     def torrent_info(self, torrent, config):
         done = torrent.totalSize > 0
         vloc = None
@@ -196,9 +293,9 @@ class PluginTransmissionInput(TransmissionBase):
                 self.client.url, config['username'], config['password']
             )
 
-        session = self.client.get_session()
+        session = self.get_session(config)
 
-        for torrent in self.client.get_torrents():
+        for torrent in self.get_torrents(config, INPUT_FIELDS):
             seed_ratio_ok, idle_limit_ok = self.check_seed_limits(torrent, session)
             if config['only_complete'] and not (
                 seed_ratio_ok and idle_limit_ok and torrent.progress == 100
@@ -366,25 +463,28 @@ class PluginTransmission(TransmissionBase):
                 log.debug('Successfully connected to transmission.')
             else:
                 raise plugin.PluginError("Couldn't connect to transmission.")
-        session_torrents = self.client.get_torrents()
+        session_torrents = self.get_torrents(config, OUTPUT_FIELDS)
+        torrents_by_hash = dict((t.hashString.lower(), t) for t in session_torrents)
+        torrents_by_id = dict((t.id, t) for t in session_torrents)
+        # Moves, option changes and actions are collected per entry and sent in batches afterwards
+        moves = OrderedDict()
+        changes = OrderedDict()
+        actions = OrderedDict()
         for entry in task.accepted:
             if task.options.test:
                 log.info('Would %s %s in transmission.', config['action'], entry['title'])
                 continue
             # Compile user options into appropriate dict
             options = self._make_torrent_options_dict(config, entry)
-            torrent_info = None
-            for t in session_torrents:
-                if t.hashString.lower() == entry.get(
-                    'torrent_info_hash', ''
-                ).lower() or t.id == entry.get('transmission_id'):
-                    torrent_info = t
-                    log.debug(
-                        'Found %s already loaded in transmission as %s',
-                        entry['title'],
-                        torrent_info.name,
-                    )
-                    break
+            torrent_info = torrents_by_hash.get(
+                entry.get('torrent_info_hash', '').lower()
+            ) or torrents_by_id.get(entry.get('transmission_id'))
+            if torrent_info:
+                log.debug(
+                    'Found %s already loaded in transmission as %s',
+                    entry['title'],
+                    torrent_info.name,
+                )
 
             if not torrent_info:
                 if config['action'] != 'add':
@@ -430,8 +530,9 @@ class PluginTransmission(TransmissionBase):
                     entry.fail(msg)
                     continue
                 log.info('"%s" torrent added to transmission', entry['title'])
+                self.invalidate_torrents(config)
                 # The info returned by the add call is incomplete, refresh it
-                torrent_info = self.client.get_torrent(torrent_info.id)
+                torrent_info = self.client.get_torrent(torrent_info.id, OUTPUT_FIELDS)
             else:
                 # Torrent already loaded in transmission
                 if options['add'].get('download_dir'):
@@ -442,7 +543,9 @@ class PluginTransmission(TransmissionBase):
                     # In such case this will kick transmission to really move data.
                     # If data is already located at new location then transmission just ignore
                     # this command.
-                    self.client.move_torrent_data(torrent_info.id, options['add']['download_dir'], 120)
+                    moves.setdefault(options['add']['download_dir'], []).append(
+                        (torrent_info, entry)
+                    )
 
             try:
                 total_size = torrent_info.totalSize
@@ -529,7 +632,7 @@ class PluginTransmission(TransmissionBase):
                     # If we have a main file and want to rename it and associated files
                     if 'content_filename' in options['post'] and main_id is not None:
                         if 'download_dir' not in options['add']:
-                            download_dir = self.client.get_session().download_dir
+                            download_dir = self.get_session(config).download_dir
                         else:
                             download_dir = options['add']['download_dir']
 
@@ -603,33 +706,29 @@ class PluginTransmission(TransmissionBase):
                                 len(file_list),
                             )
 
-                # Set any changed file properties
-                if list(options['change'].keys()):
-                    self.client.change_torrent(torrent_info.id, 30, **options['change'])
+                # Set any changed file properties, identical changes are sent in one call
+                if options['change']:
+                    key = tuple(
+                        sorted(
+                            (k, tuple(v) if isinstance(v, list) else v)
+                            for k, v in options['change'].items()
+                        )
+                    )
+                    changes.setdefault(key, (options['change'], []))[1].append(
+                        (torrent_info, entry)
+                    )
 
-                if config['action'] == 'add':
+                action = config['action']
+                if action == 'add':
                     # if add_paused was defined and set to False start the torrent;
                     # prevents downloading data before we set what files we want
                     start_paused = (
                         options['post']['paused']
                         if 'paused' in options['post']
-                        else not self.client.get_session().start_added_torrents
-                    )
-                    if start_paused:
-                        self.client.stop_torrent(torrent_info.id)
-                    else:
-                        self.client.start_torrent(torrent_info.id)
-                elif config['action'] in ('remove', 'purge'):
-                    self.client.remove_torrent(
-                        [torrent_info.id], delete_data=config['action'] == 'purge'
+                        else not self.get_session(config).start_added_torrents
                     )
-                    log.info('%sd %s from transmission', config['action'], torrent_info.name)
-                elif config['action'] == 'pause':
-                    self.client.stop_torrent([torrent_info.id])
-                    log.info('paused %s in transmission', torrent_info.name)
-                elif config['action'] == 'resume':
-                    self.client.start_torrent([torrent_info.id])
-                    log.info('resumed %s in transmission', torrent_info.name)
+                    action = 'pause' if start_paused else 'resume'
+                actions.setdefault(action, []).append((torrent_info, entry))
 
             except TransmissionError as e:
                 log.debug('TransmissionError', exc_info=True)
@@ -640,6 +739,43 @@ class PluginTransmission(TransmissionBase):
                 log.error(msg)
                 continue
 
+        self._send_batches(config, moves, changes, actions)
+
+    def _batch_call(self, description, torrents, method, *args, **kwargs):
+        """Calls `method` for a batch of torrents, logging an error with all the entries if it fails."""
+        try:
+            method([torrent_info.id for torrent_info, _ in torrents], *args, **kwargs)
+        except TransmissionError as e:
+            log.debug('TransmissionError', exc_info=True)
+            log.error(
+                'Error trying to %s %s, TransmissionError: %s',
+                description,
+                ', '.join(entry['title'] for _, entry in torrents),
+                e.message or 'N/A',
+            )
+            return False
+        return True
+
+    def _send_batches(self, config, moves, changes, actions):
+        if not (moves or changes or actions):
+            return
+        for download_dir, torrents in moves.items():
+            self._batch_call('move', torrents, self.client.move_torrent_data, download_dir, 120)
+        for change, torrents in changes.values():
+            self._batch_call('change', torrents, self.client.change_torrent, 30, **change)
+        for action, torrents in actions.items():
+            if action in ('remove', 'purge'):
+                method = self.client.remove_torrent
+                kwargs = {'delete_data': action == 'purge'}
+            elif action == 'pause':
+                method, kwargs = self.client.stop_torrent, {}
+            else:
+                method, kwargs = self.client.start_torrent, {}
+            if self._batch_call(action, torrents, method, **kwargs) and config['action'] != 'add':
+                for torrent_info, _ in torrents:
+                    log.info('%sd %s in transmission', action, torrent_info.name)
+        self.invalidate_torrents(config)
+
     def _make_torrent_options_dict(self, config, entry):
 
         opt_dic = {}
@@ -826,10 +962,10 @@ class PluginTransmissionClean(TransmissionBase):
             else None
         )
 
-        session = self.client.get_session()
+        session = self.get_session(config)
 
         remove_ids = []
-        for torrent in self.client.get_torrents():
+        for torrent in self.get_torrents(config, CLEAN_FIELDS):
             log.verbose(
                 'Torrent "%s": status: "%s" - ratio: %s -  date added: %s'
                 % (torrent.name, torrent.status, torrent.ratio, torrent.date_added)
@@ -870,6 +1006,7 @@ class PluginTransmissionClean(TransmissionBase):
             remove_ids.append(torrent.id)
         if remove_ids:
             self.client.remove_torrent(remove_ids, config.get('delete_files'))
+            self.invalidate_torrents(config)
 
 
 @event('plugin.register')
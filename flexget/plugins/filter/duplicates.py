@@ -3,6 +3,7 @@ import logging
 
 from flexget import plugin
 from flexget.event import event
+from flexget.utils.tools import group_entries_by_fields
 
 log = logging.getLogger('duplicates')
 
@@ -28,18 +29,24 @@ class Duplicates(object):
     def on_task_filter(self, task, config):
         field = config['field']
         action = config['action']
-        for entry in task.entries:
-            for prospect in task.entries:
-                if entry == prospect:
+        for (value,), group in group_entries_by_fields(task.entries, [field]).items():
+            if value is None or len(group) < 2:
+                continue
+            # Entries are compared against the others of the group which have not been rejected yet
+            remaining = list(group)
+            for entry in group:
+                prospect = next((p for p in remaining if not entry == p), None)
+                if prospect is None:
                     continue
-                if entry.get(field) is not None and entry[field] == prospect.get(field):
-                    msg = 'Field {} value {} equals on {} and {}'.format(
-                        field, entry[field], entry['title'], prospect['title']
-                    )
-                    if action == 'accept':
-                        entry.accept(msg)
-                    else:
-                        entry.reject(msg)
+                msg = 'Field {} value {} equals on {} and {}'.format(
+                    field, entry[field], entry['title'], prospect['title']
+                )
+                if action == 'accept':
+                    entry.accept(msg)
+                else:
+                    entry.reject(msg)
+                    if entry.rejected:
+                        remaining.remove(entry)
 
 
 @event('plugin.register')
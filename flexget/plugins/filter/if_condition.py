@@ -26,6 +26,7 @@ class FilterIf(object):
         'type': 'array',
         'items': {
             'type': 'object',
+            'propertyNames': {'format': 'expression'},
             'additionalProperties': {
                 'anyOf': [{'$ref': '/schema/plugins'}, {'enum': ['accept', 'reject', 'fail']}]
             },
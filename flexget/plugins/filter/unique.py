@@ -4,6 +4,7 @@ import logging
 from flexget import plugin
 from flexget.event import event
 from flexget.config_schema import one_or_more
+from flexget.utils.tools import group_entries_by_fields
 
 log = logging.getLogger('unique')
 
@@ -48,35 +49,21 @@ class Unique(object):
     def on_task_filter(self, task, config):
         config = self.prepare_config(config)
         field_names = config['field']
-        entries = list(task.entries)
-        for i, entry in enumerate(entries):
-            # Ignore already processed entries
-            if self.should_ignore(entry, config['action']):
-                continue
-            try:
-                entry_fields = self.extract_fields(entry, field_names)
-            # Ignore if a field is missing
-            except KeyError:
-                continue
-            # Iterate over next items, try to find a similar item
-            for prospect in entries[i + 1 :]:
-                # Ignore processed prospects
-                if self.should_ignore(prospect, config['action']):
-                    continue
-                try:
-                    prospect_fields = self.extract_fields(prospect, field_names)
-                # Ignore if a field is missing
-                except KeyError:
-                    continue
-                if entry_fields and entry_fields == prospect_fields:
-                    msg = 'Field {} value {} equals on {} and {}'.format(
-                        field_names, entry_fields, entry['title'], prospect['title']
-                    )
-                    # Mark prospect
-                    if config['action'] == 'accept':
-                        prospect.accept(msg)
-                    else:
-                        prospect.reject(msg)
+        # Ignore already processed entries
+        entries = [e for e in task.entries if not self.should_ignore(e, config['action'])]
+        for group in group_entries_by_fields(entries, field_names).values():
+            # The first entry of each group is kept, the others are marked
+            entry = group[0]
+            entry_fields = self.extract_fields(entry, field_names)
+            for prospect in group[1:]:
+                msg = 'Field {} value {} equals on {} and {}'.format(
+                    field_names, entry_fields, entry['title'], prospect['title']
+                )
+                # Mark prospect
+                if config['action'] == 'accept':
+                    prospect.accept(msg)
+                else:
+                    prospect.reject(msg)
 
 
 @event('plugin.register')
@@ -12,11 +12,29 @@ from flexget.event import event
 
 log = logging.getLogger('db_vacuum')
 VACUUM_INTERVAL = timedelta(weeks=24)  # 6 months
+# Value of `PRAGMA auto_vacuum` when free pages can be reclaimed with `PRAGMA incremental_vacuum`
+AUTO_VACUUM_INCREMENTAL = 2
 
 
 # Run after the cleanup is actually finished, but before analyze
 @event('manager.db_vacuum', 1)
 def on_cleanup(manager):
+    if manager.engine.dialect.name != 'sqlite':
+        return
+    with Session() as session:
+        auto_vacuum = session.execute('PRAGMA auto_vacuum').scalar()
+    if auto_vacuum == AUTO_VACUUM_INCREMENTAL:
+        # Only moves the free pages to the end of the file and truncates it, no need to rebuild the whole database
+        log.verbose('Reclaiming free database pages.')
+        with Session() as session:
+            try:
+                result = session.execute('PRAGMA incremental_vacuum')
+                # Pages are only freed while the result rows are fetched, there are none without free pages
+                if result.returns_rows:
+                    result.fetchall()
+            except OperationalError as e:
+                log.error('Could not execute incremental vacuum: %s', e)
+        return
     # Vacuum can take a long time, and is not needed frequently
     persistence = SimplePersistence('db_vacuum')
     last_vacuum = persistence.get('last_vacuum')
@@ -24,6 +42,8 @@ def on_cleanup(manager):
         log.info('Running VACUUM on database to improve performance and decrease db size.')
         with Session() as session:
             try:
+                # The VACUUM converts the database, after which the cheaper incremental vacuum is used
+                session.execute('PRAGMA auto_vacuum = INCREMENTAL')
                 session.execute('VACUUM')
             except OperationalError as e:
                 # Does not work on python 3.6, github issue #1596
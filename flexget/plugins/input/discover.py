@@ -4,18 +4,36 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 import datetime
 import logging
 import random
+import re
+import threading
+import time
+from collections import deque
 
-from sqlalchemy import Column, Integer, DateTime, Unicode, Index
+from sqlalchemy import Column, Integer, DateTime, Unicode, String, Index, ForeignKey
+from sqlalchemy.orm import relationship
 
 from flexget import options, plugin
 from flexget import db_schema
 from flexget.event import event
 from flexget.manager import Session
-from flexget.utils.tools import parse_timedelta, multiply_timedelta, aggregate_inputs
+from flexget.terminal import TerminalTable, TerminalTableError, table_parser, console
+from flexget.utils import soup, tools
+from flexget.utils.database import entry_synonym, prefetch
+from flexget.utils.requests import cancellable
+from flexget.utils.tools import (
+    aggregate_inputs,
+    get_config_hash,
+    multiply_timedelta,
+    parse_timedelta,
+    timedelta_total_seconds,
+)
 
 log = logging.getLogger('discover')
 Base = db_schema.versioned_base('discover', 0)
 
+# Seconds to wait for abandoned searches to end when all searches are done
+STOP_TIMEOUT = 5
+
 
 class DiscoverEntry(Base):
     __tablename__ = 'discover_entry'
@@ -41,6 +59,57 @@ class DiscoverEntry(Base):
 Index('ix_discover_entry_title_task', DiscoverEntry.title, DiscoverEntry.task)
 
 
+class DiscoverSearch(Base):
+    """Cached results of a search with a search plugin, shared by all tasks."""
+
+    __tablename__ = 'discover_search'
+
+    id = Column(Integer, primary_key=True)
+    plugin = Column(Unicode, index=True)
+    query = Column(Unicode)
+    config_hash = Column(String)
+    searched = Column(DateTime)
+    expires = Column(DateTime)
+    result_count = Column(Integer, default=0)
+    hits = Column(Integer, default=0)
+    misses = Column(Integer, default=0)
+    results = relationship(
+        'DiscoverSearchResult', backref='search', cascade='all, delete, delete-orphan'
+    )
+
+    def __init__(self, plugin, query, config_hash):
+        self.plugin = plugin
+        self.query = query
+        self.config_hash = config_hash
+        self.hits = 0
+        self.misses = 0
+
+    def __str__(self):
+        return '<DiscoverSearch(plugin=%s,query=%s,results=%s,expires=%s)>' % (
+            self.plugin,
+            self.query,
+            self.result_count,
+            self.expires,
+        )
+
+
+Index(
+    'ix_discover_search_plugin_query',
+    DiscoverSearch.plugin,
+    DiscoverSearch.query,
+    DiscoverSearch.config_hash,
+)
+
+
+class DiscoverSearchResult(Base):
+    __tablename__ = 'discover_search_result'
+
+    id = Column(Integer, primary_key=True)
+    search_id = Column(Integer, ForeignKey(DiscoverSearch.id), nullable=False, index=True)
+    _json = Column('json', Unicode)
+    entry = entry_synonym('_json')
+
+
 @event('manager.db_cleanup')
 def db_cleanup(manager, session):
     value = datetime.datetime.now() - parse_timedelta('7 days')
@@ -49,6 +118,261 @@ def db_cleanup(manager, session):
     ):
         log.debug('deleting %s', discover_entry)
         session.delete(discover_entry)
+    for search in session.query(DiscoverSearch).filter(DiscoverSearch.expires <= value).all():
+        log.debug('deleting %s', search)
+        session.delete(search)
+
+
+def normalize_query(entry):
+    """Returns the query of a search for `entry`, the same for entries differing only by case and whitespace."""
+    strings = [entry['title']] + sorted(entry.get('search_strings') or [])
+    return '|'.join(re.sub(r'\s+', ' ', string).strip().lower() for string in strings)
+
+
+class SearchCache(object):
+    """
+    Search results stored in the database for `ttl`, or `empty_ttl` when a search did not return anything.
+
+    Searches are looked up by search plugin, normalized query and plugin config.
+    """
+
+    def __init__(self, ttl, empty_ttl):
+        self.ttl = parse_timedelta(ttl)
+        self.empty_ttl = parse_timedelta(empty_ttl)
+
+    @staticmethod
+    def key(job):
+        return job.plugin_name, normalize_query(job.entry), get_config_hash(job.plugin_config)
+
+    def get_searches(self, session, jobs):
+        """Returns the cached searches of `jobs` by key, looked up by query in chunks."""
+        plugin_names = set(job.plugin_name for job in jobs)
+        if not plugin_names:
+            return {}
+        query = session.query(DiscoverSearch).filter(DiscoverSearch.plugin.in_(plugin_names))
+        queries = [normalize_query(job.entry) for job in jobs]
+        searches = prefetch(query, DiscoverSearch.query, queries)
+        return dict(((s.plugin, s.query, s.config_hash), s) for s in searches)
+
+    def load(self, jobs):
+        """Fills in the results of `jobs` which have unexpired results in the cache."""
+        now = datetime.datetime.now()
+        with Session() as session:
+            searches = self.get_searches(session, jobs)
+            for job in jobs:
+                search = searches.get(self.key(job))
+                if search is None or search.expires <= now:
+                    continue
+                log.debug(
+                    'Using cached results of %s for `%s`', job.plugin_name, job.entry['title']
+                )
+                search.hits += 1
+                job.results = [result.entry for result in search.results]
+                job.cached = job.done = True
+
+    def store(self, jobs):
+        """Stores the results of finished `jobs`. Failed searches are not stored."""
+        jobs = [
+            job
+            for job in jobs
+            if not (job.cached or job.timed_out or job.skipped or job.error is not None)
+        ]
+        now = datetime.datetime.now()
+        with Session() as session:
+            searches = self.get_searches(session, jobs)
+            for job in jobs:
+                key = self.key(job)
+                search = searches.get(key)
+                if search is None:
+                    search = searches[key] = DiscoverSearch(*key)
+                    session.add(search)
+                results = list(job.results or [])
+                search.misses += 1
+                search.searched = now
+                search.expires = now + (self.ttl if results else self.empty_ttl)
+                search.result_count = len(results)
+                search.results = [DiscoverSearchResult(entry=entry) for entry in results]
+
+
+class SearchJob(object):
+    """One search of a query entry with a search plugin."""
+
+    def __init__(self, index, total, entry, plugin_name, plugin_config, search):
+        self.index = index
+        self.total = total
+        self.entry = entry
+        self.plugin_name = plugin_name
+        self.plugin_config = plugin_config
+        self.search = search
+        self.started = None
+        self.done = False
+        self.timed_out = False
+        self.skipped = False
+        self.cached = False
+        self.results = None
+        self.error = None
+        # Set when the search is abandoned, its requests through `task.requests` are cancelled from then on
+        self.cancelled = threading.Event()
+
+    def run(self, task):
+        log.verbose(
+            'Searching for `%s` with plugin `%s` (%i of %i)',
+            self.entry['title'],
+            self.plugin_name,
+            self.index + 1,
+            self.total,
+        )
+        try:
+            with soup.plugin_context(self.plugin_name), cancellable(self.cancelled):
+                results = self.search.search(
+                    task=task, entry=self.entry, config=self.plugin_config
+                )
+        except Exception as e:
+            if not self.cancelled.is_set():
+                # Raised from the task thread when the results are collected
+                self.error = e
+            return
+        if self.cancelled.is_set():
+            log.debug(
+                'Dropping late results of %s for `%s`', self.plugin_name, self.entry['title']
+            )
+            return
+        self.results = results
+
+
+class SearchExecutor(object):
+    """
+    Runs search jobs from a pool of threads, with at most `plugin_workers` searches running per search plugin.
+    The `domain_workers` limit of the discover config is applied by `task.requests`, which counts a request to a host
+    until its response content has been received.
+
+    A search running longer than `timeout` seconds is abandoned, and remaining searches with the same plugin are
+    skipped, so that a single slow site cannot hold up the task. Further requests of an abandoned search through
+    `task.requests` raise :class:`~flexget.utils.requests.RequestCancelled`, and its late results are dropped. Once
+    all searches are done, the threads of abandoned searches are given :data:`STOP_TIMEOUT` seconds to end.
+
+    Searches are not serialized around database access. Search plugins reading or writing the database (e.g.
+    entry_list, or site plugins storing login cookies) do so from the worker threads, with sessions of their own,
+    at the same time as other searches. They must not use `task.session`, which is committed before the searches
+    start. Writes to a SQLite database file wait for each other up to the busy timeout.
+    """
+
+    def __init__(self, task, max_workers, plugin_workers, timeout):
+        self.task = task
+        self.max_workers = max_workers
+        self.plugin_workers = plugin_workers
+        self.timeout = timeout
+        self.pending = deque()
+        self.active = set()
+        self.remaining = 0
+        # Number of running searches by plugin name
+        self.running = {}
+        self.timed_out_plugins = set()
+        self.condition = threading.Condition()
+        self.context = {}
+        self.threads = []
+
+    def run(self, jobs):
+        if not tools.parallel_enabled or self.max_workers <= 1:
+            for job in jobs:
+                job.run(self.task)
+                job.done = True
+            return
+        # Imported here to avoid a circular import
+        from flexget.logger import local_context
+
+        self.context = dict(vars(local_context))
+        self.pending.extend(jobs)
+        self.remaining = len(jobs)
+        for _ in range(min(self.max_workers, len(jobs))):
+            self.start_worker()
+        with self.condition:
+            while self.remaining:
+                self.check_timeouts()
+                self.condition.wait(1)
+        self.stop()
+
+    def start_worker(self):
+        thread = threading.Thread(target=self.work, name='discover_search')
+        thread.daemon = True
+        thread.start()
+        self.threads.append(thread)
+
+    def stop(self):
+        """Waits for the worker threads to end, giving abandoned searches up to :data:`STOP_TIMEOUT` seconds."""
+        deadline = time.time() + STOP_TIMEOUT
+        for thread in self.threads:
+            thread.join(max(deadline - time.time(), 0))
+        running = sum(thread.is_alive() for thread in self.threads)
+        if running:
+            log.warning(
+                '%s abandoned searches are still running, their results will be ignored', running
+            )
+
+    def finish(self, job):
+        if not job.done:
+            job.done = True
+            self.remaining -= 1
+            self.condition.notify_all()
+
+    def next_job(self):
+        with self.condition:
+            while self.pending:
+                for job in self.pending:
+                    if job.plugin_name in self.timed_out_plugins:
+                        self.pending.remove(job)
+                        job.skipped = True
+                        self.finish(job)
+                        break
+                    if self.running.get(job.plugin_name, 0) < self.plugin_workers:
+                        self.pending.remove(job)
+                        self.running[job.plugin_name] = self.running.get(job.plugin_name, 0) + 1
+                        self.active.add(job)
+                        job.started = time.time()
+                        return job
+                else:
+                    self.condition.wait()
+
+    def work(self):
+        from flexget.logger import local_context
+
+        for key, value in self.context.items():
+            setattr(local_context, key, value)
+        while True:
+            job = self.next_job()
+            if job is None:
+                return
+            try:
+                job.run(self.task)
+            finally:
+                with self.condition:
+                    self.running[job.plugin_name] -= 1
+                    self.active.discard(job)
+                    self.finish(job)
+            if job.timed_out:
+                # A replacement worker was started when this search timed out
+                return
+
+    def check_timeouts(self):
+        now = time.time()
+        for job in list(self.active):
+            if now - job.started < self.timeout:
+                continue
+            log.warning(
+                'Search for `%s` with plugin `%s` did not finish in %s seconds, skipping the '
+                'remaining searches with %s',
+                job.entry['title'],
+                job.plugin_name,
+                self.timeout,
+                job.plugin_name,
+            )
+            job.timed_out = True
+            job.cancelled.set()
+            self.active.discard(job)
+            self.timed_out_plugins.add(job.plugin_name)
+            self.finish(job)
+            # The thread of the abandoned search is stuck until it finishes, keep the pool at full size
+            self.start_worker()
 
 
 class Discover(object):
@@ -64,6 +388,10 @@ class Discover(object):
           - piratebay
         interval: [1 hours|days|weeks]
         release_estimations: [strict|loose|ignore]
+        cache: [yes|no]
+
+    Searches run in up to `max_workers` threads, see :class:`SearchExecutor`. Search results are only cached when
+    `cache` is enabled, for a `ttl` of 1 hour and an `empty_ttl` of 20 minutes unless configured.
     """
 
     schema = {
@@ -99,6 +427,23 @@ class Discover(object):
                 ]
             },
             'limit': {'type': 'integer', 'minimum': 1},
+            'max_workers': {'type': 'integer', 'minimum': 1, 'default': 4},
+            'plugin_workers': {'type': 'integer', 'minimum': 1, 'default': 2},
+            'domain_workers': {'type': 'integer', 'minimum': 1, 'default': 2},
+            'search_timeout': {'type': 'string', 'format': 'interval', 'default': '5 minutes'},
+            'cache': {
+                'oneOf': [
+                    {'type': 'boolean'},
+                    {
+                        'type': 'object',
+                        'properties': {
+                            'ttl': {'type': 'string', 'format': 'interval'},
+                            'empty_ttl': {'type': 'string', 'format': 'interval'},
+                        },
+                        'additionalProperties': False,
+                    },
+                ]
+            },
         },
         'required': ['what', 'from'],
         'additionalProperties': False,
@@ -112,9 +457,10 @@ class Discover(object):
         :return: List of entries found from search engines listed under `from` configuration
         """
 
-        result = []
+        # Searches of each entry, in the order of search plugins
+        entry_jobs = []
         for index, entry in enumerate(entries):
-            entry_results = []
+            entry_jobs.append([])
             for item in config['from']:
                 if isinstance(item, dict):
                     plugin_name, plugin_config = list(item.items())[0]
@@ -124,35 +470,71 @@ class Discover(object):
                 if not callable(getattr(search, 'search')):
                     log.critical('Search plugin %s does not implement search method', plugin_name)
                     continue
-                log.verbose(
-                    'Searching for `%s` with plugin `%s` (%i of %i)',
-                    entry['title'],
-                    plugin_name,
-                    index + 1,
-                    len(entries),
+                entry_jobs[-1].append(
+                    SearchJob(index, len(entries), entry, plugin_name, plugin_config, search)
                 )
-                try:
-                    search_results = search.search(task=task, entry=entry, config=plugin_config)
-                    if not search_results:
-                        log.debug('No results from %s', plugin_name)
-                        continue
-                    log.debug('Discovered %s entries from %s', len(search_results), plugin_name)
-                    if config.get('limit'):
-                        search_results = search_results[: config['limit']]
-                    for e in search_results:
-                        e['discovered_from'] = entry['title']
-                        e['discovered_with'] = plugin_name
-                        # 'search_results' can be any iterable, make sure it's a list.
-                        e.on_complete(
-                            self.entry_complete, query=entry, search_results=list(search_results)
-                        )
-
-                    entry_results.extend(search_results)
-
-                except plugin.PluginWarning as e:
-                    log.verbose('No results from %s: %s', plugin_name, e)
-                except plugin.PluginError as e:
-                    log.error('Error searching with %s: %s', plugin_name, e)
+
+        jobs = [job for jobs in entry_jobs for job in jobs]
+        cache = None
+        if config['cache']:
+            cache = SearchCache(config['cache']['ttl'], config['cache']['empty_ttl'])
+            cache.load(jobs)
+            log.verbose(
+                'Using cached results for %s of %s searches',
+                sum(j.cached for j in jobs),
+                len(jobs),
+            )
+        executor = SearchExecutor(
+            task,
+            config['max_workers'],
+            config['plugin_workers'],
+            timedelta_total_seconds(parse_timedelta(config['search_timeout'])),
+        )
+        previous_host_requests = task.requests.max_host_requests
+        task.requests.max_host_requests = config['domain_workers']
+        try:
+            executor.run([job for job in jobs if not job.cached])
+        finally:
+            task.requests.max_host_requests = previous_host_requests
+        if cache:
+            cache.store(jobs)
+
+        result = []
+        for entry, jobs in zip(entries, entry_jobs):
+            entry_results = []
+            for job in jobs:
+                if job.timed_out:
+                    log.verbose(
+                        'Search for `%s` with %s timed out', entry['title'], job.plugin_name
+                    )
+                    continue
+                if job.skipped:
+                    log.verbose('Skipped search for `%s` with %s', entry['title'], job.plugin_name)
+                    continue
+                if isinstance(job.error, plugin.PluginWarning):
+                    log.verbose('No results from %s: %s', job.plugin_name, job.error)
+                    continue
+                if isinstance(job.error, plugin.PluginError):
+                    log.error('Error searching with %s: %s', job.plugin_name, job.error)
+                    continue
+                if job.error is not None:
+                    raise job.error
+                search_results = job.results
+                if not search_results:
+                    log.debug('No results from %s', job.plugin_name)
+                    continue
+                log.debug('Discovered %s entries from %s', len(search_results), job.plugin_name)
+                if config.get('limit'):
+                    search_results = search_results[: config['limit']]
+                for e in search_results:
+                    e['discovered_from'] = entry['title']
+                    e['discovered_with'] = job.plugin_name
+                    # 'search_results' can be any iterable, make sure it's a list.
+                    e.on_complete(
+                        self.entry_complete, query=entry, search_results=list(search_results)
+                    )
+
+                entry_results.extend(search_results)
             if not entry_results:
                 log.verbose('No search results for `%s`', entry['title'])
                 entry.complete()
@@ -277,8 +659,18 @@ class Discover(object):
         config['release_estimations'].setdefault('mode', 'strict')
         config['release_estimations'].setdefault('optimistic', '0 days')
 
+        config.setdefault('cache', False)
+        if config['cache'] is True:
+            config['cache'] = {}
+        if config['cache'] is not False:
+            config['cache'].setdefault('ttl', '1 hour')
+            config['cache'].setdefault('empty_ttl', '20 minutes')
+
         task.no_entries_ok = True
         entries = aggregate_inputs(task, config['what'])
+        # Don't leave the changes of the inputs in a transaction, while discover and the searches write the database
+        # with sessions of their own
+        task.session.commit()
         log.verbose('Discovering %i titles ...', len(entries))
         if len(entries) > 500:
             log.critical(
@@ -298,6 +690,51 @@ def register_plugin():
     plugin.register(Discover, 'discover', api_ver=2)
 
 
+def do_cli(manager, options):
+    if options.action == 'clear':
+        with Session() as session:
+            searches = session.query(DiscoverSearch)
+            if options.plugin:
+                searches = searches.filter(DiscoverSearch.plugin == options.plugin)
+            count = 0
+            for search in searches.all():
+                session.delete(search)
+                count += 1
+        console('Removed %s cached searches.' % count)
+        return
+
+    now = datetime.datetime.now()
+    # Cached, empty, expired, hits and misses of each plugin
+    stats = {}
+    with Session() as session:
+        query = session.query(
+            DiscoverSearch.plugin,
+            DiscoverSearch.result_count,
+            DiscoverSearch.expires,
+            DiscoverSearch.hits,
+            DiscoverSearch.misses,
+        )
+        if options.plugin:
+            query = query.filter(DiscoverSearch.plugin == options.plugin)
+        for plugin_name, result_count, expires, hits, misses in query:
+            plugin_stats = stats.setdefault(plugin_name, [0, 0, 0, 0, 0])
+            plugin_stats[0] += 1
+            plugin_stats[1] += not result_count
+            plugin_stats[2] += expires <= now
+            plugin_stats[3] += hits
+            plugin_stats[4] += misses
+    header = ['Plugin', 'Cached', 'Empty', 'Expired', 'Hits', 'Misses', 'Hit rate']
+    table_data = [header]
+    for plugin_name, (cached, empty, expired, hits, misses) in sorted(stats.items()):
+        hit_rate = '%.0f%%' % (100.0 * hits / (hits + misses)) if hits + misses else '-'
+        table_data.append([plugin_name, cached, empty, expired, hits, misses, hit_rate])
+    try:
+        table = TerminalTable(options.table_type, table_data)
+        console(table.output)
+    except TerminalTableError as e:
+        console('ERROR: %s' % str(e))
+
+
 @event('options.register')
 def register_parser_arguments():
     options.get_parser('execute').add_argument(
@@ -307,3 +744,17 @@ def register_parser_arguments():
         default=False,
         help='Immediately try to discover everything',
     )
+    parser = options.register_command(
+        'discover',
+        do_cli,
+        help='View statistics of or clear the discover search result cache',
+        parents=[table_parser],
+    )
+    parser.add_argument(
+        'action',
+        choices=['stats', 'clear'],
+        help='Show cache hits and misses of each search plugin, or clear cached searches',
+    )
+    parser.add_argument(
+        'plugin', nargs='?', help='Limit to a specific search plugin (if supplied)'
+    )
@@ -38,11 +38,11 @@ class PluginSortBy(object):
     schema = one_or_more(
         {
             'oneOf': [
-                {'type': 'string'},
+                {'type': 'string', 'format': 'expression'},
                 {
                     'type': 'object',
                     'properties': {
-                        'field': {'type': 'string'},
+                        'field': {'type': 'string', 'format': 'expression'},
                         'reverse': {'type': 'boolean'},
                         'ignore_articles': {
                             'oneOf': [{'type': 'boolean'}, {'type': 'string', 'format': 'regex'}]
@@ -0,0 +1,65 @@
+"""
+Selects the parser used to read html pages, globally and for specific plugins.
+
+Example::
+
+  html_parser: lxml
+
+  html_parser:
+    default: lxml
+    plugins:
+      html: html5lib
+
+lxml is the fastest, but needs to be installed separately. html.parser comes with python. html5lib is the default,
+and is used in place of the selected parser when it is not installed or fails to parse a page.
+"""
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import logging
+
+from flexget.config_schema import register_config_key
+from flexget.event import event
+from flexget.utils import soup
+
+log = logging.getLogger('html_parser')
+
+parser_schema = {'type': 'string', 'enum': soup.PARSERS}
+
+html_parser_schema = {
+    'oneOf': [
+        parser_schema,
+        {
+            'type': 'object',
+            'properties': {
+                'default': parser_schema,
+                'plugins': {'type': 'object', 'additionalProperties': parser_schema},
+            },
+            'additionalProperties': False,
+        },
+    ]
+}
+
+
+@event('config.register')
+def register_config():
+    register_config_key('html_parser', html_parser_schema)
+
+
+@event('manager.config_updated')
+def configure_parsers(manager):
+    config = manager.config.get('html_parser') or {}
+    if not isinstance(config, dict):
+        config = {'default': config}
+    soup.set_parsers(config.get('default'), config.get('plugins'))
+    log.debug('html parser: %s, for plugins: %s', soup.default_parser, soup.plugin_parsers)
+
+
+@event('task.execute.before_plugin')
+def enter_plugin(task, plugin_name):
+    soup.set_current_plugin(plugin_name)
+
+
+@event('task.execute.after_plugin')
+def exit_plugin(task, plugin_name):
+    soup.set_current_plugin(None)
@@ -8,10 +8,13 @@ import io
 import logging
 import mimetypes
 import os
+import re
 import shutil
 import socket
 import sys
 import tempfile
+import threading
+import time
 from cgi import parse_header
 from http.client import BadStatusLine
 
@@ -19,12 +22,64 @@ from requests import RequestException
 
 from flexget import options, plugin
 from flexget.event import event
-from flexget.utils.tools import decode_html, native_str_to_text
+from flexget.utils.tools import convert_bytes, decode_html, native_str_to_text, parallel_map
 from flexget.utils.template import RenderError
 from flexget.utils.pathscrub import pathscrub
 
 log = logging.getLogger('download')
 
+# Number of files downloaded at the same time
+MAX_WORKERS = 4
+# Number of files downloaded at the same time from a single host, unless the task limits it already
+MAX_HOST_WORKERS = 2
+CHUNK_SIZE = 150 * 1024
+# Number of times an interrupted download is resumed with a range request before giving up
+MAX_RESUMES = 3
+# Partial downloads which have not been resumed for this many seconds are removed
+PARTIAL_MAX_AGE = 7 * 24 * 60 * 60
+# Partial downloads kept in the temp directory, and the validators used to resume them
+PARTIAL_FILE_RE = re.compile(r'^[0-9a-f]{32}\.part(\.meta)?$')
+
+_partial_locks = {}
+_locks_lock = threading.Lock()
+
+
+def partial_lock(partfile):
+    """Returns the lock held while writing `partfile`, in case several entries have the same url."""
+    with _locks_lock:
+        return _partial_locks.setdefault(partfile, threading.Lock())
+
+
+class IncompleteDownload(RequestException):
+    """Raised when the connection is closed before the whole file has been received."""
+
+
+class TransferStats(object):
+    """Collects the amount of data received by downloads running in any number of threads."""
+
+    def __init__(self):
+        self.start = time.time()
+        self.files = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def add(self, received):
+        with self._lock:
+            self.files += 1
+            self.bytes += received
+
+    def log(self):
+        if not self.files:
+            return
+        elapsed = max(time.time() - self.start, 0.001)
+        log.verbose(
+            'Downloaded %s files (%s) in %.1f seconds, %s/s',
+            self.files,
+            convert_bytes(self.bytes),
+            elapsed,
+            convert_bytes(self.bytes / elapsed),
+        )
+
 
 class PluginDownload(object):
     """
@@ -65,6 +120,7 @@ class PluginDownload(object):
                     'overwrite': {'type': 'boolean', 'default': False},
                     'temp': {'type': 'string', 'format': 'path'},
                     'filename': {'type': 'string'},
+                    'max_workers': {'type': 'integer', 'minimum': 1},
                 },
                 'additionalProperties': False,
             },
@@ -95,6 +151,7 @@ class PluginDownload(object):
             require_path=config.get('require_path', False),
             fail_html=config['fail_html'],
             tmp_path=tmp,
+            max_workers=config.get('max_workers', MAX_WORKERS),
         )
 
     def get_temp_file(
@@ -120,6 +177,26 @@ class PluginDownload(object):
         :param tmp_path:
           path to use for temporary files while downloading
         """
+        error = self.fetch_entry(task, entry, require_path, handle_magnets, fail_html, tmp_path)
+        if error:
+            entry.fail(error)
+
+    def fetch_entry(
+        self,
+        task,
+        entry,
+        require_path=False,
+        handle_magnets=False,
+        fail_html=True,
+        tmp_path=tempfile.gettempdir(),
+        stats=None,
+    ):
+        """
+        Does the work of :meth:`get_temp_file`, but returns the reason instead of failing the entry, so that it can
+        be run in worker threads.
+
+        :return: String error, if failed.
+        """
         if entry.get('urls'):
             urls = entry.get('urls')
         else:
@@ -140,7 +217,7 @@ class PluginDownload(object):
                 # Don't fail here, there might be a magnet later in the list of urls
                 log.debug('Skipping url %s because there is no path for download', url)
                 continue
-            error = self.process_entry(task, entry, url, tmp_path)
+            error = self.process_entry(task, entry, url, tmp_path, stats)
 
             # disallow html content
             html_mimes = ['html', 'text/html']
@@ -162,14 +239,18 @@ class PluginDownload(object):
             # check if entry must have a path (download: yes)
             if require_path and 'path' not in entry:
                 log.error('%s can\'t be downloaded, no path specified for entry', entry['title'])
-                entry.fail('no path specified for entry')
-            else:
-                entry.fail(', '.join(errors))
+                return 'no path specified for entry'
+            return ', '.join(errors)
 
     def save_error_page(self, entry, task, page):
         received = os.path.join(task.manager.config_base, 'received', task.name)
         if not os.path.isdir(received):
-            os.makedirs(received)
+            try:
+                os.makedirs(received)
+            except OSError:
+                # Created by another download at the same time
+                if not os.path.isdir(received):
+                    raise
         filename = os.path.join(received, pathscrub('%s.error' % entry['title'], filename=True))
         log.error(
             'Error retrieving %s, the error page has been saved to %s', entry['title'], filename
@@ -184,9 +265,13 @@ class PluginDownload(object):
         handle_magnets=False,
         fail_html=True,
         tmp_path=tempfile.gettempdir(),
+        max_workers=MAX_WORKERS,
     ):
         """Download all task content and store in temporary folder.
 
+        Files are downloaded by up to `max_workers` threads. Unless the task already limits them, at most
+        :data:`MAX_HOST_WORKERS` files are transferred from the same host at a time through `task.requests`.
+
         :param bool require_path:
           whether or not entries without 'path' field are ignored
         :param bool handle_magnets:
@@ -196,12 +281,49 @@ class PluginDownload(object):
           fail entries which url respond with html content
         :param tmp_path:
           path to use for temporary files while downloading
+        :param int max_workers:
+          number of files downloaded at the same time
         """
-        for entry in task.accepted:
-            self.get_temp_file(task, entry, require_path, handle_magnets, fail_html, tmp_path)
+        self.prune_partial_files(tmp_path)
+        stats = TransferStats()
+        entries = list(task.accepted)
+
+        def fetch(entry):
+            return self.fetch_entry(
+                task, entry, require_path, handle_magnets, fail_html, tmp_path, stats
+            )
+
+        previous_host_requests = task.requests.max_host_requests
+        task.requests.max_host_requests = previous_host_requests or MAX_HOST_WORKERS
+        try:
+            errors = parallel_map(fetch, entries, max_workers=max_workers, name='download')
+        finally:
+            task.requests.max_host_requests = previous_host_requests
+        # Entries are only failed from the task thread
+        for entry, error in zip(entries, errors):
+            if error:
+                entry.fail(error)
+        stats.log()
+
+    def prune_partial_files(self, tmp_path):
+        """Removes partial downloads which have not been resumed for :data:`PARTIAL_MAX_AGE` seconds."""
+        tmp_path = pathscrub(os.path.expanduser(tmp_path))
+        if not os.path.isdir(tmp_path):
+            return
+        now = time.time()
+        for name in os.listdir(tmp_path):
+            if not PARTIAL_FILE_RE.match(name):
+                continue
+            filename = os.path.join(tmp_path, name)
+            try:
+                if now - os.path.getmtime(filename) > PARTIAL_MAX_AGE:
+                    log.debug('removing stale partial download %s', filename)
+                    os.remove(filename)
+            except OSError:
+                pass
 
     # TODO: a bit silly method, should be get rid of now with simplier exceptions ?
-    def process_entry(self, task, entry, url, tmp_path):
+    def process_entry(self, task, entry, url, tmp_path, stats=None):
         """
         Processes `entry` by using `url`. Does not use entry['url'].
         Does not fail the `entry` if there is a network issue, instead just logs and returns a string error.
@@ -210,6 +332,7 @@ class PluginDownload(object):
         :param entry: Entry
         :param url: Url to try download
         :param tmp_path: Path to store temporary files
+        :param stats: :class:`TransferStats` to add the received data to
         :return: String error, if failed.
         """
         try:
@@ -218,7 +341,7 @@ class PluginDownload(object):
             else:
                 if not task.manager.unit_test:
                     log.info('Downloading: %s', entry['title'])
-                self.download_entry(task, entry, url, tmp_path)
+                return self.download_entry(task, entry, url, tmp_path, stats)
         except RequestException as e:
             log.warning('RequestException %s, while downloading %s', e, url)
             return 'Network error during request: %s' % e
@@ -239,9 +362,14 @@ class PluginDownload(object):
             log.debug(msg, exc_info=True)
             return msg
 
-    def download_entry(self, task, entry, url, tmp_path):
+    def download_entry(self, task, entry, url, tmp_path, stats=None):
         """Downloads `entry` by using `url`.
 
+        The file is written to a partial file in `tmp_path` first, and hashed while it is written. Interrupted
+        downloads are resumed with range requests when the server supports them, and partial files with a known
+        validator are kept to be resumed by a later run.
+
+        :return: String error, if failed.
         :raises: Several types of exceptions ...
         :raises: PluginWarning
         """
@@ -256,7 +384,8 @@ class PluginDownload(object):
                 'Custom auth enabled for %s download: %s', entry['title'], entry['download_auth']
             )
 
-        headers = task.requests.headers
+        # Session headers are added by requests, copy to not change them for other downloads
+        headers = {}
         if 'download_headers' in entry:
             headers.update(entry['download_headers'])
             log.debug(
@@ -265,27 +394,12 @@ class PluginDownload(object):
                 entry['download_headers'],
             )
 
-        try:
-            response = task.requests.get(url, auth=auth, raise_status=False, headers=headers)
-        except UnicodeError:
-            log.error('Unicode error while encoding url %s', url)
-            return
-        if response.status_code != 200:
-            log.debug('Got %s response from server. Saving error page.', response.status_code)
-            # Save the error page
-            if response.content:
-                self.save_error_page(entry, task, response.content)
-            # Raise the error
-            response.raise_for_status()
-            return
-
         # expand ~ in temp path
         # TODO jinja?
         try:
             tmp_path = os.path.expanduser(tmp_path)
         except RenderError as e:
-            entry.fail('Could not set temp path. Error during string replacement: %s' % e)
-            return
+            return 'Could not set temp path. Error during string replacement: %s' % e
 
         # Clean illegal characters from temp path name
         tmp_path = pathscrub(tmp_path)
@@ -293,51 +407,142 @@ class PluginDownload(object):
         # create if missing
         if not os.path.isdir(tmp_path):
             log.debug('creating tmp_path %s' % tmp_path)
-            os.mkdir(tmp_path)
+            try:
+                os.mkdir(tmp_path)
+            except OSError:
+                # Created by another download at the same time
+                if not os.path.isdir(tmp_path):
+                    raise
 
         # check for write-access
         if not os.access(tmp_path, os.W_OK):
             raise plugin.PluginError('Not allowed to write to temp directory `%s`' % tmp_path)
 
-        # download and write data into a temp file
-        tmp_dir = tempfile.mkdtemp(dir=tmp_path)
         fname = hashlib.md5(url.encode('utf-8', 'replace')).hexdigest()
-        datafile = os.path.join(tmp_dir, fname)
-        outfile = io.open(datafile, 'wb')
+        partfile = os.path.join(tmp_path, fname + '.part')
+        with partial_lock(partfile):
+            return self.download_to_partial(task, entry, url, auth, headers, partfile, stats)
+
+    def download_to_partial(self, task, entry, url, auth, headers, partfile, stats):
+        """Downloads `url` into `partfile`, which is then moved into a temp directory of its own."""
+        validator = self.read_validator(partfile)
+        offset = os.path.getsize(partfile) if validator and os.path.isfile(partfile) else 0
+
+        try:
+            response = self.request_range(task, url, auth, headers, offset, validator)
+            if offset and response.status_code != 206:
+                # The file has changed or the server does not resume, start over
+                log.debug('Unable to resume partial download of %s', entry['title'])
+                offset = 0
+                if response.status_code == 416:
+                    response = self.request_range(task, url, auth, headers)
+        except UnicodeError:
+            log.error('Unicode error while encoding url %s', url)
+            return 'Unicode error while encoding url'
+        if response.status_code != (206 if offset else 200):
+            log.debug('Got %s response from server. Saving error page.', response.status_code)
+            # Save the error page
+            if response.content:
+                self.save_error_page(entry, task, response.content)
+            # Raise the error
+            response.raise_for_status()
+            return 'Unexpected response status %s' % response.status_code
+
+        total_size = self.total_size(response)
+        resumable = self.is_resumable(response)
+        validator = resumable and self.get_validator(response)
+        if validator:
+            self.write_validator(partfile, validator)
+        else:
+            self.remove_validator(partfile)
+
+        # download and write data into the partial file, hashing it on the way
+        digest = hashlib.sha1()
+        started = time.time()
+        received = 0
+        resumes = 0
+        first_response = response
         try:
-            for chunk in response.iter_content(chunk_size=150 * 1024, decode_unicode=False):
-                outfile.write(chunk)
+            with io.open(partfile, 'r+b' if offset else 'wb') as outfile:
+                if offset:
+                    log.verbose('Resuming download of %s from byte %s', entry['title'], offset)
+                    for chunk in iter(lambda: outfile.read(CHUNK_SIZE), b''):
+                        digest.update(chunk)
+                while True:
+                    try:
+                        for chunk in response.iter_content(
+                            chunk_size=CHUNK_SIZE, decode_unicode=False
+                        ):
+                            outfile.write(chunk)
+                            digest.update(chunk)
+                            received += len(chunk)
+                        if total_size and outfile.tell() < total_size:
+                            raise IncompleteDownload(
+                                'Connection closed after %s of %s bytes'
+                                % (outfile.tell(), total_size)
+                            )
+                        break
+                    except (RequestException, socket.timeout) as e:
+                        if not resumable or resumes >= MAX_RESUMES:
+                            raise
+                        resumes += 1
+                        log.verbose(
+                            'Download of %s was interrupted (%s), resuming from byte %s',
+                            entry['title'],
+                            e,
+                            outfile.tell(),
+                        )
+                        response = self.request_range(
+                            task, url, auth, headers, outfile.tell(), validator
+                        )
+                        if response.status_code != 206:
+                            raise e
         except Exception as e:
-            # don't leave futile files behind
-            # outfile has to be closed before we can delete it on Windows
-            outfile.close()
-            log.debug('Download interrupted, removing datafile')
-            os.remove(datafile)
+            # don't leave futile files behind, unless a later run can resume them
+            if validator:
+                log.verbose('Keeping partial download of %s to resume later', entry['title'])
+            else:
+                log.debug('Download interrupted, removing datafile')
+                self.remove_partial(partfile)
             if isinstance(e, socket.timeout):
                 log.error('Timeout while downloading file')
-            else:
-                raise
-        else:
-            outfile.close()
-            # Do a sanity check on downloaded file
-            if os.path.getsize(datafile) == 0:
-                entry.fail('File %s is 0 bytes in size' % datafile)
-                os.remove(datafile)
-                return
-            # store temp filename into entry so other plugins may read and modify content
-            # temp file is moved into final destination at self.output
-            entry['file'] = datafile
-            log.debug('%s field file set to: %s', entry['title'], entry['file'])
+                return 'Timeout while downloading file'
+            raise
+
+        self.remove_validator(partfile)
+        # Do a sanity check on downloaded file
+        if os.path.getsize(partfile) == 0:
+            os.remove(partfile)
+            return 'File %s is 0 bytes in size' % partfile
+        # Each file gets its own directory, which is removed along with it
+        tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(partfile))
+        datafile = os.path.join(tmp_dir, os.path.basename(partfile)[: -len('.part')])
+        os.rename(partfile, datafile)
+        # store temp filename into entry so other plugins may read and modify content
+        # temp file is moved into final destination at self.output
+        entry['file'] = datafile
+        entry['file_sha1'] = digest.hexdigest()
+        log.debug('%s field file set to: %s', entry['title'], entry['file'])
+
+        elapsed = max(time.time() - started, 0.001)
+        log.debug(
+            'Received %s for %s in %.1f seconds (%s/s)',
+            convert_bytes(received),
+            entry['title'],
+            elapsed,
+            convert_bytes(received / elapsed),
+        )
+        if stats is not None:
+            stats.add(received)
 
+        response = first_response
         if 'content-type' in response.headers:
             entry['mime-type'] = str(parse_header(response.headers['content-type'])[0])
         else:
             entry['mime-type'] = "unknown/unknown"
 
-        content_encoding = response.headers.get('content-encoding', '')
-        decompress = 'gzip' in content_encoding or 'deflate' in content_encoding
-        if 'content-length' in response.headers and not decompress:
-            entry['content-length'] = int(response.headers['content-length'])
+        if total_size is not None:
+            entry['content-length'] = total_size
 
         # prefer content-disposition naming, note: content-disposition can be disabled completely
         # by setting entry field `content-disposition` to False
@@ -353,6 +558,68 @@ class PluginDownload(object):
             entry['filename'] = filename
         log.debug('Finishing download_entry() with filename %s', entry.get('filename'))
 
+    @staticmethod
+    def request_range(task, url, auth, headers, offset=0, validator=None):
+        """Requests `url`, starting from byte `offset` if it is given."""
+        if offset:
+            headers = dict(headers, Range='bytes=%s-' % offset)
+            if validator:
+                # The whole file is sent instead, if it has changed
+                headers['If-Range'] = validator
+        return task.requests.get(url, auth=auth, raise_status=False, headers=headers)
+
+    @staticmethod
+    def total_size(response):
+        """Returns the size of the whole file, if the server told it and content is not compressed."""
+        content_encoding = response.headers.get('content-encoding', '')
+        if 'gzip' in content_encoding or 'deflate' in content_encoding:
+            return None
+        if response.status_code == 206:
+            size = response.headers.get('content-range', '').rpartition('/')[2]
+        else:
+            size = response.headers.get('content-length', '')
+        return int(size) if size.isdigit() else None
+
+    def is_resumable(self, response):
+        """Whether the rest of the file can be requested with a range request if the download is interrupted."""
+        if self.total_size(response) is None:
+            return False
+        return (
+            response.status_code == 206
+            or response.headers.get('accept-ranges', '').lower() == 'bytes'
+        )
+
+    @staticmethod
+    def get_validator(response):
+        """Returns the strong validator of the file, used to check it has not changed when resuming."""
+        etag = response.headers.get('etag')
+        if etag and not etag.startswith('W/'):
+            return etag
+        return response.headers.get('last-modified')
+
+    @staticmethod
+    def read_validator(partfile):
+        try:
+            with io.open(partfile + '.meta', encoding='utf-8') as f:
+                return f.read().strip() or None
+        except (IOError, OSError):
+            return None
+
+    @staticmethod
+    def write_validator(partfile, validator):
+        with io.open(partfile + '.meta', 'w', encoding='utf-8') as f:
+            f.write(validator)
+
+    @staticmethod
+    def remove_validator(partfile):
+        if os.path.exists(partfile + '.meta'):
+            os.remove(partfile + '.meta')
+
+    def remove_partial(self, partfile):
+        if os.path.exists(partfile):
+            os.remove(partfile)
+        self.remove_validator(partfile)
+
     def filename_from_headers(self, entry, response):
         """Checks entry filename if it's found from content-disposition"""
         if not response.headers.get('content-disposition'):
@@ -7,19 +7,20 @@ import logging
 import threading
 import random
 import string
+import weakref
 from functools import wraps, total_ordering
 
 from sqlalchemy import Column, Integer, String, Unicode
 
 from flexget import config_schema, db_schema
-from flexget.entry import EntryUnicodeError
+from flexget.entry import EntryUnicodeError, clone_entries
 from flexget.event import event, fire_event
 from flexget.logger import capture_output
 from flexget.manager import Session
 from flexget.plugin import plugins as all_plugins
 from flexget.plugin import (
     DependencyError,
-    get_plugins,
+    get_plugins_by_phase,
     phase_methods,
     plugin_schemas,
     PluginError,
@@ -83,22 +84,30 @@ def use_task_logging(func):
 
 
 class EntryIterator(object):
-    """An iterator over a subset of entries to emulate old task.accepted/rejected/failed/entries properties."""
+    """
+    A view over a subset of entries to emulate old task.accepted/rejected/failed/entries properties.
+
+    Iteration is live and keeps the order of the container, length and truth value are taken from the per-state
+    counts the container keeps up to date.
+    """
 
     def __init__(self, entries, states):
         self.all_entries = entries
         if isinstance(states, str):
             states = [states]
-        self.filter = lambda e: e._state in states
+        self.states = frozenset(states)
 
     def __iter__(self):
-        return filter(self.filter, self.all_entries)
+        if not self:
+            return iter([])
+        states = self.states
+        return (e for e in self.all_entries if e._state in states)
 
     def __bool__(self):
-        return any(e for e in self)
+        return len(self) > 0
 
     def __len__(self):
-        return sum(1 for e in self)
+        return self.all_entries.count_states(self.states)
 
     def __add__(self, other):
         return itertools.chain(self, other)
@@ -124,11 +133,25 @@ class EntryIterator(object):
         self.all_entries.sort(*args, **kwargs)
 
 
+# Held while updating entry state counts, entries may be accepted or rejected from worker threads
+_state_lock = threading.Lock()
+
+
 class EntryContainer(list):
-    """Container for a list of entries, also contains accepted, rejected failed iterators over them."""
+    """
+    Container for a list of entries, also contains accepted, rejected failed iterators over them.
+
+    The amount of entries in each state is tracked as entries are added, removed, accepted, rejected or failed, so
+    the iterators can be counted without going through all entries.
+    """
 
     def __init__(self, iterable=None):
-        list.__init__(self, iterable or [])
+        list.__init__(self)
+        self._ref = weakref.ref(self)
+        # Amount of entries in each state
+        self._state_counts = {}
+        # How many times each entry (by id) is in the container
+        self._members = {}
 
         self._entries = EntryIterator(self, ['undecided', 'accepted'])
         self._accepted = EntryIterator(self, 'accepted')  # accepted entries, can still be rejected
@@ -136,6 +159,9 @@ class EntryContainer(list):
         self._failed = EntryIterator(self, 'failed')  # failed entries
         self._undecided = EntryIterator(self, 'undecided')  # undecided entries (default)
 
+        if iterable:
+            self.extend(iterable)
+
     # Make these read-only properties
     entries = property(lambda self: self._entries)
     accepted = property(lambda self: self._accepted)
@@ -143,6 +169,110 @@ class EntryContainer(list):
     failed = property(lambda self: self._failed)
     undecided = property(lambda self: self._undecided)
 
+    def count_states(self, states):
+        """Returns the amount of entries in any of given `states`."""
+        return sum(self._state_counts.get(state, 0) for state in states)
+
+    def _added(self, entry):
+        key = id(entry)
+        times = self._members.get(key, 0)
+        self._members[key] = times + 1
+        if not times:
+            entry._containers.append(self._ref)
+        self._state_counts[entry._state] = self._state_counts.get(entry._state, 0) + 1
+
+    def _removed(self, entry):
+        key = id(entry)
+        times = self._members[key] - 1
+        if times:
+            self._members[key] = times
+        else:
+            del self._members[key]
+            entry._containers[:] = [ref for ref in entry._containers if ref is not self._ref]
+        self._state_counts[entry._state] -= 1
+
+    def _state_changed(self, entry, old_state, new_state):
+        """Called by entries in this container when their state changes."""
+        times = self._members.get(id(entry))
+        if not times:
+            return
+        with _state_lock:
+            self._state_counts[old_state] -= times
+            self._state_counts[new_state] = self._state_counts.get(new_state, 0) + times
+
+    def append(self, entry):
+        list.append(self, entry)
+        self._added(entry)
+
+    def extend(self, entries):
+        entries = list(entries)
+        list.extend(self, entries)
+        for entry in entries:
+            self._added(entry)
+
+    def insert(self, index, entry):
+        list.insert(self, index, entry)
+        self._added(entry)
+
+    def remove(self, entry):
+        index = self.index(entry)
+        del self[index]
+
+    def pop(self, index=-1):
+        entry = list.pop(self, index)
+        self._removed(entry)
+        return entry
+
+    def clear(self):
+        del self[:]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            old = list.__getitem__(self, index)
+            new = value = list(value)
+        else:
+            old = [list.__getitem__(self, index)]
+            new = [value]
+        list.__setitem__(self, index, value)
+        for entry in old:
+            self._removed(entry)
+        for entry in new:
+            self._added(entry)
+
+    def __delitem__(self, index):
+        old = list.__getitem__(self, index)
+        list.__delitem__(self, index)
+        for entry in old if isinstance(index, slice) else [old]:
+            self._removed(entry)
+
+    # Python 2 calls these for simple slices instead of __setitem__ and __delitem__
+    def __setslice__(self, start, stop, value):
+        self.__setitem__(slice(start, stop), value)
+
+    def __delslice__(self, start, stop):
+        self.__delitem__(slice(start, stop))
+
+    def __iadd__(self, entries):
+        self.extend(entries)
+        return self
+
+    def __imul__(self, times):
+        entries = list(self)
+        for _ in range(times - 1):
+            self.extend(entries)
+        if times < 1:
+            self.clear()
+        return self
+
+    def __copy__(self):
+        return EntryContainer(self)
+
+    def __deepcopy__(self, memo):
+        return EntryContainer(copy.deepcopy(list(self), memo))
+
+    def __reduce__(self):
+        return EntryContainer, (list(self),)
+
     def __repr__(self):
         return '<EntryContainer(%s)>' % list.__repr__(self)
 
@@ -244,6 +374,8 @@ class Task(object):
         self.priority = priority
         self._count = next(self._counter)
         self.finished_event = threading.Event()
+        # Time the task was added to the task queue, set by the queue
+        self.queued_time = None
 
         # simple persistence
         self.simple_persistence = SimpleTaskPersistence(self)
@@ -252,6 +384,9 @@ class Task(object):
         self._rerun_count = 0
         self._max_reruns = Task.RERUN_DEFAULT
         self._reruns_locked = False
+        # Copies of the entries produced by the input phase, replayed on reruns instead of running input again
+        self._input_snapshot = None
+        self._fresh_input = False
 
         self.config_modified = None
 
@@ -426,9 +561,8 @@ class Task(object):
           An iterator over configured :class:`flexget.plugin.PluginInfo` instances enabled on this task.
         """
         if phase:
-            plugins = sorted(
-                get_plugins(phase=phase), key=lambda p: p.phase_handlers[phase], reverse=True
-            )
+            # Configuration can change during a phase (eg. templates), so it is checked as the plugins are reached
+            plugins = get_plugins_by_phase(phase)
         else:
             plugins = iter(all_plugins.values())
         return (p for p in plugins if p.name in self.config or p.builtin)
@@ -559,13 +693,17 @@ class Task(object):
             traceback = self.manager.crash_report()
             self.abort(msg, traceback=traceback)
 
-    def rerun(self, plugin=None, reason=None):
+    def rerun(self, plugin=None, reason=None, fresh_input=False):
         """
         Immediately re-run the task after execute has completed,
         task can be re-run up to :attr:`.max_reruns` times.
 
+        Reruns get copies of the entries produced by the input phase of the previous run, unless a plugin requests
+        fresh input.
+
         :param str plugin: Plugin name
         :param str reason: Why the rerun is done
+        :param bool fresh_input: Run the input phase again, e.g. when the input produces different entries on rerun
         """
         msg = 'Plugin {0} has requested task to be ran again after execution has completed.'.format(
             self.current_plugin if plugin is None else plugin
@@ -578,6 +716,8 @@ class Task(object):
         else:
             log.info(msg)
         self._rerun = True
+        if fresh_input:
+            self._fresh_input = True
 
     def config_changed(self):
         """
@@ -652,6 +792,9 @@ class Task(object):
                     continue
                 if phase in ('start', 'prepare') and self.is_rerun:
                     log.debug('skipping phase %s during rerun', phase)
+                elif phase == 'input' and self.is_rerun and self._input_snapshot is not None:
+                    log.debug('reusing %s entries from input phase', len(self._input_snapshot))
+                    self.all_entries.extend(clone_entries(self._input_snapshot))
                 elif phase == 'exit' and self._rerun and self._rerun_count < self.max_reruns:
                     log.debug('not running task_exit yet because task will rerun')
                 else:
@@ -660,6 +803,10 @@ class Task(object):
                     if phase == 'start':
                         # Store a copy of the config state after start phase to restore for reruns
                         self.prepared_config = copy.deepcopy(self.config)
+                    elif phase == 'input':
+                        # Store copies of the produced entries to replay them on reruns, with hooks which
+                        # do not share state with the entries of this run
+                        self._input_snapshot = clone_entries(self.all_entries)
         except TaskAbort:
             try:
                 self.__run_task_phase('abort')
@@ -699,10 +846,12 @@ class Task(object):
                 ):
                     log.info('Rerunning the task in case better resolution can be achieved.')
                     self._rerun_count += 1
-                    # TODO: Potential optimization is to take snapshots (maybe make the ones backlog uses built in
-                    # instead of taking another one) after input and just inject the same entries for the rerun
+                    if self._fresh_input:
+                        self._input_snapshot = None
+                    fire_event('task.execute.rerun', self, self._input_snapshot is not None)
                     self._all_entries = EntryContainer()
                     self._rerun = False
+                    self._fresh_input = False
                     continue
                 elif self._rerun:
                     log.info(
@@ -710,6 +859,7 @@ class Task(object):
                         % self._rerun_count
                     )
                 break
+            self._input_snapshot = None
             fire_event('task.execute.completed', self)
         finally:
             self.finished_event.set()
@@ -72,8 +72,18 @@ class TaskQueue(object):
 
     def put(self, task):
         """Adds a task to be executed to the queue."""
+        task.queued_time = time.time()
         self.run_queue.put(task)
 
+    def queued_task_names(self):
+        """Returns a set with the names of the tasks which are waiting in the queue or currently running."""
+        with self.run_queue.mutex:
+            names = set(task.name for task in self.run_queue.queue)
+        current_task = self.current_task
+        if current_task is not None:
+            names.add(current_task.name)
+        return names
+
     def __len__(self):
         return self.run_queue.qsize()
 
@@ -2,6 +2,7 @@ from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
 import copy
+from datetime import datetime, timedelta
 
 from flexget.api.app import base_message
 from flexget.components.managed_lists.lists.entry_list.api import ObjectsContainer as OC
@@ -369,3 +370,37 @@ class TestEntryListPagination(object):
         data = json.loads(rsp.get_data(as_text=True))
 
         assert data[0]['title'] == 'test_title_1'
+
+    def test_entry_list_cursor_pagination(self, api_client):
+        with Session() as session:
+            entry_list = EntryListList(name='test list')
+            session.add(entry_list)
+
+            for i in range(5):
+                e = Entry(title='test_title_%s' % i, original_url='url_%s' % i)
+                list_entry = EntryListEntry(e, entry_list.id)
+                list_entry.added = datetime(2019, 1, 1) + timedelta(hours=i)
+                entry_list.entries.append(list_entry)
+
+        titles = []
+        cursor = ''
+        while cursor is not None:
+            rsp = api_client.get(
+                '/entry_list/1/entries/?per_page=2&sort_by=added&cursor=' + cursor
+            )
+            assert rsp.status_code == 200, 'Response code is %s' % rsp.status_code
+            data = json.loads(rsp.get_data(as_text=True))
+
+            assert int(rsp.headers['count']) == len(data)
+            titles.extend(item['title'] for item in data)
+            cursor = rsp.headers.get('next-cursor')
+            if len(titles) == 2:
+                # Entries added while paging don't shift the following pages
+                with Session() as session:
+                    e = Entry(title='test_title_new', original_url='url_new')
+                    session.add(EntryListEntry(e, 1))
+
+        assert titles == ['test_title_%s' % i for i in range(4, -1, -1)]
+
+        rsp = api_client.get('/entry_list/1/entries/?sort_by=title&cursor=')
+        assert rsp.status_code == 400
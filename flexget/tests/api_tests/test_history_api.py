@@ -232,3 +232,41 @@ class TestHistoryPaginationAPI(object):
         assert len(data) == 1
         assert int(rsp.headers['total-count']) == 3
         assert int(rsp.headers['count']) == 1
+
+    def test_history_cursor_pagination(self, api_client, schema_match):
+        with Session() as session:
+            for i in range(5):
+                item = History()
+                for key in ('task', 'url', 'filename', 'details'):
+                    setattr(item, key, 'test_%s' % key)
+                item.title = 'test_title_%s' % i
+                session.add(item)
+
+        titles = []
+        cursor = ''
+        while cursor is not None:
+            rsp = api_client.get('/history/?per_page=2&sort_by=id&order=asc&cursor=' + cursor)
+            assert rsp.status_code == 200
+            data = json.loads(rsp.get_data(as_text=True))
+
+            errors = schema_match(OC.history_list_object, data)
+            assert not errors
+
+            assert int(rsp.headers['count']) == len(data)
+            titles.extend(item['title'] for item in data)
+            cursor = rsp.headers.get('next-cursor')
+
+        assert titles == ['test_title_%s' % i for i in range(5)]
+
+        rsp = api_client.get('/history/?sort_by=time&estimate_count=true&cursor=')
+        assert rsp.status_code == 200
+        data = json.loads(rsp.get_data(as_text=True))
+        assert data[0]['title'] == 'test_title_4'
+        assert int(rsp.headers['total-count']) == 5
+
+        # Cursor pagination is limited to indexed columns
+        rsp = api_client.get('/history/?sort_by=title&cursor=')
+        assert rsp.status_code == 400
+
+        rsp = api_client.get('/history/?cursor=invalid')
+        assert rsp.status_code == 400
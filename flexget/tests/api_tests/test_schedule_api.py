@@ -2,6 +2,7 @@ from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
 from flexget.api.app import base_message
+from flexget.components.scheduler import scheduler
 from flexget.components.scheduler.api import ObjectsContainer as OC
 from flexget.manager import Manager
 from flexget.utils import json
@@ -140,6 +141,31 @@ class TestScheduledAPI(object):
         errors = schema_match(base_message, data)
         assert not errors
 
+    def test_schedules_id_metrics(self, api_client, schema_match):
+        rsp = api_client.get('/schedules/')
+        data = json.loads(rsp.get_data(as_text=True))
+        schedule_id = data[0]['id']
+
+        # Schedule has not run yet
+        rsp = api_client.get('/schedules/{}/metrics/'.format(schedule_id))
+        assert rsp.status_code == 404, 'Response code is %s' % rsp.status_code
+
+        with patch.dict(scheduler.scheduler_job_map, {schedule_id: 'abc'}):
+            scheduler._update_metrics('abc', last_run=None, last_queue_wait=2.0, last_run_time=4.0)
+            scheduler._update_metrics('abc', last_run=None, last_queue_wait=0.0, last_run_time=2.0)
+            try:
+                rsp = api_client.get('/schedules/{}/metrics/'.format(schedule_id))
+            finally:
+                scheduler.job_metrics.pop('abc')
+        assert rsp.status_code == 200, 'Response code is %s' % rsp.status_code
+        data = json.loads(rsp.get_data(as_text=True))
+
+        errors = schema_match(OC.schedule_metrics, data)
+        assert not errors
+        assert data['runs'] == 2
+        assert data['avg_queue_wait'] == 1.0
+        assert data['avg_run_time'] == 3.0
+
     @patch.object(Manager, 'save_config')
     def test_schedules_id_delete(self, mocked_save_config, api_client, schema_match):
         # Get schedules to get their IDs
@@ -20,6 +20,7 @@ from flexget.components.series.db import (
     AlternateNames,
     Season,
     SeasonRelease,
+    SeriesSummary,
 )
 from flexget.utils import json
 
@@ -1824,6 +1825,67 @@ class TestSeriesPagination(object):
         assert links['next']['page'] == 3
         assert links['prev']['page'] == 1
 
+    def test_series_keyset_pagination(self, api_client):
+        with Session() as session:
+            for i in range(10):
+                series = Series()
+                session.add(series)
+
+                series.name = 'test series {}'.format(i)
+                task = SeriesTask('test task')
+                series.in_tasks = [task]
+
+        rsp = api_client.get('/series/?per_page=4&sort_by=show_name&order=asc')
+        assert rsp.status_code == 200, 'Response code is %s' % rsp.status_code
+        data = json.loads(rsp.get_data(as_text=True))
+        assert [s['name'] for s in data] == ['test series {}'.format(i) for i in range(4)]
+
+        rsp = api_client.get(
+            '/series/?per_page=4&sort_by=show_name&order=asc&after={}'.format(data[-1]['id'])
+        )
+        assert rsp.status_code == 200, 'Response code is %s' % rsp.status_code
+        data = json.loads(rsp.get_data(as_text=True))
+        assert [s['name'] for s in data] == ['test series {}'.format(i) for i in range(4, 8)]
+
+        rsp = api_client.get(
+            '/series/?per_page=4&sort_by=show_name&order=desc&after={}'.format(data[0]['id'])
+        )
+        assert rsp.status_code == 200, 'Response code is %s' % rsp.status_code
+        data = json.loads(rsp.get_data(as_text=True))
+        assert [s['name'] for s in data] == ['test series {}'.format(i) for i in range(3, -1, -1)]
+
+        rsp = api_client.get('/series/?per_page=4&sort_by=show_name&after=12345')
+        assert rsp.status_code == 404, 'Response code is %s' % rsp.status_code
+
+    def test_series_without_summary(self, api_client):
+        with Session() as session:
+            for i in range(3):
+                series = Series()
+                session.add(series)
+                series.name = 'test series {}'.format(i)
+                series.in_tasks = [SeriesTask('test task')]
+            unconfigured = Series()
+            unconfigured.name = 'unconfigured series'
+            session.add(unconfigured)
+        with Session() as session:
+            session.query(SeriesSummary).delete()
+
+        rsp = api_client.get('/series/?sort_by=show_name&order=asc')
+        assert rsp.status_code == 200, 'Response code is %s' % rsp.status_code
+        data = json.loads(rsp.get_data(as_text=True))
+        assert [s['name'] for s in data] == ['test series {}'.format(i) for i in range(3)]
+        assert int(rsp.headers['total-count']) == 3
+
+        rsp = api_client.get('/series/?in_config=unconfigured')
+        assert rsp.status_code == 200, 'Response code is %s' % rsp.status_code
+        data = json.loads(rsp.get_data(as_text=True))
+        assert [s['name'] for s in data] == ['unconfigured series']
+
+        rsp = api_client.get('/series/?per_page=2&sort_by=show_name&order=asc&after={}'.format(1))
+        assert rsp.status_code == 200, 'Response code is %s' % rsp.status_code
+        data = json.loads(rsp.get_data(as_text=True))
+        assert [s['name'] for s in data] == ['test series 1', 'test series 2']
+
     def test_episodes_pagination(self, api_client, link_headers):
         number_of_episodes = 200
         with Session() as session:
@@ -2,12 +2,14 @@ from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
 import json
+import logging
 import os
+import time
 
 import pytest
 from mock import patch
 
-from flexget import __version__
+from flexget import __version__, logger
 from flexget.api.app import __version__ as __api_version__, base_message
 from flexget.api.core.server import ObjectsContainer as OC
 from flexget.manager import Manager
@@ -131,3 +133,35 @@ class TestServerAPI(object):
         assert not errors
 
         assert len(data) == 2
+
+    def test_structured_log_search(self, api_client, manager, tmpdir, monkeypatch):
+        monkeypatch.setenv(logger.ENV_STRUCTURED, '1')
+        manager.options.logfile = tmpdir.join('flexget.log').strpath
+        handler = logger.StructuredFileHandler(manager.options.logfile + logger.STRUCTURED_SUFFIX)
+        for i, task in enumerate(['test', 'other', 'test']):
+            record = logging.LogRecord('mock', logging.INFO, __file__, 1, 'msg %s' % i, (), None)
+            record.task = task
+            handler.handle(record)
+        handler.close()
+
+        rsp = api_client.get('/server/log/?task=test&search=msg&until=2100-01-01T00:00:00')
+        assert rsp.status_code == 200
+        data = json.loads(rsp.get_data(as_text=True))
+        assert [line.get('message') for line in data['stream']] == ['msg 0', 'msg 2', None]
+        assert data['stream'][0]['task'] == 'test'
+
+    def test_log_filter_timezones(self):
+        from datetime import datetime
+        from flask_restplus.inputs import datetime_from_iso8601
+        from flexget.api.core.server import log_filters
+
+        local = datetime(2019, 6, 1, 12, 0, 0)
+        filters = log_filters(
+            {
+                'since': datetime_from_iso8601('2019-06-01T12:00:00Z'),
+                'until': datetime_from_iso8601('2019-06-01T14:00:00+02:00'),
+            }
+        )
+        assert filters['since'] == filters['until'] == 1559390400
+        # Without an offset the time is local
+        assert log_filters({'since': local})['since'] == time.mktime(local.timetuple())
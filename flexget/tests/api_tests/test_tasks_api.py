@@ -6,7 +6,8 @@ import json
 from mock import patch
 
 from flexget.api.app import base_message
-from flexget.api.core.tasks import ObjectsContainer as OC
+from flexget.api.core.tasks import ObjectsContainer as OC, telemetry_events
+from flexget.components.status.api import ObjectsContainer as StatusOC
 from flexget.manager import Manager
 
 
@@ -269,3 +270,45 @@ class TestDisabledTasks(object):
 
         assert len(data) == 1
         assert not data[0].get('name') == '_disabled_task'
+
+
+class TestTaskTelemetry(object):
+    config = """
+        tasks:
+          test:
+            mock:
+              - title: entry 1
+              - title: entry 2
+            accept_all: yes
+        """
+
+    def test_telemetry_stream(self, api_client, execute_task):
+        # The buffer is shared with the executions of earlier tests
+        last_id = telemetry_events.last_id
+        execute_task('test')
+
+        rsp = api_client.get('/tasks/telemetry/', headers={'Last-Event-ID': str(last_id)})
+        assert rsp.status_code == 200
+        events = [
+            json.loads(line[len('data: ') :])
+            for line in rsp.get_data(as_text=True).splitlines()
+            if line.startswith('data: ')
+        ]
+        events = [e for e in events if e['task'] == 'test']
+        assert events[0]['status'] == 'started'
+        assert events[-1]['status'] == 'complete'
+        assert events[-1]['produced'] == 2
+        assert events[-1]['accepted'] == 2
+        assert 'input' in events[-1]['phase_durations']
+        assert any(e['status'] == 'running' for e in events)
+
+    def test_execution_statistics(self, api_client, execute_task, schema_match):
+        execute_task('test')
+        rsp = api_client.get('/status/1/executions/?produced=false')
+        assert rsp.status_code == 200
+        data = json.loads(rsp.get_data(as_text=True))
+        errors = schema_match(StatusOC.executions_list, data)
+        assert not errors
+        assert data[0]['db_queries'] > 0
+        assert data[0]['http_requests'] == 0
+        assert 'filter' in data[0]['phase_durations']
@@ -133,6 +133,8 @@ def use_vcr(request, monkeypatch):
         if not online:
             log.debug('Disabling domain limiters during VCR playback.')
             monkeypatch.setattr('flexget.utils.requests.limit_domains', mock.Mock())
+        # VCR is not thread safe
+        monkeypatch.setattr('flexget.utils.tools.parallel_enabled', False)
         with vcr.use_cassette(path=cassette_path) as cassette:
             yield cassette
 
@@ -0,0 +1,54 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+from flexget.components.archive.db import ArchiveEntry
+from flexget.manager import Session
+
+
+class TestArchive(object):
+    config = """
+        tasks:
+          test:
+            archive: [tag1, tag2]
+            mock:
+              - {title: 'entry 1', url: 'http://localhost/1', description: 'first'}
+              - {title: 'entry 2', url: 'http://localhost/2'}
+              - {title: 'entry 2', url: 'http://localhost/2'}
+          test2:
+            archive: [tag3]
+            mock:
+              - {title: 'entry 2', url: 'http://localhost/2'}
+              - {title: 'entry 2', url: 'http://localhost/other'}
+    """
+
+    def archived(self):
+        with Session() as session:
+            return sorted(
+                (
+                    ae.title,
+                    ae.url,
+                    ae.description,
+                    sorted(s.name for s in ae.sources),
+                    sorted(t.name for t in ae.tags),
+                )
+                for ae in session.query(ArchiveEntry)
+            )
+
+    def test_archive(self, execute_task):
+        execute_task('test')
+        assert self.archived() == [
+            ('entry 1', 'http://localhost/1', 'first', ['test'], ['tag1', 'tag2']),
+            ('entry 2', 'http://localhost/2', None, ['test'], ['tag1', 'tag2']),
+        ]
+        # Running again should not duplicate anything
+        execute_task('test')
+        assert len(self.archived()) == 2
+
+    def test_existing_entries(self, execute_task):
+        execute_task('test')
+        execute_task('test2')
+        assert self.archived() == [
+            ('entry 1', 'http://localhost/1', 'first', ['test'], ['tag1', 'tag2']),
+            ('entry 2', 'http://localhost/2', None, ['test', 'test2'], ['tag1', 'tag2', 'tag3']),
+            ('entry 2', 'http://localhost/other', None, ['test2'], ['tag3']),
+        ]
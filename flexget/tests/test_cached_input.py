@@ -5,7 +5,7 @@ from datetime import timedelta
 
 import pytest
 
-from flexget.utils.cached_input import cached
+from flexget.utils.cached_input import cached, InputCacheStore, IterableCache, estimate_size
 from flexget import plugin
 from flexget.entry import Entry
 
@@ -23,7 +23,21 @@ class InputPersist(object):
         return [Entry(title='Test', url='http://test.com')]
 
 
+class InputNoTTL(object):
+    """Fake input plugin which is not kept in memory cache, emits an entry the first time it is run."""
+
+    hasrun = False
+
+    @cached('test_input_no_ttl', ttl='0 seconds')
+    def on_task_input(self, task, config):
+        if self.hasrun:
+            return []
+        self.hasrun = True
+        return [Entry(title='Test', url='http://test.com')]
+
+
 plugin.register(InputPersist, 'test_input', api_ver=2)
+plugin.register(InputNoTTL, 'test_input_no_ttl', api_ver=2)
 
 
 @pytest.mark.filecopy('rss.xml', '__tmp__/cached.xml')
@@ -36,6 +50,8 @@ class TestInputCache(object):
               url: __tmp__/cached.xml
           test_db:
             test_input: True
+          test_ttl:
+            test_input_no_ttl: True
     """
 
     def test_memory_cache(self, execute_task, tmpdir):
@@ -46,9 +62,16 @@ class TestInputCache(object):
         tmpdir.join('cached.xml').write('')
         task = execute_task('test_memory')
         assert task.entries, 'should have created entries from the cache'
-        # Turn the cache time down and run again to make sure the entries are not created again
-        cached.cache.cache_time = timedelta(minutes=0)
+        # Clear the cache and run again to make sure the entries are not created again
+        cached.cache.clear()
         task = execute_task('test_memory')
+        assert not task.entries, 'cache should have been cleared'
+
+    def test_ttl(self, execute_task):
+        """Test time to live given for an input"""
+        task = execute_task('test_ttl')
+        assert task.entries, 'should have created entries at the start'
+        task = execute_task('test_ttl')
         assert not task.entries, 'cache should have been expired'
 
     def test_db_cache(self, execute_task):
@@ -60,3 +83,34 @@ class TestInputCache(object):
         cached.cache.clear()
         task = execute_task('test_db')
         assert task.entries, 'should have created entries from the cache'
+
+
+class TestInputCacheStore(object):
+    def test_byte_budget(self):
+        entries = [Entry(title='Test %s' % i, url='http://test.com/%s' % i) for i in range(10)]
+        size = estimate_size(entries)
+        store = InputCacheStore(max_bytes=int(size * 2.5))
+        for name in ('a', 'b', 'c'):
+            store.set(name, entries, timedelta(minutes=5), size)
+        assert store.keys() == ['b', 'c'], 'least recently used results should have been dropped'
+        assert store.get('b') is entries
+        store.set('d', entries, timedelta(minutes=5), size)
+        assert store.get('c') is None
+        assert store.get('b') is entries
+        assert store.size == 2 * size
+
+    def test_expiry(self):
+        store = InputCacheStore()
+        store.set('a', [], timedelta(seconds=-1), 10)
+        assert store.get('a') is None
+        assert store.size == 0
+
+    def test_iterable_cache_copies(self):
+        finished = []
+        entries = iter([Entry(title='Test', url='http://test.com', tags=['a'])])
+        cache = IterableCache(entries, finished.append)
+        first = list(cache)
+        first[0]['tags'].append('b')
+        second = list(cache)
+        assert second[0]['tags'] == ['a']
+        assert len(finished) == 1, 'finished hook should be called once'
@@ -0,0 +1,116 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import os
+import threading
+import time
+
+from mock import patch, Mock
+
+from flexget.utils.cache import ResourceCache
+
+
+def make_response(content=b'data', status_code=200, headers=None):
+    response = Mock(status_code=status_code, content=content)
+    response.headers = headers or {'content-type': 'image/jpeg', 'etag': '"abc"'}
+    return response
+
+
+class TestResourceCache(object):
+    @patch('flexget.utils.cache.requests.get')
+    def test_cache_hit_and_index(self, mocked_get, tmpdir):
+        mocked_get.return_value = make_response()
+        cache = ResourceCache(tmpdir.strpath)
+        path, mime = cache.get('http://test/a.jpg')
+        assert mime == 'image/jpeg'
+        with open(path, 'rb') as f:
+            assert f.read() == b'data'
+
+        path, mime = cache.get('http://test/a.jpg')
+        assert mime == 'image/jpeg', 'mime type should be kept for cached resources'
+        assert mocked_get.call_count == 1
+
+        # Metadata is loaded from the index
+        cache = ResourceCache(tmpdir.strpath)
+        assert cache.size == 4
+        assert cache.get('http://test/a.jpg') == (path, 'image/jpeg')
+        assert mocked_get.call_count == 1
+
+    @patch('flexget.utils.cache.requests.get')
+    def test_index_batched(self, mocked_get, tmpdir):
+        mocked_get.return_value = make_response()
+        cache = ResourceCache(tmpdir.strpath)
+        with patch.object(cache, '_save', wraps=cache._save) as save:
+            for i in range(5):
+                cache.get('http://test/%s' % i)
+            # Only the first miss writes the index, the rest wait for the save interval or shutdown
+            assert save.call_count == 1
+            cache.save()
+            assert save.call_count == 2
+
+        cache = ResourceCache(tmpdir.strpath)
+        assert cache.size == 5 * 4
+        assert cache.get('http://test/4')[1] == 'image/jpeg'
+        assert mocked_get.call_count == 5
+
+    @patch('flexget.utils.cache.requests.get')
+    def test_unindexed_resources(self, mocked_get, tmpdir):
+        mocked_get.return_value = make_response()
+        cache = ResourceCache(tmpdir.strpath)
+        paths = [cache.get('http://test/%s' % i)[0] for i in range(3)]
+        # Index was written after the first miss only, as if flexget did not shut down cleanly
+        os.remove(paths[0])
+
+        cache = ResourceCache(tmpdir.strpath)
+        assert cache.size == 2 * 4
+        assert cache.get('http://test/2')[0] == paths[2]
+        assert mocked_get.call_count == 3
+
+    @patch('flexget.utils.cache.requests.get')
+    def test_evict_batch(self, mocked_get, tmpdir):
+        mocked_get.return_value = make_response(content=b'x' * 300 * 1024)
+        cache = ResourceCache(tmpdir.strpath, max_size=1)
+        paths = [cache.get('http://test/%s' % i)[0] for i in range(3)]
+        # Touch the first one so it is not the least recently used
+        cache.get('http://test/0')
+        cache.get('http://test/3')
+        assert cache.size == 3 * 300 * 1024
+        assert os.path.exists(paths[0])
+        assert not os.path.exists(paths[1])
+        assert os.path.exists(paths[2])
+
+    @patch('flexget.utils.cache.requests.get')
+    def test_coalesce(self, mocked_get, tmpdir):
+        def slow_get(url, headers=None):
+            time.sleep(0.2)
+            return make_response()
+
+        mocked_get.side_effect = slow_get
+        cache = ResourceCache(tmpdir.strpath)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get('http://test/a')))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert mocked_get.call_count == 1
+        assert len(set(results)) == 1
+
+    @patch('flexget.utils.cache.requests.get')
+    def test_revalidate(self, mocked_get, tmpdir):
+        mocked_get.return_value = make_response()
+        cache = ResourceCache(tmpdir.strpath, revalidate_after=-1)
+        path, _ = cache.get('http://test/a')
+
+        mocked_get.return_value = make_response(status_code=304, content=b'')
+        assert cache.get('http://test/a') == (path, 'image/jpeg')
+        for thread in threading.enumerate():
+            if thread.name == 'cached_resource_revalidate':
+                thread.join()
+        assert mocked_get.call_count == 2
+        assert mocked_get.call_args[1]['headers'] == {'If-None-Match': '"abc"'}
+        with open(path, 'rb') as f:
+            assert f.read() == b'data'
@@ -1,6 +1,8 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+from flexget import config_schema, plugin
+
 
 class TestCondition(object):
     config = """
@@ -98,3 +100,16 @@ class TestQualityCondition(object):
             count = len(task.rejected)
             expected = int(taskname[-1])
             assert count == expected, "Expected %s rejects, got %d" % (expected, count)
+
+
+class TestConditionValidation(object):
+    config = """
+        tasks: {}
+    """
+
+    def test_invalid_expression_is_config_error(self, manager):
+        schema = plugin.get_plugin_by_name('if').schema
+        assert not config_schema.process_config([{"year > 2000": 'accept'}], schema)
+        errors = config_schema.process_config([{"year >": 'accept'}], schema)
+        assert errors
+        assert 'expression syntax' in errors[0].message
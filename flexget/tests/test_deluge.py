@@ -0,0 +1,186 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import copy
+import sys
+import types
+
+import pytest
+
+from flexget import plugin
+from flexget.plugins.clients import deluge
+
+TORRENT_STATUS = {
+    'files': [
+        {'index': 0, 'path': 'Show/show.mkv', 'size': 950},
+        {'index': 1, 'path': 'Show/show.srt', 'size': 10},
+        {'index': 2, 'path': 'Show/sample.mkv', 'size': 40},
+    ],
+    'total_size': 1000,
+    'save_path': '/downloads',
+    'move_on_completed_path': '',
+    'move_on_completed': False,
+    'progress': 100,
+}
+
+
+class StubDelugeRPCClient(object):
+    """Records the calls made to the daemon, answering with the status of two loaded torrents."""
+
+    instances = []
+
+    def __init__(self, host, port, username, password, decode_utf8=False):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.connected = False
+        self.connects = 0
+        self.calls = []
+        self.fail = False
+        self.instances.append(self)
+
+    def connect(self):
+        self.connected = True
+        self.connects += 1
+
+    def disconnect(self):
+        self.connected = False
+
+    def call(self, method, *args):
+        self.calls.append((method,) + args)
+        if self.fail:
+            raise plugin.PluginError('Connection to the daemon was lost')
+        if method == 'core.get_session_state':
+            return ['aaaa', 'bbbb']
+        if method == 'core.get_torrents_status':
+            if 'id' in args[0]:
+                return dict(
+                    (torrent_id, copy.deepcopy(TORRENT_STATUS)) for torrent_id in args[0]['id']
+                )
+            return {'aaaa': {'name': 'Torrent A', 'hash': 'aaaa', 'label': 'tv'}}
+        if method == 'core.get_torrent_status':
+            return copy.deepcopy(TORRENT_STATUS)
+
+    def methods(self):
+        return [call[0] for call in self.calls]
+
+
+@pytest.fixture(autouse=True)
+def deluge_client(monkeypatch):
+    module = types.ModuleType('deluge_client')
+    module.DelugeRPCClient = StubDelugeRPCClient
+    monkeypatch.setitem(sys.modules, 'deluge_client', module)
+    monkeypatch.setattr(deluge, '_clients', {})
+    monkeypatch.setattr(StubDelugeRPCClient, 'instances', [])
+    return module
+
+
+def connected_clients():
+    return [client for client in StubDelugeRPCClient.instances if client.connects]
+
+
+class TestDeluge(object):
+    config = """
+        templates:
+          daemon:
+            from_deluge: &daemon
+              host: deluge.example
+              username: user
+              password: pass
+        tasks:
+          input:
+            template: daemon
+          input_keys:
+            from_deluge:
+              <<: *daemon
+              keys: [label]
+              filter:
+                label: TV
+          output:
+            mock:
+              - {title: 'a', url: 'http://x/a', torrent_info_hash: 'AAAA'}
+              - {title: 'b', url: 'http://x/b', deluge_id: 'bbbb'}
+              - {title: 'c', url: 'http://x/c', torrent_info_hash: 'cccc'}
+            accept_all: yes
+            deluge:
+              <<: *daemon
+              action: resume
+              path: /new
+              content_filename: Renamed
+              main_file_only: yes
+              hide_sparse_files: yes
+    """
+
+    def test_connection_pool(self, execute_task):
+        execute_task('input')
+        execute_task('output')
+        (client,) = connected_clients()
+        assert client.connects == 1
+        assert client.methods() == [
+            'core.get_torrents_status',
+            'core.get_session_state',
+            'core.get_torrents_status',
+            'core.set_torrent_file_priorities',
+            'core.rename_files',
+            'core.set_torrent_file_priorities',
+            'core.rename_files',
+            'core.move_storage',
+            'core.resume_torrent',
+        ]
+
+    def test_failure_discards_connection(self, execute_task):
+        execute_task('input')
+        (client,) = connected_clients()
+        client.fail = True
+        execute_task('input', abort=True)
+        assert not client.connected
+        assert not deluge._clients
+        execute_task('input')
+        assert len(connected_clients()) == 2
+
+    def test_input_keys(self, execute_task):
+        task = execute_task('input')
+        (client,) = connected_clients()
+        assert client.calls == [('core.get_torrents_status', {}, [])]
+        (entry,) = task.entries
+        assert entry['title'] == 'Torrent A'
+        assert entry['torrent_info_hash'] == 'AAAA'
+        assert entry['deluge_label'] == 'tv'
+
+        execute_task('input_keys')
+        keys = sorted(['label'] + list(deluge.InputDeluge.settings_map))
+        assert client.calls[-1] == ('core.get_torrents_status', {'label': 'tv'}, keys)
+
+    def test_output_batches(self, execute_task):
+        execute_task('output')
+        (client,) = connected_clients()
+        # The status of all loaded torrents is fetched with one call
+        status_calls = [call for call in client.calls if call[0] == 'core.get_torrents_status']
+        assert status_calls == [
+            ('core.get_torrents_status', {'id': ['aaaa', 'bbbb']}, deluge.STATUS_KEYS)
+        ]
+        assert 'core.get_torrent_status' not in client.methods()
+        # All renames of a torrent are merged into one call
+        renames = [call for call in client.calls if call[0] == 'core.rename_files']
+        assert renames == [
+            (
+                'core.rename_files',
+                torrent_id,
+                [
+                    (0, 'Show/Renamed.mkv'),
+                    (1, 'Show/Renamed.srt'),
+                    (2, 'Show/.sparse_files/sample.mkv'),
+                ],
+            )
+            for torrent_id in ('aaaa', 'bbbb')
+        ]
+        priorities = [
+            call[2] for call in client.calls if call[0] == 'core.set_torrent_file_priorities'
+        ]
+        assert priorities == [[1, 1, 0], [1, 1, 0]]
+        # Storage is moved for all torrents at once, after their files have been renamed
+        assert client.calls[-2:] == [
+            ('core.move_storage', ['aaaa', 'bbbb'], '/new'),
+            ('core.resume_torrent', ['aaaa', 'bbbb']),
+        ]
@@ -1,10 +1,22 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import io
+import threading
+import time
 from datetime import datetime, timedelta
 
+import pytest
+import requests
+
 from flexget.entry import Entry
 from flexget import plugin
+from flexget.manager import Session
+from flexget.plugins.input.discover import DiscoverEntry, DiscoverSearch, SearchCache, SearchJob
+from flexget.utils.requests import RequestException, RequestCancelled
+
+# Captured before the online check replaces it, for tests serving the requests from a fake transport adapter
+requests_session_request = requests.Session.request
 
 
 class SearchPlugin(object):
@@ -16,8 +28,10 @@ class SearchPlugin(object):
     """
 
     schema = {}
+    calls = 0
 
     def search(self, task, entry, config=None):
+        SearchPlugin.calls += 1
         if not config:
             return []
         elif config == 'fail':
@@ -28,6 +42,138 @@ class SearchPlugin(object):
 plugin.register(SearchPlugin, 'test_search', interfaces=['search'], api_ver=2)
 
 
+class TwoResultsSearchPlugin(object):
+    """Fake search plugin which passes back two releases of the entry that was searched for."""
+
+    schema = {}
+
+    def search(self, task, entry, config=None):
+        return [
+            Entry(title='%s 720p' % entry['title'], url='http://localhost/720p'),
+            Entry(title='%s 1080p' % entry['title'], url='http://localhost/1080p'),
+        ]
+
+
+plugin.register(
+    TwoResultsSearchPlugin, 'test_two_results_search', interfaces=['search'], api_ver=2
+)
+
+
+class RerunOnce(object):
+    """Requests a single rerun of the task."""
+
+    schema = {'type': 'boolean'}
+
+    def on_task_filter(self, task, config):
+        if not task.is_rerun:
+            task.rerun()
+
+
+plugin.register(RerunOnce, 'test_discover_rerun_once', api_ver=2)
+
+
+class SlowSearchPlugin(object):
+    """
+    Fake search plugin which takes `config['delay']` seconds (or `config['slow_delay']` for titles starting with
+    Slow) to pass back the entry that was searched for. Remembers the most searches it has been running at once,
+    and the errors of the requests made after a slow search when `config['late_request']` is set.
+    """
+
+    schema = {}
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+    late_errors = []
+
+    def search(self, task, entry, config=None):
+        cls = type(self)
+        with cls.lock:
+            cls.running += 1
+            cls.max_running = max(cls.max_running, cls.running)
+        try:
+            if entry['title'].startswith('Slow'):
+                time.sleep(config['slow_delay'])
+                if config.get('late_request'):
+                    try:
+                        task.requests.get('http://localhost/late')
+                    except RequestException as e:
+                        cls.late_errors.append(e)
+            else:
+                time.sleep(config['delay'])
+        finally:
+            with cls.lock:
+                cls.running -= 1
+        return [Entry(entry)]
+
+
+plugin.register(SlowSearchPlugin, 'test_slow_search', interfaces=['search'], api_ver=2)
+
+
+class SessionInput(object):
+    """Fake input plugin which flushes a row into `task.session` for each of the `config` titles."""
+
+    schema = {'type': 'array', 'items': {'type': 'string'}}
+
+    def on_task_input(self, task, config):
+        for title in config:
+            task.session.add(DiscoverEntry(title, 'session input'))
+        task.session.flush()
+        return [Entry(title=title, url='http://localhost/%s' % title) for title in config]
+
+
+plugin.register(SessionInput, 'test_session_input', api_ver=2)
+
+
+class WritingSearchPlugin(object):
+    """Fake search plugin which writes a row with a session of its own for each search."""
+
+    schema = {}
+
+    def search(self, task, entry, config=None):
+        with Session() as session:
+            session.add(DiscoverEntry(entry['title'], 'writing search'))
+        return [Entry(entry)]
+
+
+plugin.register(WritingSearchPlugin, 'test_writing_search', interfaces=['search'], api_ver=2)
+
+
+class RequestSearchPlugin(object):
+    """Fake search plugin which fetches a results page from `config` url for each search."""
+
+    schema = {}
+
+    def search(self, task, entry, config=None):
+        task.requests.get(config, params={'q': entry['title']}).content
+        return [Entry(entry)]
+
+
+plugin.register(RequestSearchPlugin, 'test_request_search', interfaces=['search'], api_ver=2)
+
+
+class SlowBody(io.BytesIO):
+    """Response body which is slowly read, remembering the most bodies being read at once."""
+
+    lock = threading.Lock()
+    open = 0
+    max_open = 0
+
+    def __init__(self, data):
+        super(SlowBody, self).__init__(data)
+        with SlowBody.lock:
+            SlowBody.open += 1
+            SlowBody.max_open = max(SlowBody.max_open, SlowBody.open)
+
+    def read(self, *args):
+        time.sleep(0.05)
+        data = super(SlowBody, self).read(*args)
+        if not data and not self.closed:
+            with SlowBody.lock:
+                SlowBody.open -= 1
+            self.close()
+        return data
+
+
 class EstRelease(object):
     """Fake release estimate plugin. Just returns 'est_release' entry field."""
 
@@ -84,6 +230,117 @@ class TestDiscover(object):
                 identified_by: ep
             mock_output: yes
             max_reruns: 3
+          test_concurrent_searches:
+            discover:
+              release_estimations: ignore
+              plugin_workers: 2
+              what:
+              - mock:
+                - title: Foo 1
+                - title: Foo 2
+                - title: Foo 3
+                - title: Foo 4
+                - title: Foo 5
+                - title: Foo 6
+              from:
+              - test_slow_search:
+                  delay: 0.2
+              - test_search: yes
+          test_cache:
+            discover:
+              release_estimations: ignore
+              interval: 0 seconds
+              cache:
+                empty_ttl: 0 seconds
+              what:
+              - mock:
+                - title: Foo
+                - title: Bar
+              from:
+              - test_search: yes
+              - test_search: no
+          test_cache_other_task:
+            discover:
+              release_estimations: ignore
+              cache: yes
+              what:
+              - mock:
+                - title: foo
+              from:
+              - test_search: yes
+          test_cache_disabled:
+            discover:
+              release_estimations: ignore
+              what:
+              - mock:
+                - title: foo
+              from:
+              - test_search: yes
+          test_search_timeout:
+            discover:
+              release_estimations: ignore
+              search_timeout: 1 second
+              plugin_workers: 1
+              what:
+              - mock:
+                - title: Slow 1
+                - title: Foo 2
+              from:
+              - test_slow_search:
+                  delay: 0
+                  slow_delay: 2
+                  late_request: yes
+              - test_search: yes
+          test_domain_workers:
+            discover:
+              release_estimations: ignore
+              plugin_workers: 4
+              domain_workers: 1
+              what:
+              - mock:
+                - title: Foo 1
+                - title: Foo 2
+                - title: Foo 3
+                - title: Foo 4
+              from:
+              - test_request_search: http://search.example.com/
+          test_fill_list:
+            mock:
+            - {title: 'Foo.S01E01.720p', url: 'http://localhost/foo'}
+            - {title: 'Bar.S01E01.720p', url: 'http://localhost/bar'}
+            - {title: 'Baz.S01E01.720p', url: 'http://localhost/baz'}
+            accept_all: yes
+            list_add:
+            - entry_list: search list
+          test_entry_list_search:
+            discover:
+              release_estimations: ignore
+              max_workers: 4
+              plugin_workers: 4
+              what:
+              - mock:
+                - title: Foo
+                - title: Bar
+                - title: Baz
+                - title: Missing
+              from:
+              - entry_list: search list
+            # The entries were seen when they were added to the list
+            disable: seen
+          test_rerun_reusing_input:
+            discover:
+              release_estimations: ignore
+              cache: no
+              what:
+              - mock:
+                - title: Foo
+              from:
+              - test_two_results_search: yes
+            test_discover_rerun_once: yes
+            regexp:
+              accept:
+              - 720p
+            disable: seen
 
     """
 
@@ -128,6 +385,148 @@ class TestDiscover(object):
             task.mock_output
         )
 
+    def test_concurrent_searches(self, execute_task):
+        SlowSearchPlugin.max_running = 0
+        task = execute_task('test_concurrent_searches')
+        assert SlowSearchPlugin.max_running == 2
+        # Results are in the order of entries and search plugins
+        assert [(e['title'], e['discovered_with']) for e in task.entries] == [
+            ('Foo %d' % i, name)
+            for i in range(1, 7)
+            for name in ('test_slow_search', 'test_search')
+        ]
+
+    def test_cache(self, execute_task):
+        SearchPlugin.calls = 0
+        task = execute_task('test_cache')
+        assert len(task.entries) == 2
+        assert SearchPlugin.calls == 4
+        # Searches with results are cached, empty results have expired already
+        task = execute_task('test_cache')
+        assert [e['title'] for e in task.entries] == ['Foo', 'Bar']
+        assert SearchPlugin.calls == 6
+        # Cached results are shared between tasks
+        task = execute_task('test_cache_other_task')
+        assert [e['title'] for e in task.entries] == ['Foo']
+        assert SearchPlugin.calls == 6
+        # The cache is only used when enabled
+        task = execute_task('test_cache_disabled')
+        assert [e['title'] for e in task.entries] == ['foo']
+        assert SearchPlugin.calls == 7
+
+    def test_entry_list_search(self, execute_task):
+        execute_task('test_fill_list')
+        # Searches reading the database from the worker threads see the rows written by the task thread
+        task = execute_task('test_entry_list_search')
+        assert sorted(e['title'] for e in task.entries) == [
+            'Bar.S01E01.720p',
+            'Baz.S01E01.720p',
+            'Foo.S01E01.720p',
+        ]
+        assert task.find_entry(title='Foo.S01E01.720p')['discovered_from'] == 'Foo'
+
+    def test_cache_lookup_by_query(self, manager):
+        with Session() as session:
+            for query in ('foo', 'bar', 'baz'):
+                session.add(DiscoverSearch('test_search', query, 'hash'))
+        jobs = [
+            SearchJob(0, 2, Entry(title='Foo'), 'test_search', True, None),
+            SearchJob(1, 2, Entry(title='Other'), 'test_search', True, None),
+        ]
+        with Session() as session:
+            searches = SearchCache('1 hour', '20 minutes').get_searches(session, jobs)
+            # Only the searches of the jobs are loaded, not all searches of the plugin
+            assert list(searches) == [('test_search', 'foo', 'hash')]
+
+    def test_rerun_reusing_input(self, execute_task):
+        # Completion hooks of the replayed search results must not share the results of the first run
+        task = execute_task('test_rerun_reusing_input')
+        assert task.rerun_count == 1
+        assert task.telemetry.reused_inputs == 1
+        assert [e['title'] for e in task.all_entries] == ['Foo 720p', 'Foo 1080p']
+        assert [e['title'] for e in task.accepted] == ['Foo 720p']
+
+    def test_domain_workers(self, execute_task, monkeypatch):
+        def send(adapter, request, **kwargs):
+            response = requests.Response()
+            response.status_code = 200
+            response.url = request.url
+            response.request = request
+            response.raw = SlowBody(b'results')
+            return response
+
+        # Requests go through the whole session, but are answered by the transport adapter
+        monkeypatch.setattr('requests.adapters.HTTPAdapter.send', send)
+        monkeypatch.setattr('requests.sessions.Session.request', requests_session_request)
+        SlowBody.max_open = 0
+        task = execute_task('test_domain_workers')
+        assert len(task.entries) == 4
+        # Transfers of the results pages from the same host are limited, not just sending the requests
+        assert SlowBody.max_open == 1
+
+    def test_search_timeout(self, execute_task):
+        SlowSearchPlugin.late_errors = []
+        task = execute_task('test_search_timeout')
+        # The slow search is abandoned, and the remaining searches with the same plugin are skipped
+        assert [(e['title'], e['discovered_with']) for e in task.entries] == [
+            ('Slow 1', 'test_search'),
+            ('Foo 2', 'test_search'),
+        ]
+        # The abandoned search could not make requests anymore, and its thread was waited for
+        assert [type(e) for e in SlowSearchPlugin.late_errors] == [RequestCancelled]
+        assert not [t for t in threading.enumerate() if t.name == 'discover_search']
+
+
+class TestDiscoverFileDatabase(object):
+    """Searches from worker threads using a database file, which has separate connections unlike an in-memory one."""
+
+    config = """
+        tasks:
+          test_fill_list:
+            mock:
+            - {title: 'Foo.S01E01.720p', url: 'http://localhost/foo'}
+            - {title: 'Bar.S01E01.720p', url: 'http://localhost/bar'}
+            accept_all: yes
+            list_add:
+            - entry_list: search list
+          test_writing_searches:
+            discover:
+              release_estimations: ignore
+              max_workers: 4
+              plugin_workers: 4
+              what:
+              # The input's changes are committed before the searches write from other connections
+              - test_session_input: [Foo, Bar, Baz, Qux]
+              from:
+              - test_writing_search: yes
+              - entry_list: search list
+            disable: seen
+    """
+
+    @pytest.fixture()
+    def manager(self, request, config, tmpdir):
+        from .conftest import MockManager
+
+        filename = tmpdir.join('test.sqlite').strpath.replace('\\', '\\\\')
+        mockmanager = MockManager(config, request.cls.__name__, db_uri='sqlite:///%s' % filename)
+        yield mockmanager
+        mockmanager.shutdown()
+
+    def test_writing_searches(self, execute_task):
+        execute_task('test_fill_list')
+        task = execute_task('test_writing_searches')
+        assert sorted((e['title'], e['discovered_with']) for e in task.entries) == [
+            ('Bar', 'test_writing_search'),
+            ('Bar.S01E01.720p', 'entry_list'),
+            ('Baz', 'test_writing_search'),
+            ('Foo', 'test_writing_search'),
+            ('Foo.S01E01.720p', 'entry_list'),
+            ('Qux', 'test_writing_search'),
+        ]
+        with Session() as session:
+            rows = session.query(DiscoverEntry).filter(DiscoverEntry.task == 'writing search')
+            assert sorted(row.title for row in rows) == ['Bar', 'Baz', 'Foo', 'Qux']
+
 
 class TestEmitSeriesInDiscover(object):
     config = """
@@ -1,12 +1,20 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import hashlib
+import io
 import pytest
 import sys
 import os
+import threading
+import time
 
+import requests
 from jinja2 import Template
 
+# Captured before the online check replaces it, for tests serving the requests from a fake transport adapter
+requests_session_request = requests.Session.request
+
 
 # TODO more checks: fail_html, etc.
 @pytest.mark.online
@@ -181,3 +189,190 @@ class TestDownloadAuth(object):
 
         task = execute_task('with_auth')
         assert len(task.accepted) == 2
+
+
+class FakeServer(object):
+    """Serves `content` to requests made by the download plugin, dropping the first connection halfway through."""
+
+    def __init__(self, content, drop_after=None):
+        self.content = content
+        self.drop_after = drop_after
+        self.requests = []
+
+    def install(self, monkeypatch):
+        def get(session, url, **kwargs):
+            return self.get(url, **kwargs)
+
+        monkeypatch.setattr('flexget.utils.requests.Session.get', get)
+
+    def get(self, url, **kwargs):
+        headers = kwargs.get('headers') or {}
+        self.requests.append((url, headers))
+        offset = 0
+        response = requests.Response()
+        response.url = url
+        response.headers = requests.structures.CaseInsensitiveDict(
+            {'accept-ranges': 'bytes', 'etag': '"abc"', 'content-type': 'application/octet-stream'}
+        )
+        if 'Range' in headers:
+            offset = int(headers['Range'][len('bytes=') : -1])
+            response.status_code = 206
+            response.headers['content-range'] = 'bytes %s-%s/%s' % (
+                offset,
+                len(self.content) - 1,
+                len(self.content),
+            )
+        else:
+            response.status_code = 200
+        body = self.content[offset:]
+        response.headers['content-length'] = str(len(body))
+        if self.drop_after is not None:
+            body, self.drop_after = body[: self.drop_after], None
+        response.raw = io.BytesIO(body)
+        return response
+
+    def install_adapter(self, monkeypatch):
+        """Serves the requests from the transport adapter, so they go through the whole session."""
+
+        def send(adapter, request, **kwargs):
+            response = self.get(request.url, headers=request.headers)
+            response.request = request
+            response.raw = self.body(response.raw.read())
+            return response
+
+        monkeypatch.setattr('requests.adapters.HTTPAdapter.send', send)
+        monkeypatch.setattr('requests.sessions.Session.request', requests_session_request)
+
+    def body(self, data):
+        return io.BytesIO(data)
+
+
+class CountingServer(FakeServer):
+    """Keeps track of how many response bodies are being transferred at the same time."""
+
+    def __init__(self, content):
+        super(CountingServer, self).__init__(content)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def body(self, data):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        return CountingBody(self, data)
+
+    def finished(self):
+        with self.lock:
+            self.active -= 1
+
+
+class CountingBody(io.BytesIO):
+    def __init__(self, server, data):
+        super(CountingBody, self).__init__(data)
+        self.server = server
+
+    def read(self, *args):
+        # Slow enough for the downloads to overlap
+        time.sleep(0.01)
+        data = super(CountingBody, self).read(*args)
+        if not data:
+            self.close()
+        return data
+
+    def close(self):
+        if not self.closed:
+            self.server.finished()
+        super(CountingBody, self).close()
+
+
+@pytest.mark.usefixtures('tmpdir')
+class TestDownloadResume(object):
+    config = """
+        tasks:
+          resume:
+            mock:
+              - {title: 'entry 1', url: 'http://example.com/file.bin'}
+            accept_all: yes
+            download:
+              path: __tmp__
+              temp: __tmp__
+          parallel:
+            mock:
+              - {title: 'entry 1', url: 'http://a.example.com/1.bin'}
+              - {title: 'entry 2', url: 'http://a.example.com/2.bin'}
+              - {title: 'entry 3', url: 'http://b.example.com/3.bin'}
+              - {title: 'entry 4', url: 'http://b.example.com/4.bin'}
+              - {title: 'entry 5', url: 'http://c.example.com/5.bin'}
+            accept_all: yes
+            download:
+              path: __tmp__
+              temp: __tmp__
+              max_workers: 3
+          same_host:
+            mock:
+              - {title: 'entry 1', url: 'http://a.example.com/1.bin'}
+              - {title: 'entry 2', url: 'http://a.example.com/2.bin'}
+              - {title: 'entry 3', url: 'http://a.example.com/3.bin'}
+              - {title: 'entry 4', url: 'http://a.example.com/4.bin'}
+              - {title: 'entry 5', url: 'http://a.example.com/5.bin'}
+            accept_all: yes
+            download:
+              path: __tmp__
+              temp: __tmp__
+              max_workers: 5
+    """
+
+    def test_resume_interrupted(self, execute_task, monkeypatch, tmpdir):
+        content = os.urandom(1024 * 1024)
+        server = FakeServer(content, drop_after=300 * 1024)
+        server.install(monkeypatch)
+        task = execute_task('resume')
+        entry = task.find_entry('accepted', title='entry 1')
+        assert len(server.requests) == 2
+        assert server.requests[1][1]['Range'] == 'bytes=%s-' % (300 * 1024)
+        assert server.requests[1][1]['If-Range'] == '"abc"'
+        assert entry['file_sha1'] == hashlib.sha1(content).hexdigest()
+        assert entry['content-length'] == len(content)
+        with open(entry['location'], 'rb') as f:
+            assert f.read() == content
+        assert not [name for name in os.listdir(tmpdir.strpath) if name.endswith('.part')]
+
+    def test_resume_partial_from_previous_run(self, execute_task, monkeypatch, tmpdir):
+        content = os.urandom(512 * 1024)
+        partfile = os.path.join(
+            tmpdir.strpath, hashlib.md5(b'http://example.com/file.bin').hexdigest() + '.part'
+        )
+        with open(partfile, 'wb') as f:
+            f.write(content[:1000])
+        with open(partfile + '.meta', 'w') as f:
+            f.write('"abc"')
+        server = FakeServer(content)
+        server.install(monkeypatch)
+        task = execute_task('resume')
+        entry = task.find_entry('accepted', title='entry 1')
+        assert len(server.requests) == 1
+        assert server.requests[0][1]['Range'] == 'bytes=1000-'
+        assert entry['file_sha1'] == hashlib.sha1(content).hexdigest()
+        with open(entry['location'], 'rb') as f:
+            assert f.read() == content
+
+    def test_parallel(self, execute_task, monkeypatch):
+        server = FakeServer(b'content')
+        server.install(monkeypatch)
+        task = execute_task('parallel')
+        assert len(server.requests) == 5
+        assert len(task.accepted) == 5
+        for entry in task.accepted:
+            assert os.path.isfile(entry['location'])
+
+    def test_host_transfers_limited(self, execute_task, monkeypatch):
+        from flexget.plugins.output.download import CHUNK_SIZE, MAX_HOST_WORKERS
+
+        server = CountingServer(os.urandom(CHUNK_SIZE * 4))
+        server.install_adapter(monkeypatch)
+        task = execute_task('same_host')
+        assert len(task.accepted) == 5
+        assert server.active == 0
+        # The host slot is held while the file is received, not only until the headers arrive
+        assert server.max_active == MAX_HOST_WORKERS
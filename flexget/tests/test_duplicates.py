@@ -26,6 +26,17 @@ class TestDuplicates(object):
             duplicates:
               field: foo
               action: reject
+          duplicates_groups:
+            mock:
+              - {title: 'entry 1', url: 'http://foo.bar/1', another_field: ['a', 'b']}
+              - {title: 'entry 2', url: 'http://foo.bar/2', another_field: ['a', 'c']}
+              - {title: 'entry 3', url: 'http://foo.bar/3', another_field: ['a', 'b']}
+              - {title: 'entry 4', url: 'http://foo.bar/4', another_field: ['a', 'c']}
+              - {title: 'entry 5', url: 'http://foo.bar/5', another_field: ['a', 'b']}
+              - {title: 'entry 6', url: 'http://foo.bar/6', another_field: ['a', 'd']}
+            duplicates:
+              field: another_field
+              action: reject
     """
 
     def test_duplicates_accept(self, execute_task):
@@ -42,3 +53,8 @@ class TestDuplicates(object):
         task = execute_task('duplicates_missing_field')
         assert len(task.accepted) == 0
         assert len(task.rejected) == 0
+
+    def test_duplicates_groups(self, execute_task):
+        task = execute_task('duplicates_groups')
+        # The last entry of each group of duplicates is kept
+        assert sorted(e['title'] for e in task.rejected) == ['entry 1', 'entry 2', 'entry 3']
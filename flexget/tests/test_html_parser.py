@@ -0,0 +1,41 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+from flexget.utils import soup
+
+HTML = """<html><body>
+<div class=header><p>Some Text</div>
+<table class=results><tr><td class=name>Foo</td></tr></table>
+</body></html>"""
+
+
+class TestHtmlParser(object):
+    config = """
+        html_parser:
+          default: html.parser
+          plugins:
+            test_plugin: html5lib
+        tasks: {}
+    """
+
+    def test_config(self, manager):
+        assert soup.selected_parser() == 'html.parser'
+        with soup.plugin_context('test_plugin'):
+            assert soup.selected_parser() == 'html5lib'
+        assert soup.selected_parser() == 'html.parser'
+
+    def test_parse_only(self, manager):
+        result = soup.get_soup(HTML, parse_only=soup.SoupStrainer('table'))
+        assert result.find('td', class_='name').text == 'Foo'
+        assert not result.find('div')
+        # html5lib always builds the whole tree
+        with soup.plugin_context('test_plugin'):
+            result = soup.get_soup(HTML, parse_only=soup.SoupStrainer('table'))
+        assert result.find('td', class_='name').text == 'Foo'
+        assert result.find('div')
+
+    def test_fallback(self, manager, monkeypatch):
+        monkeypatch.setattr(soup, 'default_parser', 'not_installed')
+        result = soup.get_soup(HTML)
+        assert result.find('td', class_='name').text == 'Foo'
+        assert 'not_installed' in soup._missing_parsers
@@ -0,0 +1,90 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import json
+import logging
+import os
+import sys
+
+from flexget import logger
+
+
+def make_record(name, level, msg, task='', created=None):
+    record = logging.LogRecord(name, level, __file__, 1, msg, (), None)
+    record.task = task
+    if created is not None:
+        record.created = created
+    return record
+
+
+class TestStructuredLog(object):
+    def test_index_and_search(self, tmpdir, monkeypatch):
+        monkeypatch.setattr(logger, 'INDEX_BLOCK_SIZE', 1024)
+        filename = tmpdir.join('flexget.log.json').strpath
+        handler = logger.StructuredFileHandler(filename)
+        for i in range(200):
+            task = 'task_a' if i < 100 else 'task_b'
+            level = logging.ERROR if i == 150 else logging.INFO
+            handler.handle(make_record('plugin_%s' % (i % 3), level, 'msg %s' % i, task, i))
+
+        with open(filename + logger.INDEX_SUFFIX) as index:
+            blocks = [json.loads(line) for line in index]
+        assert len(blocks) > 5
+        assert blocks[0]['start'] == 0
+        assert blocks[0]['tasks'] == ['task_a']
+
+        records, end = logger.search_structured_log(filename, lines=5)
+        assert end == os.path.getsize(filename)
+        assert [r['message'] for r in records] == ['msg %s' % i for i in range(195, 200)]
+
+        records, _ = logger.search_structured_log(filename, lines=500, task='task_a')
+        assert len(records) == 100
+        assert records[0]['message'] == 'msg 0'
+
+        records, _ = logger.search_structured_log(filename, min_level=logging.WARNING)
+        assert [r['message'] for r in records] == ['msg 150']
+
+        records, _ = logger.search_structured_log(
+            filename, plugin='plugin_1', since=10, until=20, matcher=lambda r: '3' in r['message']
+        )
+        assert [r['message'] for r in records] == ['msg 13']
+        handler.close()
+
+    def test_rollover(self, tmpdir):
+        filename = tmpdir.join('flexget.log.json').strpath
+        handler = logger.StructuredFileHandler(filename, maxBytes=2048, backupCount=2)
+        for i in range(50):
+            handler.handle(make_record('plugin', logging.INFO, 'msg %s' % i, created=i))
+        handler.close()
+
+        assert os.path.isfile(filename + '.1')
+        assert os.path.isfile(filename + '.1' + logger.INDEX_SUFFIX)
+        records, _ = logger.search_structured_log(filename, lines=500)
+        messages = [r['message'] for r in records]
+        # Records are returned oldest first, across the rotated files
+        assert messages == ['msg %s' % i for i in range(50 - len(messages), 50)]
+        assert len(messages) > 20
+
+    def test_exception_message(self, tmpdir):
+        filename = tmpdir.join('flexget.log.json').strpath
+        handler = logger.StructuredFileHandler(filename)
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            record = logging.LogRecord(
+                'plugin', logging.ERROR, __file__, 1, 'failed', (), sys.exc_info()
+            )
+        record.task = ''
+        handler.handle(record)
+        handler.close()
+
+        records, _ = logger.search_structured_log(filename)
+        message = records[0]['message']
+        assert message.startswith('failed\nTraceback')
+        assert '\\n' not in message
+
+    def test_opt_in(self, tmpdir, monkeypatch):
+        monkeypatch.delenv(logger.ENV_STRUCTURED, raising=False)
+        assert not logger.structured_log_enabled()
+        monkeypatch.setenv(logger.ENV_STRUCTURED, '1')
+        assert logger.structured_log_enabled()
@@ -7,6 +7,8 @@ from future.utils import text_type
 import os
 import stat
 import sys
+import time
+from datetime import timedelta
 
 import pytest
 
@@ -304,3 +306,113 @@ class TestSetPlugin(object):
         entry = task.find_entry('entries', title='Entry 1')
         assert (isinstance(entry['int_field'], int)), 'should allow setting values as integers rather than strings'
         assert entry['int_field'] == 3
+
+
+class TestDatabaseProfile(object):
+    config = """
+        database:
+          profile: performance
+          cache_size: 4 MiB
+        tasks: {}
+    """
+
+    def test_pragmas(self, manager):
+        assert manager.db_pragmas['synchronous'] == 'NORMAL'
+        assert manager.db_pragmas['cache_size'] == -4096
+        with manager.engine.connect() as conn:
+            assert conn.execute('PRAGMA cache_size').scalar() == -4096
+            # NORMAL
+            assert conn.execute('PRAGMA synchronous').scalar() == 1
+
+
+class TestDbCleanup(object):
+    config = """
+        tasks: {}
+    """
+
+    @pytest.fixture(autouse=True)
+    def reset_cleanup_state(self, manager):
+        from flexget.utils.simple_persistence import SimplePersistence
+
+        # Persisted values outlive the manager of the previous test
+        manager.persist.pop('last_cleanup', None)
+        manager.persist.pop('db_cleanup_done', None)
+        SimplePersistence('db_vacuum').pop('last_vacuum', None)
+
+    def test_resumes_after_budget(self, manager, monkeypatch):
+        from flexget import manager as manager_module
+        from flexget.event import add_event_handler, remove_event_handler
+
+        calls = []
+
+        def slow_cleanup(manager, session):
+            calls.append('slow')
+            time.sleep(0.05)
+
+        def other_cleanup(manager, session):
+            calls.append('other')
+
+        monkeypatch.setattr(manager_module, 'DB_CLEANUP_BUDGET', timedelta(seconds=0.01))
+        add_event_handler('manager.db_cleanup', slow_cleanup, 255)
+        add_event_handler('manager.db_cleanup', other_cleanup, 254)
+        try:
+            manager.db_cleanup()
+            assert calls == ['slow']
+            assert manager.persist['db_cleanup_done']
+            # The tiny budget may need a few more runs to get through the rest of the handlers
+            for _ in range(50):
+                manager.db_cleanup()
+                if not manager.persist['db_cleanup_done']:
+                    break
+            assert calls == ['slow', 'other']
+            assert not manager.persist['db_cleanup_done']
+            # Interval has not passed again
+            manager.db_cleanup()
+            assert calls == ['slow', 'other']
+        finally:
+            remove_event_handler('manager.db_cleanup', slow_cleanup)
+            remove_event_handler('manager.db_cleanup', other_cleanup)
+
+    def test_handler_pauses(self, manager, monkeypatch):
+        from flexget import manager as manager_module
+        from flexget.event import add_event_handler, remove_event_handler
+
+        calls = []
+
+        def batched_cleanup(manager, session):
+            calls.append('batched')
+            time.sleep(0.1)
+            # Pretend there is still work left the first time
+            return not manager.db_cleanup_expired() or len(calls) > 1
+
+        def other_cleanup(manager, session):
+            calls.append('other')
+
+        monkeypatch.setattr(manager_module, 'DB_CLEANUP_BUDGET', timedelta(seconds=0.05))
+        add_event_handler('manager.db_cleanup', batched_cleanup, 255)
+        add_event_handler('manager.db_cleanup', other_cleanup, 254)
+        try:
+            manager.db_cleanup()
+            assert calls == ['batched']
+            assert not manager.db_cleanup_expired(), 'deadline should be reset after the cleanup'
+            # The unfinished handler is run again, before the rest
+            for _ in range(50):
+                manager.db_cleanup()
+                if not manager.persist['db_cleanup_done']:
+                    break
+            assert calls == ['batched', 'batched', 'other']
+            # A forced cleanup has no time limit
+            del calls[:]
+            manager.db_cleanup(force=True)
+            assert calls == ['batched', 'other']
+        finally:
+            remove_event_handler('manager.db_cleanup', batched_cleanup)
+            remove_event_handler('manager.db_cleanup', other_cleanup)
+
+    def test_incremental_vacuum(self, manager):
+        # The first cleanup converts the database with a full VACUUM
+        manager.db_cleanup(force=True)
+        with manager.engine.connect() as conn:
+            assert conn.execute('PRAGMA auto_vacuum').scalar() == 2
+        # Nothing is left to reclaim on the next cleanup
+        manager.db_cleanup(force=True)
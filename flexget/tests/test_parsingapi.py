@@ -3,6 +3,7 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
 from flexget.components.parsing import plugin_parsing
 from flexget import plugin
+from flexget.utils import qualities
 
 
 class TestParsingAPI(object):
@@ -38,3 +39,31 @@ class TestTaskParsing(object):
         # make sure when a non-default parser is installed on a task, it doesn't affect other tasks
         execute_task('explicit_parser')
         assert not plugin_parsing.selected_parsers
+
+
+class TestParseCache(object):
+    config = 'tasks: {}'
+
+    def test_results_are_cached(self, manager):
+        parsing = plugin.get('parsing', 'tests')
+        plugin_parsing.parse_cache.clear()
+        first = parsing.parse_series('Some.Show.S01E02.720p-GRP', name='Some Show')
+        second = parsing.parse_series('Some.Show.S01E02.720p-GRP', name='Some Show')
+        assert plugin_parsing.parse_cache.stats()['hits'] == 1
+        assert first is not second, 'callers should get their own copy of the result'
+        assert second.valid and second.identifier == 'S01E02'
+        # Modifying a result must not affect later lookups
+        first.name = 'Changed'
+        first.quality.resolution = qualities.get('1080p').resolution
+        third = parsing.parse_series('Some.Show.S01E02.720p-GRP', name='Some Show')
+        assert third.name == 'Some Show'
+        assert third.quality == qualities.Quality('720p')
+
+    def test_arguments_are_part_of_key(self, manager):
+        parsing = plugin.get('parsing', 'tests')
+        plugin_parsing.parse_cache.clear()
+        assert parsing.parse_series('Some.Show.S01E02', name='Some Show').valid
+        assert not parsing.parse_series('Some.Show.S01E02', name='Other Show').valid
+        parsing.parse_movie('Some Movie 2010 720p')
+        parsing.parse_movie('Some Movie 2010 720p', name='Another Movie')
+        assert plugin_parsing.parse_cache.stats()['hits'] == 0
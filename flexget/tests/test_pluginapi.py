@@ -7,7 +7,7 @@ import glob
 import pytest
 
 from flexget import plugin, plugins
-from flexget.event import event, fire_event
+from flexget.event import event, fire_event, remove_event_handler
 
 
 @pytest.mark.chdir
@@ -66,6 +66,43 @@ class TestPluginApi(object):
         assert 'oneword' in plugin.plugins
         assert 'test_html' in plugin.plugins
 
+    def test_phase_plugins_order(self):
+        plugin.load_plugins()
+        expected = sorted(
+            plugin.get_plugins(phase='filter'),
+            key=lambda p: p.phase_handlers['filter'],
+            reverse=True,
+        )
+        assert list(plugin.get_plugins_by_phase('filter')) == expected
+        # Changing a handler priority changes the order
+        handler = expected[-1].phase_handlers['filter']
+        original = handler.priority
+        handler.priority = expected[0].phase_handlers['filter'].priority + 1
+        try:
+            assert plugin.get_plugins_by_phase('filter')[0] == expected[-1]
+        finally:
+            handler.priority = original
+        assert list(plugin.get_plugins_by_phase('filter')) == expected
+
+    def test_event_order(self):
+        called = []
+
+        @event('test.event_order', priority=1)
+        def low():
+            called.append('low')
+
+        fire_event('test.event_order')
+
+        @event('test.event_order', priority=255)
+        def high():
+            called.append('high')
+
+        fire_event('test.event_order')
+        remove_event_handler('test.event_order', high)
+        fire_event('test.event_order')
+        remove_event_handler('test.event_order', low)
+        assert called == ['low', 'high', 'low', 'low']
+
 
 class TestExternalPluginLoading(object):
     _config = """
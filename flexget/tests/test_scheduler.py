@@ -0,0 +1,35 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import argparse
+import threading
+import time
+
+from flexget.components.scheduler import scheduler
+
+
+class IdleQueueManager(object):
+    """Starts tasks as soon as they are queued, before `execute` has returned."""
+
+    def execute(self, options, priority=1):
+        finished_events = []
+        for i, name in enumerate(options['tasks']):
+            task = argparse.Namespace(id=i, name=name, options=argparse.Namespace(**options))
+            time.sleep(0.05)
+            scheduler.record_task_start(task)
+            time.sleep(0.2)
+            finished = threading.Event()
+            finished.set()
+            finished_events.append((task.id, task.name, finished))
+        return finished_events
+
+
+class TestRunJob(object):
+    def test_queue_wait_on_idle_queue(self, monkeypatch):
+        monkeypatch.setattr(scheduler, 'manager', IdleQueueManager())
+        scheduler.run_job(['task1'], job_id='test_job')
+        metrics = scheduler.get_job_metrics('test_job')
+        assert metrics['runs'] == 1
+        assert 0.04 < metrics['last_queue_wait'] < 0.15
+        assert metrics['last_run_time'] >= 0.19
+        assert not scheduler._task_start_times
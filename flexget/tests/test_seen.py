@@ -199,3 +199,32 @@ class TestFilterSeenMovies(object):
         task = execute_task('test_2')
         msg = 'Changing scope should not have rejected Seen movie title 13'
         assert not task.find_entry('rejected', title='Seen movie title 13'), msg
+
+
+class TestSeenLearnEntries(object):
+    config = """
+      tasks:
+        many:
+          accept_all: yes
+          mock:
+          - {title: 'item 1', url: 'http://localhost/1'}
+          - {title: 'item 2', url: 'http://localhost/2', original_url: 'http://localhost/2'}
+          - {title: 'item 3', url: 'http://localhost/3', original_url: 'http://localhost/other'}
+    """
+
+    def test_fields_linked_to_entries(self, execute_task):
+        from flexget.components.seen.db import SeenEntry
+        from flexget.manager import Session
+
+        execute_task('many')
+        with Session() as session:
+            fields = {
+                se.title: sorted(f.value for f in se.fields) for se in session.query(SeenEntry)
+            }
+        assert fields == {
+            'item 1': ['http://localhost/1', 'item 1'],
+            'item 2': ['http://localhost/2', 'item 2'],
+            'item 3': ['http://localhost/3', 'http://localhost/other', 'item 3'],
+        }
+        task = execute_task('many')
+        assert len(task.rejected) == 3, 'all entries should have been remembered as seen'
@@ -1,6 +1,7 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+from datetime import datetime, timedelta
 from io import StringIO
 
 import pytest
@@ -241,6 +242,71 @@ class TestDatabase(object):
         task = execute_task('progress_2')
         assert not task.accepted, 'doppelgangers accepted'
 
+    def test_summary(self, execute_task):
+        """Series plugin: summary is updated when releases are stored and learned"""
+        execute_task('progress_1')
+        with Session() as session:
+            series = session.query(db.Series).filter(db.Series.name == 'progress').one()
+            summary = series.summary
+            assert summary.configured
+            assert summary.episode_count == 1
+            assert summary.release_count == 2
+            assert summary.downloaded_count == 1
+            assert summary.latest_entity.identifier == 'S01E20'
+            assert summary.last_download_date is not None
+            assert summary.latest_release_id == summary.latest_entity.latest_release.id
+        db.remove_series_entity('progress', 'S01E20')
+        with Session() as session:
+            summary = session.query(db.Series).filter(db.Series.name == 'progress').one().summary
+            assert summary.episode_count == 0
+            assert summary.latest_entity is None
+
+    def test_summary_upkeep_scoped(self, execute_task):
+        """Series plugin: summary upkeep only hooks into sessions writing to the series tables"""
+        from flexget.components.seen.db import SeenEntry
+
+        with Session() as session:
+            session.add(SeenEntry('title', 'task'))
+            session.commit()
+            assert 'series_summary_dirty' not in session.info
+        with Session() as session:
+            series = db.Series()
+            series.name = 'scoped'
+            session.add(series)
+            session.commit()
+            assert 'series_summary_dirty' in session.info
+        with Session() as session:
+            summary = session.query(db.Series).filter(db.Series.name == 'scoped').one().summary
+            assert summary.episode_count == 0
+
+    def test_summary_updated_on_commit(self, execute_task, monkeypatch):
+        """Series plugin: summaries are recalculated once per commit, not on every flush"""
+        updated = []
+        update_series_summary = db.update_series_summary
+
+        def counting_update(series):
+            updated.append(series.name)
+            return update_series_summary(series)
+
+        monkeypatch.setattr(db, 'update_series_summary', counting_update)
+        with Session() as session:
+            series = db.Series()
+            series.name = 'flushed'
+            session.add(series)
+            session.flush()
+            for number in range(1, 3):
+                episode = db.Episode()
+                episode.identifier = 'S01E0%s' % number
+                episode.identified_by = 'ep'
+                episode.season = 1
+                episode.number = number
+                series.episodes.append(episode)
+                session.flush()
+            assert updated == []
+            session.commit()
+            assert updated == ['flushed']
+            assert series.summary.episode_count == 2
+
 
 class TestFilterSeries(object):
     config = """
@@ -2543,3 +2609,50 @@ class TestSeriesDDAudio(object):
             title='Channels.S01E01.1080p.HDTV.DD+7.1-FlexGet'
         ), 'Channels.S01E01.1080p.HDTV.DD+7.1-FlexGet should have been accepted'
         assert len(task.accepted) == 1, 'should have accepted only one'
+
+
+class TestSeriesDbCleanup(object):
+    config = """
+        templates:
+          global:
+            parsing:
+              series: {{parser}}
+        tasks:
+          test:
+            series:
+            - old show
+            - new show
+            mock:
+            - title: old show s01e01 720p
+            - title: new show s01e01 720p
+    """
+
+    def make_old(self):
+        with Session() as session:
+            series = session.query(db.Series).filter(db.Series.name == 'old show').one()
+            session.query(db.SeriesTask).filter(db.SeriesTask.series_id == series.id).delete()
+            for episode in series.episodes:
+                for release in episode.releases:
+                    release.downloaded = False
+                    release.first_seen = datetime.now() - timedelta(days=200)
+
+    def series_names(self):
+        with Session() as session:
+            return (
+                sorted(summary.series.name for summary in session.query(db.SeriesSummary).all()),
+                sorted(series.name for series in session.query(db.Series).all()),
+            )
+
+    def test_cleanup(self, execute_task, manager):
+        execute_task('test')
+        self.make_old()
+        manager.db_cleanup(force=True)
+        assert self.series_names() == (['new show'], ['new show'])
+
+    def test_pauses_when_expired(self, execute_task, manager, monkeypatch):
+        execute_task('test')
+        self.make_old()
+        monkeypatch.setattr(manager, 'db_cleanup_expired', lambda: True)
+        with Session() as session:
+            assert db.db_cleanup(manager, session) is False
+        assert self.series_names() == (['new show', 'old show'], ['new show', 'old show'])
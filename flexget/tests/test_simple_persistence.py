@@ -1,7 +1,12 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
-from flexget.utils.simple_persistence import SimplePersistence
+from datetime import timedelta
+
+import pytest
+
+from flexget.manager import Session
+from flexget.utils.simple_persistence import SimpleKeyValue, SimplePersistence
 
 
 class TestSimplePersistence(object):
@@ -29,3 +34,64 @@ class TestSimplePersistence(object):
         # Make sure it commits and actually persists
         persist = SimplePersistence('testplugin')
         assert persist['aoeu'] == 'test'
+
+    def test_flush_only_changed(self, execute_task):
+        persist = SimplePersistence('flushplugin')
+        persist['changed'] = 'a'
+        persist['deleted'] = 'b'
+        SimplePersistence.flush()
+        del persist['deleted']
+        assert 'deleted' not in persist
+        assert ('flushplugin', 'deleted') in SimplePersistence.class_dirty[None]
+        SimplePersistence.flush()
+        assert not SimplePersistence.class_dirty[None]
+        with Session() as session:
+            keys = [
+                skv.key
+                for skv in session.query(SimpleKeyValue).filter(
+                    SimpleKeyValue.plugin == 'flushplugin'
+                )
+            ]
+        assert keys == ['changed']
+
+    def test_flush_failure_keeps_changes(self, execute_task, monkeypatch):
+        persist = SimplePersistence('failplugin')
+        persist['key'] = 'value'
+
+        def broken_session():
+            raise IOError('database is gone')
+
+        monkeypatch.setattr('flexget.utils.simple_persistence.Session', broken_session)
+        with pytest.raises(IOError):
+            SimplePersistence.flush()
+        assert ('failplugin', 'key') in SimplePersistence.class_dirty[None]
+        monkeypatch.undo()
+        SimplePersistence.flush()
+        with Session() as session:
+            skv = session.query(SimpleKeyValue).filter(SimpleKeyValue.plugin == 'failplugin').one()
+            assert skv.value == 'value'
+
+    def test_flush_keeps_added(self, execute_task):
+        persist = SimplePersistence('addedplugin')
+        persist['key'] = 'a'
+        SimplePersistence.flush()
+        with Session() as session:
+            skv = (
+                session.query(SimpleKeyValue).filter(SimpleKeyValue.plugin == 'addedplugin').one()
+            )
+            added = skv.added
+        persist['key'] = 'b'
+        SimplePersistence.flush()
+        with Session() as session:
+            skv = (
+                session.query(SimpleKeyValue).filter(SimpleKeyValue.plugin == 'addedplugin').one()
+            )
+            assert skv.value == 'b'
+            assert skv.added == added
+
+    def test_evict(self, execute_task):
+        execute_task('test')
+        assert 'test' in SimplePersistence.class_last_used
+        SimplePersistence.evict(max_age=timedelta(seconds=-1))
+        assert 'test' not in SimplePersistence.class_last_used
+        assert 'test' not in SimplePersistence.class_store
@@ -1,6 +1,43 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import copy
+
+from flexget import plugin
+from flexget.entry import Entry, clone_entries
+from flexget.task import EntryContainer
+
+
+class CountingInput(object):
+    """Produces a couple of entries and counts how many times the input phase ran."""
+
+    schema = {'type': 'boolean'}
+    calls = 0
+
+    def on_task_input(self, task, config):
+        CountingInput.calls += 1
+        entry = Entry(title='entry %s' % CountingInput.calls, url='http://test/1', tags=['a'])
+        entry.on_accept(lambda e: None)
+        return [entry, Entry(title='other', url='http://test/2')]
+
+
+class RerunRequest(object):
+    """Requests a single rerun of the task, with fresh input if configured so."""
+
+    schema = {'type': 'string', 'enum': ['reuse', 'fresh']}
+
+    def on_task_filter(self, task, config):
+        for entry in task.entries:
+            # Modifications of the first run should not show up in reruns
+            entry.setdefault('tags', []).append('modified')
+            entry['rerun_count'] = task.rerun_count
+        if not task.is_rerun:
+            task.rerun(fresh_input=config == 'fresh')
+
+
+plugin.register(CountingInput, 'test_counting_input', api_ver=2)
+plugin.register(RerunRequest, 'test_rerun_request', api_ver=2)
+
 
 class TestTemplate(object):
     config = """
@@ -29,3 +66,143 @@ class TestTemplate(object):
 
         task = execute_task('test')
         assert len(task.entries) == 2, 'Should have emitted House S01E02 and Hawaii Five-O S01E01'
+
+
+class TestEntryContainer(object):
+    def make_container(self, amount=6):
+        return EntryContainer(
+            Entry(title='%s' % i, url='http://localhost/%s' % i) for i in range(amount)
+        )
+
+    def test_state_counts(self):
+        container = self.make_container()
+        container[0].accept()
+        container[1].reject()
+        container[2].fail()
+        container[3].accept()
+        container[3].reject()
+        assert len(container.accepted) == 1
+        assert len(container.rejected) == 2
+        assert len(container.failed) == 1
+        assert len(container.undecided) == 2
+        assert len(container.entries) == 3
+        assert not EntryContainer().entries
+        # Views keep the order of the container
+        assert [e['title'] for e in container.entries] == ['0', '4', '5']
+        container.reverse()
+        assert [e['title'] for e in container.entries] == ['5', '4', '0']
+
+    def test_mutations(self):
+        container = self.make_container()
+        container[0].accept()
+        container[:] = container[:3]
+        assert len(container.entries) == 3
+        del container[0]
+        assert not container.accepted
+        container.append(Entry(title='new', url='http://localhost/new'))
+        container.pop(0)
+        container[0] = Entry(title='replaced', url='http://localhost/replaced')
+        container[0].reject()
+        assert len(container.rejected) == 1
+        assert len(container.undecided) == 1
+        container.clear()
+        assert not container.rejected
+
+    def test_copies_not_tracked(self):
+        container = self.make_container()
+        other = EntryContainer(container[:2])
+        copied = copy.deepcopy(container[0])
+        copied.accept()
+        assert not container.accepted
+        container[0].accept()
+        assert len(container.accepted) == 1
+        assert len(other.accepted) == 1
+        del container[0]
+        container[0].reject()
+        assert len(other.rejected) == 1
+        assert len(other.accepted) == 1
+
+
+class TestRerunInput(object):
+    config = """
+        templates:
+          global:
+            test_counting_input: yes
+            disable: seen
+            max_reruns: 1
+        tasks:
+          reuse:
+            test_rerun_request: reuse
+          fresh:
+            test_rerun_request: fresh
+    """
+
+    def test_input_reused(self, execute_task):
+        CountingInput.calls = 0
+        task = execute_task('reuse')
+        assert task.rerun_count == 1
+        assert CountingInput.calls == 1, 'input phase should not run again on rerun'
+        entry = task.find_entry(title='entry 1')
+        assert entry['rerun_count'] == 1
+        assert entry['tags'] == ['a', 'modified']
+        assert entry.task is task
+        # Hooks added during input phase are kept, but not duplicated
+        hooks = [hook for hook in entry._hooks['accept'] if hook.func.__name__ == '<lambda>']
+        assert len(hooks) == 1
+        assert len(task.all_entries) == 2
+        assert task.telemetry.reruns == 1
+        assert task.telemetry.reused_inputs == 1
+
+    def test_fresh_input(self, execute_task):
+        CountingInput.calls = 0
+        task = execute_task('fresh')
+        assert task.rerun_count == 1
+        assert CountingInput.calls == 2
+        assert task.find_entry(title='entry 2')
+        assert not task.find_entry(title='entry 1')
+        assert task.telemetry.reruns == 1
+        assert task.telemetry.reused_inputs == 0
+
+
+class TestEntryClone(object):
+    def test_clone(self):
+        entry = Entry(title='foo', url='http://foo', tags=['a'], info={'b': 1})
+        entry.register_lazy_func(lambda e: e.update(lazy='value'), ['lazy'])
+        entry.accept()
+        clone = entry.clone()
+        assert clone.accepted
+        assert clone['title'] == 'foo'
+        assert clone['original_url'] == 'http://foo'
+        clone['tags'].append('b')
+        clone['info']['c'] = 2
+        assert entry['tags'] == ['a']
+        assert entry['info'] == {'b': 1}
+        assert clone.is_lazy('lazy')
+        assert clone['lazy'] == 'value'
+        assert entry.is_lazy('lazy'), 'lazy lookup should only happen on the clone'
+
+    def test_clone_entries_rebinds_hooks(self):
+        completed = []
+
+        def on_complete(entry, group=None, tag=None):
+            group.remove(entry)
+            completed.append((entry, tag))
+
+        entries = [Entry(title='a', url='http://a'), Entry(title='b', url='http://b')]
+        group = list(entries)
+        for entry in entries:
+            entry.on_complete(on_complete, group=group, tag='x')
+        clones = clone_entries(entries)
+        for entry in entries:
+            entry.complete()
+        assert not group
+        # The clones got a group of their own, other arguments are shared
+        for clone in clones:
+            clone.complete()
+        assert [(entry['title'], tag) for entry, tag in completed] == [
+            ('a', 'x'),
+            ('b', 'x'),
+            ('a', 'x'),
+            ('b', 'x'),
+        ]
+        assert all(entry is clone for (entry, _), clone in zip(completed[2:], clones))
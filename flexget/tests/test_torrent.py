@@ -1,12 +1,16 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import binascii
 import os
+import socket
+import struct
+import threading
 
 import mock
 import pytest
 
-from flexget.utils.bittorrent import Torrent
+from flexget.utils.bittorrent import Torrent, bencode
 
 
 class TestInfoHash(object):
@@ -334,6 +338,97 @@ class TestTorrentAlive(object):
         assert get_udp_seeds('udp://127.0.0.1:PORT/announce', 'HASH') == 0
         assert get_udp_seeds('udp://127.0.0.1:65536/announce', 'HASH') == 0
 
+    def test_torrent_alive_udp_multi_hash_scrape(self):
+        from flexget.components.bittorrent import torrent_alive
+
+        tracker = FakeUDPTracker()
+        url = 'udp://127.0.0.1:%s/announce' % tracker.port
+        info_hashes = ['%040X' % i for i in range(1, 101)]
+        try:
+            seeds = torrent_alive.scrape_trackers({url: info_hashes})
+            # The cached results and connection id are used for the second scrape
+            seeds_again = torrent_alive.scrape_trackers({url: info_hashes + ['%040X' % 200]})
+        finally:
+            tracker.close()
+        assert seeds == dict(((url, h), int(h, 16)) for h in info_hashes)
+        assert seeds_again[(url, '%040X' % 200)] == 200
+        # One handshake, then two scrape packets for 100 hashes and one for the new hash
+        assert tracker.connects == 1
+        assert tracker.scrapes == [74, 26, 1]
+
+    def test_torrent_alive_udp_wrong_transaction(self):
+        from flexget.components.bittorrent import torrent_alive
+
+        tracker = FakeUDPTracker(wrong_transaction=True)
+        url = 'udp://127.0.0.1:%s/announce' % tracker.port
+        try:
+            seeds = torrent_alive.scrape_udp(url, ['%040X' % 1])
+        finally:
+            tracker.close()
+        assert tracker.scrapes == [1]
+        assert seeds == {}
+
+    @mock.patch('flexget.utils.requests.get')
+    def test_torrent_alive_http_multi_hash_scrape(self, mocked_get):
+        from flexget.components.bittorrent import torrent_alive
+
+        info_hashes = ['%040X' % i for i in range(1, 61)]
+        # The raw info hash keys of the response are decoded to text when they are valid utf-8
+        files = dict(
+            (binascii.unhexlify(h), {'complete': int(h, 16), 'incomplete': 0}) for h in info_hashes
+        )
+        mocked_get.return_value = mock.Mock(content=bencode({'files': files}))
+        url = 'http://tracker.test/announce?passkey=abc'
+
+        seeds = torrent_alive.scrape_trackers({url: info_hashes})
+        assert seeds == dict(((url, h), int(h, 16)) for h in info_hashes)
+        # 60 hashes take two scrape requests
+        scrape_urls = [call[0][0] for call in mocked_get.call_args_list]
+        assert len(scrape_urls) == 2
+        assert scrape_urls[0].startswith('http://tracker.test/scrape?passkey=abc&info_hash=')
+        assert scrape_urls[0].count('info_hash=') == torrent_alive.HTTP_SCRAPE_MAX
+        assert scrape_urls[1].count('info_hash=') == 10
+
+
+class FakeUDPTracker(object):
+    """UDP tracker on localhost, which reports as many seeds as the numeric value of each info hash."""
+
+    connection_id = 0x1234
+
+    def __init__(self, wrong_transaction=False):
+        self.wrong_transaction = wrong_transaction
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(('127.0.0.1', 0))
+        self.port = self.socket.getsockname()[1]
+        self.connects = 0
+        self.scrapes = []
+        self.thread = threading.Thread(target=self.serve)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def serve(self):
+        while True:
+            try:
+                data, address = self.socket.recvfrom(2048)
+            except (IOError, OSError):
+                return
+            connection_id, action, transaction_id = struct.unpack(b'>QLL', data[:16])
+            if action == 0:
+                self.connects += 1
+                reply = struct.pack(b'>LLQ', 0, transaction_id, self.connection_id)
+            else:
+                hashes = [data[i : i + 20] for i in range(16, len(data), 20)]
+                self.scrapes.append(len(hashes))
+                if self.wrong_transaction:
+                    transaction_id += 1
+                reply = struct.pack(b'>LL', 2, transaction_id)
+                for info_hash in hashes:
+                    reply += struct.pack(b'>LLL', int(binascii.hexlify(info_hash), 16), 0, 0)
+            self.socket.sendto(reply, address)
+
+    def close(self):
+        self.socket.close()
+
 
 class TestRtorrentMagnet(object):
     __tmp__ = True
@@ -0,0 +1,194 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import sys
+import types
+from datetime import datetime
+
+import pytest
+
+from flexget.plugins.clients import transmission
+
+
+class TransmissionError(Exception):
+    def __init__(self, message='', original=None):
+        super(TransmissionError, self).__init__(message)
+        self.message = message
+        self.original = original
+
+
+class HTTPHandlerError(Exception):
+    pass
+
+
+class StubTorrent(object):
+    def __init__(self, id, name, hash):
+        self.id = id
+        self.name = name
+        self.hashString = hash
+        self.totalSize = 1024 * 1024
+        self.torrentFile = '/torrents/%s.torrent' % name
+        self.comment = ''
+        self.downloadDir = '/downloads'
+        self.isFinished = False
+        self.isPrivate = False
+        self.ratio = 0
+        self.uploadRatio = 0
+        self.status = 'seeding'
+        self.seedRatioMode = 0
+        self.seedRatioLimit = 0
+        self.seedIdleMode = 0
+        self.seedIdleLimit = 0
+        self.date_active = self.date_added = self.date_done = self.date_started = datetime.now()
+        self.addedDate = self.doneDate = 0
+        self.priority = 'normal'
+        self.progress = 100
+        self.secondsDownloading = self.secondsSeeding = 0
+        self.trackers = [{'announce': 'http://tracker.example.com/announce'}]
+        self.error = 0
+
+
+class StubSession(object):
+    start_added_torrents = True
+    download_dir = '/downloads'
+    seedRatioLimited = False
+    idle_seeding_limit_enabled = False
+
+
+class StubClient(object):
+    """Records the RPC calls made by the plugins."""
+
+    instances = []
+
+    def __init__(self, address, port, user, password):
+        self.calls = []
+        self.instances.append(self)
+
+    def _record(self, name, *args, **kwargs):
+        self.calls.append((name, args, kwargs))
+
+    def calls_to(self, name):
+        return [(args, kwargs) for call, args, kwargs in self.calls if call == name]
+
+    def get_session(self):
+        self._record('get_session')
+        return StubSession()
+
+    def get_torrents(self, arguments=None):
+        self._record('get_torrents', arguments=arguments)
+        return [StubTorrent(1, 'Torrent A', 'AAAA'), StubTorrent(2, 'Torrent B', 'BBBB')]
+
+    def move_torrent_data(self, ids, location, timeout=None):
+        self._record('move_torrent_data', ids, location, timeout)
+
+    def change_torrent(self, ids, timeout=None, **kwargs):
+        self._record('change_torrent', ids, timeout, **kwargs)
+
+    def start_torrent(self, ids):
+        self._record('start_torrent', ids)
+
+    def stop_torrent(self, ids):
+        self._record('stop_torrent', ids)
+
+    def remove_torrent(self, ids, delete_data=False):
+        self._record('remove_torrent', ids, delete_data=delete_data)
+
+
+@pytest.fixture(autouse=True)
+def transmissionrpc(monkeypatch):
+    module = types.ModuleType('transmissionrpc')
+    module.__version__ = '0.11'
+    module.Client = StubClient
+    module.TransmissionError = TransmissionError
+    module.HTTPHandlerError = HTTPHandlerError
+    monkeypatch.setitem(sys.modules, 'transmissionrpc', module)
+    monkeypatch.setattr(transmission, 'transmissionrpc', module, raising=False)
+    monkeypatch.setattr(transmission, 'TransmissionError', TransmissionError, raising=False)
+    monkeypatch.setattr(transmission, 'HTTPHandlerError', HTTPHandlerError, raising=False)
+    monkeypatch.setattr(transmission, '_clients', {})
+    monkeypatch.setattr(StubClient, 'instances', [])
+    return module
+
+
+class TestTransmission(object):
+    config = """
+        tasks:
+          input:
+            from_transmission: yes
+          pause_input:
+            from_transmission: yes
+            accept_all: yes
+            transmission:
+              action: pause
+          batches:
+            mock:
+              - {title: 'a', url: 'http://x/a', torrent_info_hash: 'aaaa'}
+              - {title: 'b', url: 'http://x/b', transmission_id: 2}
+              - {title: 'c', url: 'http://x/c', torrent_info_hash: 'cccc'}
+            accept_all: yes
+            transmission:
+              action: resume
+              path: /new
+              max_up_speed: 10
+          separate_changes:
+            mock:
+              - {title: 'a', url: 'http://x/a', torrent_info_hash: 'aaaa'}
+              - {title: 'b', url: 'http://x/b', torrent_info_hash: 'bbbb', max_up_speed: 20}
+            accept_all: yes
+            transmission:
+              action: resume
+              max_up_speed: 10
+    """
+
+    def test_input_fields(self, execute_task):
+        task = execute_task('input')
+        assert len(task.entries) == 2
+        entry = task.find_entry(title='Torrent A')
+        assert entry['transmission_id'] == 1
+        assert entry['transmission_trackers'] == ['http://tracker.example.com/announce']
+        (client,) = StubClient.instances
+        assert client.calls_to('get_torrents') == [
+            ((), {'arguments': sorted(set(transmission.INPUT_FIELDS))})
+        ]
+
+    def test_one_torrent_list_per_run(self, execute_task):
+        execute_task('pause_input')
+        (client,) = StubClient.instances
+        # The output reuses the list fetched by the input, which has all the fields it needs
+        assert len(client.calls_to('get_torrents')) == 1
+        assert len(client.calls_to('get_session')) == 1
+        assert client.calls_to('stop_torrent') == [(([1, 2],), {})]
+
+        execute_task('pause_input')
+        # The client is kept, but the torrents are fetched again for the new run
+        assert StubClient.instances == [client]
+        assert len(client.calls_to('get_torrents')) == 2
+
+    def test_batches(self, execute_task):
+        task = execute_task('batches')
+        assert len(task.accepted) == 3
+        (client,) = StubClient.instances
+        assert client.calls_to('get_torrents') == [
+            ((), {'arguments': sorted(transmission.OUTPUT_FIELDS)})
+        ]
+        # Only the torrents loaded in transmission are handled, in one call per kind
+        assert client.calls_to('move_torrent_data') == [(([1, 2], '/new', 120), {})]
+        assert client.calls_to('change_torrent') == [
+            (([1, 2], 30), {'uploadLimit': 10, 'uploadLimited': True})
+        ]
+        assert client.calls_to('start_torrent') == [(([1, 2],), {})]
+        assert [call for call, args, kwargs in client.calls] == [
+            'get_torrents',
+            'move_torrent_data',
+            'change_torrent',
+            'start_torrent',
+        ]
+
+    def test_differing_changes_not_merged(self, execute_task):
+        execute_task('separate_changes')
+        (client,) = StubClient.instances
+        assert client.calls_to('change_torrent') == [
+            (([1], 30), {'uploadLimit': 10, 'uploadLimited': True}),
+            (([2], 30), {'uploadLimit': 20, 'uploadLimited': True}),
+        ]
+        assert client.calls_to('start_torrent') == [(([1, 2],), {})]
@@ -1,6 +1,19 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+from flexget.entry import Entry
+from flexget.utils.tools import group_entries_by_fields
+
+
+class Unhashable(object):
+    __hash__ = None
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, Unhashable) and self.value == other.value
+
 
 class TestUniques(object):
     config = """
@@ -40,6 +53,20 @@ class TestUniques(object):
               - episode_id
               - quality
 
+          accept_groups:
+            mock:
+              - {title: 'bla1', episode_id: 1, series_id: [1, 2]}
+              - {title: 'bla2', episode_id: 2, series_id: [1, 2]}
+              - {title: 'bla3', episode_id: 1, series_id: [1, 2]}
+              - {title: 'bla4', episode_id: 2, series_id: [1, 2]}
+              - {title: 'bla5', episode_id: 1, series_id: [1, 3]}
+              - {title: 'bla6', episode_id: 1, series_id: [1, 2]}
+            unique:
+              action: accept
+              field:
+              - episode_id
+              - series_id
+
     """
 
     def test_single_field(self, execute_task):
@@ -59,3 +86,40 @@ class TestUniques(object):
         task = execute_task('missing_field')
         assert len(task.rejected) == 1, 'should reject 1 entires'
         assert task.rejected[0]['title'] == 'bla3', 'should reject bla3'
+
+    def test_accept_groups(self, execute_task):
+        """Unique plugin: Accept all but the first entry of each group"""
+        task = execute_task('accept_groups')
+        assert [e['title'] for e in task.accepted] == ['bla3', 'bla4', 'bla6']
+
+
+class TestGroupEntriesByFields(object):
+    def group_titles(self, values):
+        entries = [Entry(title='entry %s' % i, field=value) for i, value in enumerate(values)]
+        groups = group_entries_by_fields(entries, ['field'])
+        return [[e['title'] for e in group] for group in groups.values()]
+
+    def test_unhashable_values(self):
+        values = [
+            Unhashable(1),
+            'a',
+            Unhashable(2),
+            [Unhashable(1)],
+            Unhashable(1),
+            [Unhashable(1)],
+        ]
+        assert self.group_titles(values) == [
+            ['entry 0', 'entry 4'],
+            ['entry 1'],
+            ['entry 2'],
+            ['entry 3', 'entry 5'],
+        ]
+
+    def test_types_kept_distinct(self):
+        values = [[1, 2], (1, 2), [1, 2], {1: 2}, {(1, 2)}, {1: 2}]
+        assert self.group_titles(values) == [
+            ['entry 0', 'entry 2'],
+            ['entry 1'],
+            ['entry 3', 'entry 5'],
+            ['entry 4'],
+        ]
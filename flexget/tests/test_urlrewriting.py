@@ -1,9 +1,76 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import threading
+
+from flexget import plugin
 from flexget.plugin import get_plugin_by_name
 
 
+class ChainRewriter(object):
+    """Rewrites `http://chain.test/<from_step>/<id>` urls to `http://chain.test/<to_step>/<id>` and counts calls."""
+
+    def __init__(self, from_step, to_step):
+        self.prefix = 'http://chain.test/%s/' % from_step
+        self.to_step = to_step
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def url_rewritable(self, task, entry):
+        return entry['url'].startswith(self.prefix)
+
+    def url_rewrite(self, task, entry):
+        with self.lock:
+            self.calls += 1
+        entry['url'] = 'http://chain.test/%s/%s' % (self.to_step, entry['url'][len(self.prefix) :])
+        entry['chain_step'] = self.to_step
+
+
+class ChainRewriterA(ChainRewriter):
+    def __init__(self):
+        super(ChainRewriterA, self).__init__('a', 'b')
+
+
+class ChainRewriterB(ChainRewriter):
+    def __init__(self):
+        super(ChainRewriterB, self).__init__('b', 'final')
+
+
+class SearchRewriter(object):
+    """Rewrites `http://search.test/` urls by searching for the title of the entry."""
+
+    schema = {}
+
+    def __init__(self):
+        self.calls = 0
+
+    def url_rewritable(self, task, entry):
+        return entry['url'] == 'http://search.test/'
+
+    def url_rewrite(self, task, entry):
+        self.calls += 1
+        entry['url'] = 'http://search.test/result/%s' % entry['title'].replace(' ', '_')
+
+    def search(self, task, entry, config=None):
+        return []
+
+
+class RerunOnce(object):
+    schema = {'type': 'boolean'}
+
+    def on_task_output(self, task, config):
+        if not task.is_rerun:
+            task.rerun()
+
+
+plugin.register(ChainRewriterA, 'test_chain_a', interfaces=['urlrewriter'], api_ver=2)
+plugin.register(ChainRewriterB, 'test_chain_b', interfaces=['urlrewriter'], api_ver=2)
+plugin.register(
+    SearchRewriter, 'test_search_rewriter', interfaces=['urlrewriter', 'search'], api_ver=2
+)
+plugin.register(RerunOnce, 'test_rerun_once', api_ver=2)
+
+
 class TestURLRewriters(object):
     """
         Bad example, does things manually, you should use task.find_entry to check existance
@@ -92,3 +159,64 @@ class TestRegexpurlrewriter(object):
         assert task.find_entry(
             url='http://newzleech.com/?m=gen&dl=1&post=123'
         ), 'did not url_rewrite properly'
+
+
+class TestUrlRewritingFramework(object):
+    config = """
+        templates:
+          global:
+            mock:
+              - {title: 'entry 1', url: 'http://chain.test/a/1', urls: ['http://chain.test/a/1']}
+              - {title: 'entry 2', url: 'http://chain.test/a/2'}
+              - {title: 'entry 3', url: 'http://chain.test/b/3'}
+              - {title: 'entry 4', url: 'http://other.test/4'}
+              - {title: 'entry 5', url: 'http://search.test/'}
+              - {title: 'entry 6', url: 'http://search.test/'}
+            accept_all: yes
+        tasks:
+          test_chain:
+            urlrewriting:
+              max_workers: 4
+          test_rerun:
+            test_rerun_once: yes
+            disable: seen
+            max_reruns: 1
+    """
+
+    def reset_calls(self):
+        for name in ('test_chain_a', 'test_chain_b', 'test_search_rewriter'):
+            get_plugin_by_name(name).instance.calls = 0
+
+    def calls(self, name):
+        return get_plugin_by_name(name).instance.calls
+
+    def test_rewrite_chain(self, execute_task):
+        self.reset_calls()
+        task = execute_task('test_chain')
+        entry = task.find_entry(title='entry 1')
+        assert entry['url'] == 'http://chain.test/final/1'
+        assert entry['urls'] == ['http://chain.test/final/1']
+        assert entry['chain_step'] == 'final'
+        assert task.find_entry(title='entry 2')['url'] == 'http://chain.test/final/2'
+        assert task.find_entry(title='entry 3')['url'] == 'http://chain.test/final/3'
+        assert task.find_entry(title='entry 4')['url'] == 'http://other.test/4'
+        assert self.calls('test_chain_a') == 2
+        assert self.calls('test_chain_b') == 3
+
+    def test_rewrites_reused_on_rerun(self, execute_task):
+        self.reset_calls()
+        task = execute_task('test_rerun')
+        assert task.rerun_count == 1
+        entry = task.find_entry(title='entry 1')
+        assert entry['url'] == 'http://chain.test/final/1'
+        assert entry['chain_step'] == 'final'
+        assert self.calls('test_chain_a') == 2, 'rewrites should not be repeated on rerun'
+        assert self.calls('test_chain_b') == 3, 'rewrites should not be repeated on rerun'
+
+    def test_search_rewrites_not_reused(self, execute_task):
+        self.reset_calls()
+        task = execute_task('test_rerun')
+        assert task.find_entry(title='entry 5')['url'] == 'http://search.test/result/entry_5'
+        assert task.find_entry(title='entry 6')['url'] == 'http://search.test/result/entry_6'
+        # Searched again for each entry on the rerun
+        assert self.calls('test_search_rewriter') == 4
@@ -7,7 +7,7 @@ import math
 import pytest
 
 from flexget.utils import json
-from flexget.utils.tools import parse_filesize, split_title_year
+from flexget.utils.tools import LRUCache, parse_filesize, split_title_year
 
 
 def compare_floats(float1, float2):
@@ -109,3 +109,22 @@ class TestSplitYearTitle(object):
     )
     def test_split_year_title(self, title, expected_title, expected_year):
         assert split_title_year(title) == (expected_title, expected_year)
+
+
+class TestLRUCache(object):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_size=2)
+        cache['a'] = 1
+        cache['b'] = 2
+        # Accessing 'a' makes 'b' the least recently used item
+        assert cache['a'] == 1
+        cache['c'] = 3
+        assert 'b' not in cache
+        assert set(cache) == {'a', 'c'}
+
+    def test_stats(self):
+        cache = LRUCache(max_size=2)
+        cache['a'] = 1
+        cache.get('a')
+        cache.get('b')
+        assert cache.stats() == {'size': 1, 'max_size': 2, 'hits': 1, 'misses': 1}
@@ -3,77 +3,326 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
 import hashlib
 import io
+import json
 import os
+import threading
+import time
+from collections import OrderedDict
 
 import requests
+from flexget.event import event
 from flexget.utils.tools import log
 
+# Fraction of the maximum size the cache is trimmed down to when it grows over the limit, so that eviction
+# happens in batches instead of on every new resource
+EVICT_TARGET = 0.9
+# Seconds between writes of the index, which is also written at shutdown
+INDEX_SAVE_INTERVAL = 60
+# Seconds to wait for another thread fetching the same resource
+FETCH_TIMEOUT = 60
 
-def cached_resource(url, base_dir, force=False, max_size=250, directory='cached_resources'):
+
+class _Fetch(object):
+    """A fetch of a resource in progress, which other requests for the same resource wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+
+
+class ResourceCache(object):
     """
-    Caches a remote resource to local filesystem. Return a tuple of local file name and mime type, use primarily
-    for API/WebUI.
+    Cache of remote resources in a directory, with metadata (url, size, mime type, validators and access times)
+    kept in memory in LRU order and persisted to an index file in the same directory.
 
-    :param url: Resource URL
-    :param force: Does not check for existence of cached resource, fetches the remote URL, ignores directory size limit
-    :param max_size: Maximum allowed size of directory, in MB.
-    :param directory: Name of directory to use. Default is `cached_resources`
-    :return: Tuple of file path and mime type
+    The total size is tracked when resources are added or removed, so the directory only needs to be listed once when
+    the index is loaded, to pick up resources added since it was last written. The index is written at most every
+    `INDEX_SAVE_INTERVAL` seconds and at shutdown, instead of on every change. Concurrent misses of the same URL are coalesced into a single download, and
+    resources older than `revalidate_after` are served from cache while being revalidated in the background with
+    a conditional request.
     """
-    mime_type = None
-    hashed_name = hashlib.md5(url.encode('utf-8')).hexdigest()
-    file_path = os.path.join(base_dir, directory, hashed_name)
-    directory = os.path.dirname(file_path)
 
-    if not os.path.exists(file_path) or force:
+    index_name = '.index.json'
+
+    def __init__(self, directory, max_size=250, revalidate_after=7 * 24 * 60 * 60):
+        """
+        :param directory: Directory to store resources in
+        :param max_size: Maximum allowed size of the cached resources, in MB
+        :param revalidate_after: Age in seconds after which a cached resource is revalidated
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.revalidate_after = revalidate_after
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()
+        self._size = 0
+        self._in_flight = {}
+        self._dirty = False
+        self._last_save = 0
+        self._load()
+
+    @property
+    def size(self):
+        """Total size of cached resources, in bytes"""
+        return self._size
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def get(self, url, force=False):
+        """
+        Return the local file name and mime type of a resource, fetching it if needed.
+
+        :param url: Resource URL
+        :param force: Fetch the remote URL even if the resource is cached, ignoring the size limit
+        :return: Tuple of file path and mime type
+        """
+        name = hashlib.md5(url.encode('utf-8')).hexdigest()
+        if not force:
+            with self._lock:
+                entry = self._entries.get(name)
+                if entry is not None and os.path.exists(self.path(name)):
+                    # Move to the most recently used end
+                    self._entries[name] = self._entries.pop(name)
+                    entry['accessed'] = time.time()
+                    self._dirty = True
+                    self._maybe_save()
+                    if time.time() - entry['fetched'] > self.revalidate_after:
+                        self._revalidate(url, name)
+                    return self.path(name), entry['mime']
+        return self._fetch(url, name, force=force)
+
+    def _revalidate(self, url, name):
+        if name in self._in_flight:
+            return
+
+        def revalidate():
+            try:
+                self._fetch(url, name, conditional=True)
+            except Exception as e:
+                log.debug('revalidating %s failed: %s', url, e)
+
+        thread = threading.Thread(target=revalidate, name='cached_resource_revalidate')
+        thread.daemon = True
+        thread.start()
+
+    def _fetch(self, url, name, force=False, conditional=False):
+        with self._lock:
+            fetch = self._in_flight.get(name)
+            owner = fetch is None
+            if owner:
+                fetch = self._in_flight[name] = _Fetch()
+        if not owner:
+            log.debug('waiting for %s which is already being fetched', url)
+            fetch.done.wait(FETCH_TIMEOUT)
+            if fetch.error is not None:
+                raise fetch.error
+            with self._lock:
+                entry = self._entries.get(name)
+                if entry is not None:
+                    return self.path(name), entry['mime']
+            # The other fetch did not finish in time, fetch it ourselves
+            return self._fetch(url, name, force=force)
+        try:
+            return self._download(url, name, force=force, conditional=conditional)
+        except Exception as e:
+            fetch.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[name]
+            fetch.done.set()
+
+    def _download(self, url, name, force=False, conditional=False):
+        file_path = self.path(name)
+        headers = {}
+        entry = self._entries.get(name)
+        if conditional and entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
         log.debug('caching %s', url)
-        response = requests.get(url)
+        response = requests.get(url, headers=headers)
+        if response.status_code == 304 and entry is not None:
+            log.debug('cached copy of %s is still valid', url)
+            with self._lock:
+                entry['fetched'] = time.time()
+                self._dirty = True
+                self._maybe_save()
+            return file_path, entry['mime']
         response.raise_for_status()
-        mime_type = response.headers.get('content-type')
         content = response.content
-        if not os.path.exists(directory):
-            os.makedirs(directory)
 
-        # Checks directory size and trims if necessary.
-        size = dir_size(directory) / (1024 * 1024.0)
-        if not force:
-            while size >= max_size:
-                log.debug(
-                    'directory %s size is over the allowed limit of %s, trimming', size, max_size
-                )
-                trim_dir(directory)
-                size = dir_size(directory) / (1024 * 1024.0)
-
-        with io.open(file_path, 'wb') as file:
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+        temp_path = file_path + '.part'
+        with io.open(temp_path, 'wb') as file:
             file.write(content)
-    return file_path, mime_type
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        os.rename(temp_path, file_path)
 
+        now = time.time()
+        entry = {
+            'url': url,
+            'size': len(content),
+            'mime': response.headers.get('content-type'),
+            'etag': response.headers.get('etag'),
+            'last_modified': response.headers.get('last-modified'),
+            'fetched': now,
+            'accessed': now,
+        }
+        with self._lock:
+            old = self._entries.pop(name, None)
+            if old is not None:
+                self._size -= old['size']
+            self._entries[name] = entry
+            self._size += entry['size']
+            if not force:
+                self._evict()
+            self._dirty = True
+            self._maybe_save()
+        return file_path, entry['mime']
 
-def dir_size(directory):
-    """
-    Sums the size of all files in a given dir. Not recursive.
+    def _evict(self):
+        """Removes least recently used resources in a batch, when the cache has grown over the size limit."""
+        max_size = self.max_size * 1024 * 1024
+        if self._size <= max_size:
+            return
+        log.debug(
+            'directory %s size is over the allowed limit of %s MB, trimming',
+            self.directory,
+            self.max_size,
+        )
+        target = max_size * EVICT_TARGET
+        removed = 0
+        # Never remove the most recently added resource
+        while self._size > target and len(self._entries) > 1:
+            name, entry = self._entries.popitem(last=False)
+            self._size -= entry['size']
+            removed += 1
+            try:
+                os.remove(self.path(name))
+            except OSError:
+                pass
+        log.debug('removed %s least recently used resources', removed)
 
-    :param directory: Directory to check
-    :return: Summed size of all files in Bytes.
-    """
-    size = 0
-    for file in os.listdir(directory):
-        filename = os.path.join(directory, file)
-        size += os.path.getsize(filename)
-    return size
+    def save(self):
+        """Writes the index, if it has changed since it was last written."""
+        with self._lock:
+            if self._dirty:
+                self._save()
 
+    def _maybe_save(self):
+        if self._dirty and time.time() - self._last_save > INDEX_SAVE_INTERVAL:
+            self._save()
 
-def trim_dir(directory):
-    """
-    Removed the least accessed file on a given dir
+    def _save(self):
+        if not os.path.exists(self.directory):
+            return
+        index_path = self.path(self.index_name)
+        entries = [dict(entry, name=name) for name, entry in self._entries.items()]
+        data = json.dumps({'entries': entries})
+        try:
+            with io.open(index_path + '.part', 'w', encoding='utf-8') as file:
+                file.write(data)
+            if os.path.exists(index_path):
+                os.remove(index_path)
+            os.rename(index_path + '.part', index_path)
+        except (IOError, OSError) as e:
+            log.warning('unable to save cached resources index: %s', e)
+            return
+        self._dirty = False
+        self._last_save = time.time()
+
+    def _load(self):
+        if not os.path.exists(self.directory):
+            return
+        try:
+            with io.open(self.path(self.index_name), encoding='utf-8') as file:
+                entries = json.load(file)['entries']
+        except (IOError, OSError, ValueError, KeyError):
+            log.debug('building cached resources index of %s', self.directory)
+            entries = []
+        names = set(self._resource_names())
+        for entry in entries:
+            name = entry.pop('name')
+            # Resources evicted since the index was last written
+            if name not in names:
+                self._dirty = True
+                continue
+            self._entries[name] = entry
+            self._size += entry['size']
+        self._add_unindexed(names)
+        self.save()
+
+    def _resource_names(self):
+        for name in os.listdir(self.directory):
+            if name.startswith(self.index_name) or name.endswith('.part'):
+                continue
+            yield name
+
+    def _add_unindexed(self, names):
+        """Adds the files in the directory missing from the index, as least recently used."""
+        files = []
+        for name in names:
+            if name in self._entries:
+                continue
+            stat = os.stat(self.path(name))
+            files.append((stat.st_atime, name, stat))
+        if not files:
+            return
+        self._dirty = True
+        indexed = list(self._entries.items())
+        self._entries.clear()
+        for _, name, stat in sorted(files):
+            self._entries[name] = {
+                'url': None,
+                'size': stat.st_size,
+                'mime': None,
+                'etag': None,
+                'last_modified': None,
+                'fetched': stat.st_mtime,
+                'accessed': stat.st_atime,
+            }
+            self._size += stat.st_size
+        self._entries.update(indexed)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+@event('manager.shutdown')
+def save_resource_caches(manager):
+    with _caches_lock:
+        caches = list(_caches.values())
+    for cache in caches:
+        cache.save()
 
-    :param directory: Directory to check
-    """
 
-    def access_time(f):
-        return os.stat(os.path.join(directory, f)).st_atime
+def get_resource_cache(directory, max_size=250):
+    """Returns the shared :class:`ResourceCache` of a directory."""
+    with _caches_lock:
+        cache = _caches.get(directory)
+        if cache is None:
+            cache = _caches[directory] = ResourceCache(directory, max_size=max_size)
+        cache.max_size = max_size
+        return cache
 
-    files = sorted(os.listdir(directory), key=access_time)
-    file_name = os.path.join(directory, files[0])
-    log.debug('removing least accessed file: %s', file_name)
-    os.remove(file_name)
+
+def cached_resource(url, base_dir, force=False, max_size=250, directory='cached_resources'):
+    """
+    Caches a remote resource to local filesystem. Return a tuple of local file name and mime type, use primarily
+    for API/WebUI.
+
+    :param url: Resource URL
+    :param force: Does not check for existence of cached resource, fetches the remote URL, ignores directory size limit
+    :param max_size: Maximum allowed size of directory, in MB.
+    :param directory: Name of directory to use. Default is `cached_resources`
+    :return: Tuple of file path and mime type
+    """
+    cache = get_resource_cache(os.path.join(base_dir, directory), max_size=max_size)
+    return cache.get(url, force=force)
@@ -3,22 +3,34 @@ from __future__ import unicode_literals, division, absolute_import
 import copy
 import logging
 import pickle
+import sys
+import threading
+import time
+import zlib
+from collections import Mapping, OrderedDict
 from datetime import datetime, timedelta
 
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 from flexget import db_schema
+from flexget.entry import Entry
 from flexget.event import event
 from flexget.manager import Session
 from flexget.plugin import PluginError
 from flexget.utils import json
-from flexget.utils.database import entry_synonym
-from flexget.utils.sqlalchemy_utils import table_schema, table_add_column
-from flexget.utils.tools import parse_timedelta, TimedDict, get_config_hash
-from sqlalchemy import Column, Integer, String, DateTime, Unicode, select, ForeignKey
-from sqlalchemy.orm import relation
+from flexget.utils.database import only_builtins
+from flexget.utils.lazy_dict import LazyLookup
+from flexget.utils.sqlalchemy_utils import table_schema, table_add_column, table_exists
+from flexget.utils.tools import parse_timedelta, get_config_hash, timedelta_total_seconds
+from sqlalchemy import Column, Integer, String, DateTime, Unicode, LargeBinary, select
+from sqlalchemy.schema import DropTable
 
 log = logging.getLogger('input_cache')
-Base = db_schema.versioned_base('input_cache', 1)
+Base = db_schema.versioned_base('input_cache', 2)
+
+# Time input results are kept in memory, unless given for the input
+DEFAULT_TTL = '5 minutes'
+# Approximate amount of memory input results may take, least recently used results are dropped first
+MAX_CACHE_BYTES = 64 * 1024 * 1024
 
 
 @db_schema.upgrade('input_cache')
@@ -39,9 +51,39 @@ def upgrade(ver, session):
             except KeyError as e:
                 log.error('Unable error upgrading input_cache pickle object due to %s' % str(e))
         ver = 1
+    if ver == 1:
+        log.info('Storing input caches as a single compressed blob.')
+        table_add_column('input_cache', 'entries', LargeBinary, session)
+        if table_exists('input_cache_entry', session):
+            cache_table = table_schema('input_cache', session)
+            entry_table = table_schema('input_cache_entry', session)
+            for cache_row in session.execute(select([cache_table.c.id])):
+                entries = session.execute(
+                    select([entry_table.c.json]).where(entry_table.c.cache_id == cache_row['id'])
+                )
+                blob = '[%s]' % ','.join(row['json'] for row in entries if row['json'])
+                session.execute(
+                    cache_table.update()
+                    .where(cache_table.c.id == cache_row['id'])
+                    .values(entries=zlib.compress(blob.encode('utf-8')))
+                )
+            session.execute(DropTable(entry_table))
+        ver = 2
     return ver
 
 
+def dump_entries(entries):
+    """Serializes `entries` to a compressed json blob."""
+    data = json.dumps([only_builtins(dict(entry)) for entry in entries], encode_datetime=True)
+    return zlib.compress(data.encode('utf-8'))
+
+
+def load_entries(blob):
+    """Restores entries serialized with :func:`dump_entries`."""
+    data = json.loads(zlib.decompress(blob).decode('utf-8'), decode_datetime=True)
+    return [Entry(item) for item in data]
+
+
 class InputCache(Base):
     __tablename__ = 'input_cache'
 
@@ -49,18 +91,16 @@ class InputCache(Base):
     name = Column(Unicode)
     hash = Column(String)
     added = Column(DateTime, default=datetime.now)
+    # Compressed json list of the entries, see `dump_entries`
+    _entries = Column('entries', LargeBinary)
 
-    entries = relation('InputCacheEntry', backref='cache', cascade='all, delete, delete-orphan')
-
+    @property
+    def entries(self):
+        return load_entries(self._entries) if self._entries else []
 
-class InputCacheEntry(Base):
-    __tablename__ = 'input_cache_entry'
-
-    id = Column(Integer, primary_key=True)
-    _json = Column('json', Unicode)
-    entry = entry_synonym('_json')
-
-    cache_id = Column(Integer, ForeignKey('input_cache.id'), nullable=False)
+    @entries.setter
+    def entries(self, entries):
+        self._entries = dump_entries(entries)
 
 
 @event('manager.db_cleanup')
@@ -75,54 +115,143 @@ def db_cleanup(manager, session):
         log.verbose('Removed %s old input caches.' % result)
 
 
+def estimate_size(value):
+    """Returns the approximate amount of memory in bytes taken by `value` and the values it contains."""
+    size = sys.getsizeof(value)
+    if isinstance(value, Entry):
+        # Don't evaluate lazy fields
+        value = value.store
+    if isinstance(value, Mapping):
+        for key, item in value.items():
+            if not isinstance(item, LazyLookup):
+                size += estimate_size(key) + estimate_size(item)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+class InputCacheStore(object):
+    """
+    Thread safe in-memory cache of input results, shared by all tasks.
+
+    Results expire after the time to live they were stored with. When results take more than `max_bytes` of memory,
+    least recently used ones are dropped first.
+    """
+
+    def __init__(self, max_bytes=MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        # Mapping of cache name to [expiry timestamp, value, size in bytes], in least recently used first order
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+
+    def get(self, name):
+        """Returns the value cached under `name`, or None if there is no unexpired value."""
+        with self._lock:
+            item = self._items.pop(name, None)
+            if item is None:
+                return None
+            if item[0] < time.time():
+                self.size -= item[2]
+                return None
+            # Re-insert to mark as most recently used
+            self._items[name] = item
+            return item[1]
+
+    def set(self, name, value, ttl, size=0):
+        """
+        Caches `value` under `name`.
+
+        :param timedelta ttl: Time the value is kept for
+        :param int size: Amount of memory taken by `value` in bytes, if known yet
+        """
+        with self._lock:
+            old = self._items.pop(name, None)
+            if old is not None:
+                self.size -= old[2]
+            self._items[name] = [time.time() + timedelta_total_seconds(ttl), value, size]
+            self.size += size
+            self._evict()
+
+    def resize(self, name, value, size):
+        """Updates the size of `value` once it is known, if it is still cached under `name`."""
+        with self._lock:
+            item = self._items.get(name)
+            if item is None or item[1] is not value:
+                return
+            self.size += size - item[2]
+            item[2] = size
+            self._evict()
+
+    def _evict(self):
+        # Always keep the most recent value, even if it alone exceeds the budget
+        while self.size > self.max_bytes and len(self._items) > 1:
+            name, (_, _, size) = self._items.popitem(last=False)
+            self.size -= size
+            log.debug('Dropped input cache %s from memory (%s bytes)', name, size)
+
+    def keys(self):
+        with self._lock:
+            return list(self._items.keys())
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __len__(self):
+        return len(self._items)
+
+
 class cached(object):
     """
     Implements transparent caching decorator @cached for inputs.
 
-    Decorator has two parameters:
+    Decorator has three parameters:
 
     * **name** in which the configuration is present in tasks configuration.
-    * **key** in which the configuration has the cached resource identifier (ie. url).
-      If the key is not given or present in the configuration :name: is expected to be a cache name (ie. url)
+    * **persist** time the results are stored in the database, used when the input is run again within that time
+      or fails.
+    * **ttl** time the results are kept in memory, shared by all tasks with the same configuration of the input.
 
     .. note:: Configuration assumptions may make this unusable in some (future) inputs
     """
 
-    cache = TimedDict(cache_time='5 minutes')
+    cache = InputCacheStore()
 
-    def __init__(self, name, persist=None):
+    def __init__(self, name, persist=None, ttl=DEFAULT_TTL):
         # Cast name to unicode to prevent sqlalchemy warnings when filtering
         self.name = str(name)
         # Parse persist time
         self.persist = persist and parse_timedelta(persist)
-        # Will be set when wrapped function is called
-        self.config_hash = None
-        self.cache_name = None
+        self.ttl = parse_timedelta(ttl)
 
     def __call__(self, func):
         def wrapped_func(*args, **kwargs):
             # get task from method parameters
             task = args[1]
-            self.config_hash = get_config_hash(args[2])
+            # The same input may run in several tasks at once, keep names local to this call
+            config_hash = get_config_hash(args[2])
 
             log.trace('self.name: %s' % self.name)
-            log.trace('hash: %s' % self.config_hash)
+            log.trace('hash: %s' % config_hash)
 
-            self.cache_name = self.name + '_' + self.config_hash
-            log.debug(
-                'cache name: %s (has: %s)' % (self.cache_name, ', '.join(list(self.cache.keys())))
-            )
+            cache_name = self.name + '_' + config_hash
+            log.debug('cache name: %s (has: %s)' % (cache_name, ', '.join(self.cache.keys())))
 
             if not task.options.nocache:
-                cache_value = self.cache.get(self.cache_name, None)
-                if cache_value:
+                cache_value = self.cache.get(cache_name)
+                if cache_value is not None:
                     # return from the cache
                     log.verbose('Restored entries from cache')
                     return cache_value
 
                 if self.persist:
                     # Check database cache
-                    db_cache = self.load_from_db()
+                    db_cache = self.load_from_db(config_hash)
                     if db_cache is not None:
                         return db_cache
 
@@ -134,7 +263,7 @@ class cached(object):
             except PluginError as e:
                 # If there was an error producing entries, but we have valid entries in the db cache, return those.
                 if self.persist and not task.options.nocache:
-                    cache = self.load_from_db(load_expired=True)
+                    cache = self.load_from_db(config_hash, load_expired=True)
                     if cache is not None:
                         log.error(
                             'There was an error during %s input (%s), using cache instead.'
@@ -144,64 +273,89 @@ class cached(object):
                 # If there was nothing in the db cache, re-raise the error.
                 raise
             # store results to cache
-            log.debug('storing entries to cache %s ', self.cache_name)
-            cache = IterableCache(response, self.store_to_db if self.persist else None)
-            self.cache[self.cache_name] = cache
+            log.debug('storing entries to cache %s ', cache_name)
+
+            def finished(entries):
+                self.cache.resize(cache_name, cache, estimate_size(entries))
+                if self.persist:
+                    self.store_to_db(config_hash, entries)
+
+            cache = IterableCache(response, finished)
+            self.cache.set(cache_name, cache, self.ttl)
             return cache
 
         return wrapped_func
 
-    def store_to_db(self, entries):
+    def store_to_db(self, config_hash, entries):
         # Store to database
-        log.debug('Storing cache %s to database.' % self.cache_name)
+        log.debug('Storing cache %s to database.' % self.name)
         with Session() as session:
             db_cache = (
                 session.query(InputCache)
-                    .filter(InputCache.name == self.name)
-                    .filter(InputCache.hash == self.config_hash)
-                    .first()
+                .filter(InputCache.name == self.name)
+                .filter(InputCache.hash == config_hash)
+                .first()
             )
             if not db_cache:
-                db_cache = InputCache(name=self.name, hash=self.config_hash)
-            db_cache.entries = [InputCacheEntry(entry=ent) for ent in entries]
+                db_cache = InputCache(name=self.name, hash=config_hash)
+                session.add(db_cache)
+            db_cache.entries = entries
             db_cache.added = datetime.now()
-            session.merge(db_cache)
 
-    def load_from_db(self, load_expired=False):
+    def load_from_db(self, config_hash, load_expired=False):
         with Session() as session:
             db_cache = (
                 session.query(InputCache)
-                    .filter(InputCache.name == self.name)
-                    .filter(InputCache.hash == self.config_hash)
+                .filter(InputCache.name == self.name)
+                .filter(InputCache.hash == config_hash)
             )
             if not load_expired:
                 db_cache = db_cache.filter(InputCache.added > datetime.now() - self.persist)
             db_cache = db_cache.first()
             if db_cache:
-                entries = [ent.entry for ent in db_cache.entries]
+                entries = db_cache.entries
                 log.verbose('Restored %s entries from db cache' % len(entries))
                 # Store to in memory cache
-                self.cache[self.cache_name] = copy.deepcopy(entries)
-                return entries
+                cache = IterableCache(entries)
+                self.cache.set(
+                    self.name + '_' + config_hash, cache, self.ttl, estimate_size(entries)
+                )
+                return cache
 
 
 class IterableCache(object):
     """
     Can cache any iterable (including generators) without immediately evaluating all entries.
     If `finished_hook` is supplied, it will be called the first time the iterable is run to the end.
+
+    Several threads may iterate at the same time. Each iteration yields copies of the cached items.
     """
+
     def __init__(self, iterable, finished_hook=None):
         self.iterable = iter(iterable)
         self.cache = []
+        self.finished = False
         self.finished_hook = finished_hook
+        self.lock = threading.Lock()
 
     def __iter__(self):
-        for item in self.cache:
-            yield copy.deepcopy(item)
-        for item in self.iterable:
-            self.cache.append(item)
-            yield copy.deepcopy(item)
-        # The first time we iterate through all items, call our finished hook with complete list of items
-        if self.finished_hook:
-            self.finished_hook(self.cache)
-            self.finished_hook = None
+        index = 0
+        while True:
+            with self.lock:
+                if index < len(self.cache):
+                    item = self.cache[index]
+                elif self.finished:
+                    return
+                else:
+                    try:
+                        item = next(self.iterable)
+                    except StopIteration:
+                        self.finished = True
+                        # The first time we iterate through all items, call our finished hook with complete list
+                        if self.finished_hook:
+                            self.finished_hook(self.cache)
+                            self.finished_hook = None
+                        return
+                    self.cache.append(item)
+            index += 1
+            yield item.clone() if isinstance(item, Entry) else copy.deepcopy(item)
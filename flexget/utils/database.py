@@ -12,6 +12,7 @@ from sqlalchemy.ext.hybrid import Comparator, hybrid_property
 
 from flexget.manager import Session
 from flexget.utils import qualities, json
+from flexget.utils.tools import chunked
 from flexget.entry import Entry
 
 
@@ -82,56 +83,60 @@ def text_date_synonym(name):
     return synonym(name, descriptor=property(getter, setter))
 
 
-def entry_synonym(name):
-    """Use json to serialize python objects for db storage."""
+def only_builtins(item):
+    """Returns a copy of `item` containing only values which can be serialized to json, e.g. for storing entries."""
+    supported_types = (str, unicode, int, float, long, bool, datetime)
+    # dict, list, tuple and set are also supported, but handled separately
 
-    def only_builtins(item):
-        supported_types = (str, unicode, int, float, long, bool, datetime)
-        # dict, list, tuple and set are also supported, but handled separately
-
-        if isinstance(item, supported_types):
-            return item
-        elif isinstance(item, Mapping):
-            result = {}
-            for key, value in item.items():
-                try:
-                    result[key] = only_builtins(value)
-                except TypeError:
-                    continue
+    if isinstance(item, supported_types):
+        return item
+    elif isinstance(item, Mapping):
+        result = {}
+        for key, value in item.items():
+            try:
+                result[key] = only_builtins(value)
+            except TypeError:
+                continue
+        return result
+    elif isinstance(item, (list, tuple, set)):
+        result = []
+        for value in item:
+            try:
+                result.append(only_builtins(value))
+            except ValueError:
+                continue
+        if isinstance(item, list):
             return result
-        elif isinstance(item, (list, tuple, set)):
-            result = []
-            for value in item:
-                try:
-                    result.append(only_builtins(value))
-                except ValueError:
-                    continue
-            if isinstance(item, list):
-                return result
-            elif isinstance(item, tuple):
-                return tuple(result)
-            else:
-                return set(result)
-        elif isinstance(item, qualities.Quality):
-            return item.name
+        elif isinstance(item, tuple):
+            return tuple(result)
         else:
-            for s_type in supported_types:
-                if isinstance(item, s_type):
-                    return s_type(item)
+            return set(result)
+    elif isinstance(item, qualities.Quality):
+        return item.name
+    else:
+        for s_type in supported_types:
+            if isinstance(item, s_type):
+                return s_type(item)
+
+    # If item isn't a subclass of a builtin python type, raise ValueError.
+    raise TypeError('%r is not of type Entry.' % type(item))
 
-        # If item isn't a subclass of a builtin python type, raise ValueError.
-        raise TypeError('%r is not of type Entry.' % type(item))
+
+def dump_entry(entry):
+    """Serializes `entry` to the json stored by :func:`entry_synonym` columns."""
+    if isinstance(entry, Entry) or isinstance(entry, dict):
+        return unicode(json.dumps(only_builtins(dict(entry)), encode_datetime=True))
+    raise TypeError('%r is not of type Entry or dict.' % type(entry))
+
+
+def entry_synonym(name):
+    """Use json to serialize python objects for db storage."""
 
     def getter(self):
         return Entry(json.loads(getattr(self, name), decode_datetime=True))
 
     def setter(self, entry):
-        if isinstance(entry, Entry) or isinstance(entry, dict):
-            setattr(
-                self, name, unicode(json.dumps(only_builtins(dict(entry)), encode_datetime=True))
-            )
-        else:
-            raise TypeError('%r is not of type Entry or dict.' % type(entry))
+        setattr(self, name, dump_entry(entry))
 
     return synonym(name, descriptor=property(getter, setter))
 
@@ -148,6 +153,64 @@ def json_synonym(name):
     return synonym(name, descriptor=property(getter, setter))
 
 
+def prefetch(query, column, values):
+    """
+    Yields the rows of `query` where `column` is one of `values`.
+
+    Rows are looked up with one query per chunk of values, rather than one query per value, e.g. to find which of the
+    entries processed by a plugin are already in the database.
+    """
+    for chunk in chunked(list(set(values))):
+        for row in query.filter(column.in_(chunk)):
+            yield row
+
+
+def bulk_insert(session, model, mappings, return_defaults=False):
+    """
+    Inserts rows of `model` with one statement per chunk of rows, rather than adding and flushing an object per row.
+
+    The rows are not added to the session as objects, relationships must be filled in by foreign keys.
+
+    :param session: SQLAlchemy session
+    :param model: Mapped class of the rows
+    :param list mappings: Dicts of attribute name to value, one per row
+    :param bool return_defaults: If True, generated primary keys are set into `mappings`. The rows are inserted one by
+        one then, as sqlite can not return the keys generated by a multi-row insert.
+    """
+    for chunk in chunked(mappings):
+        session.bulk_insert_mappings(model, chunk, return_defaults=return_defaults)
+
+
+def delete_in_batches(query, id_column, manager=None, on_batch=None, batch_size=500):
+    """
+    Deletes the rows matched by `query` in batches, committing after each one so other sessions are not locked out of
+    the database for the whole delete. Meant for `manager.db_cleanup` handlers.
+
+    :param query: Query of the rows to delete
+    :param id_column: Primary key column of the rows
+    :param manager: If given, stops once the database cleanup of the manager has used up its time budget
+    :param on_batch: Called with the list of ids of each batch before it is deleted
+    :param int batch_size: Number of rows deleted per batch
+    :returns: Tuple of the number of deleted rows, and whether all matching rows were deleted
+    """
+    session = query.session
+    deleted = 0
+    while True:
+        if manager is not None and manager.db_cleanup_expired():
+            return deleted, False
+        ids = [row[0] for row in query.with_entities(id_column).limit(batch_size)]
+        if not ids:
+            return deleted, True
+        if on_batch:
+            on_batch(ids)
+        deleted += (
+            session.query(id_column.class_)
+            .filter(id_column.in_(ids))
+            .delete(synchronize_session=False)
+        )
+        session.commit()
+
+
 class CaseInsensitiveWord(Comparator):
     """Hybrid value representing a string that compares case insensitively."""
 
@@ -6,6 +6,9 @@ from future.utils import text_to_native_str
 
 import time
 import logging
+import threading
+import weakref
+from contextlib import contextmanager
 from datetime import timedelta, datetime
 
 import requests
@@ -29,6 +32,21 @@ logging.getLogger('urllib3').setLevel(logging.WARNING)
 WAIT_TIME = timedelta(seconds=60)
 # Remembers sites that have timed out
 unresponsive_hosts = TimedDict(WAIT_TIME)
+# Number of requests made through `Session`, used for execution statistics
+_request_count = 0
+_request_count_lock = threading.Lock()
+# Semaphores limiting concurrent requests to a host, by (host, limit)
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+# Host slots held by the current thread, by (host, limit), and the event cancelling its requests
+_thread_state = threading.local()
+# Weak references releasing the host slots of streamed responses that are dropped without being read or closed
+_slot_refs = set()
+
+
+def get_request_count():
+    """Returns the total number of requests made through :class:`Session` instances."""
+    return _request_count
 
 
 def is_unresponsive(url):
@@ -56,6 +74,107 @@ def set_unresponsive(url):
     unresponsive_hosts[host] = True
 
 
+class RequestCancelled(RequestException):
+    """Raised for requests made from a thread whose work has been cancelled, see :func:`cancellable`."""
+
+
+@contextmanager
+def cancellable(event):
+    """
+    Makes requests of :class:`Session` instances from the current thread raise :class:`RequestCancelled` once
+    `event` is set.
+
+    :param threading.Event event: Set to cancel the requests
+    """
+    previous = getattr(_thread_state, 'cancel_event', None)
+    _thread_state.cancel_event = event
+    try:
+        yield
+    finally:
+        _thread_state.cancel_event = previous
+
+
+def host_slot(url, limit):
+    """
+    Returns the semaphore allowing at most `limit` concurrent requests to the host of `url`.
+
+    :param url: Any url of the host
+    :param int limit: Maximum number of concurrent requests
+    """
+    key = (urlparse(url).hostname, limit)
+    with _host_slots_lock:
+        slot = _host_slots.get(key)
+        if slot is None:
+            slot = _host_slots[key] = threading.BoundedSemaphore(limit)
+        return slot
+
+
+class HeldSlot(object):
+    """A host slot acquired by a request, which is released once the response body has been received."""
+
+    def __init__(self, url, limit):
+        self.key = (urlparse(url).hostname, limit)
+        self.slot = host_slot(url, limit)
+        self.held = _held_slots()
+        self.lock = threading.Lock()
+        self.ref = None
+        # Requests made by a thread which already holds a slot to the host share it, instead of waiting for itself
+        self.acquired = self.key not in self.held
+        if self.acquired:
+            self.slot.acquire()
+            self.held[self.key] = self
+
+    def watch(self, response):
+        """Releases the slot when the body of streamed `response` has been read, it is closed or garbage collected."""
+        if not self.acquired or response._content_consumed:
+            self.release()
+            return
+        response.__class__ = HostSlotResponse
+        response.host_slot = self
+        self.ref = weakref.ref(response, self.release)
+        _slot_refs.add(self.ref)
+
+    def release(self, ref=None):
+        with self.lock:
+            if not self.acquired:
+                return
+            self.acquired = False
+        _slot_refs.discard(self.ref)
+        if self.held.get(self.key) is self:
+            del self.held[self.key]
+        self.slot.release()
+
+
+def _held_slots():
+    held = getattr(_thread_state, 'held', None)
+    if held is None:
+        held = _thread_state.held = {}
+    return held
+
+
+class HostSlotResponse(requests.Response):
+    """Streamed response holding a :class:`HeldSlot` until its content has been read or it is closed."""
+
+    host_slot = None
+
+    def iter_content(self, *args, **kwargs):
+        try:
+            for chunk in super(HostSlotResponse, self).iter_content(*args, **kwargs):
+                yield chunk
+        finally:
+            self.release_host_slot()
+
+    def close(self):
+        try:
+            super(HostSlotResponse, self).close()
+        finally:
+            self.release_host_slot()
+
+    def release_host_slot(self):
+        if self.host_slot:
+            self.host_slot.release()
+
+
 class DomainLimiter(object):
     def __init__(self, domain):
         self.domain = domain
@@ -88,7 +207,8 @@ class TokenBucketLimiter(DomainLimiter):
         self.wait = wait
         # Restore previous state for this domain, or establish new state cache
         self.state = self.state_cache.setdefault(
-            domain, {'tokens': self.max_tokens, 'last_update': datetime.now()}
+            domain,
+            {'tokens': self.max_tokens, 'last_update': datetime.now(), 'lock': threading.Lock()},
         )
 
     @property
@@ -108,6 +228,11 @@ class TokenBucketLimiter(DomainLimiter):
         self.state['last_update'] = value
 
     def __call__(self):
+        # Requests from concurrent threads wait for their token one after another
+        with self.state['lock']:
+            self._take_token()
+
+    def _take_token(self):
         if self.tokens < self.max_tokens:
             regen = timedelta_total_seconds(
                 datetime.now() - self.last_update
@@ -187,6 +312,9 @@ class Session(requests.Session):
         self.adapters['http://'].max_retries = max_retries
         # Stores min intervals between requests for certain sites
         self.domain_limiters = {}
+        # Maximum number of concurrent requests to a single host from threads sharing this session, or None.
+        # A request counts until its streamed content has been read or the response is closed.
+        self.max_host_requests = None
         self.headers.update({'User-Agent': 'FlexGet/%s (www.flexget.com)' % version})
 
     def add_cookiejar(self, cookiejar):
@@ -229,6 +357,10 @@ class Session(requests.Session):
         :param bool raise_status: If True, non-success status code responses will be raised as errors (True by default)
         """
 
+        cancel_event = getattr(_thread_state, 'cancel_event', None)
+        if cancel_event is not None and cancel_event.is_set():
+            raise RequestCancelled('Request to %s was cancelled' % urlparse(url).hostname)
+
         # Raise Timeout right away if site is known to timeout
         if is_unresponsive(url):
             raise requests.Timeout(
@@ -239,6 +371,10 @@ class Session(requests.Session):
         # Run domain limiters for this url
         limit_domains(url, self.domain_limiters)
 
+        global _request_count
+        with _request_count_lock:
+            _request_count += 1
+
         kwargs.setdefault('timeout', self.timeout)
         raise_status = kwargs.pop('raise_status', True)
 
@@ -249,14 +385,28 @@ class Session(requests.Session):
 
         try:
             log.debug('%sing URL %s with args %s and kwargs %s', method.upper(), url, args, kwargs)
-            result = super(Session, self).request(method, url, *args, **kwargs)
+            # Streamed content is received after the request returns, the slot is kept until then
+            slot = HeldSlot(url, self.max_host_requests) if self.max_host_requests else None
+            try:
+                result = super(Session, self).request(method, url, *args, **kwargs)
+            except Exception:
+                if slot:
+                    slot.release()
+                raise
         except requests.Timeout:
             # Mark this site in known unresponsive list
             set_unresponsive(url)
             raise
 
+        if slot:
+            slot.watch(result)
         if raise_status:
-            result.raise_for_status()
+            try:
+                result.raise_for_status()
+            except requests.HTTPError:
+                if slot:
+                    slot.release()
+                raise
 
         return result
 
@@ -12,8 +12,9 @@ from future.types.newstr import newstr
 
 import logging
 import pickle
+import threading
 from collections import MutableMapping, defaultdict
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from sqlalchemy import Column, Integer, String, DateTime, Unicode, select, Index
 
@@ -23,12 +24,15 @@ from flexget.manager import Session
 from flexget.utils import json
 from flexget.utils.database import json_synonym
 from flexget.utils.sqlalchemy_utils import table_schema, create_index, table_add_column
+from flexget.utils.tools import chunked
 
 log = logging.getLogger('util.simple_persistence')
 Base = db_schema.versioned_base('simple_persistence', 4)
 
 # Used to signify that a given key should be deleted from simple persistence on flush
 DELETE = object()
+# In daemon mode, values of tasks which have not run for this long are dropped from memory
+STORE_MAX_AGE = timedelta(hours=6)
 
 
 @db_schema.upgrade('simple_persistence')
@@ -131,10 +135,18 @@ class SimplePersistence(MutableMapping):
 
     This should only be used if a plugin needs to store a few values, otherwise it should create a full table in
     the database.
+
+    Values are loaded per task on first access, and written back on :meth:`flush`. Only keys that were changed since
+    the last flush are written.
     """
 
     # Stores values in store[taskname][pluginname][key] format
     class_store = defaultdict(lambda: defaultdict(dict))
+    # (pluginname, key) pairs changed since the last flush, per task
+    class_dirty = defaultdict(set)
+    # When the values of a task were last used, tasks not in here have not been loaded from the database yet
+    class_last_used = {}
+    class_lock = threading.RLock()
 
     def __init__(self, plugin=None):
         self.taskname = None
@@ -142,31 +154,45 @@ class SimplePersistence(MutableMapping):
 
     @property
     def store(self):
-        return self.class_store[self.taskname][self.plugin]
+        with self.class_lock:
+            if self.taskname not in self.class_last_used:
+                self.load(self.taskname)
+            self.class_last_used[self.taskname] = datetime.now()
+            return self.class_store[self.taskname][self.plugin]
 
     def __setitem__(self, key, value):
         log.debug('setting key %s value %s', key, repr(value))
-        self.store[key] = value
+        with self.class_lock:
+            self.store[key] = value
+            self.class_dirty[self.taskname].add((self.plugin, key))
 
     def __getitem__(self, key):
-        if key not in self.store or self.store[key] == DELETE:
+        value = self.store.get(key, DELETE)
+        if value is DELETE:
             raise KeyError('%s is not contained in the simple_persistence table.' % key)
-        return self.store[key]
+        return value
 
     def __delitem__(self, key):
-        self.store[key] = DELETE
+        with self.class_lock:
+            if key not in self:
+                raise KeyError(key)
+            self.store[key] = DELETE
+            self.class_dirty[self.taskname].add((self.plugin, key))
 
     def __iter__(self):
-        return iter(self.store)
+        return iter([key for key, value in list(self.store.items()) if value is not DELETE])
 
     def __len__(self):
-        return len(self.store)
+        return len(list(iter(self)))
 
     @classmethod
     def load(cls, task=None):
         """Load all key/values from `task` into memory from database."""
-        with Session() as session:
+        with cls.class_lock, Session() as session:
             for skv in session.query(SimpleKeyValue).filter(SimpleKeyValue.task == task).all():
+                if (skv.plugin, skv.key) in cls.class_dirty[task]:
+                    # Don't overwrite values which have been changed since
+                    continue
                 try:
                     cls.class_store[task][skv.plugin][skv.key] = skv.value
                 except TypeError as e:
@@ -175,29 +201,75 @@ class SimplePersistence(MutableMapping):
                         str(e),
                     )
                     cls.class_store[task][skv.plugin][skv.key] = DELETE
+                    cls.class_dirty[task].add((skv.plugin, skv.key))
+            cls.class_last_used[task] = datetime.now()
 
     @classmethod
     def flush(cls, task=None):
-        """Flush all in memory key/values to database."""
-        log.debug('Flushing simple persistence for task %s to db.' % task)
-        with Session() as session:
-            for pluginname in cls.class_store[task]:
-                for key, value in cls.class_store[task][pluginname].items():
-                    query = (
-                        session.query(SimpleKeyValue)
-                        .filter(SimpleKeyValue.task == task)
-                        .filter(SimpleKeyValue.plugin == pluginname)
-                        .filter(SimpleKeyValue.key == key)
-                    )
-                    if value == DELETE:
-                        query.delete()
-                    else:
-                        updated = query.update(
-                            {'value': newstr(json.dumps(value, encode_datetime=True))},
-                            synchronize_session=False,
+        """Flush all changed in memory key/values to database."""
+        with cls.class_lock:
+            dirty = cls.class_dirty.get(task)
+            if not dirty:
+                return
+            log.debug('Flushing %s simple persistence values for task %s to db.', len(dirty), task)
+            keys_by_plugin = defaultdict(list)
+            for pluginname, key in dirty:
+                keys_by_plugin[pluginname].append(key)
+            now = datetime.now()
+            # Replace all the changed rows with one delete and one insert per batch, rather than a query per key
+            with Session() as session:
+                rows = []
+                for pluginname, keys in keys_by_plugin.items():
+                    for chunk in chunked(keys):
+                        existing = (
+                            session.query(SimpleKeyValue)
+                            .filter(SimpleKeyValue.task == task)
+                            .filter(SimpleKeyValue.plugin == pluginname)
+                            .filter(SimpleKeyValue.key.in_(chunk))
+                        )
+                        # Rows keep the time they were first added
+                        added = dict(
+                            existing.with_entities(SimpleKeyValue.key, SimpleKeyValue.added)
                         )
-                        if not updated:
-                            session.add(SimpleKeyValue(task, pluginname, key, value))
+                        existing.delete(synchronize_session=False)
+                        for key in chunk:
+                            value = cls.class_store[task][pluginname].get(key, DELETE)
+                            if value is DELETE:
+                                continue
+                            rows.append(
+                                {
+                                    'feed': task,
+                                    'plugin': pluginname,
+                                    'key': key,
+                                    'json': newstr(json.dumps(value, encode_datetime=True)),
+                                    'added': added.get(key) or now,
+                                }
+                            )
+                for chunk in chunked(rows):
+                    session.execute(SimpleKeyValue.__table__.insert(), chunk)
+            # Only forget the changes once they have been committed, so they are written again if that failed
+            del cls.class_dirty[task]
+            for pluginname, key in dirty:
+                if cls.class_store[task][pluginname].get(key) is DELETE:
+                    del cls.class_store[task][pluginname][key]
+
+    @classmethod
+    def evict(cls, max_age=None):
+        """
+        Forget in memory values of tasks which have not been used recently. They will be loaded from the database again
+        when needed.
+
+        :param timedelta max_age: Evict tasks which have not been used for this long. Defaults to `STORE_MAX_AGE`.
+        """
+        max_age = max_age or STORE_MAX_AGE
+        oldest = datetime.now() - max_age
+        with cls.class_lock:
+            for task, last_used in list(cls.class_last_used.items()):
+                if task is None or cls.class_dirty.get(task) or last_used > oldest:
+                    continue
+                log.debug('Evicting simple persistence values for task %s from memory.', task)
+                cls.class_last_used.pop(task)
+                cls.class_store.pop(task, None)
 
 
 class SimpleTaskPersistence(SimplePersistence):
@@ -210,28 +282,16 @@ class SimpleTaskPersistence(SimplePersistence):
         return self.task.current_plugin
 
 
-@event('manager.startup')
-def load_taskless(manager):
-    """Loads all key/value pairs into memory which aren't associated with a specific task."""
-    SimplePersistence.load()
-
-
 @event('manager.shutdown')
 def flush_taskless(manager):
     SimplePersistence.flush()
 
 
-@event('task.execute.started')
-def load_task(task):
-    """Loads all key/value pairs into memory before a task starts."""
-    if not SimplePersistence.class_store[task.name]:
-        SimplePersistence.load(task.name)
-
-
 @event('task.execute.completed')
 def flush_task(task):
-    """Stores all in memory key/value pairs to database when a task has completed."""
+    """Stores all changed in memory key/value pairs to database when a task has completed."""
     SimplePersistence.flush(task.name)
     # In daemon mode, we don't want to wait until shutdown to flush taskless
     if task.manager.is_daemon:
         SimplePersistence.flush()
+        SimplePersistence.evict()
@@ -1,7 +1,11 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
-from bs4 import BeautifulSoup
+import contextlib
+import logging
+import threading
+
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer  # noqa pylint: disable=unused-import
 
 # Hack, hide DataLossWarnings
 # Based on html5lib code namespaceHTMLElements=False should do it, but nope ...
@@ -11,6 +15,78 @@ from html5lib.constants import DataLossWarning
 
 warnings.simplefilter('ignore', DataLossWarning)
 
+log = logging.getLogger('utils.soup')
+
+PARSERS = ['html5lib', 'lxml', 'html.parser']
+# Slowest, but most lenient parser. Used when the selected parser is not installed or fails on a document.
+FALLBACK_PARSER = 'html5lib'
+
+# Parser used when none is given, and parsers used when running specific plugins. See `set_parsers`.
+default_parser = FALLBACK_PARSER
+plugin_parsers = {}
+
+_local = threading.local()
+_missing_parsers = set()
+
+
+def set_parsers(default=None, plugins=None):
+    """
+    Select the parsers used by :func:`get_soup` when no parser is given.
+
+    :param default: Parser used by default
+    :param dict plugins: Mapping of plugin name to the parser used while that plugin runs
+    """
+    global default_parser
+    default_parser = default or FALLBACK_PARSER
+    plugin_parsers.clear()
+    plugin_parsers.update(plugins or {})
+
+
+def set_current_plugin(plugin_name):
+    """Makes :func:`get_soup` use the parser selected for `plugin_name` in this thread."""
+    _local.plugin = plugin_name
+
+
+@contextlib.contextmanager
+def plugin_context(plugin_name):
+    """Context manager which makes :func:`get_soup` use the parser selected for `plugin_name` in this thread."""
+    old_plugin = getattr(_local, 'plugin', None)
+    set_current_plugin(plugin_name)
+    try:
+        yield
+    finally:
+        set_current_plugin(old_plugin)
+
+
+def selected_parser():
+    """Returns the parser selected for the plugin running in this thread."""
+    return plugin_parsers.get(getattr(_local, 'plugin', None), default_parser)
+
+
+def get_soup(obj, parser=None, parse_only=None):
+    """
+    Parse a document with BeautifulSoup.
+
+    When `parser` is not given, the parser configured with the `html_parser` setting is used, falling back to
+    html5lib if that parser is not installed or fails to parse the document.
 
-def get_soup(obj, parser='html5lib'):
-    return BeautifulSoup(obj, parser)
+    :param obj: Document text, bytes or file object
+    :param parser: Parser to use, no fallback is done for an explicitly given parser
+    :param parse_only: :class:`SoupStrainer` limiting the tree to matching elements, to save time and memory when
+        only a part of the page is needed. Ignored by html5lib, which always builds the whole tree.
+    """
+    if parser is not None:
+        return BeautifulSoup(obj, parser, parse_only=parse_only)
+    parser = selected_parser()
+    if parser != FALLBACK_PARSER and parser not in _missing_parsers:
+        if hasattr(obj, 'read'):
+            # The document may need to be parsed twice
+            obj = obj.read()
+        try:
+            return BeautifulSoup(obj, parser, parse_only=parse_only)
+        except FeatureNotFound:
+            log.warning('Parser %s is not installed, using %s instead', parser, FALLBACK_PARSER)
+            _missing_parsers.add(parser)
+        except Exception as e:
+            log.debug('Parsing with %s failed (%s), retrying with %s', parser, e, FALLBACK_PARSER)
+    return BeautifulSoup(obj, FALLBACK_PARSER)
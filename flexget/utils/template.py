@@ -28,12 +28,17 @@ from dateutil import parser as dateutil_parse
 from flexget.event import event
 from flexget.utils.lazy_dict import LazyDict
 from flexget.utils.pathscrub import pathscrub
+from flexget.utils.tools import LRUCache
 
 log = logging.getLogger('utils.template')
 
 # The environment will be created after the manager has started
 environment = None
 
+# Compiled expressions and templates, keyed by their source string. The same strings are evaluated for every entry,
+# so we only want to pay the compilation cost once.
+_compiled_cache = LRUCache(max_size=500)
+
 
 class RenderError(Exception):
     """Error raised when there is a problem with jinja rendering."""
@@ -174,6 +179,7 @@ class FlexGetNativeTemplate(FlexGetTemplate, NativeTemplate):
 def make_environment(manager):
     """Create our environment and add our custom filters"""
     global environment
+    _compiled_cache.clear()
     environment = Environment(
         undefined=StrictUndefined,
         loader=ChoiceLoader(
@@ -243,13 +249,7 @@ def render(template, context, native=False):
     :return: The rendered template text.
     """
     if isinstance(template, str):
-        template_class = None
-        if native:
-            template_class = FlexGetNativeTemplate
-        try:
-            template = environment.from_string(template, template_class=template_class)
-        except TemplateSyntaxError as e:
-            raise RenderError('Error in template syntax: ' + e.message)
+        template = compile_template(template, native=native)
     try:
         result = template.render(context)
     except Exception as e:
@@ -288,6 +288,50 @@ def render_from_task(template, task):
     return render(template, variables)
 
 
+def compile_template(template_string, native=False):
+    """
+    Compiles a template string, re-using the result of previous compilations of the same string.
+
+    :param str template_string: Template string to compile.
+    :param native: If True, the template will render native python types.
+    :return: The compiled Template.
+    :raises RenderError: If the template has invalid syntax.
+    """
+    key = ('template', template_string, native)
+    try:
+        return _compiled_cache[key]
+    except KeyError:
+        pass
+    template_class = FlexGetNativeTemplate if native else None
+    try:
+        template = environment.from_string(template_string, template_class=template_class)
+    except TemplateSyntaxError as e:
+        raise RenderError('Error in template syntax: ' + e.message)
+    _compiled_cache[key] = template
+    return template
+
+
+def compile_expression(expression):
+    """
+    Compiles a jinja `expression`, re-using the result of previous compilations of the same expression.
+
+    :param str expression: A jinja expression to compile
+    :return: A callable which evaluates the expression with keyword arguments as its context.
+    :raises RenderError: If the expression has invalid syntax.
+    """
+    key = ('expression', expression)
+    try:
+        return _compiled_cache[key]
+    except KeyError:
+        pass
+    try:
+        compiled_expr = environment.compile_expression(expression)
+    except TemplateSyntaxError as e:
+        raise RenderError('Error in expression syntax: ' + e.message)
+    _compiled_cache[key] = compiled_expr
+    return compiled_expr
+
+
 def evaluate_expression(expression, context):
     """
     Evaluate a jinja `expression` using a given `context` with support for `LazyDict`s (`Entry`s.)
@@ -295,7 +339,7 @@ def evaluate_expression(expression, context):
     :param str expression:  A jinja expression to evaluate
     :param context: dictlike, supporting LazyDicts
     """
-    compiled_expr = environment.compile_expression(expression)
+    compiled_expr = compile_expression(expression)
     # If we have a LazyDict, grab the underlying store. Our environment supports LazyFields directly
     if isinstance(context, LazyDict):
         context = context.store
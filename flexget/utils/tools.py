@@ -13,7 +13,8 @@ import operator
 import os
 import re
 import sys
-from collections import MutableMapping, defaultdict
+import threading
+from collections import MutableMapping, OrderedDict, defaultdict
 from datetime import timedelta, datetime
 from pprint import pformat
 
@@ -401,6 +402,72 @@ class TimedDict(MutableMapping):
         )
 
 
+class LRUCache(MutableMapping):
+    """
+    Thread safe dict which holds at most `max_size` items, evicting the least recently used ones first.
+
+    Keeps hit and miss counters, which can be inspected with :meth:`stats`.
+    """
+
+    def __init__(self, max_size=1000):
+        self.max_size = max_size
+        self._store = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def __getitem__(self, key):
+        with self._lock:
+            try:
+                value = self._store.pop(key)
+            except KeyError:
+                self.misses += 1
+                raise
+            # Re-insert to mark as most recently used
+            self._store[key] = value
+            self.hits += 1
+            return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._store.pop(key, None)
+            self._store[key] = value
+            while len(self._store) > self.max_size:
+                self._store.popitem(last=False)
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self._store[key]
+
+    def __contains__(self, key):
+        # Membership tests should not count as an access
+        return key in self._store
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._store.keys()))
+
+    def __len__(self):
+        return len(self._store)
+
+    def clear(self):
+        with self._lock:
+            self._store.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        """Returns a dict with the size and hit statistics of this cache."""
+        return {
+            'size': len(self._store),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def __repr__(self):
+        return '%s(max_size=%r, %r)' % (self.__class__.__name__, self.max_size, dict(self._store))
+
+
 class BufferQueue(queue.Queue):
     """Used in place of a file-like object to capture text and access it safely from another thread."""
 
@@ -411,6 +478,58 @@ class BufferQueue(queue.Queue):
         self.put(line)
 
 
+# Calls of `parallel_map` run in the calling thread when this is False, used by tests replaying network sessions
+parallel_enabled = True
+
+
+def parallel_map(func, items, max_workers=4, name='worker'):
+    """
+    Calls `func` with each of `items` from up to `max_workers` threads, and returns the results in the order of
+    `items`. Worker threads log with the task and output capture of the calling thread.
+
+    If any of the calls raised an exception, the one for the earliest item is raised after all calls have finished.
+    """
+    items = list(items)
+    if not parallel_enabled or max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+
+    # Imported here since the logger module depends on this one
+    from flexget.logger import local_context
+
+    context = dict(vars(local_context))
+    results = [None] * len(items)
+    errors = []
+    indexes = iter(range(len(items)))
+    lock = threading.Lock()
+
+    def work():
+        for key, value in context.items():
+            setattr(local_context, key, value)
+        while True:
+            with lock:
+                index = next(indexes, None)
+            if index is None:
+                return
+            try:
+                results[index] = func(items[index])
+            except Exception as e:
+                with lock:
+                    errors.append((index, e))
+
+    threads = [
+        threading.Thread(target=work, name='%s-%d' % (name, i))
+        for i in range(min(max_workers, len(items)))
+    ]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise min(errors, key=lambda error: error[0])[1]
+    return results
+
+
 def singleton(cls):
     instances = {}
 
@@ -572,6 +691,89 @@ def group_entries(entries, identifier):
     return grouped_entries
 
 
+class _HashableList(tuple):
+    """Hashable version of a list, which like a list does not compare equal to a tuple with the same items."""
+
+    def __eq__(self, other):
+        return isinstance(other, _HashableList) and tuple.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = tuple.__hash__
+
+
+class _HashableDict(frozenset):
+    """Hashable version of a dict as a set of its items, which does not compare equal to an actual set of them."""
+
+    def __eq__(self, other):
+        return isinstance(other, _HashableDict) and frozenset.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = frozenset.__hash__
+
+
+class _GroupKey(object):
+    """Stands in for a field value which can't be hashed, in the keys of :func:`group_entries_by_fields`."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def __repr__(self):
+        return repr(self.value)
+
+
+def hashable(value):
+    """
+    Returns `value` with lists, sets and dicts in it converted to hashable types which compare the same way.
+
+    Other values are returned as they are, so hashing the result still raises a TypeError if they can't be hashed.
+    """
+    if isinstance(value, list):
+        return _HashableList(hashable(item) for item in value)
+    if isinstance(value, tuple):
+        return tuple(hashable(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(hashable(item) for item in value)
+    if isinstance(value, dict):
+        return _HashableDict((key, hashable(item)) for key, item in value.items())
+    return value
+
+
+def group_entries_by_fields(entries, fields):
+    """
+    Buckets entries by the values of `fields` in a single pass. Entries missing any of the fields are left out.
+    Values which can't be hashed are compared with the groups of other unhashable values one by one instead.
+
+    :param entries: Iterable of entries
+    :param list fields: Names of the fields to group by
+    :return: OrderedDict of lists of entries in their original order, by tuple of the hashable field values
+    """
+    grouped_entries = OrderedDict()
+    # Field values and key of the groups with values which can't be hashed
+    unhashable_groups = []
+    for entry in entries:
+        try:
+            values = [entry[field] for field in fields]
+        except KeyError:
+            continue
+        key = tuple(hashable(value) for value in values)
+        try:
+            hash(key)
+        except TypeError:
+            for group_values, group_key in unhashable_groups:
+                if group_values == values:
+                    key = group_key
+                    break
+            else:
+                key = tuple(_GroupKey(value) for value in values)
+                unhashable_groups.append((values, key))
+        grouped_entries.setdefault(key, []).append(entry)
+    return grouped_entries
+
+
 def aggregate_inputs(task, inputs):
     from flexget import plugin
 